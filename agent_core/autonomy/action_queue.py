@@ -0,0 +1,297 @@
+"""
+Deferred Action Queue for the Nick the Great Unified Agent.
+
+This module implements the queue of actions waiting for approval. Actions are registered
+by name so a pending action is just a name and a JSON context, which can be saved to the
+autonomy store and picked up again after a restart. Pending actions expire after a TTL,
+and approved actions run on a bounded worker pool instead of the approver's thread.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, List, Optional, Callable
+
+from .storage import AutonomyStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Default time (in seconds) an action may wait for approval
+DEFAULT_ACTION_TTL = 7 * 24 * 3600
+
+class DeferredActionQueue:
+    """
+    Queue of actions waiting for approval.
+
+    Each action is a dictionary with id, name, category, action, context, user_id,
+    approval_request_id, created_time, expiry_time and status ("pending" until approved,
+    then "queued" until it has run).
+    """
+
+    def __init__(self,
+                 store: Optional[AutonomyStore] = None,
+                 max_workers: int = 4,
+                 ttl: int = DEFAULT_ACTION_TTL,
+                 on_complete: Optional[Callable[[Dict[str, Any], Any, Optional[Exception]], None]] = None):
+        """
+        Initialize the queue, restoring any actions saved in the store.
+
+        Args:
+            store: Persistent store for pending actions (in-memory only if None)
+            max_workers: Maximum number of approved actions run at once
+            ttl: Default time (in seconds) an action may wait for approval
+            on_complete: Called with (action, result, error) after an approved action has run
+        """
+        self.store = store
+        self.ttl = ttl
+        self.on_complete = on_complete
+        self.actions = {}  # Dictionary of action ID to action
+        self.registry = {}  # Dictionary of action name to function
+        self._functions = {}  # Dictionary of action ID to unregistered function (not restorable)
+        self._waiting = set()  # IDs of restored approved actions whose function isn't registered yet
+        self._expiry_heap = []  # Heap of (expiry_time, action_id), stale entries skipped on pop
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="deferred-action")
+
+        if store:
+            for data in store.query("pending_actions")[0]:
+                self._add(data)
+            logger.info(f"Restored {len(self.actions)} deferred actions")
+
+    def register(self, name: str, function: Callable[[Dict[str, Any]], Any]) -> None:
+        """
+        Register a function that deferred actions can refer to by name.
+
+        Approved actions restored from the store start running once their function is registered.
+
+        Args:
+            name: The action name
+            function: Function called with the action context
+        """
+        with self._lock:
+            self.registry[name] = function
+            ready = [action_id for action_id in self._waiting if self.actions[action_id]["name"] == name]
+            self._waiting.difference_update(ready)
+
+        for action_id in ready:
+            self._executor.submit(self._run, action_id)
+
+    def defer(self,
+              action_id: str,
+              function: Optional[Callable[[Dict[str, Any]], Any]],
+              name: Optional[str],
+              category: str,
+              action: str,
+              context: Dict[str, Any],
+              user_id: Optional[str] = None,
+              approval_request_id: Optional[str] = None,
+              ttl: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Add an action waiting for approval.
+
+        Args:
+            action_id: The ID of the action
+            function: Function to run (None to use the registered function for name)
+            name: Registered name of the function (actions without one are lost on restart)
+            category: The decision category value
+            action: The specific action
+            context: The context passed to the function
+            user_id: The ID of the user that was asked for approval
+            approval_request_id: The ID of the approval request
+            ttl: Time (in seconds) the action may wait for approval (default: the queue's TTL)
+
+        Returns:
+            Dict[str, Any]: The deferred action
+        """
+        self.evict_expired()
+
+        now = int(time.time())
+        data = {
+            "id": action_id,
+            "name": name,
+            "category": category,
+            "action": action,
+            "context": context,
+            "user_id": user_id,
+            "approval_request_id": approval_request_id,
+            "created_time": now,
+            "expiry_time": now + (self.ttl if ttl is None else ttl),
+            "status": "pending"
+        }
+
+        with self._lock:
+            if function is not None and name not in self.registry:
+                self._functions[action_id] = function
+            self._add(data)
+        self._persist(data)
+        return data
+
+    def link(self, action_id: str, approval_request_id: str) -> bool:
+        """
+        Record the approval request of an action deferred before the request was created.
+
+        Args:
+            action_id: The ID of the action
+            approval_request_id: The ID of the approval request
+
+        Returns:
+            bool: True if the action was found, False if it has already finished
+        """
+        with self._lock:
+            data = self.actions.get(action_id)
+            if data is None:
+                return False
+            data["approval_request_id"] = approval_request_id
+        self._persist(data)
+        return True
+
+    def get(self, action_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a deferred action by ID.
+
+        Args:
+            action_id: The ID of the action
+
+        Returns:
+            Optional[Dict[str, Any]]: The action, or None if not found
+        """
+        return self.actions.get(action_id)
+
+    def approve(self, action_id: str, approved_by: Optional[str] = None) -> Optional[Future]:
+        """
+        Queue an approved action to run on the worker pool.
+
+        Args:
+            action_id: The ID of the action
+            approved_by: The ID of the user who approved it
+
+        Returns:
+            Optional[Future]: Future for the action's result, or None if the action is unknown
+        """
+        with self._lock:
+            data = self.actions.get(action_id)
+            if data is None or data["status"] != "pending":
+                logger.warning(f"Attempted to approve unknown or already queued action: {action_id}")
+                return None
+            data["status"] = "queued"
+            data["approved_by"] = approved_by
+        self._persist(data)
+        return self._executor.submit(self._run, action_id)
+
+    def discard(self, action_id: str) -> bool:
+        """
+        Drop an action that won't run (rejected, cancelled or expired).
+
+        Args:
+            action_id: The ID of the action
+
+        Returns:
+            bool: True if the action was dropped, False if it wasn't pending
+        """
+        with self._lock:
+            data = self.actions.get(action_id)
+            if data is None or data["status"] != "pending":
+                return False
+            self._remove(action_id)
+        return True
+
+    def evict_expired(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Drop pending actions whose TTL has passed.
+
+        Args:
+            now: Current Unix time (default: time.time())
+
+        Returns:
+            List[Dict[str, Any]]: The evicted actions
+        """
+        now = time.time() if now is None else now
+        evicted = []
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                _, action_id = heapq.heappop(self._expiry_heap)
+                data = self.actions.get(action_id)
+                # Skip entries for actions that were handled or approved meanwhile
+                if data is None or data["status"] != "pending":
+                    continue
+                self._remove(action_id)
+                evicted.append(data)
+
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} expired deferred actions")
+        return evicted
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker pool.
+
+        Args:
+            wait: Whether to wait for queued actions to finish
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def _add(self, data: Dict[str, Any]) -> None:
+        """Track an action; restored approved actions wait for their function to be registered."""
+        with self._lock:
+            self.actions[data["id"]] = data
+            if data["status"] == "pending":
+                heapq.heappush(self._expiry_heap, (data["expiry_time"], data["id"]))
+            elif data["status"] == "queued":
+                self._waiting.add(data["id"])
+
+    def _remove(self, action_id: str) -> None:
+        """Forget an action and delete it from the store."""
+        with self._lock:
+            self.actions.pop(action_id, None)
+            self._functions.pop(action_id, None)
+        if self.store:
+            self.store.delete("pending_actions", action_id)
+
+    def _persist(self, data: Dict[str, Any]) -> None:
+        """Save an action to the store (if there is one)."""
+        if not self.store:
+            return
+
+        try:
+            self.store.save("pending_actions", data)
+        except Exception as e:
+            logger.error(f"Error persisting deferred action {data['id']}: {e}")
+
+    def _run(self, action_id: str) -> Any:
+        """Run an approved action on a worker thread."""
+        with self._lock:
+            data = self.actions.get(action_id)
+            if data is None:
+                return None
+            function = self._functions.get(action_id) or self.registry.get(data["name"])
+
+        result, error = None, None
+        if function is None:
+            error = LookupError(f"No function registered for deferred action '{data['name']}'")
+            logger.error(f"Cannot run deferred action {action_id}: {error}")
+        else:
+            try:
+                result = function(data["context"])
+                logger.info(f"Deferred action {action_id} executed with result: {result}")
+            except Exception as e:
+                error = e
+                logger.error(f"Error executing deferred action {action_id}: {e}")
+
+        self._remove(action_id)
+
+        if self.on_complete:
+            try:
+                self.on_complete(data, result, error)
+            except Exception as e:
+                logger.error(f"Error in completion callback for deferred action {action_id}: {e}")
+
+        if error:
+            raise error
+        return result
@@ -5,16 +5,19 @@ This module implements the approval workflow that manages the process of request
 and receiving approval for agent actions.
 """
 
+import bisect
 import logging
 import enum
 import time
 import uuid
 import json
+import threading
 from typing import Dict, Any, List, Optional, Callable, Tuple
 from datetime import datetime, timedelta
 
 from .decision_matrix import DecisionCategory, ApprovalLevel
 from .notification_system import NotificationSystem, NotificationType, NotificationPriority, NotificationStatus
+from .storage import AutonomyStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -70,6 +73,8 @@ class ApprovalRequest:
         self.decision_reason = None
         self.notification_id = None
         self.callback = callback
+        self.status_listener = None  # Called with (request, old_status) after every status change
+        self._lock = threading.Lock()  # Makes the check-and-set of a decision atomic
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -135,15 +140,10 @@ class ApprovalRequest:
         Returns:
             bool: True if the approval was successful, False otherwise
         """
-        if self.status != ApprovalStatus.PENDING:
+        if not self._set_status(ApprovalStatus.APPROVED, user_id, reason):
             logger.warning(f"Attempted to approve request {self.id} with status {self.status.value}")
             return False
         
-        self.status = ApprovalStatus.APPROVED
-        self.decision_time = int(time.time())
-        self.decision_user_id = user_id
-        self.decision_reason = reason
-        
         if self.callback:
             try:
                 self.callback(self.id, self.status, {
@@ -166,15 +166,10 @@ class ApprovalRequest:
         Returns:
             bool: True if the rejection was successful, False otherwise
         """
-        if self.status != ApprovalStatus.PENDING:
+        if not self._set_status(ApprovalStatus.REJECTED, user_id, reason):
             logger.warning(f"Attempted to reject request {self.id} with status {self.status.value}")
             return False
         
-        self.status = ApprovalStatus.REJECTED
-        self.decision_time = int(time.time())
-        self.decision_user_id = user_id
-        self.decision_reason = reason
-        
         if self.callback:
             try:
                 self.callback(self.id, self.status, {
@@ -193,13 +188,10 @@ class ApprovalRequest:
         Returns:
             bool: True if the cancellation was successful, False otherwise
         """
-        if self.status != ApprovalStatus.PENDING:
+        if not self._set_status(ApprovalStatus.CANCELLED):
             logger.warning(f"Attempted to cancel request {self.id} with status {self.status.value}")
             return False
         
-        self.status = ApprovalStatus.CANCELLED
-        self.decision_time = int(time.time())
-        
         if self.callback:
             try:
                 self.callback(self.id, self.status, {})
@@ -208,6 +200,39 @@ class ApprovalRequest:
         
         return True
     
+    def _set_status(self,
+                    status: ApprovalStatus,
+                    user_id: Optional[str] = None,
+                    reason: Optional[str] = None) -> bool:
+        """
+        Decide a pending request and tell the status listener (if any).
+        
+        The check and the update are atomic, so when several threads decide the same request
+        only one of them succeeds.
+        
+        Args:
+            status: The new status
+            user_id: The ID of the user who made the decision
+            reason: The reason for the decision
+        
+        Returns:
+            bool: True if the request was pending and is now decided, False otherwise
+        """
+        with self._lock:
+            if self.status != ApprovalStatus.PENDING:
+                return False
+            
+            self.decision_time = int(time.time())
+            if user_id is not None or reason is not None:
+                self.decision_user_id = user_id
+                self.decision_reason = reason
+            old_status = self.status
+            self.status = status
+        
+        if self.status_listener:
+            self.status_listener(self, old_status)
+        return True
+    
     def is_expired(self) -> bool:
         """
         Check if the approval request has expired.
@@ -227,12 +252,9 @@ class ApprovalRequest:
         Returns:
             bool: True if the operation was successful, False otherwise
         """
-        if self.status != ApprovalStatus.PENDING:
+        if not self._set_status(ApprovalStatus.EXPIRED):
             return False
         
-        self.status = ApprovalStatus.EXPIRED
-        self.decision_time = int(time.time())
-        
         if self.callback:
             try:
                 self.callback(self.id, self.status, {})
@@ -246,15 +268,31 @@ class ApprovalWorkflow:
     Workflow for managing approval requests in the agent.
     """
     
-    def __init__(self, notification_system: NotificationSystem):
+    def __init__(self, notification_system: NotificationSystem, store: Optional[AutonomyStore] = None):
         """
         Initialize the approval workflow.
         
         Args:
             notification_system: The notification system to use for sending approval requests
+            store: Persistent store for approval requests (in-memory only if None)
         """
         self.notification_system = notification_system
+        self.store = store
         self.approval_requests = {}  # Dictionary of request ID to ApprovalRequest
+        
+        # Secondary indexes, each a list of (created_time, request_id) keys kept sorted so
+        # filtered queries and pages never scan requests that can't match
+        self._indexes = {}  # Dictionary of index key (see _index_keys) to sorted list of keys
+        
+        # Guards approval_requests and the indexes; request decisions have their own locks
+        self._lock = threading.RLock()
+        
+        # Only pending requests are loaded up front; decided ones are loaded when asked for
+        if store:
+            for data in store.query("approval_requests", {"status": ApprovalStatus.PENDING.value})[0]:
+                self._track(ApprovalRequest.from_dict(data))
+            logger.info(f"Loaded {len(self.approval_requests)} pending approval requests")
+        
         logger.info("Approval Workflow initialized")
     
     def create_approval_request(self, 
@@ -298,7 +336,7 @@ class ApprovalWorkflow:
         )
         
         # Store the request
-        self.approval_requests[request.id] = request
+        self.add_approval_request(request)
         
         # Create a notification for the approval request
         notification = self.notification_system.create_notification(
@@ -316,6 +354,7 @@ class ApprovalWorkflow:
         
         # Link the notification to the approval request
         request.notification_id = notification.id
+        self._persist(request)
         
         logger.info(f"Created approval request {request.id}: {title}")
         return request
@@ -330,7 +369,45 @@ class ApprovalWorkflow:
         Returns:
             Optional[ApprovalRequest]: The approval request, or None if not found
         """
-        return self.approval_requests.get(request_id)
+        request = self.approval_requests.get(request_id)
+        if request is None and self.store:
+            data = self.store.load("approval_requests", request_id)
+            if data:
+                with self._lock:
+                    # Another thread may have loaded it meanwhile; everyone must share one instance
+                    request = self.approval_requests.get(request_id)
+                    if request is None:
+                        request = ApprovalRequest.from_dict(data)
+                        self._track(request)
+        return request
+    
+    def add_approval_request(self, request: ApprovalRequest) -> None:
+        """
+        Add an existing approval request (e.g. one restored with from_dict) to the workflow.
+        
+        Args:
+            request: The approval request to add
+        """
+        self._track(request)
+        self._persist(request)
+    
+    def _track(self, request: ApprovalRequest) -> None:
+        """
+        Keep a request in memory and add it to the indexes.
+        
+        Args:
+            request: The approval request
+        """
+        with self._lock:
+            if request.id in self.approval_requests:
+                self._unindex(self.approval_requests[request.id], self.approval_requests[request.id].status)
+            
+            self.approval_requests[request.id] = request
+            request.status_listener = self._status_changed
+            
+            key = (request.created_time, request.id)
+            for index_key in self._index_keys(request.user_id, request.status, request.category):
+                bisect.insort(self._indexes.setdefault(index_key, []), key)
     
     def get_approval_requests(self, 
                              user_id: Optional[str] = None, 
@@ -345,24 +422,208 @@ class ApprovalWorkflow:
             category: Filter by decision category
         
         Returns:
-            List[ApprovalRequest]: The matching approval requests
+            List[ApprovalRequest]: The matching approval requests, oldest first
+        """
+        return self.get_approval_requests_page(user_id, status, category, limit=None)[0]
+    
+    def get_approval_requests_page(self,
+                                  user_id: Optional[str] = None,
+                                  status: Optional[ApprovalStatus] = None,
+                                  category: Optional[DecisionCategory] = None,
+                                  limit: Optional[int] = 50,
+                                  cursor: Optional[str] = None,
+                                  newest_first: bool = False) -> Tuple[List[ApprovalRequest], Optional[str]]:
         """
-        result = []
+        Get a page of approval requests matching the specified filters, ordered by creation time.
         
-        for request in self.approval_requests.values():
-            # Apply filters
-            if user_id is not None and request.user_id != user_id:
-                continue
+        Args:
+            user_id: Filter by user ID
+            status: Filter by approval status
+            category: Filter by decision category
+            limit: Maximum number of requests to return (None for all)
+            cursor: The cursor returned with the previous page (None for the first page)
+            newest_first: Whether to return the newest requests first
+        
+        Returns:
+            Tuple[List[ApprovalRequest], Optional[str]]: (requests, cursor for the next page or None if this is the last page)
+        """
+        if limit is not None and limit <= 0:
+            return [], cursor
+        
+        # Pending requests are always in memory; anything else may only be in the store
+        if self.store and status != ApprovalStatus.PENDING:
+            filters = {"user_id": user_id, "status": status.value if status else None, "category": category.value if category else None}
+            records, next_cursor = self.store.query(
+                "approval_requests",
+                {column: value for column, value in filters.items() if value is not None},
+                limit, cursor, newest_first
+            )
+            return [self.approval_requests.get(data["id"]) or ApprovalRequest.from_dict(data) for data in records], next_cursor
+        
+        with self._lock:
+            # Walk the smallest index that covers one of the filters, and check the rest per request
+            candidates = [self._indexes.get(index_key, []) for index_key in self._index_keys(user_id, status, category, filters_only=True)]
+            keys = min(candidates, key=len) if candidates else self._indexes.get(("all",), [])
             
-            if status is not None and request.status != status:
-                continue
+            if cursor:
+                created_time, request_id = cursor.split(":", 1)
+                after = (int(created_time), request_id)
+                position = bisect.bisect_left(keys, after) if newest_first else bisect.bisect_right(keys, after)
+            else:
+                position = len(keys) if newest_first else 0
             
-            if category is not None and request.category != category:
-                continue
+            result = []
+            next_cursor = None
+            step = -1 if newest_first else 1
+            position = position - 1 if newest_first else position
+            while 0 <= position < len(keys):
+                key = keys[position]
+                position += step
+                
+                request = self.approval_requests[key[1]]
+                if user_id is not None and request.user_id != user_id:
+                    continue
+                if status is not None and request.status != status:
+                    continue
+                if category is not None and request.category != category:
+                    continue
+                
+                if limit is not None and len(result) == limit:
+                    last = result[-1]
+                    next_cursor = f"{last.created_time}:{last.id}"
+                    break
+                result.append(request)
+        
+        return result, next_cursor
+    
+    def cancel_request(self, request_id: str) -> bool:
+        """
+        Cancel an approval request.
+        
+        Args:
+            request_id: The ID of the approval request to cancel
+        
+        Returns:
+            bool: True if the cancellation was successful, False otherwise
+        """
+        request = self.get_approval_request(request_id)
+        if not request:
+            logger.warning(f"Attempted to cancel non-existent request: {request_id}")
+            return False
+        
+        return request.cancel()
+    
+    def check_expired_requests(self) -> List[str]:
+        """
+        Mark pending requests whose expiry time has passed as expired.
+        
+        Returns:
+            List[str]: The IDs of the requests that expired
+        """
+        expired = []
+        # Only pending requests can expire, so the status index bounds the scan
+        with self._lock:
+            pending = [self.approval_requests[request_id] for _, request_id in self._indexes.get(("status", ApprovalStatus.PENDING), [])]
+        
+        # Requests are expired outside the lock, since expiring runs their callbacks
+        for request in pending:
+            if request.is_expired() and request.mark_as_expired():
+                expired.append(request.id)
+        
+        if expired:
+            logger.info(f"Expired {len(expired)} approval requests")
+        return expired
+    
+    def _index_keys(self,
+                   user_id: Optional[str],
+                   status: Optional[ApprovalStatus],
+                   category: Optional[DecisionCategory],
+                   filters_only: bool = False) -> List[Tuple]:
+        """
+        Get the index keys for a request, or for a query's filters.
+        
+        Args:
+            user_id: The user ID
+            status: The approval status
+            category: The decision category
+            filters_only: Whether these are query filters, where None means "any" rather than a value
+        
+        Returns:
+            List[Tuple]: The index keys
+        """
+        if not filters_only:
+            return [("all",), ("status", status), ("user_id", user_id), ("category", category), ("user_status", user_id, status)]
+        
+        index_keys = []
+        if user_id is not None and status is not None:
+            index_keys.append(("user_status", user_id, status))
+        else:
+            if user_id is not None:
+                index_keys.append(("user_id", user_id))
+            if status is not None:
+                index_keys.append(("status", status))
+        if category is not None:
+            index_keys.append(("category", category))
+        return index_keys
+    
+    def _unindex(self, request: ApprovalRequest, status: ApprovalStatus) -> None:
+        """
+        Remove a request from every index.
+        
+        Args:
+            request: The approval request
+            status: The status the request was indexed under
+        """
+        key = (request.created_time, request.id)
+        for index_key in self._index_keys(request.user_id, status, request.category):
+            self._remove_key(index_key, key)
+    
+    def _status_changed(self, request: ApprovalRequest, old_status: ApprovalStatus) -> None:
+        """
+        Move a request between the status indexes after a transition.
+        
+        Args:
+            request: The approval request
+            old_status: The status before the transition
+        """
+        key = (request.created_time, request.id)
+        with self._lock:
+            for index_key in (("status", old_status), ("user_status", request.user_id, old_status)):
+                self._remove_key(index_key, key)
             
-            result.append(request)
+            for index_key in (("status", request.status), ("user_status", request.user_id, request.status)):
+                bisect.insort(self._indexes.setdefault(index_key, []), key)
         
-        return result
+        self._persist(request)
+    
+    def _persist(self, request: ApprovalRequest) -> None:
+        """
+        Save a request to the store (if there is one).
+        
+        Args:
+            request: The approval request
+        """
+        if not self.store:
+            return
+        
+        try:
+            self.store.save("approval_requests", request.to_dict())
+        except Exception as e:
+            logger.error(f"Error persisting approval request {request.id}: {e}")
+    
+    def _remove_key(self, index_key: Tuple, key: Tuple[int, str]) -> None:
+        """
+        Remove a key from an index, if present.
+        
+        Args:
+            index_key: The index key
+            key: The (created_time, request_id) key to remove
+        """
+        keys = self._indexes.get(index_key)
+        if keys:
+            position = bisect.bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
     
     def approve_request(self, request_id: str, user_id: str, reason: Optional[str] = None) -> bool:
         """
@@ -5,21 +5,79 @@ This module implements the autonomy framework that determines when the agent can
 autonomously and when it needs human approval.
 """
 
+import os
 import logging
 import time
 import uuid
-from typing import Dict, Any, List, Optional, Callable, Tuple
+import itertools
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Callable, Tuple, Mapping, NamedTuple, Iterator
 
 from .decision_matrix import DecisionMatrix, DecisionCategory, ApprovalLevel
 from .notification_system import NotificationSystem, NotificationType, NotificationPriority
 from .approval_workflow import ApprovalWorkflow, ApprovalStatus
 from .risk_tolerance import RiskToleranceProfile, RiskAssessment, RiskCategory, RiskLevel, create_default_profiles
 from .experimentation_framework import ExperimentationFramework, Experiment, ExperimentType, ExperimentStatus
+from .storage import AutonomyStore
+from .action_queue import DeferredActionQueue
+from .metrics import StageTimings
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Record the stage timings of one in this many decisions
+DEFAULT_TIMING_SAMPLE_INTERVAL = 100
+
+class LazyRiskAssessment(Mapping):
+    """
+    Read-only per-category risk assessment, captured when the decision was evaluated.
+
+    Holds the encoded levels the tolerance check used and only decodes them when first read,
+    so reading it never re-runs the rules and always agrees with the decision.
+    """
+
+    def __init__(self, levels: Tuple[int, ...]):
+        """
+        Initialize the assessment.
+
+        Args:
+            levels: The encoded risk levels returned by RiskAssessment.check_tolerance_levels
+        """
+        self._levels = levels
+        self._assessment = None
+
+    def _get(self) -> Dict[RiskCategory, RiskLevel]:
+        if self._assessment is None:
+            self._assessment = RiskAssessment.decode_levels(self._levels)
+        return self._assessment
+
+    def __getitem__(self, category: RiskCategory) -> RiskLevel:
+        return self._get()[category]
+
+    def __iter__(self) -> Iterator[RiskCategory]:
+        return iter(self._get())
+
+    def __len__(self) -> int:
+        return len(self._get())
+
+    def __repr__(self) -> str:
+        return repr(self._get())
+
+class DecisionResult(NamedTuple):
+    """
+    Immutable result of evaluating whether the agent can execute an action.
+    """
+    category: DecisionCategory
+    action: str
+    approval_level: ApprovalLevel
+    matched_rule: Optional[str]  # Decision matrix condition that set the approval level (None for the default)
+    risk: Mapping[RiskCategory, RiskLevel]  # As assessed for the tolerance check; empty for prohibited actions
+    within_tolerance: bool
+    can_execute: bool
+    reason: Optional[str]
+    timings: Mapping[str, float]  # Dictionary of stage name ("matrix", "risk", "total") to seconds
+
 class AutonomyFramework:
     """
     Framework for managing agent autonomy.
@@ -29,12 +87,31 @@ class AutonomyFramework:
     for determining when the agent can act autonomously.
     """
 
-    def __init__(self):
-        """Initialize the autonomy framework."""
+    def __init__(self,
+                 db_path: Optional[str] = None,
+                 action_workers: int = 4,
+                 timing_sample_interval: int = DEFAULT_TIMING_SAMPLE_INTERVAL):
+        """
+        Initialize the autonomy framework.
+
+        Args:
+            db_path: SQLite database for approvals, notifications and pending actions
+                (defaults to AUTONOMY_DB_PATH; state is kept in memory only if neither is set)
+            action_workers: Maximum number of approved actions run at once
+            timing_sample_interval: Record the stage timings of one in this many decisions
+                (1 records every decision, 0 disables stage timings)
+        """
+        db_path = db_path or os.environ.get("AUTONOMY_DB_PATH")
+        self.store = AutonomyStore(db_path) if db_path else None
+
         self.decision_matrix = DecisionMatrix()
-        self.notification_system = NotificationSystem()
-        self.approval_workflow = ApprovalWorkflow(self.notification_system)
-        self.pending_actions = {}  # Dictionary of action ID to pending action info
+        self.notification_system = NotificationSystem(self.store)
+        self.approval_workflow = ApprovalWorkflow(self.notification_system, self.store)
+
+        # Actions waiting for approval, run on the queue's workers once approved
+        self.action_queue = DeferredActionQueue(self.store, max_workers=action_workers, on_complete=self._action_completed)
+        self.pending_actions = self.action_queue.actions  # Dictionary of action ID to pending action info
+        self._relink_pending_actions()
 
         # Initialize risk tolerance framework
         self.risk_profiles = create_default_profiles()
@@ -44,6 +121,11 @@ class AutonomyFramework:
         # Initialize experimentation framework
         self.experimentation_framework = ExperimentationFramework()
 
+        # Per-stage latency of a sample of decisions, so timing stays out of the decision latency
+        self.decision_timings = StageTimings("autonomy_decision_stage_seconds")
+        self.timing_sample_interval = timing_sample_interval
+        self._decision_counter = itertools.count(1)
+
         logger.info("Autonomy Framework initialized")
 
     def can_execute(self,
@@ -61,16 +143,144 @@ class AutonomyFramework:
         Returns:
             Tuple[bool, Optional[str]]: (can_execute, reason)
         """
+        if self._timing_sampled():
+            decision = self._evaluate(category, action, context, record_timings=True)
+            return decision.can_execute, decision.reason
+
         # First, check the decision matrix
         approval_level = self.decision_matrix.get_approval_level(category, action, context)
 
         if approval_level == ApprovalLevel.PROHIBITED:
             return False, "Action prohibited"
 
-        # Next, assess the risk
-        risk_assessment = self.risk_assessment.assess_risk(action, context)
-        within_tolerance, risk_reason = self.risk_assessment.is_within_tolerance(risk_assessment)
+        # Next, check the risk against the tolerance levels
+        within_tolerance, risk_reason = self.risk_assessment.check_tolerance(action, context)
+
+        return self._decide(approval_level, within_tolerance, risk_reason)
+
+    def evaluate(self,
+                 category: DecisionCategory,
+                 action: str,
+                 context: Dict[str, Any]) -> DecisionResult:
+        """
+        Evaluate the decision matrix and risk tolerance for an action once.
+
+        The time spent in each stage is recorded in decision_timings for a sample of decisions
+        (see timing_sample_interval). The per-category risk assessment is captured by the same
+        rule pass as the tolerance check, and only decoded if the result's risk mapping is read.
+
+        Args:
+            category: The decision category
+            action: The specific action
+            context: The context in which the action is being performed
+
+        Returns:
+            DecisionResult: The approval level, risk assessment, decision and stage timings
+        """
+        return self._evaluate(category, action, context, self._timing_sampled())
+
+    def _timing_sampled(self) -> bool:
+        """Whether the current decision's stage timings should be recorded."""
+        interval = self.timing_sample_interval
+        return interval > 0 and (interval == 1 or next(self._decision_counter) % interval == 0)
+
+    def _evaluate(self,
+                  category: DecisionCategory,
+                  action: str,
+                  context: Dict[str, Any],
+                  record_timings: bool) -> DecisionResult:
+        """Evaluate an action for evaluate, recording its stage timings if record_timings is set."""
+        start = time.perf_counter()
+
+        # First, check the decision matrix
+        approval_level, matched_rule = self.decision_matrix.match(category, action, context)
+        matrix_done = time.perf_counter()
+
+        if approval_level == ApprovalLevel.PROHIBITED:
+            risk, within_tolerance = MappingProxyType({}), True
+            can_execute, reason = False, "Action prohibited"
+            risk_done = matrix_done
+        else:
+            # Next, check the risk against the tolerance levels
+            levels, within_tolerance, risk_reason = self.risk_assessment.check_tolerance_levels(action, context)
+            risk = LazyRiskAssessment(levels)
+            can_execute, reason = self._decide(approval_level, within_tolerance, risk_reason)
+            risk_done = time.perf_counter()
+
+        timings = {"matrix": matrix_done - start, "risk": risk_done - matrix_done, "total": risk_done - start}
+        if record_timings:
+            self.decision_timings.observe(timings)
+
+        return DecisionResult(
+            category=category,
+            action=action,
+            approval_level=approval_level,
+            matched_rule=matched_rule,
+            risk=risk,
+            within_tolerance=within_tolerance,
+            can_execute=can_execute,
+            reason=reason,
+            timings=MappingProxyType(timings)
+        )
+
+    def can_execute_many(self, items: List[Tuple[DecisionCategory, str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Determine in a single pass whether the agent can execute a batch of actions.
+
+        Gives the same answers as calling can_execute for each item. Items are grouped by action
+        and by the context values the rules read, so each distinct case is only evaluated once,
+        and one summary line is logged instead of several lines per item.
+
+        Args:
+            items: List of (category, action, context) tuples
+
+        Returns:
+            Dict: "results", a list of (can_execute, reason) tuples in input order, and
+                "summary", counts of allowed, notify, approval_required, prohibited and risk_exceeded items
+        """
+        approval_levels = self.decision_matrix.get_approval_levels(items)
+
+        # Prohibited actions are rejected before their risk is assessed, as in can_execute
+        to_assess = [index for index, level in enumerate(approval_levels) if level != ApprovalLevel.PROHIBITED]
+        tolerances = self.risk_assessment.assess_tolerance_many([items[index][2] for index in to_assess])
+        tolerance_by_index = dict(zip(to_assess, tolerances))
+
+        results = []
+        summary = {"total": len(items), "allowed": 0, "notify": 0, "approval_required": 0, "prohibited": 0, "risk_exceeded": 0}
+        for index, approval_level in enumerate(approval_levels):
+            if approval_level == ApprovalLevel.PROHIBITED:
+                result = (False, "Action prohibited")
+                summary["prohibited"] += 1
+            else:
+                within_tolerance, risk_reason = tolerance_by_index[index]
+                result = self._decide(approval_level, within_tolerance, risk_reason)
+                if not within_tolerance:
+                    summary["risk_exceeded"] += 1
+                elif result[0]:
+                    summary["allowed"] += 1
+                    if approval_level == ApprovalLevel.NOTIFY:
+                        summary["notify"] += 1
+                else:
+                    summary["approval_required"] += 1
+            results.append(result)
+
+        logger.info(f"Evaluated {len(items)} actions: {summary['allowed']} allowed ({summary['notify']} with notification), "
+                    f"{summary['approval_required']} need approval, {summary['prohibited']} prohibited, "
+                    f"{summary['risk_exceeded']} over risk tolerance")
+        return {"results": results, "summary": summary}
+
+    def _decide(self, approval_level: ApprovalLevel, within_tolerance: bool, risk_reason: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """
+        Combine a non-prohibited approval level with a risk tolerance check.
+
+        Args:
+            approval_level: The approval level from the decision matrix
+            within_tolerance: Whether the action's risk is within tolerance
+            risk_reason: Why the risk exceeds tolerance (if it does)
 
+        Returns:
+            Tuple[bool, Optional[str]]: (can_execute, reason)
+        """
         if not within_tolerance:
             # If the risk exceeds tolerance, require approval regardless of the decision matrix
             return False, f"Risk exceeds tolerance: {risk_reason}"
@@ -93,8 +303,9 @@ class AutonomyFramework:
                       context: Dict[str, Any],
                       title: str,
                       description: str,
-                      execute_function: Callable[[Dict[str, Any]], Any],
-                      user_id: Optional[str] = None) -> Dict[str, Any]:
+                      execute_function: Optional[Callable[[Dict[str, Any]], Any]],
+                      user_id: Optional[str] = None,
+                      action_name: Optional[str] = None) -> Dict[str, Any]:
         """
         Execute an action with the appropriate approval flow.
 
@@ -104,26 +315,32 @@ class AutonomyFramework:
             context: The context in which the action is being performed
             title: A short title describing the action
             description: A detailed description of the action
-            execute_function: Function to call to execute the action
+            execute_function: Function to call to execute the action (None to use the one registered as action_name)
             user_id: The ID of the user to notify or request approval from
+            action_name: Name the function was registered under with register_action; only named
+                actions survive a restart while waiting for approval (context must be JSON-serializable)
 
         Returns:
             Dict: Result of the action execution or information about the approval request
         """
-        # Determine if the agent can execute the action
-        can_execute, reason = self.can_execute(category, action, context)
+        # Determine if the agent can execute the action; every branch below reuses this decision
+        decision = self.evaluate(category, action, context)
+        reason = decision.reason
 
         # Generate a unique ID for this action
         action_id = str(uuid.uuid4())
+        if execute_function is None:
+            execute_function = self.action_queue.registry.get(action_name)
+            if execute_function is None:
+                raise ValueError(f"No action registered as '{action_name}'")
 
-        if can_execute:
+        if decision.can_execute:
             # Execute the action
             try:
                 result = execute_function(context)
 
                 # If notification is required, send it
-                approval_level = self.decision_matrix.get_approval_level(category, action, context)
-                if approval_level == ApprovalLevel.NOTIFY:
+                if decision.approval_level == ApprovalLevel.NOTIFY:
                     self.notification_system.create_notification(
                         title=f"Action Executed: {title}",
                         message=description,
@@ -160,9 +377,7 @@ class AutonomyFramework:
                 }
         else:
             # Action requires approval or is prohibited
-            approval_level = self.decision_matrix.get_approval_level(category, action, context)
-
-            if approval_level == ApprovalLevel.PROHIBITED:
+            if decision.approval_level == ApprovalLevel.PROHIBITED:
                 logger.warning(f"Attempted to execute prohibited action {category.value}.{action}")
 
                 # Notify about the prohibited action attempt
@@ -182,29 +397,33 @@ class AutonomyFramework:
                     "reason": reason
                 }
 
-            # Store the execute function for later use
-            self.pending_actions[action_id] = {
-                "category": category,
-                "action": action,
-                "context": context,
-                "execute_function": execute_function,
-                "created_time": int(time.time())
-            }
-
-            # Create an approval request
-            def approval_callback(request_id, status, details):
-                self._handle_approval_result(action_id, request_id, status, details)
-
-            request = self.approval_workflow.create_approval_request(
-                title=title,
-                description=description,
-                category=category,
-                action=action,
-                context=context,
-                user_id=user_id,
-                callback=approval_callback
+            # Defer the action before creating the request, so a decision that arrives
+            # as soon as the request exists always finds the action
+            self.action_queue.defer(
+                action_id,
+                None if action_name in self.action_queue.registry else execute_function,
+                action_name,
+                category.value,
+                action,
+                context,
+                user_id=user_id
             )
 
+            try:
+                request = self.approval_workflow.create_approval_request(
+                    title=title,
+                    description=description,
+                    category=category,
+                    action=action,
+                    context=context,
+                    user_id=user_id,
+                    callback=self._approval_callback(action_id)
+                )
+            except Exception:
+                self.action_queue.discard(action_id)
+                raise
+            self.action_queue.link(action_id, request.id)
+
             return {
                 "action_id": action_id,
                 "status": "approval_requested",
@@ -212,59 +431,77 @@ class AutonomyFramework:
                 "reason": reason
             }
 
+    def register_action(self, name: str, function: Callable[[Dict[str, Any]], Any]) -> None:
+        """
+        Register a function that execute_action can refer to by name.
+
+        Args:
+            name: The action name
+            function: Function called with the action context
+        """
+        self.action_queue.register(name, function)
+
+    def evict_expired_actions(self) -> List[str]:
+        """
+        Drop actions that have waited longer than the queue's TTL and cancel their approval requests.
+
+        Returns:
+            List[str]: The IDs of the evicted actions
+        """
+        evicted = self.action_queue.evict_expired()
+        for pending_action in evicted:
+            request = self.approval_workflow.get_approval_request(pending_action["approval_request_id"])
+            if request:
+                request.callback = None
+                request.cancel()
+        return [pending_action["id"] for pending_action in evicted]
+
+    def _approval_callback(self, action_id: str) -> Callable[[str, ApprovalStatus, Dict[str, Any]], None]:
+        """Create the approval request callback for a deferred action."""
+        def approval_callback(request_id, status, details):
+            self._handle_approval_result(action_id, request_id, status, details)
+        return approval_callback
+
+    def _relink_pending_actions(self) -> None:
+        """Reconnect deferred actions restored from the store to their approval requests."""
+        for action_id, pending_action in list(self.pending_actions.items()):
+            if pending_action["status"] != "pending":
+                continue
+
+            request = self.approval_workflow.get_approval_request(pending_action["approval_request_id"])
+            if request is None or pending_action["name"] is None:
+                # Unnamed actions can't be restored, so their requests can't be honoured either
+                logger.warning(f"Dropping deferred action {action_id}: its approval request or function is gone")
+                self.action_queue.discard(action_id)
+                if request and request.status == ApprovalStatus.PENDING:
+                    request.cancel()
+            elif request.status == ApprovalStatus.PENDING:
+                request.callback = self._approval_callback(action_id)
+            else:
+                # Decided while the action was being saved
+                self._handle_approval_result(action_id, request.id, request.status, {"user_id": request.decision_user_id})
+
     def _handle_approval_result(self, action_id: str, request_id: str, status: ApprovalStatus, details: Dict[str, Any]):
         """
         Handle the result of an approval request.
 
+        Approved actions are queued to run on the action queue's workers, so this returns
+        without waiting for them.
+
         Args:
             action_id: The ID of the action
             request_id: The ID of the approval request (used for tracking)
             status: The approval status
             details: Additional details about the approval decision
         """
-        if action_id not in self.pending_actions:
+        pending_action = self.action_queue.get(action_id)
+        if pending_action is None:
             logger.warning(f"Received approval result for unknown action: {action_id}")
             return
 
-        pending_action = self.pending_actions[action_id]
-
         if status == ApprovalStatus.APPROVED:
             logger.info(f"Action {action_id} approved by user {details.get('user_id')}")
-
-            # Execute the action
-            try:
-                action_result = pending_action["execute_function"](pending_action["context"])
-
-                # Notify about the successful execution
-                self.notification_system.create_notification(
-                    title=f"Approved Action Executed",
-                    message=f"The approved action has been executed successfully.",
-                    notification_type=NotificationType.INFO,
-                    priority=NotificationPriority.MEDIUM,
-                    user_id=details.get("user_id"),
-                    related_entity_id=action_id,
-                    related_entity_type=f"{pending_action['category'].value}_{pending_action['action']}"
-                )
-
-                # Log the result
-                logger.info(f"Action {action_id} executed with result: {action_result}")
-
-                # Clean up
-                del self.pending_actions[action_id]
-
-            except Exception as e:
-                logger.error(f"Error executing approved action {action_id}: {e}")
-
-                # Notify about the error
-                self.notification_system.create_notification(
-                    title=f"Approved Action Failed",
-                    message=f"Error executing the approved action: {e}",
-                    notification_type=NotificationType.ERROR,
-                    priority=NotificationPriority.HIGH,
-                    user_id=details.get("user_id"),
-                    related_entity_id=action_id,
-                    related_entity_type=f"{pending_action['category'].value}_{pending_action['action']}"
-                )
+            self.action_queue.approve(action_id, details.get("user_id"))
 
         elif status == ApprovalStatus.REJECTED:
             logger.info(f"Action {action_id} rejected by user {details.get('user_id')}")
@@ -277,17 +514,59 @@ class AutonomyFramework:
                 priority=NotificationPriority.MEDIUM,
                 user_id=details.get("user_id"),
                 related_entity_id=action_id,
-                related_entity_type=f"{pending_action['category'].value}_{pending_action['action']}"
+                related_entity_type=f"{pending_action['category']}_{pending_action['action']}"
             )
 
             # Clean up
-            del self.pending_actions[action_id]
+            self.action_queue.discard(action_id)
 
         elif status in [ApprovalStatus.EXPIRED, ApprovalStatus.CANCELLED]:
             logger.info(f"Action {action_id} {status.value}")
 
             # Clean up
-            del self.pending_actions[action_id]
+            self.action_queue.discard(action_id)
+
+    def _action_completed(self, pending_action: Dict[str, Any], result: Any, error: Optional[Exception]) -> None:
+        """
+        Notify about an approved action that has run.
+
+        Args:
+            pending_action: The deferred action
+            result: The action's result
+            error: The exception the action raised, or None if it succeeded
+        """
+        if error is None:
+            # Notify about the successful execution
+            self.notification_system.create_notification(
+                title=f"Approved Action Executed",
+                message=f"The approved action has been executed successfully.",
+                notification_type=NotificationType.INFO,
+                priority=NotificationPriority.MEDIUM,
+                user_id=pending_action.get("approved_by"),
+                related_entity_id=pending_action["id"],
+                related_entity_type=f"{pending_action['category']}_{pending_action['action']}"
+            )
+        else:
+            # Notify about the error
+            self.notification_system.create_notification(
+                title=f"Approved Action Failed",
+                message=f"Error executing the approved action: {error}",
+                notification_type=NotificationType.ERROR,
+                priority=NotificationPriority.HIGH,
+                user_id=pending_action.get("approved_by"),
+                related_entity_id=pending_action["id"],
+                related_entity_type=f"{pending_action['category']}_{pending_action['action']}"
+            )
+
+    def close(self) -> None:
+        """Wait for queued actions, then flush and close the store (if there is one)."""
+        self.action_queue.shutdown()
+        if self.store:
+            self.store.close()
+
+    def get_decision_timings(self) -> StageTimings:
+        """Get the per-stage decision latency histograms."""
+        return self.decision_timings
 
     def get_decision_matrix(self) -> DecisionMatrix:
         """Get the decision matrix."""
@@ -319,8 +598,11 @@ class AutonomyFramework:
             logger.warning(f"Unknown risk profile: {profile_name}")
             return False
 
-        self.current_risk_profile = self.risk_profiles[profile_name]
-        self.risk_assessment = RiskAssessment(self.current_risk_profile)
+        # Build the new assessment before swapping it in, so decisions never see a half-set profile
+        profile = self.risk_profiles[profile_name]
+        risk_assessment = RiskAssessment(profile)
+        self.current_risk_profile = profile
+        self.risk_assessment = risk_assessment
 
         logger.info(f"Set risk profile to: {profile_name}")
         return True
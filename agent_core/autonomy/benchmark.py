@@ -0,0 +1,320 @@
+"""
+Benchmarks for the autonomy framework.
+
+Run from the agent_core directory:
+
+    python -m autonomy.benchmark decisions --iterations 100000
+    python -m autonomy.benchmark batch --batch-size 1000
+    python -m autonomy.benchmark can_execute --iterations 100000 --max-overhead 1.5
+    python -m autonomy.benchmark risk --extra-rules 200
+    python -m autonomy.benchmark stages --iterations 100000
+    python -m autonomy.benchmark contention --threads 1,2,4,8,16,32,64
+"""
+
+import time
+import random
+import logging
+import argparse
+import threading
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+from .decision_matrix import DecisionMatrix, DecisionCategory, ApprovalLevel
+from .autonomy_framework import AutonomyFramework
+from .risk_tolerance import RiskAssessment, RiskCategory, RiskLevel, create_default_profiles
+from .approval_workflow import ApprovalWorkflow
+from .notification_system import NotificationSystem
+
+# Contexts that exercise every condition in the default matrix
+SAMPLE_CONTEXTS = [
+    (DecisionCategory.CONTENT_CREATION, "generate_ebook", {"word_count": 12000, "contains_sensitive_topics": False}),
+    (DecisionCategory.CONTENT_CREATION, "create_social_media_post", {"platform": "pinterest", "contains_sensitive_topics": False}),
+    (DecisionCategory.FINANCIAL, "spend_money", {"amount": 25.0}),
+    (DecisionCategory.FINANCIAL, "allocate_budget", {"amount": 8.0, "experiment_has_positive_roi": True}),
+    (DecisionCategory.PLATFORM_INTERACTION, "post_content", {"platform": "facebook"}),
+    (DecisionCategory.PLATFORM_INTERACTION, "interact_with_users", {"interaction_type": "comment"}),
+    (DecisionCategory.EXPERIMENT_MANAGEMENT, "start_experiment", {"estimated_cost": 12.0}),
+    (DecisionCategory.RESOURCE_ALLOCATION, "reallocate_resources", {"resource_type": "compute", "amount_change": 30.0}),
+    (DecisionCategory.EXTERNAL_COMMUNICATION, "contact_freelancer", {"is_existing_relationship": True, "message_type": "status_request"})
+]
+
+def eval_approval_level(matrix: DecisionMatrix, category: DecisionCategory, action: str, context: Dict[str, Any]) -> ApprovalLevel:
+    """The eval-based lookup DecisionMatrix used before conditions were compiled, kept as a baseline."""
+    action_rules = matrix.matrix[category][action]
+    for condition_str, level in action_rules.get("conditions", {}).items():
+        try:
+            if eval(condition_str, {"__builtins__": {}}, context):
+                return level
+        except Exception:
+            pass
+    return action_rules["default"]
+
+def baseline_can_execute(framework: AutonomyFramework, category: DecisionCategory, action: str, context: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+    """The can_execute path from before decisions recorded stage timings, kept as a baseline."""
+    approval_level = framework.decision_matrix.get_approval_level(category, action, context)
+    if approval_level == ApprovalLevel.PROHIBITED:
+        return False, "Action prohibited"
+    within_tolerance, risk_reason = framework.risk_assessment.check_tolerance(action, context)
+    return framework._decide(approval_level, within_tolerance, risk_reason)
+
+def _time_per_call(function, workload: List[Tuple[DecisionCategory, str, Dict[str, Any]]]) -> float:
+    """Run a function over the workload and return the mean latency in microseconds."""
+    start = time.perf_counter()
+    for category, action, context in workload:
+        function(category, action, context)
+    return (time.perf_counter() - start) / len(workload) * 1e6
+
+def benchmark_decisions(iterations: int, seed: int = 0) -> Dict[str, float]:
+    """
+    Compare per-decision latency of eval-based and compiled condition evaluation.
+
+    Args:
+        iterations: Number of decisions to time for each implementation
+        seed: Random seed for the workload
+
+    Returns:
+        Dict[str, float]: Mean latency (in microseconds) per implementation
+    """
+    matrix = DecisionMatrix()
+    rng = random.Random(seed)
+    workload = [rng.choice(SAMPLE_CONTEXTS) for _ in range(iterations)]
+
+    # Both implementations must agree before their timings mean anything
+    for category, action, context in SAMPLE_CONTEXTS:
+        assert matrix.get_approval_level(category, action, context) == eval_approval_level(matrix, category, action, context)
+
+    return {
+        "eval": _time_per_call(lambda *args: eval_approval_level(matrix, *args), workload),
+        "compiled": _time_per_call(matrix.get_approval_level, workload)
+    }
+
+def benchmark_batch(batch_size: int, seed: int = 0) -> Dict[str, float]:
+    """
+    Compare checking a batch of actions one by one with can_execute_many.
+
+    Args:
+        batch_size: Number of actions in the batch
+        seed: Random seed for the workload
+
+    Returns:
+        Dict[str, float]: Mean latency (in microseconds) per action for each approach
+    """
+    framework = AutonomyFramework()
+    rng = random.Random(seed)
+    batch = [rng.choice(SAMPLE_CONTEXTS) for _ in range(batch_size)]
+
+    start = time.perf_counter()
+    singles = [framework.can_execute(*item) for item in batch]
+    single_latency = (time.perf_counter() - start) / batch_size * 1e6
+
+    start = time.perf_counter()
+    bulk = framework.can_execute_many(batch)["results"]
+    bulk_latency = (time.perf_counter() - start) / batch_size * 1e6
+
+    assert singles == bulk
+    return {"can_execute": single_latency, "can_execute_many": bulk_latency}
+
+def benchmark_can_execute(iterations: int, seed: int = 0, repeats: int = 3) -> Dict[str, float]:
+    """
+    Compare can_execute with the baseline path it must not regress against.
+
+    Args:
+        iterations: Number of decisions to time per repeat for each implementation
+        seed: Random seed for the workload
+        repeats: Number of interleaved repeats; the fastest one is reported, to reduce noise
+
+    Returns:
+        Dict[str, float]: Mean latency (in microseconds) per implementation
+    """
+    framework = AutonomyFramework()
+    rng = random.Random(seed)
+    workload = [rng.choice(SAMPLE_CONTEXTS) for _ in range(iterations)]
+
+    for category, action, context in SAMPLE_CONTEXTS:
+        assert framework.can_execute(category, action, context) == baseline_can_execute(framework, category, action, context)
+
+    results = {"baseline": float("inf"), "can_execute": float("inf")}
+    for _ in range(repeats):
+        results["baseline"] = min(results["baseline"], _time_per_call(lambda *args: baseline_can_execute(framework, *args), workload))
+        results["can_execute"] = min(results["can_execute"], _time_per_call(framework.can_execute, workload))
+    return results
+
+def benchmark_risk(iterations: int, extra_rules: int, seed: int = 0) -> Dict[str, float]:
+    """
+    Measure risk check latency with the default rule table and with extra profile rules.
+
+    Args:
+        iterations: Number of risk checks to time for each configuration
+        extra_rules: Number of extra rules (on fields the workload doesn't use) added to the profile
+        seed: Random seed for the workload
+
+    Returns:
+        Dict[str, float]: Mean latency (in microseconds) per configuration
+    """
+    rng = random.Random(seed)
+    workload = [context for _, _, context in (rng.choice(SAMPLE_CONTEXTS) for _ in range(iterations))]
+
+    results = {}
+    for rules in (0, extra_rules):
+        profile = create_default_profiles()["balanced"]
+        for index in range(rules):
+            profile.add_rule({"category": RiskCategory.OPERATIONAL, "field": f"extra_field_{index}", "level": RiskLevel.HIGH})
+
+        assessment = RiskAssessment(profile)
+        start = time.perf_counter()
+        for context in workload:
+            assessment.check_tolerance("benchmark", context)
+        results[f"{rules} extra rules"] = (time.perf_counter() - start) / iterations * 1e6
+
+    return results
+
+def benchmark_stages(iterations: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    Run decisions through AutonomyFramework.evaluate and collect the per-stage timings.
+
+    Args:
+        iterations: Number of decisions to evaluate
+        seed: Random seed for the workload
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Histogram snapshot per stage
+    """
+    framework = AutonomyFramework()
+    rng = random.Random(seed)
+    for category, action, context in (rng.choice(SAMPLE_CONTEXTS) for _ in range(iterations)):
+        framework.evaluate(category, action, context)
+
+    return framework.get_decision_timings().snapshot()
+
+def _throughput(threads: int, operations: int, operation: Callable[[int, int], None]) -> float:
+    """
+    Run operations split across threads that start together, and return operations per second.
+
+    Args:
+        threads: Number of threads
+        operations: Total number of operations
+        operation: Function called with (thread index, operation index)
+    """
+    per_thread = max(1, operations // threads)
+    barrier = threading.Barrier(threads + 1)
+    errors = []
+
+    def worker(thread_index):
+        barrier.wait()
+        try:
+            for index in range(per_thread):
+                operation(thread_index, index)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if errors:
+        raise errors[0]
+    return per_thread * threads / elapsed
+
+def benchmark_contention(thread_counts: List[int], operations: int, seed: int = 0) -> Dict[int, Dict[str, float]]:
+    """
+    Measure decision and approval throughput with increasing numbers of threads sharing one framework.
+
+    Args:
+        thread_counts: Thread counts to measure
+        operations: Total operations per measurement
+        seed: Random seed for the workload
+
+    Returns:
+        Dict[int, Dict[str, float]]: Operations per second for "decisions" and "approvals", per thread count
+    """
+    rng = random.Random(seed)
+    workload = [rng.choice(SAMPLE_CONTEXTS) for _ in range(1024)]
+    results = {}
+
+    for threads in thread_counts:
+        framework = AutonomyFramework()
+
+        def decide(thread_index, index):
+            framework.evaluate(*workload[(thread_index * 31 + index) % len(workload)])
+
+        approval_workflow = ApprovalWorkflow(NotificationSystem())
+
+        def request_and_approve(thread_index, index):
+            request = approval_workflow.create_approval_request(
+                "Benchmark", "Benchmark request", DecisionCategory.FINANCIAL, "spend_money", {"amount": index}, f"user_{thread_index}"
+            )
+            approval_workflow.approve_request(request.id, "approver")
+
+        results[threads] = {
+            "decisions": _throughput(threads, operations, decide),
+            "approvals": _throughput(threads, max(threads, operations // 10), request_and_approve)
+        }
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the autonomy framework")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    decisions = subparsers.add_parser("decisions", help="Per-decision latency of condition evaluation")
+    decisions.add_argument("--iterations", type=int, default=100000)
+    decisions.add_argument("--seed", type=int, default=0)
+    batch = subparsers.add_parser("batch", help="Per-action latency of single and bulk execution checks")
+    batch.add_argument("--batch-size", type=int, default=1000)
+    batch.add_argument("--seed", type=int, default=0)
+    can_execute = subparsers.add_parser("can_execute", help="can_execute latency against the pre-timing baseline")
+    can_execute.add_argument("--iterations", type=int, default=100000)
+    can_execute.add_argument("--seed", type=int, default=0)
+    can_execute.add_argument("--max-overhead", type=float, default=None,
+                             help="Exit with an error if can_execute is slower than the baseline by more than this factor")
+    risk = subparsers.add_parser("risk", help="Risk check latency as profile rules are added")
+    risk.add_argument("--iterations", type=int, default=100000)
+    risk.add_argument("--extra-rules", type=int, default=200)
+    risk.add_argument("--seed", type=int, default=0)
+    stages = subparsers.add_parser("stages", help="Per-stage latency of the decision pipeline")
+    stages.add_argument("--iterations", type=int, default=100000)
+    stages.add_argument("--seed", type=int, default=0)
+    contention = subparsers.add_parser("contention", help="Decision and approval throughput as threads are added")
+    contention.add_argument("--threads", default="1,2,4,8,16,32,64", help="Comma-separated thread counts")
+    contention.add_argument("--operations", type=int, default=50000)
+    contention.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Per-decision log lines would dominate the timings
+    logging.getLogger("autonomy").setLevel(logging.WARNING)
+
+    if args.benchmark == "decisions":
+        results = benchmark_decisions(args.iterations, args.seed)
+        for name, latency in results.items():
+            print(f"{name:>10}: {latency:8.2f} us/decision")
+        print(f"{'speedup':>10}: {results['eval'] / results['compiled']:8.1f}x")
+    elif args.benchmark == "batch":
+        results = benchmark_batch(args.batch_size, args.seed)
+        for name, latency in results.items():
+            print(f"{name:>16}: {latency:8.2f} us/action")
+        print(f"{'speedup':>16}: {results['can_execute'] / results['can_execute_many']:8.1f}x")
+    elif args.benchmark == "can_execute":
+        results = benchmark_can_execute(args.iterations, args.seed)
+        for name, latency in results.items():
+            print(f"{name:>12}: {latency:8.2f} us/decision")
+        overhead = results['can_execute'] / results['baseline']
+        print(f"{'overhead':>12}: {overhead:8.2f}x")
+        if args.max_overhead is not None and overhead > args.max_overhead:
+            parser.exit(1, f"can_execute overhead {overhead:.2f}x exceeds {args.max_overhead:.2f}x\n")
+    elif args.benchmark == "risk":
+        for name, latency in benchmark_risk(args.iterations, args.extra_rules, args.seed).items():
+            print(f"{name:>30}: {latency:8.2f} us/check")
+    elif args.benchmark == "stages":
+        for stage, snapshot in benchmark_stages(args.iterations, args.seed).items():
+            print(f"{stage:>8}: {snapshot['mean'] * 1e6:8.2f} us/decision (mean over {snapshot['count']})")
+    elif args.benchmark == "contention":
+        thread_counts = [int(count) for count in args.threads.split(",")]
+        print(f"{'threads':>8} {'decisions/s':>12} {'approvals/s':>12}")
+        for threads, throughput in benchmark_contention(thread_counts, args.operations, args.seed).items():
+            print(f"{threads:>8} {throughput['decisions']:>12.0f} {throughput['approvals']:>12.0f}")
+
+if __name__ == "__main__":
+    main()
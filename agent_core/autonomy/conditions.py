@@ -0,0 +1,171 @@
+"""
+Condition expressions for the Nick the Great Unified Agent.
+
+This module compiles the condition strings used by the decision matrix (e.g.
+"amount <= 10.0 and experiment_has_positive_roi") into closures. Only a small,
+safe subset of Python expression syntax is accepted: context keys, literals,
+comparisons and boolean operators. Anything else is rejected at compile time,
+so conditions can never call functions or reach attributes.
+"""
+
+import ast
+import functools
+import operator
+from typing import Dict, Any, Callable, Tuple
+
+# Maximum number of distinct condition strings kept compiled
+CONDITION_CACHE_SIZE = 1024
+
+COMPARISON_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right
+}
+
+class ConditionError(ValueError):
+    """Raised when a condition uses syntax outside the supported subset."""
+
+class MissingContextKey(KeyError):
+    """Raised when a condition refers to a key that is not in the context."""
+
+Condition = Callable[[Dict[str, Any]], Any]
+
+@functools.lru_cache(maxsize=CONDITION_CACHE_SIZE)
+def compile_condition(expression: str) -> Condition:
+    """
+    Compile a condition expression.
+
+    Args:
+        expression: The condition, e.g. "platform in ['twitter', 'facebook']"
+
+    Returns:
+        Condition: A function that evaluates the condition against a context dictionary
+
+    Raises:
+        ConditionError: If the expression is not valid or uses unsupported syntax
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ConditionError(f"Invalid condition '{expression}': {e.msg}") from e
+
+    return _compile_node(tree.body, expression)
+
+@functools.lru_cache(maxsize=CONDITION_CACHE_SIZE)
+def condition_names(expression: str) -> Tuple[str, ...]:
+    """
+    Get the context keys a condition reads.
+
+    Args:
+        expression: The condition
+
+    Returns:
+        Tuple[str, ...]: The context keys, sorted
+
+    Raises:
+        ConditionError: If the expression is not valid
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ConditionError(f"Invalid condition '{expression}': {e.msg}") from e
+
+    return tuple(sorted({node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}))
+
+def _compile_node(node: ast.AST, expression: str) -> Condition:
+    """Compile a single AST node into a closure over the context."""
+    if isinstance(node, ast.Name):
+        name = node.id
+
+        def lookup(context):
+            try:
+                return context[name]
+            except KeyError:
+                raise MissingContextKey(name) from None
+        return lookup
+
+    if isinstance(node, (ast.Constant, ast.List, ast.Tuple, ast.Set)) or _is_negative_number(node):
+        value = _literal(node, expression)
+        return lambda context: value
+
+    if isinstance(node, ast.BoolOp):
+        operands = [_compile_node(value, expression) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return lambda context: all(operand(context) for operand in operands)
+        return lambda context: any(operand(context) for operand in operands)
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        operand = _compile_node(node.operand, expression)
+        return lambda context: not operand(context)
+
+    if isinstance(node, ast.Compare):
+        return _compile_comparison(node, expression)
+
+    raise ConditionError(f"Unsupported syntax in condition '{expression}': {type(node).__name__}")
+
+def _compile_comparison(node: ast.Compare, expression: str) -> Condition:
+    """Compile a (possibly chained) comparison such as "5 < amount <= 10"."""
+    for op in node.ops:
+        if type(op) not in COMPARISON_OPERATORS:
+            raise ConditionError(f"Unsupported operator in condition '{expression}': {type(op).__name__}")
+
+    left = _compile_node(node.left, expression)
+    steps = [_compile_step(op, comparator, expression) for op, comparator in zip(node.ops, node.comparators)]
+
+    if len(steps) == 1:
+        compare, right = steps[0]
+        return lambda context: compare(left(context), right(context))
+
+    def chained(context):
+        value = left(context)
+        for compare, operand in steps:
+            next_value = operand(context)
+            if not compare(value, next_value):
+                return False
+            value = next_value
+        return True
+    return chained
+
+def _compile_step(op: ast.cmpop, comparator: ast.AST, expression: str) -> Tuple[Callable[[Any, Any], bool], Condition]:
+    """Compile one operator and right-hand operand of a comparison."""
+    compare = COMPARISON_OPERATORS[type(op)]
+
+    # Membership in a literal collection becomes a set lookup
+    if isinstance(op, (ast.In, ast.NotIn)) and isinstance(comparator, (ast.List, ast.Tuple, ast.Set)):
+        items = _literal(comparator, expression)
+        try:
+            members = frozenset(items)
+        except TypeError:
+            members = None
+        if members is not None:
+            negate = isinstance(op, ast.NotIn)
+
+            def contains(value, _):
+                try:
+                    found = value in members
+                except TypeError:
+                    # Unhashable values can still equal an item
+                    found = value in items
+                return found != negate
+            return contains, lambda context: items
+
+    return compare, _compile_node(comparator, expression)
+
+def _is_negative_number(node: ast.AST) -> bool:
+    """Check whether a node is a negative numeric literal like -5."""
+    return (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub)
+            and isinstance(node.operand, ast.Constant) and isinstance(node.operand.value, (int, float)))
+
+def _literal(node: ast.AST, expression: str) -> Any:
+    """Evaluate a literal node (numbers, strings, booleans, None and collections of them)."""
+    try:
+        return ast.literal_eval(node)
+    except ValueError as e:
+        raise ConditionError(f"Unsupported literal in condition '{expression}'") from e
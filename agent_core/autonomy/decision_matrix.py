@@ -7,12 +7,18 @@ and when it needs human approval.
 
 import logging
 import enum
+import threading
 from typing import Dict, Any, Optional, List, Tuple
 
+from .conditions import compile_condition, condition_names, Condition, ConditionError
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Stands in for context keys that are absent when grouping batch items
+_MISSING = object()
+
 class DecisionCategory(enum.Enum):
     """Categories of decisions that the agent can make."""
     CONTENT_CREATION = "content_creation"
@@ -37,11 +43,22 @@ class DecisionMatrix:
     - First level: Decision category (e.g., CONTENT_CREATION)
     - Second level: Action type (e.g., "generate_ebook")
     - Third level: Conditions and approval levels
+    
+    Reads don't lock: update_matrix builds a new rules dictionary for the action and swaps it
+    in (copy-on-write), so readers always see either the old or the new rules.
     """
     
     def __init__(self):
         """Initialize the decision matrix with default values."""
         self.matrix = self._create_default_matrix()
+        self._write_lock = threading.Lock()  # Serializes update_matrix calls
+
+        # Compiled conditions per (category, action), rebuilt when update_matrix changes them
+        self._compiled_rules = {}  # Dictionary of (category, action) to (conditions, rules, context keys read)
+        for category, actions in self.matrix.items():
+            for action in actions:
+                self._compiled_action_rules(category, action)
+
         logger.info("Decision Matrix initialized with default values")
     
     def _create_default_matrix(self) -> Dict[DecisionCategory, Dict[str, Dict[str, Any]]]:
@@ -175,31 +192,108 @@ class DecisionMatrix:
         Returns:
             ApprovalLevel: The required approval level
         """
+        return self.match(category, action, context)[0]
+    
+    def match(self, category: DecisionCategory, action: str, context: Dict[str, Any]) -> Tuple[ApprovalLevel, Optional[str]]:
+        """
+        Determine the approval level for an action and the condition that set it.
+        
+        Args:
+            category: The decision category
+            action: The specific action
+            context: The context in which the action is being performed
+        
+        Returns:
+            Tuple[ApprovalLevel, Optional[str]]: (approval level, matched condition or None if the default applied)
+        """
         if category not in self.matrix:
             logger.warning(f"Unknown decision category: {category}")
-            return ApprovalLevel.APPROVAL_REQUIRED
+            return ApprovalLevel.APPROVAL_REQUIRED, None
         
         if action not in self.matrix[category]:
             logger.warning(f"Unknown action '{action}' in category {category}")
-            return ApprovalLevel.APPROVAL_REQUIRED
+            return ApprovalLevel.APPROVAL_REQUIRED, None
         
-        action_rules = self.matrix[category][action]
-        default_level = action_rules["default"]
+        default_level = self.matrix[category][action]["default"]
+        condition_str, level = self._match_rule(self._compiled_action_rules(category, action), context)
+
+        if condition_str is not None:
+            logger.info(f"Condition '{condition_str}' met for {category.value}.{action}, setting approval level to {level.value}")
+            return level, condition_str
         
-        # Check conditions
-        for condition_str, level in action_rules.get("conditions", {}).items():
+        logger.info(f"Using default approval level {default_level.value} for {category.value}.{action}")
+        return default_level, None
+
+    def get_approval_levels(self, items: List[Tuple[DecisionCategory, str, Dict[str, Any]]]) -> List[ApprovalLevel]:
+        """
+        Determine the approval levels for a batch of actions.
+
+        Items are grouped by action, and within a group each distinct combination of the
+        context values the action's conditions read is only evaluated once.
+
+        Args:
+            items: List of (category, action, context) tuples
+
+        Returns:
+            List[ApprovalLevel]: The required approval level for each item, in order
+        """
+        levels = [None] * len(items)
+        groups = {}
+        for index, (category, action, context) in enumerate(items):
+            groups.setdefault((category, action), []).append(index)
+
+        for (category, action), indexes in groups.items():
+            if category not in self.matrix or action not in self.matrix[category]:
+                logger.warning(f"Unknown action '{action}' in category {category}")
+                for index in indexes:
+                    levels[index] = ApprovalLevel.APPROVAL_REQUIRED
+                continue
+
+            default_level = self.matrix[category][action]["default"]
+            self._compiled_action_rules(category, action)
+            _, rules, names = self._compiled_rules[(category, action)]
+            results = {}
+
+            for index in indexes:
+                context = items[index][2]
+                key = tuple(context.get(name, _MISSING) for name in names)
+                try:
+                    level = results.get(key)
+                except TypeError:
+                    # Unhashable context values can't be shared; evaluate this item on its own
+                    key = None
+                    level = None
+
+                if level is None:
+                    level = self._match_rule(rules, context)[1] or default_level
+                    if key is not None:
+                        results[key] = level
+                levels[index] = level
+
+        return levels
+
+    def _match_rule(self, rules: List[Tuple[str, Optional[Condition], ApprovalLevel]],
+                    context: Dict[str, Any]) -> Tuple[Optional[str], Optional[ApprovalLevel]]:
+        """
+        Find the first rule whose condition holds in a context.
+
+        Args:
+            rules: Compiled rules from _compiled_action_rules
+            context: The context in which the action is being performed
+
+        Returns:
+            Tuple[Optional[str], Optional[ApprovalLevel]]: (condition, approval level), or (None, None) if no condition holds
+        """
+        for condition_str, condition, level in rules:
             try:
-                # Simple condition evaluation (not secure, but functional for prototype)
-                # In production, use a proper expression evaluator
-                condition_met = eval(condition_str, {"__builtins__": {}}, context)
-                if condition_met:
-                    logger.info(f"Condition '{condition_str}' met for {category.value}.{action}, setting approval level to {level.value}")
-                    return level
+                if condition is None:
+                    raise ConditionError(f"Condition '{condition_str}' could not be compiled")
+                if condition(context):
+                    return condition_str, level
             except Exception as e:
                 logger.error(f"Error evaluating condition '{condition_str}': {e}")
-        
-        logger.info(f"Using default approval level {default_level.value} for {category.value}.{action}")
-        return default_level
+
+        return None, None
     
     def update_matrix(self, category: DecisionCategory, action: str, 
                      updates: Dict[str, Any]) -> bool:
@@ -215,26 +309,78 @@ class DecisionMatrix:
             bool: True if the update was successful, False otherwise
         """
         try:
-            if category not in self.matrix:
-                self.matrix[category] = {}
+            # Validate the whole update before touching the matrix, so a rejected update changes nothing
+            if "default" in updates and not isinstance(updates["default"], ApprovalLevel):
+                raise ValueError(f"Invalid default approval level: {updates['default']!r}")
+            for condition, level in updates.get("conditions", {}).items():
+                compile_condition(condition)
+                if not isinstance(level, ApprovalLevel):
+                    raise ValueError(f"Invalid approval level for condition '{condition}': {level!r}")
             
-            if action not in self.matrix[category]:
-                self.matrix[category][action] = {"default": ApprovalLevel.APPROVAL_REQUIRED, "conditions": {}}
-            
-            # Update default approval level if provided
-            if "default" in updates:
-                self.matrix[category][action]["default"] = updates["default"]
-            
-            # Update conditions if provided
-            if "conditions" in updates:
-                if "conditions" not in self.matrix[category][action]:
-                    self.matrix[category][action]["conditions"] = {}
+            with self._write_lock:
+                current = self.matrix.get(category, {}).get(action, {"default": ApprovalLevel.APPROVAL_REQUIRED, "conditions": {}})
+                action_rules = dict(current)
+                if "default" in updates:
+                    action_rules["default"] = updates["default"]
+                if "conditions" in updates:
+                    action_rules["conditions"] = {**current.get("conditions", {}), **updates["conditions"]}
                 
-                for condition, level in updates["conditions"].items():
-                    self.matrix[category][action]["conditions"][condition] = level
+                # Publish the new rules with a single assignment, compiling them just before
+                self._compile_action_rules(category, action, action_rules.get("conditions", {}))
+                self.matrix.setdefault(category, {})[action] = action_rules
             
             logger.info(f"Updated decision matrix for {category.value}.{action}")
             return True
         except Exception as e:
             logger.error(f"Error updating decision matrix: {e}")
             return False
+
+    def _compiled_action_rules(self, category: DecisionCategory, action: str) -> List[Tuple[str, Optional[Condition], ApprovalLevel]]:
+        """
+        Get the compiled conditions for an action, compiling them if they changed.
+
+        Args:
+            category: The decision category
+            action: The specific action
+
+        Returns:
+            List: (condition string, compiled condition or None if invalid, approval level) tuples, in order
+        """
+        conditions = self.matrix[category][action].get("conditions", {})
+        cached = self._compiled_rules.get((category, action))
+
+        # Conditions may also be edited directly on the matrix, so check the cached copy still matches
+        if cached is None or cached[0] != conditions:
+            cached = self._compile_action_rules(category, action, conditions)
+
+        return cached[1]
+
+    def _compile_action_rules(self, category: DecisionCategory, action: str,
+                              conditions: Dict[str, ApprovalLevel]) -> Tuple[Dict[str, ApprovalLevel], List, Tuple[str, ...]]:
+        """
+        Compile an action's conditions and cache the result.
+
+        Args:
+            category: The decision category
+            action: The specific action
+            conditions: The action's conditions
+
+        Returns:
+            Tuple: (copy of the conditions, compiled rules, context keys read)
+        """
+        # Work on a copy, so a concurrent direct edit can't change the conditions mid-iteration
+        conditions = dict(conditions)
+        rules = []
+        names = set()
+        for condition_str, level in conditions.items():
+            try:
+                condition = compile_condition(condition_str)
+                names.update(condition_names(condition_str))
+            except ConditionError as e:
+                logger.error(f"Error compiling condition '{condition_str}': {e}")
+                condition = None
+            rules.append((condition_str, condition, level))
+
+        compiled = (conditions, rules, tuple(sorted(names)))
+        self._compiled_rules[(category, action)] = compiled
+        return compiled
@@ -0,0 +1,281 @@
+"""
+Experiment Log Store for the Nick the Great Unified Agent.
+
+This module implements the log kept for each experiment. Recent entries are kept in
+memory and older ones are written to JSON-lines segment files, one directory per
+experiment. Each segment is indexed by its timestamp range and log levels, so queries
+by time and level only read the segments that can match.
+"""
+
+import os
+import json
+import bisect
+import logging
+import tempfile
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Iterator, Union
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Number of entries written per segment file
+DEFAULT_SEGMENT_SIZE = 500
+
+# Number of recent entries included when an experiment is serialized
+DEFAULT_TAIL_SIZE = 100
+
+def default_log_dir() -> str:
+    """Get the directory experiment logs are written to (EXPERIMENT_LOG_DIR, or a temporary directory)."""
+    return os.environ.get("EXPERIMENT_LOG_DIR") or os.path.join(tempfile.gettempdir(), "experiment_logs")
+
+class ExperimentLog:
+    """
+    Append-only log of an experiment.
+
+    Supports len(), iteration, indexing and comparison with a list of entries, so it can be
+    used where experiments used to keep a plain list. Each entry is a dictionary with
+    timestamp, level and message.
+    """
+
+    def __init__(self,
+                 experiment_id: str,
+                 log_dir: Optional[str] = None,
+                 segment_size: int = DEFAULT_SEGMENT_SIZE,
+                 tail_size: int = DEFAULT_TAIL_SIZE):
+        """
+        Initialize the log.
+
+        Args:
+            experiment_id: The ID of the experiment
+            log_dir: Directory for segment files (defaults to default_log_dir())
+            segment_size: Number of entries kept in memory before they are written as a segment
+            tail_size: Number of recent entries kept for serialization
+        """
+        self.experiment_id = experiment_id
+        self.directory = os.path.join(log_dir or default_log_dir(), experiment_id)
+        self.segment_size = segment_size
+        self.segments = []  # Segment index: file, start, count, min_timestamp, max_timestamp, levels
+        self.tail = deque(maxlen=tail_size)  # Most recent entries
+        self._active = []  # Entries not written to a segment yet
+        self._starts = []  # Index of the first entry of each segment, for bisecting
+        self._cached_segment = (None, None)  # (segment file, entries) of the last segment read
+        self._lock = threading.RLock()
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """
+        Add an entry, writing a segment once enough entries have been added.
+
+        Args:
+            entry: The log entry
+        """
+        with self._lock:
+            self._active.append(entry)
+            self.tail.append(entry)
+            if len(self._active) >= self.segment_size:
+                self.flush()
+
+    def extend(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Add several entries.
+
+        Args:
+            entries: The log entries
+        """
+        for entry in entries:
+            self.append(entry)
+
+    def flush(self) -> None:
+        """Write the entries kept in memory to segments, topping up the last segment first."""
+        with self._lock:
+            if not self._active:
+                return
+
+            # A partly filled segment (from an earlier explicit flush) is appended to
+            if self.segments and self.segments[-1]["count"] < self.segment_size:
+                segment = self.segments[-1]
+            else:
+                segment = {
+                    "file": f"{len(self.segments):06d}.jsonl",
+                    "start": self._flushed_count(),
+                    "count": 0,
+                    "min_timestamp": None,
+                    "max_timestamp": None,
+                    "levels": {}
+                }
+            entries = self._active[:self.segment_size - segment["count"]]
+
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(os.path.join(self.directory, segment["file"]), "a") as f:
+                    f.writelines(json.dumps(entry) + "\n" for entry in entries)
+            except OSError as e:
+                # Keep the entries in memory and try again on the next flush
+                logger.error(f"Error writing log segment for experiment {self.experiment_id}: {e}")
+                return
+
+            timestamps = [entry["timestamp"] for entry in entries]
+            if segment["count"]:
+                timestamps += [segment["min_timestamp"], segment["max_timestamp"]]
+            segment["min_timestamp"] = min(timestamps)
+            segment["max_timestamp"] = max(timestamps)
+            for entry in entries:
+                segment["levels"][entry["level"]] = segment["levels"].get(entry["level"], 0) + 1
+            if not segment["count"]:
+                self.segments.append(segment)
+                self._starts.append(segment["start"])
+            segment["count"] += len(entries)
+
+            if self._cached_segment[0] == segment["file"]:
+                self._cached_segment = (None, None)
+            self._active = self._active[len(entries):]
+
+        # Anything left over starts the next segment
+        if self._active:
+            self.flush()
+
+    def query(self,
+              start_time: Optional[float] = None,
+              end_time: Optional[float] = None,
+              level: Optional[str] = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get entries in a time range and/or at a level, oldest first.
+
+        Only segments whose timestamp range overlaps [start_time, end_time] and that contain
+        the level are read.
+
+        Args:
+            start_time: Earliest timestamp (inclusive)
+            end_time: Latest timestamp (inclusive)
+            level: Log level to match
+            limit: Maximum number of entries to return
+
+        Returns:
+            List[Dict[str, Any]]: The matching entries
+        """
+        def matches(entry):
+            return ((start_time is None or entry["timestamp"] >= start_time)
+                    and (end_time is None or entry["timestamp"] <= end_time)
+                    and (level is None or entry["level"] == level))
+
+        with self._lock:
+            segments = [
+                segment for segment in self.segments
+                if (start_time is None or segment["max_timestamp"] >= start_time)
+                and (end_time is None or segment["min_timestamp"] <= end_time)
+                and (level is None or level in segment["levels"])
+            ]
+            active = list(self._active)
+
+        result = []
+        for entries in [self._read_segment(segment) for segment in segments] + [active]:
+            for entry in entries:
+                if matches(entry):
+                    result.append(entry)
+                    if limit is not None and len(result) >= limit:
+                        return result
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the log to a dictionary: the segment index, without any entries.
+
+        Entries kept in memory are written first, so the segments cover the whole log.
+
+        Returns:
+            Dict: The log as a dictionary
+        """
+        with self._lock:
+            self.flush()
+            return {
+                "directory": self.directory,
+                "segment_size": self.segment_size,
+                "segments": [dict(segment) for segment in self.segments],
+                "count": len(self)
+            }
+
+    @classmethod
+    def from_dict(cls, experiment_id: str, data: Dict[str, Any], tail: Optional[List[Dict[str, Any]]] = None) -> 'ExperimentLog':
+        """
+        Create a log from a dictionary created by to_dict.
+
+        Args:
+            experiment_id: The ID of the experiment
+            data: The dictionary containing the segment index
+            tail: The most recent entries, if known
+
+        Returns:
+            ExperimentLog: The created log
+        """
+        log = cls(experiment_id, segment_size=data.get("segment_size", DEFAULT_SEGMENT_SIZE))
+        log.directory = data["directory"]
+        log.segments = [dict(segment) for segment in data.get("segments", [])]
+        log._starts = [segment["start"] for segment in log.segments]
+        log.tail.extend(tail or [])
+        return log
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._flushed_count() + len(self._active)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            segments = list(self.segments)
+            active = list(self._active)
+
+        for segment in segments:
+            yield from self._read_segment(segment)
+        yield from active
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        with self._lock:
+            length = len(self)
+            if index < 0:
+                index += length
+            if not 0 <= index < length:
+                raise IndexError("experiment log index out of range")
+
+            flushed = self._flushed_count()
+            if index >= flushed:
+                return self._active[index - flushed]
+
+            # Recent entries are usually still in the tail
+            if index >= length - len(self.tail):
+                return self.tail[index - (length - len(self.tail))]
+
+            segment = self.segments[bisect.bisect_right(self._starts, index) - 1]
+        return self._read_segment(segment)[index - segment["start"]]
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, ExperimentLog):
+            other = list(other)
+        if isinstance(other, list):
+            return len(self) == len(other) and list(self) == other
+        return NotImplemented
+
+    def _flushed_count(self) -> int:
+        """Get the number of entries written to segments."""
+        if not self.segments:
+            return 0
+        return self.segments[-1]["start"] + self.segments[-1]["count"]
+
+    def _read_segment(self, segment: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Read a segment's entries, reusing the last segment read."""
+        cached_file, cached_entries = self._cached_segment
+        if cached_file == segment["file"]:
+            return cached_entries
+
+        try:
+            with open(os.path.join(self.directory, segment["file"])) as f:
+                entries = [json.loads(line) for line in f]
+        except OSError as e:
+            logger.error(f"Error reading log segment {segment['file']} for experiment {self.experiment_id}: {e}")
+            return []
+
+        self._cached_segment = (segment["file"], entries)
+        return entries
@@ -0,0 +1,174 @@
+"""
+Online statistics for experiments in the Nick the Great Unified Agent.
+
+This module implements streaming accumulators (Welford's algorithm), which keep the
+count, mean and variance of a metric in O(1) per observation, and a mixture sequential
+probability ratio test (mSPRT) on top of them. The mSPRT gives an always-valid p-value,
+so an experiment can be checked after every observation and stopped as soon as it is
+significant without inflating the false positive rate.
+"""
+
+import math
+from typing import Dict, Any, Optional
+
+class RunningStats:
+    """
+    Count, mean and variance of a stream of values, updated with Welford's algorithm.
+    """
+
+    def __init__(self):
+        """Initialize an empty accumulator."""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared differences from the mean
+
+    def add(self, value: float) -> None:
+        """
+        Add a value.
+
+        Args:
+            value: The observed value
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: 'RunningStats') -> None:
+        """
+        Add all the values of another accumulator (Chan et al.'s parallel update).
+
+        Args:
+            other: The other accumulator
+        """
+        if not other.count:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    @property
+    def variance(self) -> float:
+        """The sample variance (0 with fewer than two values)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        """The sample standard deviation."""
+        return math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the accumulator to a dictionary.
+
+        Returns:
+            Dict: The accumulator as a dictionary
+        """
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "variance": self.variance}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RunningStats':
+        """
+        Create an accumulator from a dictionary.
+
+        Args:
+            data: The dictionary containing the accumulator data
+
+        Returns:
+            RunningStats: The created accumulator
+        """
+        stats = cls()
+        stats.count = data.get("count", 0)
+        stats.mean = data.get("mean", 0.0)
+        stats.m2 = data.get("m2", 0.0)
+        return stats
+
+def msprt_likelihood_ratio(control: RunningStats, treatment: RunningStats, mixture_variance: Optional[float] = None) -> float:
+    """
+    Compute the mSPRT likelihood ratio for a difference in means.
+
+    Uses a normal mixture N(0, mixture_variance) over the true difference, with the
+    variance of the observed difference estimated from both samples.
+
+    Args:
+        control: Accumulator for the control variant
+        treatment: Accumulator for the treatment variant
+        mixture_variance: Variance of the mixing distribution (defaults to the pooled sample variance)
+
+    Returns:
+        float: The likelihood ratio (1.0 if there isn't enough data to test)
+    """
+    if control.count < 2 or treatment.count < 2:
+        return 1.0
+
+    variance = control.variance / control.count + treatment.variance / treatment.count
+    if variance <= 0:
+        return 1.0
+
+    if mixture_variance is None:
+        mixture_variance = (control.m2 + treatment.m2) / (control.count + treatment.count - 2)
+    if mixture_variance <= 0:
+        return 1.0
+
+    difference = treatment.mean - control.mean
+    log_ratio = (0.5 * math.log(variance / (variance + mixture_variance))
+                 + difference * difference * mixture_variance / (2 * variance * (variance + mixture_variance)))
+    # The ratio only matters up to 1 / alpha, so cap it instead of overflowing
+    return math.exp(min(log_ratio, 700.0))
+
+class SequentialTest:
+    """
+    Always-valid sequential test of a treatment variant against a control.
+
+    The p-value never increases, so the test can be checked after every observation.
+    """
+
+    def __init__(self, confidence_level: float = 0.95, min_samples: int = 30, mixture_variance: Optional[float] = None):
+        """
+        Initialize the test.
+
+        Args:
+            confidence_level: Confidence level at which the test stops (e.g. 0.95)
+            min_samples: Minimum observations per variant before the test can stop
+            mixture_variance: Variance of the mSPRT mixing distribution (see msprt_likelihood_ratio)
+        """
+        self.alpha = 1.0 - confidence_level
+        self.min_samples = min_samples
+        self.mixture_variance = mixture_variance
+        self.p_value = 1.0
+
+    def update(self, control: RunningStats, treatment: RunningStats) -> bool:
+        """
+        Update the p-value with the current accumulators.
+
+        Args:
+            control: Accumulator for the control variant
+            treatment: Accumulator for the treatment variant
+
+        Returns:
+            bool: True if the difference is significant at the confidence level
+        """
+        # Variance estimates from a handful of samples would make the ratio unreliable
+        if control.count < self.min_samples or treatment.count < self.min_samples:
+            return False
+
+        ratio = msprt_likelihood_ratio(control, treatment, self.mixture_variance)
+        self.p_value = min(self.p_value, 1.0 / ratio)
+        return self.p_value <= self.alpha
+
+    def is_significant(self, control: RunningStats, treatment: RunningStats) -> bool:
+        """
+        Check whether the test can stop.
+
+        Args:
+            control: Accumulator for the control variant
+            treatment: Accumulator for the treatment variant
+
+        Returns:
+            bool: True if both variants have enough samples and the p-value is at most alpha
+        """
+        return (control.count >= self.min_samples and treatment.count >= self.min_samples
+                and self.p_value <= self.alpha)
@@ -13,6 +13,8 @@ import random
 from typing import Dict, Any, Optional, List, Tuple, Callable
 
 from .risk_tolerance import RiskToleranceProfile, RiskAssessment, RiskCategory, RiskLevel
+from .experiment_log import ExperimentLog
+from .experiment_statistics import RunningStats, SequentialTest
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -35,6 +37,9 @@ class ExperimentStatus(enum.Enum):
     FAILED = "failed"  # Experiment has failed
     CANCELLED = "cancelled"  # Experiment has been cancelled
 
+# Success criteria that configure the sequential test rather than naming expected results
+SEQUENTIAL_TEST_CRITERIA = ("confidence_level", "metric", "control_variant", "min_samples", "mixture_variance")
+
 class Experiment:
     """
     Experiment for testing different autonomy settings.
@@ -49,7 +54,8 @@ class Experiment:
                 parameters: Dict[str, Any],
                 success_criteria: Dict[str, Any],
                 max_duration_seconds: int = 3600,
-                callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+                callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                log_dir: Optional[str] = None):
         """
         Initialize the experiment.
         
@@ -61,6 +67,7 @@ class Experiment:
             success_criteria: Criteria for determining if the experiment is successful
             max_duration_seconds: Maximum duration of the experiment in seconds
             callback: Function to call when the experiment completes
+            log_dir: Directory for the experiment's log segments (see experiment_log.default_log_dir)
         """
         self.id = str(uuid.uuid4())
         self.name = name
@@ -76,7 +83,11 @@ class Experiment:
         self.end_time = None
         self.results = {}
         self.metrics = {}
-        self.logs = []
+        self.logs = ExperimentLog(self.id, log_dir)
+        
+        # Streaming statistics per variant, and a sequential test per non-control variant
+        self.variants = {}  # Dictionary of variant name to {metric name: RunningStats}
+        self.sequential_tests = {}  # Dictionary of variant name to SequentialTest against the control
         
         logger.info(f"Created experiment: {name} ({self.id})")
     
@@ -146,6 +157,9 @@ class Experiment:
         self.status = ExperimentStatus.COMPLETED
         self.end_time = time.time()
         self.results = results
+        if "confidence_level" in self.success_criteria:
+            # Experiments that ran their full duration are judged on the statistics so far
+            self.results = {**self.statistical_results(), **results}
         
         # Calculate success based on success criteria
         success = self._evaluate_success()
@@ -218,6 +232,102 @@ class Experiment:
         self.metrics.update(metrics)
         logger.debug(f"Updated metrics for experiment {self.id}: {metrics}")
     
+    def record_observation(self, variant: str, metric: str, value: float) -> bool:
+        """
+        Record one observation of a metric for a variant.
+        
+        Updates the variant's accumulator in O(1). If the success criteria set a
+        "confidence_level", the tested metric ("metric", or the first one recorded) is checked
+        against the control variant ("control_variant", or the first variant recorded) with a
+        sequential test, and the experiment completes as soon as a variant is significant.
+        
+        Args:
+            variant: The variant name
+            metric: The metric name
+            value: The observed value
+        
+        Returns:
+            bool: True if this observation completed the experiment, False otherwise
+        """
+        self.variants.setdefault(variant, {}).setdefault(metric, RunningStats()).add(value)
+        
+        if self.status != ExperimentStatus.RUNNING or "confidence_level" not in self.success_criteria:
+            return False
+        
+        control = self._control_variant()
+        control_metrics = self.variants.get(control, {})
+        tested_metric = self.success_criteria.get("metric") or next(iter(control_metrics), None)
+        control_stats = control_metrics.get(metric)
+        # Nothing can be tested until the control has data for the tested metric
+        if metric != tested_metric or control_stats is None:
+            return False
+        
+        # An observation for the control changes every comparison; otherwise only its own
+        variants = [name for name in self.variants if name != control] if variant == control else [variant]
+        for name in variants:
+            treatment_stats = self.variants[name].get(metric)
+            if treatment_stats is None or name == control:
+                continue
+            
+            test = self.sequential_tests.get(name)
+            if test is None:
+                test = self.sequential_tests[name] = self._new_sequential_test()
+            
+            if test.update(control_stats, treatment_stats):
+                logger.info(f"Variant {name} of experiment {self.id} is significant (p = {test.p_value:.4f}), stopping early")
+                return self.complete(self.statistical_results())
+        
+        return False
+    
+    def statistical_results(self) -> Dict[str, Any]:
+        """
+        Summarize the variant statistics and sequential tests.
+        
+        Returns:
+            Dict[str, Any]: "variants" (accumulators per variant and metric), "control_variant",
+                "p_values" per tested variant and "winner" (the significant variant with the best
+                mean, or None, including while the control has no data for the tested metric)
+        """
+        control = self._control_variant()
+        control_metrics = self.variants.get(control, {})
+        metric = self.success_criteria.get("metric") or next(iter(control_metrics), None)
+        control_stats = control_metrics.get(metric)
+        
+        significant = []
+        if control_stats is not None:
+            significant = [
+                name for name, test in self.sequential_tests.items()
+                if name in self.variants and metric in self.variants[name]
+                and test.is_significant(control_stats, self.variants[name][metric])
+            ]
+        winner = None
+        if significant:
+            best = max(significant, key=lambda name: self.variants[name][metric].mean)
+            # A significant variant that is worse than the control means the control wins
+            winner = best if self.variants[best][metric].mean > control_stats.mean else control
+        
+        return {
+            "variants": {
+                name: {metric_name: stats.to_dict() for metric_name, stats in metrics.items()}
+                for name, metrics in self.variants.items()
+            },
+            "control_variant": control,
+            "p_values": {name: test.p_value for name, test in self.sequential_tests.items()},
+            "winner": winner
+        }
+    
+    def _new_sequential_test(self) -> SequentialTest:
+        """Create a sequential test configured by the success criteria."""
+        return SequentialTest(
+            self.success_criteria.get("confidence_level", 0.95),
+            self.success_criteria.get("min_samples", 30),
+            self.success_criteria.get("mixture_variance")
+        )
+    
+    def _control_variant(self) -> Optional[str]:
+        """Get the control variant: the configured one, or the first variant recorded."""
+        return self.success_criteria.get("control_variant") or next(iter(self.variants), None)
+    
     def add_log(self, message: str, level: str = "INFO", timestamp: Optional[float] = None) -> None:
         """
         Add a log entry to the experiment.
@@ -239,6 +349,25 @@ class Experiment:
         self.logs.append(log_entry)
         logger.debug(f"Added log entry to experiment {self.id}: {message}")
     
+    def get_logs(self,
+                 start_time: Optional[float] = None,
+                 end_time: Optional[float] = None,
+                 level: Optional[str] = None,
+                 limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get log entries in a time range and/or at a level.
+        
+        Args:
+            start_time: Earliest timestamp (inclusive)
+            end_time: Latest timestamp (inclusive)
+            level: Log level to match
+            limit: Maximum number of entries to return
+        
+        Returns:
+            List[Dict[str, Any]]: The matching log entries, oldest first
+        """
+        return self.logs.query(start_time, end_time, level, limit)
+    
     def _evaluate_success(self) -> bool:
         """
         Evaluate whether the experiment was successful based on the success criteria.
@@ -249,7 +378,19 @@ class Experiment:
         # This is a simplified implementation. In a real system, this would use
         # more sophisticated success evaluation algorithms.
         
+        if "confidence_level" in self.success_criteria:
+            winner = self.results.get("winner")
+            if not winner:
+                logger.info(f"No variant of experiment {self.id} reached confidence level {self.success_criteria['confidence_level']}")
+                return False
+            if winner == self._control_variant():
+                logger.info(f"Control variant {winner} of experiment {self.id} beat every other variant")
+                return False
+        
         for key, value in self.success_criteria.items():
+            if key in SEQUENTIAL_TEST_CRITERIA:
+                continue
+            
             if key not in self.results:
                 logger.warning(f"Success criterion {key} not found in results")
                 return False
@@ -264,6 +405,9 @@ class Experiment:
         """
         Convert the experiment to a dictionary.
         
+        Only the most recent log entries are included ("logs"); the rest are read from the
+        log segments listed in "log_index".
+        
         Returns:
             Dict: The experiment as a dictionary
         """
@@ -280,7 +424,13 @@ class Experiment:
             "end_time": self.end_time,
             "results": self.results,
             "metrics": self.metrics,
-            "logs": self.logs
+            "variants": {
+                name: {metric: stats.to_dict() for metric, stats in metrics.items()}
+                for name, metrics in self.variants.items()
+            },
+            "p_values": {name: test.p_value for name, test in self.sequential_tests.items()},
+            "logs": list(self.logs.tail),
+            "log_index": self.logs.to_dict()
         }
     
     @classmethod
@@ -309,7 +459,20 @@ class Experiment:
         experiment.end_time = data.get("end_time")
         experiment.results = data.get("results", {})
         experiment.metrics = data.get("metrics", {})
-        experiment.logs = data.get("logs", [])
+        experiment.variants = {
+            name: {metric: RunningStats.from_dict(stats) for metric, stats in metrics.items()}
+            for name, metrics in data.get("variants", {}).items()
+        }
+        for name, p_value in data.get("p_values", {}).items():
+            experiment.sequential_tests[name] = experiment._new_sequential_test()
+            experiment.sequential_tests[name].p_value = p_value
+        
+        if "log_index" in data:
+            experiment.logs = ExperimentLog.from_dict(experiment.id, data["log_index"], data.get("logs"))
+        else:
+            # Older dictionaries have the full list of entries
+            experiment.logs = ExperimentLog(experiment.id)
+            experiment.logs.extend(data.get("logs", []))
         
         return experiment
 
@@ -320,8 +483,14 @@ class ExperimentationFramework:
     This class provides methods for creating, running, and managing experiments.
     """
     
-    def __init__(self):
-        """Initialize the experimentation framework."""
+    def __init__(self, log_dir: Optional[str] = None):
+        """
+        Initialize the experimentation framework.
+        
+        Args:
+            log_dir: Directory for experiment log segments (see experiment_log.default_log_dir)
+        """
+        self.log_dir = log_dir
         self.experiments = {}
         logger.info("Initialized experimentation framework")
     
@@ -355,7 +524,8 @@ class ExperimentationFramework:
             parameters=parameters,
             success_criteria=success_criteria,
             max_duration_seconds=max_duration_seconds,
-            callback=callback
+            callback=callback,
+            log_dir=self.log_dir
         )
         
         self.experiments[experiment.id] = experiment
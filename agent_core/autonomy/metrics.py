@@ -0,0 +1,144 @@
+"""
+Metrics for the Nick the Great Unified Agent autonomy framework.
+
+This module implements the latency histograms used to see where autonomy decisions spend
+their time. Histograms use fixed cumulative buckets like Prometheus histograms and can be
+exported in the Prometheus text format, so no metrics client library is needed.
+"""
+
+import bisect
+import threading
+from typing import Dict, Any, Optional, Sequence
+
+# Bucket upper bounds (in seconds), from 1 microsecond to 100 milliseconds
+DEFAULT_LATENCY_BUCKETS = (
+    0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005,
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.1
+)
+
+class Histogram:
+    """
+    Thread-safe histogram of observed values.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            buckets: Sorted bucket upper bounds (an implicit +Inf bucket is added)
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # Per-bucket counts, not cumulative
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        Record a value.
+
+        Args:
+            value: The observed value
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current state of the histogram.
+
+        Returns:
+            Dict[str, Any]: "count", "sum", "mean" and "buckets", a list of (upper bound, cumulative count)
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+
+        return {"count": count, "sum": total, "mean": total / count if count else 0.0, "buckets": cumulative}
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile as the upper bound of the bucket that contains it.
+
+        Args:
+            q: The quantile, between 0 and 1
+
+        Returns:
+            Optional[float]: The estimate, or None if nothing has been observed
+        """
+        snapshot = self.snapshot()
+        if not snapshot["count"]:
+            return None
+
+        rank = q * snapshot["count"]
+        for bound, cumulative in snapshot["buckets"]:
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+class StageTimings:
+    """
+    Latency histograms for the stages of a pipeline, keyed by stage name.
+    """
+
+    def __init__(self, name: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Initialize the stage timings.
+
+        Args:
+            name: Metric name used in the Prometheus export
+            buckets: Bucket upper bounds (in seconds) for every stage
+        """
+        self.name = name
+        self.buckets = tuple(buckets)
+        self.histograms = {}  # Dictionary of stage name to Histogram
+        self._lock = threading.Lock()
+
+    def observe(self, timings: Dict[str, float]) -> None:
+        """
+        Record one duration per stage.
+
+        Args:
+            timings: Dictionary of stage name to duration (in seconds)
+        """
+        for stage, duration in timings.items():
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                with self._lock:
+                    histogram = self.histograms.setdefault(stage, Histogram(self.buckets))
+            histogram.observe(duration)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the current state of every stage's histogram.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Dictionary of stage name to histogram snapshot
+        """
+        return {stage: histogram.snapshot() for stage, histogram in list(self.histograms.items())}
+
+    def to_prometheus(self) -> str:
+        """
+        Export the histograms in the Prometheus text exposition format.
+
+        Returns:
+            str: The exported metrics
+        """
+        lines = [f"# TYPE {self.name} histogram"]
+        for stage, snapshot in sorted(self.snapshot().items()):
+            for bound, cumulative in snapshot["buckets"]:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{stage="{stage}"}} {snapshot["sum"]}')
+            lines.append(f'{self.name}_count{{stage="{stage}"}} {snapshot["count"]}')
+        return "\n".join(lines) + "\n"
@@ -9,9 +9,12 @@ import logging
 import enum
 import time
 import uuid
+import threading
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from .storage import AutonomyStore
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -86,6 +89,8 @@ class Notification:
         self.read_time = None
         self.action_taken = None
         self.action_time = None
+        self.status_listener = None  # Called with the notification after every status change
+        self._lock = threading.Lock()  # Makes taking an action atomic
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -146,8 +151,8 @@ class Notification:
     
     def mark_as_read(self) -> None:
         """Mark the notification as read."""
-        self.status = NotificationStatus.READ
         self.read_time = int(time.time())
+        self._set_status(NotificationStatus.READ)
     
     def take_action(self, action: str) -> bool:
         """
@@ -163,19 +168,32 @@ class Notification:
             logger.warning(f"Attempted to take action on notification {self.id} that doesn't require action")
             return False
         
-        if self.status == NotificationStatus.EXPIRED:
-            logger.warning(f"Attempted to take action on expired notification {self.id}")
-            return False
-        
         if self.action_options and action not in self.action_options:
             logger.warning(f"Invalid action '{action}' for notification {self.id}")
             return False
         
-        self.action_taken = action
-        self.action_time = int(time.time())
-        self.status = NotificationStatus.ACTIONED
+        with self._lock:
+            if self.status == NotificationStatus.EXPIRED:
+                logger.warning(f"Attempted to take action on expired notification {self.id}")
+                return False
+            
+            self.action_taken = action
+            self.action_time = int(time.time())
+            self._set_status(NotificationStatus.ACTIONED)
         return True
     
+    def _set_status(self, status: NotificationStatus) -> None:
+        """
+        Change the status and tell the status listener (if any).
+        
+        Args:
+            status: The new status
+        """
+        self.status = status
+        
+        if self.status_listener:
+            self.status_listener(self)
+    
     def is_expired(self) -> bool:
         """
         Check if the notification has expired.
@@ -193,9 +211,16 @@ class NotificationSystem:
     System for managing notifications in the agent.
     """
     
-    def __init__(self):
-        """Initialize the notification system."""
-        self.notifications = {}  # Dictionary of notification ID to Notification
+    def __init__(self, store: Optional[AutonomyStore] = None):
+        """
+        Initialize the notification system.
+        
+        Args:
+            store: Persistent store for notifications (in-memory only if None)
+        """
+        self.store = store
+        self.notifications = {}  # Dictionary of notification ID to Notification (only those used so far if there is a store)
+        self._lock = threading.RLock()  # Guards notifications
         logger.info("Notification System initialized")
     
     def create_notification(self, 
@@ -240,7 +265,8 @@ class NotificationSystem:
             expiry_time=expiry_time
         )
         
-        self.notifications[notification.id] = notification
+        self._track(notification)
+        self._persist(notification)
         logger.info(f"Created notification {notification.id}: {title}")
         
         # TODO: Send notification to backend for delivery to users
@@ -257,7 +283,12 @@ class NotificationSystem:
         Returns:
             Optional[Notification]: The notification, or None if not found
         """
-        return self.notifications.get(notification_id)
+        notification = self.notifications.get(notification_id)
+        if notification is None and self.store:
+            data = self.store.load("notifications", notification_id)
+            if data:
+                notification = self._track_loaded(data)
+        return notification
     
     def get_notifications(self, 
                          user_id: Optional[str] = None, 
@@ -280,9 +311,24 @@ class NotificationSystem:
         Returns:
             List[Notification]: The matching notifications
         """
+        if self.store:
+            filters = {
+                "user_id": user_id,
+                "status": status.value if status else None,
+                "type": notification_type.value if notification_type else None,
+                "related_entity_id": related_entity_id,
+                "related_entity_type": related_entity_type,
+                "action_required": action_required
+            }
+            records = self.store.query("notifications", {column: value for column, value in filters.items() if value is not None})[0]
+            return [self._track_loaded(data) for data in records]
+        
         result = []
         
-        for notification in self.notifications.values():
+        with self._lock:
+            notifications = list(self.notifications.values())
+        
+        for notification in notifications:
             # Apply filters
             if user_id is not None and notification.user_id != user_id:
                 continue
@@ -322,7 +368,7 @@ class NotificationSystem:
             logger.warning(f"Attempted to update non-existent notification: {notification_id}")
             return False
         
-        notification.status = status
+        notification._set_status(status)
         logger.info(f"Updated notification {notification_id} status to {status.value}")
         return True
     
@@ -343,3 +389,49 @@ class NotificationSystem:
             return False
         
         return notification.take_action(action)
+    
+    def _track(self, notification: Notification) -> Notification:
+        """
+        Keep a notification in memory and persist its status changes.
+        
+        Args:
+            notification: The notification
+        
+        Returns:
+            Notification: The same notification
+        """
+        with self._lock:
+            self.notifications[notification.id] = notification
+        notification.status_listener = self._persist
+        return notification
+    
+    def _track_loaded(self, data: Dict[str, Any]) -> Notification:
+        """
+        Get the in-memory instance of a notification loaded from the store, tracking it if it's new.
+        
+        Args:
+            data: The notification as returned by the store
+        
+        Returns:
+            Notification: The notification (the same instance for every caller)
+        """
+        with self._lock:
+            notification = self.notifications.get(data["id"])
+            if notification is None:
+                notification = self._track(Notification.from_dict(data))
+            return notification
+    
+    def _persist(self, notification: Notification) -> None:
+        """
+        Save a notification to the store (if there is one).
+        
+        Args:
+            notification: The notification
+        """
+        if not self.store:
+            return
+        
+        try:
+            self.store.save("notifications", notification.to_dict())
+        except Exception as e:
+            logger.error(f"Error persisting notification {notification.id}: {e}")
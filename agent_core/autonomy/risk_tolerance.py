@@ -5,9 +5,12 @@ This module implements the risk tolerance framework that determines the level of
 the agent is willing to take in different contexts.
 """
 
+import bisect
 import logging
+import threading
 import enum
-from typing import Dict, Any, Optional, List, Tuple
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Tuple, Callable
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -30,6 +33,32 @@ class RiskCategory(enum.Enum):
     SECURITY = "security"  # Risk related to security breaches
     PERFORMANCE = "performance"  # Risk related to performance degradation
 
+# Integer encoding of risk levels, so assessments and tolerances compare as plain ints
+RISK_LEVEL_VALUES = {
+    RiskLevel.MINIMAL: 1,
+    RiskLevel.LOW: 2,
+    RiskLevel.MEDIUM: 3,
+    RiskLevel.HIGH: 4,
+    RiskLevel.CRITICAL: 5
+}
+RISK_LEVELS_BY_VALUE = {value: level for level, value in RISK_LEVEL_VALUES.items()}
+
+# Default risk rules, applied under every profile. Each rule reads one context field and
+# raises the risk of one category:
+# - "level": the level when the field is truthy
+# - "thresholds": (bound, level) pairs; the level of the highest bound the value exceeds
+# - "values": a mapping of field value to level
+DEFAULT_RISK_RULES = [
+    {"category": RiskCategory.FINANCIAL, "field": "amount", "thresholds": [
+        (10, RiskLevel.LOW), (100, RiskLevel.MEDIUM), (500, RiskLevel.HIGH), (1000, RiskLevel.CRITICAL)
+    ]},
+    {"category": RiskCategory.REPUTATION, "field": "public", "level": RiskLevel.MEDIUM},
+    {"category": RiskCategory.COMPLIANCE, "field": "regulated", "level": RiskLevel.HIGH},
+    {"category": RiskCategory.SECURITY, "field": "sensitive_data", "level": RiskLevel.HIGH},
+    {"category": RiskCategory.OPERATIONAL, "field": "critical_system", "level": RiskLevel.HIGH},
+    {"category": RiskCategory.PERFORMANCE, "field": "resource_intensive", "level": RiskLevel.MEDIUM}
+]
+
 class RiskToleranceProfile:
     """
     Risk tolerance profile for the agent.
@@ -37,7 +66,8 @@ class RiskToleranceProfile:
     This class defines the risk tolerance levels for different risk categories.
     """
     
-    def __init__(self, name: str, description: str, tolerance_levels: Dict[RiskCategory, RiskLevel]):
+    def __init__(self, name: str, description: str, tolerance_levels: Dict[RiskCategory, RiskLevel],
+                 rules: Optional[List[Dict[str, Any]]] = None):
         """
         Initialize the risk tolerance profile.
         
@@ -45,10 +75,18 @@ class RiskToleranceProfile:
             name: The name of the profile
             description: A description of the profile
             tolerance_levels: A dictionary mapping risk categories to risk levels
+            rules: Extra risk rules applied under this profile (see DEFAULT_RISK_RULES)
         """
         self.name = name
         self.description = description
-        self.tolerance_levels = tolerance_levels
+        # Read-only, so every change goes through update_tolerance_level and bumps the version
+        self._tolerance_levels = dict(tolerance_levels)
+        self.tolerance_levels = MappingProxyType(self._tolerance_levels)
+        self.rules = []
+        self.version = 0  # Incremented on every change so assessments know to recompile
+        self._lock = threading.Lock()  # Keeps each change and its version bump together
+        for rule in rules or []:
+            self.add_rule(rule)
         logger.info(f"Created risk tolerance profile: {name}")
     
     def get_tolerance_level(self, category: RiskCategory) -> RiskLevel:
@@ -75,9 +113,26 @@ class RiskToleranceProfile:
             category: The risk category
             level: The new tolerance level
         """
-        self.tolerance_levels[category] = level
+        with self._lock:
+            self._tolerance_levels[category] = level
+            self.version += 1
         logger.info(f"Updated risk tolerance for {category.value} to {level.value}")
     
+    def add_rule(self, rule: Dict[str, Any]) -> None:
+        """
+        Add a risk rule to the profile.
+        
+        Args:
+            rule: The rule (see DEFAULT_RISK_RULES)
+        
+        Raises:
+            ValueError: If the rule is invalid
+        """
+        compile_risk_rule(rule)
+        with self._lock:
+            self.rules.append(rule)
+            self.version += 1
+    
     def to_dict(self) -> Dict[str, Any]:
         """
         Convert the profile to a dictionary.
@@ -88,7 +143,8 @@ class RiskToleranceProfile:
         return {
             "name": self.name,
             "description": self.description,
-            "tolerance_levels": {category.value: level.value for category, level in self.tolerance_levels.items()}
+            "tolerance_levels": {category.value: level.value for category, level in self.tolerance_levels.items()},
+            "rules": [_rule_to_dict(rule) for rule in self.rules]
         }
     
     @classmethod
@@ -110,9 +166,126 @@ class RiskToleranceProfile:
         return cls(
             name=data.get("name", "Unknown"),
             description=data.get("description", ""),
-            tolerance_levels=tolerance_levels
+            tolerance_levels=tolerance_levels,
+            rules=[_rule_from_dict(rule) for rule in data.get("rules", [])]
         )
 
+def compile_risk_rule(rule: Dict[str, Any]) -> Callable[[Any], int]:
+    """
+    Compile a risk rule into a function from field value to encoded risk level.
+
+    Args:
+        rule: The rule (see DEFAULT_RISK_RULES)
+
+    Returns:
+        Callable[[Any], int]: The compiled rule
+
+    Raises:
+        ValueError: If the rule is invalid
+    """
+    if not isinstance(rule.get("category"), RiskCategory) or not rule.get("field"):
+        raise ValueError(f"Risk rule needs a RiskCategory and a field: {rule}")
+
+    minimal = RISK_LEVEL_VALUES[RiskLevel.MINIMAL]
+
+    if "thresholds" in rule:
+        thresholds = sorted(rule["thresholds"], key=lambda threshold: threshold[0])
+        bounds = [bound for bound, _ in thresholds]
+        levels = [minimal] + [RISK_LEVEL_VALUES[level] for _, level in thresholds]
+        # The number of bounds strictly below the value picks the level
+        return lambda value: levels[bisect.bisect_left(bounds, value)]
+
+    if "level" in rule:
+        level = RISK_LEVEL_VALUES[rule["level"]]
+        return lambda value: level if value else minimal
+
+    if "values" in rule:
+        levels = {value: RISK_LEVEL_VALUES[level] for value, level in rule["values"].items()}
+
+        def lookup(value):
+            try:
+                return levels.get(value, minimal)
+            except TypeError:
+                return minimal
+        return lookup
+
+    raise ValueError(f"Risk rule needs thresholds, a level or values: {rule}")
+
+def _rule_to_dict(rule: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a risk rule to a JSON-friendly dictionary."""
+    data = {"category": rule["category"].value, "field": rule["field"]}
+    if "thresholds" in rule:
+        data["thresholds"] = [[bound, level.value] for bound, level in rule["thresholds"]]
+    elif "level" in rule:
+        data["level"] = rule["level"].value
+    elif "values" in rule:
+        data["values"] = {value: level.value for value, level in rule["values"].items()}
+    return data
+
+def _rule_from_dict(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Create a risk rule from a dictionary produced by _rule_to_dict."""
+    rule = {"category": RiskCategory(data["category"]), "field": data["field"]}
+    if "thresholds" in data:
+        rule["thresholds"] = [(bound, RiskLevel(level)) for bound, level in data["thresholds"]]
+    elif "level" in data:
+        rule["level"] = RiskLevel(data["level"])
+    elif "values" in data:
+        rule["values"] = {value: RiskLevel(level) for value, level in data["values"].items()}
+    return rule
+
+class RiskRuleEngine:
+    """
+    Compiled evaluator for a risk rule table.
+    
+    Rules are grouped by the context field they read, and only fields present in a
+    context are looked at, so rules for other fields cost nothing.
+    """
+    
+    def __init__(self, rules: List[Dict[str, Any]]):
+        """
+        Compile a rule table.
+        
+        Args:
+            rules: The risk rules (see DEFAULT_RISK_RULES)
+        """
+        self.categories = list(RiskCategory)
+        category_index = {category: index for index, category in enumerate(self.categories)}
+        
+        by_field = {}
+        for rule in rules:
+            by_field.setdefault(rule["field"], []).append((category_index[rule["category"]], compile_risk_rule(rule)))
+        
+        self._by_field = {field: tuple(evaluators) for field, evaluators in by_field.items()}
+        self.fields = tuple(sorted(self._by_field))
+        self._minimal = (RISK_LEVEL_VALUES[RiskLevel.MINIMAL],) * len(self.categories)
+    
+    def evaluate(self, context: Dict[str, Any]) -> Tuple[int, ...]:
+        """
+        Evaluate the rules against a context.
+        
+        Args:
+            context: The context in which the action is being performed
+        
+        Returns:
+            Tuple[int, ...]: The encoded risk level of each category, in RiskCategory order
+        """
+        levels = None
+        # Walk whichever is smaller: the context or the rule table
+        fields = context if len(context) < len(self._by_field) else self._by_field
+        for field in fields:
+            evaluators = self._by_field.get(field)
+            if evaluators is None or field not in context:
+                continue
+            value = context[field]
+            for index, evaluator in evaluators:
+                level = evaluator(value)
+                if levels is None:
+                    levels = list(self._minimal)
+                if level > levels[index]:
+                    levels[index] = level
+        
+        return self._minimal if levels is None else tuple(levels)
+
 class RiskAssessment:
     """
     Risk assessment for agent actions.
@@ -128,8 +301,34 @@ class RiskAssessment:
             profile: The risk tolerance profile to use
         """
         self.profile = profile
+        self._compiled_for = None
+        self._compile()
         logger.info(f"Initialized risk assessment with profile: {profile.name}")
     
+    def _compile(self) -> None:
+        """Compile the rule table and tolerance vector for the current profile."""
+        self.engine = RiskRuleEngine(DEFAULT_RISK_RULES + self.profile.rules)
+        self._tolerances = tuple(
+            RISK_LEVEL_VALUES[self.profile.get_tolerance_level(category)] for category in self.engine.categories
+        )
+        self._compiled_for = (id(self.profile), self.profile.version)
+    
+    def _levels(self, context: Dict[str, Any]) -> Tuple[int, ...]:
+        """
+        Get the encoded risk levels for a context.
+        
+        Args:
+            context: The context in which the action is being performed
+        
+        Returns:
+            Tuple[int, ...]: The encoded risk level of each category, in RiskCategory order
+        """
+        # The profile may have been swapped or edited since the last call
+        if self._compiled_for != (id(self.profile), self.profile.version):
+            self._compile()
+        
+        return self.engine.evaluate(context)
+    
     def assess_risk(self, action: str, context: Dict[str, Any]) -> Dict[RiskCategory, RiskLevel]:
         """
         Assess the risk of an action in a specific context.
@@ -141,47 +340,116 @@ class RiskAssessment:
         Returns:
             Dict[RiskCategory, RiskLevel]: The risk assessment for each category
         """
-        # This is a simplified implementation. In a real system, this would use
-        # more sophisticated risk assessment algorithms.
-        
-        # Default to minimal risk for all categories
-        assessment = {category: RiskLevel.MINIMAL for category in RiskCategory}
-        
-        # Assess financial risk
-        if "amount" in context:
-            amount = context["amount"]
-            if amount > 1000:
-                assessment[RiskCategory.FINANCIAL] = RiskLevel.CRITICAL
-            elif amount > 500:
-                assessment[RiskCategory.FINANCIAL] = RiskLevel.HIGH
-            elif amount > 100:
-                assessment[RiskCategory.FINANCIAL] = RiskLevel.MEDIUM
-            elif amount > 10:
-                assessment[RiskCategory.FINANCIAL] = RiskLevel.LOW
-        
-        # Assess reputation risk
-        if "public" in context and context["public"]:
-            assessment[RiskCategory.REPUTATION] = RiskLevel.MEDIUM
-        
-        # Assess compliance risk
-        if "regulated" in context and context["regulated"]:
-            assessment[RiskCategory.COMPLIANCE] = RiskLevel.HIGH
-        
-        # Assess security risk
-        if "sensitive_data" in context and context["sensitive_data"]:
-            assessment[RiskCategory.SECURITY] = RiskLevel.HIGH
-        
-        # Assess operational risk
-        if "critical_system" in context and context["critical_system"]:
-            assessment[RiskCategory.OPERATIONAL] = RiskLevel.HIGH
-        
-        # Assess performance risk
-        if "resource_intensive" in context and context["resource_intensive"]:
-            assessment[RiskCategory.PERFORMANCE] = RiskLevel.MEDIUM
-        
-        logger.info(f"Risk assessment for action '{action}': {assessment}")
+        levels = self._levels(context)
+        assessment = {
+            category: RISK_LEVELS_BY_VALUE[level] for category, level in zip(self.engine.categories, levels)
+        }
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Risk assessment for action '{action}': {assessment}")
         return assessment
     
+    def check_tolerance(self, action: str, context: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        """
+        Assess the risk of an action and check it against the tolerance levels.
+        
+        Equivalent to is_within_tolerance(assess_risk(action, context)), without building the
+        assessment dictionary.
+        
+        Args:
+            action: The action to assess
+            context: The context in which the action is being performed
+        
+        Returns:
+            Tuple[bool, Optional[str]]: (within_tolerance, reason)
+        """
+        reason = self._levels_exceeded(self._levels(context))
+        if reason:
+            logger.warning(reason)
+            return False, reason
+        
+        return True, None
+    
+    def check_tolerance_levels(self, action: str, context: Dict[str, Any]) -> Tuple[Tuple[int, ...], bool, Optional[str]]:
+        """
+        Check an action against the tolerance levels, also returning the levels that were checked.
+        
+        Like check_tolerance, without building the assessment dictionary; decode_levels turns
+        the levels into the assessment assess_risk would have returned at this point.
+        
+        Args:
+            action: The action to assess
+            context: The context in which the action is being performed
+        
+        Returns:
+            Tuple[Tuple[int, ...], bool, Optional[str]]: (encoded levels in RiskCategory order, within_tolerance, reason)
+        """
+        levels = self._levels(context)
+        reason = self._levels_exceeded(levels)
+        if reason:
+            logger.warning(reason)
+        return levels, reason is None, reason
+    
+    @staticmethod
+    def decode_levels(levels: Tuple[int, ...]) -> Dict[RiskCategory, RiskLevel]:
+        """
+        Decode the levels returned by check_tolerance_levels.
+        
+        Args:
+            levels: The encoded risk level of each category, in RiskCategory order
+        
+        Returns:
+            Dict[RiskCategory, RiskLevel]: The risk assessment for each category
+        """
+        return {category: RISK_LEVELS_BY_VALUE[level] for category, level in zip(RiskCategory, levels)}
+    
+    def assess_with_tolerance(self, action: str, context: Dict[str, Any]) -> Tuple[Dict[RiskCategory, RiskLevel], bool, Optional[str]]:
+        """
+        Assess the risk of an action and check it against the tolerance levels in one pass.
+        
+        Args:
+            action: The action to assess
+            context: The context in which the action is being performed
+        
+        Returns:
+            Tuple[Dict[RiskCategory, RiskLevel], bool, Optional[str]]: (assessment, within_tolerance, reason)
+        """
+        levels = self._levels(context)
+        assessment = {
+            category: RISK_LEVELS_BY_VALUE[level] for category, level in zip(self.engine.categories, levels)
+        }
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Risk assessment for action '{action}': {assessment}")
+        
+        reason = self._levels_exceeded(levels)
+        if reason:
+            logger.warning(reason)
+        return assessment, reason is None, reason
+    
+    def assess_tolerance_many(self, contexts: List[Dict[str, Any]]) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Assess a batch of contexts and check each against the tolerance levels.
+        
+        Contexts with the same values for the fields the rules read are only assessed once.
+        
+        Args:
+            contexts: The contexts in which the actions are being performed
+        
+        Returns:
+            List[Tuple[bool, Optional[str]]]: (within_tolerance, reason) for each context, in order
+        """
+        results = []
+        checked = {}  # Dictionary of encoded risk levels to (within_tolerance, reason)
+        for context in contexts:
+            levels = self._levels(context)
+            result = checked.get(levels)
+            if result is None:
+                reason = self._levels_exceeded(levels)
+                result = (reason is None, reason)
+                checked[levels] = result
+            results.append(result)
+        
+        return results
+    
     def is_within_tolerance(self, assessment: Dict[RiskCategory, RiskLevel]) -> Tuple[bool, Optional[str]]:
         """
         Determine if a risk assessment is within the tolerance levels.
@@ -202,6 +470,24 @@ class RiskAssessment:
         
         return True, None
     
+    def _levels_exceeded(self, levels: Tuple[int, ...]) -> Optional[str]:
+        """
+        Compare encoded risk levels with the profile's tolerance vector.
+        
+        Args:
+            levels: The encoded risk level of each category, in RiskCategory order
+        
+        Returns:
+            Optional[str]: Why the levels exceed tolerance, or None if they are within tolerance
+        """
+        for index, (level, tolerance) in enumerate(zip(levels, self._tolerances)):
+            if level > tolerance:
+                category = self.engine.categories[index]
+                return (f"Risk level {RISK_LEVELS_BY_VALUE[level].value} for {category.value} "
+                        f"exceeds tolerance level {RISK_LEVELS_BY_VALUE[tolerance].value}")
+        
+        return None
+    
     def _risk_level_to_value(self, level: RiskLevel) -> int:
         """
         Convert a risk level to a numeric value for comparison.
@@ -212,14 +498,7 @@ class RiskAssessment:
         Returns:
             int: The numeric value
         """
-        values = {
-            RiskLevel.MINIMAL: 1,
-            RiskLevel.LOW: 2,
-            RiskLevel.MEDIUM: 3,
-            RiskLevel.HIGH: 4,
-            RiskLevel.CRITICAL: 5
-        }
-        return values.get(level, 0)
+        return RISK_LEVEL_VALUES.get(level, 0)
 
 # Create default risk tolerance profiles
 def create_default_profiles() -> Dict[str, RiskToleranceProfile]:
@@ -0,0 +1,281 @@
+"""
+Persistent storage for the Nick the Great Unified Agent autonomy framework.
+
+This module implements an embedded SQLite store for approval requests, notifications and
+pending actions. Records are kept as JSON (the to_dict form of each object) next to a few
+indexed columns used for lookups. Writes are buffered and flushed in batches, and nothing
+is loaded until it is asked for, so startup time doesn't grow with history.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Indexed columns per table, taken from the record's to_dict keys. Every table also has
+# id, created_time and the JSON data.
+TABLES = {
+    "approval_requests": ("status", "user_id", "category"),
+    "notifications": ("status", "user_id", "type", "related_entity_id", "related_entity_type", "action_required"),
+    "pending_actions": ("status", "expiry_time")
+}
+
+class AutonomyStore:
+    """
+    SQLite store for autonomy framework records.
+
+    Saves and deletes are buffered per record (later writes to the same record replace
+    earlier ones) and written in one transaction when the buffer fills, when the flush
+    interval passes, or when flush() is called.
+    """
+
+    def __init__(self, db_path: str = ":memory:", batch_size: int = 100, flush_interval: float = 1.0):
+        """
+        Initialize the store.
+
+        Args:
+            db_path: SQLite database path (in-memory by default)
+            batch_size: Number of buffered writes that triggers a flush
+            flush_interval: Maximum time (in seconds) a write stays buffered (0 disables the flush thread)
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # One connection shared by all threads, serialized by a lock
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        if db_path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+        self._pending = {table: {} for table in TABLES}  # Dictionary of table to {record_id: (data, row), or None to delete}
+        self._pending_count = 0
+        self._pending_condition = threading.Condition()
+        # Batches are written one at a time, in the order they were taken from the buffer, so an
+        # older version of a record never overwrites a newer one; the batch being written stays
+        # visible to load until it is committed
+        self._flush_lock = threading.Lock()
+        self._in_flight = {table: {} for table in TABLES}
+        self._running = flush_interval > 0
+        self._flush_thread = None
+        if self._running:
+            self._flush_thread = threading.Thread(target=self._run_flusher, name="autonomy-store-flusher", daemon=True)
+            self._flush_thread.start()
+
+        logger.info(f"Autonomy store using {db_path}")
+
+    def _create_schema(self) -> None:
+        """Create the tables and indexes if they don't exist."""
+        with self._lock, self.conn:
+            for table, columns in TABLES.items():
+                column_definitions = "".join(f", {column}" for column in columns)
+                self.conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY, created_time INTEGER NOT NULL"
+                    f"{column_definitions}, data TEXT NOT NULL)"
+                )
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_created ON {table} (created_time, id)")
+                for column in columns:
+                    self.conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column}, created_time, id)"
+                    )
+
+    def save(self, table: str, data: Dict[str, Any]) -> None:
+        """
+        Buffer a record for saving.
+
+        Args:
+            table: The table name
+            data: The record, as returned by its to_dict (must include "id" and "created_time")
+
+        Raises:
+            TypeError: If the record can't be serialized to JSON
+        """
+        # Serialize now, so a bad record fails its caller instead of a later batch
+        row = (data["id"], data["created_time"], *(data.get(column) for column in TABLES[table]), json.dumps(data))
+        self._buffer(table, data["id"], (data, row))
+
+    def delete(self, table: str, record_id: str) -> None:
+        """
+        Buffer a record for deletion.
+
+        Args:
+            table: The table name
+            record_id: The ID of the record
+        """
+        self._buffer(table, record_id, None)
+
+    def load(self, table: str, record_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a record by ID, including buffered writes.
+
+        Args:
+            table: The table name
+            record_id: The ID of the record
+
+        Returns:
+            Optional[Dict[str, Any]]: The record, or None if not found
+        """
+        with self._pending_condition:
+            for buffered in (self._pending, self._in_flight):
+                if record_id in buffered[table]:
+                    pending = buffered[table][record_id]
+                    return pending[0] if pending else None
+
+        with self._lock:
+            row = self.conn.execute(f"SELECT data FROM {table} WHERE id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(self,
+             table: str,
+             filters: Optional[Dict[str, Any]] = None,
+             limit: Optional[int] = None,
+             cursor: Optional[str] = None,
+             newest_first: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Query records in creation order.
+
+        Args:
+            table: The table name
+            filters: Dictionary of indexed column to required value
+            limit: Maximum number of records to return (None for all)
+            cursor: The cursor returned with the previous page (None for the first page)
+            newest_first: Whether to return the newest records first
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[str]]: (records, cursor for the next page or None if this is the last page)
+        """
+        # Buffered writes must be visible to queries; flush also waits for a batch another thread is writing
+        self.flush()
+
+        clauses = []
+        params = []
+        for column, value in (filters or {}).items():
+            if column not in TABLES[table] and column != "created_time":
+                raise ValueError(f"Column {column} of {table} is not indexed")
+            clauses.append(f"{column} IS ?")
+            params.append(value)
+
+        if cursor:
+            created_time, record_id = cursor.split(":", 1)
+            clauses.append(f"(created_time, id) {'<' if newest_first else '>'} (?, ?)")
+            params.extend([int(created_time), record_id])
+
+        direction = "DESC" if newest_first else "ASC"
+        sql = f"SELECT created_time, id, data FROM {table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY created_time {direction}, id {direction}"
+        if limit is not None:
+            # One extra row tells us whether there is another page
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1][0]}:{rows[-1][1]}" if rows else cursor
+        return [json.loads(row[2]) for row in rows], next_cursor
+
+    def count(self, table: str) -> int:
+        """
+        Count the records in a table, including buffered writes.
+
+        Args:
+            table: The table name
+
+        Returns:
+            int: The number of records
+        """
+        self.flush()
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def flush(self) -> None:
+        """Write all buffered saves and deletes in one transaction."""
+        with self._flush_lock:
+            with self._pending_condition:
+                if not self._pending_count:
+                    return
+                pending = self._pending
+                self._in_flight = pending
+                self._pending = {table: {} for table in TABLES}
+                self._pending_count = 0
+
+            try:
+                self._write(pending)
+            except Exception as e:
+                logger.error(f"Error flushing autonomy store: {e}")
+                # Put the writes back (unless newer ones replaced them) so the next flush retries
+                with self._pending_condition:
+                    for table, records in pending.items():
+                        for record_id, write in records.items():
+                            if record_id not in self._pending[table]:
+                                self._pending[table][record_id] = write
+                                self._pending_count += 1
+                    self._in_flight = {table: {} for table in TABLES}
+                raise
+
+            with self._pending_condition:
+                self._in_flight = {table: {} for table in TABLES}
+
+    def _write(self, pending: Dict[str, Dict[str, Any]]) -> None:
+        """Write a batch of saves and deletes in one transaction."""
+        with self._lock, self.conn:
+            for table, records in pending.items():
+                saves = [pending[1] for pending in records.values() if pending is not None]
+                deletes = [(record_id,) for record_id, pending in records.items() if pending is None]
+                if saves:
+                    columns = TABLES[table]
+                    placeholders = ", ".join("?" for _ in range(len(columns) + 3))
+                    self.conn.executemany(
+                        f"INSERT OR REPLACE INTO {table} (id, created_time, {', '.join(columns)}, data) "
+                        f"VALUES ({placeholders})",
+                        saves
+                    )
+                if deletes:
+                    self.conn.executemany(f"DELETE FROM {table} WHERE id = ?", deletes)
+
+    def close(self) -> None:
+        """Flush buffered writes, stop the flush thread and close the connection."""
+        with self._pending_condition:
+            self._running = False
+            self._pending_condition.notify_all()
+        if self._flush_thread:
+            self._flush_thread.join()
+        self.flush()
+        with self._lock:
+            self.conn.close()
+
+    def _buffer(self, table: str, record_id: str, pending: Optional[Tuple[Dict[str, Any], Tuple]]) -> None:
+        """Buffer a write, flushing once the batch is full."""
+        with self._pending_condition:
+            if record_id not in self._pending[table]:
+                self._pending_count += 1
+            self._pending[table][record_id] = pending
+            full = self._pending_count >= self.batch_size
+
+        if full:
+            self.flush()
+
+    def _run_flusher(self) -> None:
+        """Flush buffered writes every flush_interval seconds."""
+        while True:
+            with self._pending_condition:
+                self._pending_condition.wait(self.flush_interval)
+                if not self._running:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                # Already logged; the writes stay buffered for the next attempt
+                pass
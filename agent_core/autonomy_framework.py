@@ -5,12 +5,25 @@ This module implements a simplified version of the autonomy framework that deter
 when the agent can act autonomously and when it needs human approval.
 """
 
+import bisect
+import functools
+import heapq
+import itertools
+import json
 import logging
+import os
+import threading
 import time
 import uuid
+from collections import Counter, deque
 from enum import Enum
 from typing import Dict, Any, List, Optional, Callable, Tuple
 
+try:
+    from agent_core.notification_delivery import NotificationDispatcher
+except ImportError:
+    from notification_delivery import NotificationDispatcher
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -34,6 +47,14 @@ class RiskLevel(Enum):
     HIGH = "high"  # High risk actions
     CRITICAL = "critical"  # Critical risk actions
 
+# Numeric ordering of risk levels, used when comparing assessed risks
+RISK_LEVEL_VALUES = {
+    RiskLevel.LOW: 1,
+    RiskLevel.MEDIUM: 2,
+    RiskLevel.HIGH: 3,
+    RiskLevel.CRITICAL: 4
+}
+
 class ApprovalLevel(Enum):
     """Levels of approval required for different actions."""
     AUTONOMOUS = "autonomous"  # Agent can act without human approval
@@ -78,7 +99,8 @@ class NotificationPreference:
                 user_id: str,
                 channels: Dict[NotificationPriority, List[NotificationChannel]] = None,
                 do_not_disturb: List[Dict[str, Any]] = None,
-                batching: Dict[NotificationPriority, int] = None):
+                batching: Dict[NotificationPriority, int] = None,
+                contacts: Dict[NotificationChannel, str] = None):
         """
         Initialize notification preferences.
 
@@ -87,8 +109,10 @@ class NotificationPreference:
             channels: Dictionary mapping priority levels to preferred channels
             do_not_disturb: List of time periods during which notifications should not be sent
             batching: Dictionary mapping priority levels to batching intervals (in minutes)
+            contacts: Dictionary mapping channels to the user's address on them (e.g. email, phone number)
         """
         self.user_id = user_id
+        self.contacts = contacts or {}
 
         # Default channel preferences if none provided
         self.channels = channels or {
@@ -148,6 +172,7 @@ class Notification:
         self.sent = False
         self.sent_time = None
         self.sent_channels = []
+        self.delivery_status = {}  # Dictionary of NotificationChannel to "pending", "delivered" or "failed"
 
 class ApprovalRequest:
     """A request for human approval of an agent action."""
@@ -203,18 +228,201 @@ class ApprovalRequest:
 
         self.auto_approve_after = auto_approve_after
         self.auto_reject_after = auto_reject_after
+        self._lock = threading.Lock()  # Makes the check-and-set of a decision atomic
+
+    def _set_status(self, status: ApprovalStatus, details: Optional[str]) -> bool:
+        """
+        Decide a pending request.
+
+        The check and the update are atomic, so when the expiry scheduler and a caller
+        decide the same request at once only one of them succeeds.
+
+        Args:
+            status: The new status
+            details: Additional details about the decision
+
+        Returns:
+            bool: True if the request was pending and is now decided, False otherwise
+        """
+        with self._lock:
+            if self.status != ApprovalStatus.PENDING:
+                return False
+
+            self.status = status
+            self.updated_time = int(time.time())
+            self.response_details = details
+            return True
+
+class TimerWheel:
+    """
+    Hierarchical timer wheel with one-second ticks.
+
+    Level 0 has one slot per second; each higher level has slots SLOTS times wider.
+    Timers cascade down a level when the lower wheel wraps around, so scheduling,
+    cancelling and firing a timer are all O(1) and a tick only touches due timers.
+    """
+
+    SLOTS = 64
+    LEVELS = 4  # 64^4 seconds (about 194 days) before timers are clamped to the outermost level
+
+    def __init__(self, start_time: int):
+        """
+        Initialize the timer wheel.
+
+        Args:
+            start_time: The current time (in seconds since epoch)
+        """
+        self.current_time = start_time
+        self.wheels = [[{} for _ in range(self.SLOTS)] for _ in range(self.LEVELS)]
+        self.timers = {}  # Dictionary of key to (level, slot, due_time)
+        self.level_counts = [0] * self.LEVELS
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    def schedule(self, key: Any, due_time: int) -> None:
+        """
+        Schedule (or reschedule) a timer.
+
+        Args:
+            key: Hashable key identifying the timer
+            due_time: Time (in seconds since epoch) when the timer is due
+        """
+        self.cancel(key)
+        self._place(key, max(due_time, self.current_time + 1))
+
+    def cancel(self, key: Any) -> bool:
+        """
+        Cancel a timer.
+
+        Args:
+            key: The key of the timer
+
+        Returns:
+            bool: True if the timer was scheduled, False otherwise
+        """
+        timer = self.timers.pop(key, None)
+        if timer is None:
+            return False
+        level, slot, _ = timer
+        del self.wheels[level][slot][key]
+        self.level_counts[level] -= 1
+        return True
+
+    def due_time(self, key: Any) -> Optional[int]:
+        """Get the due time of a scheduled timer, or None if it isn't scheduled."""
+        timer = self.timers.get(key)
+        return timer[2] if timer else None
+
+    def advance(self, now: int) -> List[Any]:
+        """
+        Advance the wheel to the given time.
+
+        Args:
+            now: The current time (in seconds since epoch)
+
+        Returns:
+            List[Any]: Keys of the timers that became due, in due order
+        """
+        if not self.timers:
+            # Nothing can fire, so jump straight to the new time
+            self.current_time = max(self.current_time, now)
+            return []
+
+        fired = []
+        while self.current_time < now:
+            if not self.level_counts[0]:
+                # Level 0 is empty, so skip ahead to just before the next cascade
+                boundary = (self.current_time // self.SLOTS + 1) * self.SLOTS
+                self.current_time = max(self.current_time, min(now, boundary) - 1)
+                if self.current_time >= now:
+                    break
+
+            self.current_time += 1
+            tick = self.current_time
+
+            # Cascade higher levels whose lower wheel just wrapped around, outermost first
+            for level in range(self.LEVELS - 1, 0, -1):
+                width = self.SLOTS ** level
+                if tick % width == 0:
+                    slot = self.wheels[level][(tick // width) % self.SLOTS]
+                    entries = list(slot.items())
+                    slot.clear()
+                    self.level_counts[level] -= len(entries)
+                    for key, due_time in entries:
+                        del self.timers[key]
+                        self._place(key, due_time)
+
+            slot = self.wheels[0][tick % self.SLOTS]
+            if slot:
+                fired.extend(slot)
+                self.level_counts[0] -= len(slot)
+                for key in slot:
+                    del self.timers[key]
+                slot.clear()
+
+        return fired
+
+    def _place(self, key: Any, due_time: int) -> None:
+        """Put a timer in the slot of the lowest level that can hold its delay."""
+        delay = due_time - self.current_time
+        for level in range(self.LEVELS):
+            width = self.SLOTS ** level
+            if delay < width * self.SLOTS or level == self.LEVELS - 1:
+                # Clamp timers beyond the outermost level; they cascade back down when reached
+                slot_time = min(due_time, self.current_time + width * (self.SLOTS - 1))
+                if level > 0:
+                    # Timers in the current slot of a higher level would only be seen after a full turn
+                    slot_time = max(slot_time, (self.current_time // width + 1) * width)
+                slot = (slot_time // width) % self.SLOTS
+                self.wheels[level][slot][key] = due_time
+                self.timers[key] = (level, slot, due_time)
+                self.level_counts[level] += 1
+                return
 
 class NotificationSystem:
     """System for sending notifications to humans."""
 
-    def __init__(self):
-        """Initialize the notification system."""
-        self.notifications = []
+    def __init__(self,
+                max_notifications: int = 100000,
+                retention_seconds: int = 30 * 24 * 60 * 60,
+                auto_flush: bool = False,
+                dispatcher: Optional[NotificationDispatcher] = None):
+        """
+        Initialize the notification system.
+
+        Args:
+            max_notifications: Maximum number of notifications kept in memory
+            retention_seconds: Age after which notifications are evicted
+            auto_flush: Whether to start the batch flusher thread immediately
+            dispatcher: Delivers notifications over external channels (dashboard-only if None)
+        """
+        self.max_notifications = max_notifications
+        self.retention_seconds = retention_seconds
+        self.dispatcher = dispatcher
+
+        # Notifications by ID, in creation order so the oldest is always first
+        self._notifications = {}  # Dictionary of notification_id to Notification
+        # Per-user and unread indexes; dicts double as insertion-ordered sets
+        self._user_index = {}  # Dictionary of user_id to {notification_id: Notification}
+        self._unread_index = {}  # Dictionary of user_id to {notification_id: Notification}
+        self._unread = {}  # Dictionary of notification_id to unread Notification
+
         self.user_preferences = {}  # Dictionary of user_id to NotificationPreference
         self.notification_batches = {}  # Dictionary of user_id to batched notifications
         self.last_batch_time = {}  # Dictionary of user_id to last batch time
+
+        # Each pending (user_id, priority) batch has one timer for its exact due time
+        self._batch_wheel = TimerWheel(int(time.time()))
+        self._batch_condition = threading.Condition(threading.RLock())
+        self._flush_thread = None
+        self._flush_running = False
+
         logger.info("Notification System initialized")
 
+        if auto_flush:
+            self.start_batch_flusher()
+
     def create_notification(self,
                            title: str,
                            message: str,
@@ -244,7 +452,7 @@ class NotificationSystem:
             title, message, notification_type, priority, user_id,
             related_entity_id, related_entity_type, metadata
         )
-        self.notifications.append(notification)
+        self._store(notification)
         logger.info(f"Created notification: {notification.id} - {title}")
 
         # Process the notification based on user preferences
@@ -258,6 +466,61 @@ class NotificationSystem:
 
         return notification
 
+    @property
+    def notifications(self) -> List[Notification]:
+        """All stored notifications, oldest first."""
+        return list(self._notifications.values())
+
+    def _store(self, notification: Notification) -> None:
+        """
+        Add a notification to the store and its indexes, evicting old ones.
+
+        Args:
+            notification: The notification to store
+        """
+        self._notifications[notification.id] = notification
+        self._user_index.setdefault(notification.user_id, {})[notification.id] = notification
+        if not notification.read:
+            self._unread_index.setdefault(notification.user_id, {})[notification.id] = notification
+            self._unread[notification.id] = notification
+
+        self._evict()
+
+    def _evict(self) -> None:
+        """Evict notifications past the retention period or over the size cap."""
+        cutoff = int(time.time()) - self.retention_seconds
+
+        # The store is in creation order, so only the head ever needs checking
+        while self._notifications:
+            oldest = next(iter(self._notifications.values()))
+            if len(self._notifications) <= self.max_notifications and oldest.created_time >= cutoff:
+                break
+            self._remove(oldest.id)
+
+    def _remove(self, notification_id: str) -> Optional[Notification]:
+        """
+        Remove a notification from the store and all indexes.
+
+        Args:
+            notification_id: The ID of the notification to remove
+
+        Returns:
+            Optional[Notification]: The removed notification, or None if not found
+        """
+        notification = self._notifications.pop(notification_id, None)
+        if notification is None:
+            return None
+
+        for index in (self._user_index, self._unread_index):
+            user_notifications = index.get(notification.user_id)
+            if user_notifications is not None:
+                user_notifications.pop(notification_id, None)
+                if not user_notifications:
+                    del index[notification.user_id]
+        self._unread.pop(notification_id, None)
+
+        return notification
+
     def _process_notification(self, notification: Notification) -> None:
         """
         Process a notification based on user preferences.
@@ -273,13 +536,7 @@ class NotificationSystem:
 
         # Check if we're in a do-not-disturb period
         current_time = int(time.time())
-        in_dnd = False
-        for dnd_period in preferences.do_not_disturb:
-            start_time = dnd_period.get("start_time")
-            end_time = dnd_period.get("end_time")
-            if start_time and end_time and start_time <= current_time <= end_time:
-                in_dnd = True
-                break
+        in_dnd = self._dnd_end(preferences, current_time) is not None
 
         # If in DND period and not critical, batch for later
         if in_dnd and notification.priority != NotificationPriority.CRITICAL:
@@ -305,16 +562,73 @@ class NotificationSystem:
             notification: The notification to batch
         """
         user_id = notification.user_id
-        if user_id not in self.notification_batches:
-            self.notification_batches[user_id] = {}
-
         priority = notification.priority
-        if priority not in self.notification_batches[user_id]:
-            self.notification_batches[user_id][priority] = []
 
-        self.notification_batches[user_id][priority].append(notification)
+        with self._batch_condition:
+            if user_id not in self.notification_batches:
+                self.notification_batches[user_id] = {}
+
+            if priority not in self.notification_batches[user_id]:
+                self.notification_batches[user_id][priority] = []
+
+            self.notification_batches[user_id][priority].append(notification)
+
+            # Schedule the batch the first time something is added to it
+            key = (user_id, priority)
+            if self._batch_wheel.due_time(key) is None:
+                current_time = int(time.time())
+                # An idle wheel stops ticking; catch it up before scheduling relative to it
+                self._batch_wheel.advance(current_time)
+                self._batch_wheel.schedule(key, self._batch_due_time(user_id, priority, current_time))
+                self._batch_condition.notify()
+
         logger.info(f"Batched notification: {notification.id} for user {user_id}")
 
+    def _dnd_end(self, preferences: NotificationPreference, current_time: int) -> Optional[int]:
+        """
+        Get the end of the do-not-disturb period the given time falls in.
+
+        Args:
+            preferences: The user's notification preferences
+            current_time: The time to check (in seconds since epoch)
+
+        Returns:
+            Optional[int]: The end time of the active period, or None if not in one
+        """
+        for dnd_period in preferences.do_not_disturb:
+            start_time = dnd_period.get("start_time")
+            end_time = dnd_period.get("end_time")
+            if start_time and end_time and start_time <= current_time <= end_time:
+                return end_time
+        return None
+
+    def _batch_due_time(self, user_id: str, priority: NotificationPriority, current_time: int) -> int:
+        """
+        Get the time a user's batch for a priority becomes due.
+
+        Args:
+            user_id: The ID of the user
+            priority: The priority of the batch
+            current_time: The current time (in seconds since epoch)
+
+        Returns:
+            int: The due time (in seconds since epoch)
+        """
+        preferences = self.user_preferences.get(user_id)
+        if preferences is None:
+            return current_time
+
+        batch_interval = preferences.batching.get(priority, 0)
+        last_batch = self.last_batch_time.get(user_id, {}).get(priority, 0)
+        due_time = last_batch + batch_interval * 60  # Convert minutes to seconds
+
+        # Batches held back by do-not-disturb go out right after the period ends
+        dnd_end = self._dnd_end(preferences, max(due_time, current_time))
+        if dnd_end is not None and priority != NotificationPriority.CRITICAL:
+            due_time = dnd_end + 1
+
+        return due_time
+
     def _send_notification(self, notification: Notification) -> None:
         """
         Send a notification through the appropriate channels.
@@ -333,43 +647,132 @@ class NotificationSystem:
         preferences = self.user_preferences[user_id]
         channels = preferences.channels.get(notification.priority, [NotificationChannel.DASHBOARD])
 
-        # In a real implementation, we would send through each channel here
-        # For now, we'll just mark it as sent
         notification.sent = True
         notification.sent_time = int(time.time())
         notification.sent_channels = channels
 
+        # Delivery is asynchronous; each channel's workers report back through delivery_status
+        if self.dispatcher:
+            payload = None
+            for channel in channels:
+                if not self.dispatcher.has_channel(channel.value):
+                    continue
+                if payload is None:
+                    payload = self._delivery_payload(notification)
+                notification.delivery_status[channel] = "pending"
+                future = self.dispatcher.dispatch(channel.value, {**payload, "recipient": preferences.contacts.get(channel)})
+                future.add_done_callback(functools.partial(self._record_delivery, notification, channel))
+
         logger.info(f"Sent notification: {notification.id} to user {user_id} via {', '.join([c.value for c in channels])}")
 
+    def _delivery_payload(self, notification: Notification) -> Dict[str, Any]:
+        """
+        Build the payload handed to delivery channels.
+
+        Args:
+            notification: The notification to deliver
+
+        Returns:
+            Dict[str, Any]: The payload
+        """
+        return {
+            "id": notification.id,
+            "title": notification.title,
+            "message": notification.message,
+            "type": notification.notification_type.value,
+            "priority": notification.priority.value,
+            "user_id": notification.user_id,
+            "related_entity_id": notification.related_entity_id,
+            "related_entity_type": notification.related_entity_type,
+            "metadata": notification.metadata,
+            "created_time": notification.created_time
+        }
+
+    def _record_delivery(self, notification: Notification, channel: NotificationChannel, future) -> None:
+        """Record the outcome of an asynchronous delivery."""
+        delivered = not future.cancelled() and future.exception() is None and future.result()
+        notification.delivery_status[channel] = "delivered" if delivered else "failed"
+
     def process_batches(self) -> None:
         """Process all batched notifications that are due to be sent."""
         current_time = int(time.time())
 
-        for user_id, priority_batches in self.notification_batches.items():
-            if user_id not in self.user_preferences:
-                continue
+        with self._batch_condition:
+            # Only batches whose timers fire are touched, however many users have batches
+            for key in self._batch_wheel.advance(current_time):
+                self._flush_batch(key, current_time)
 
-            preferences = self.user_preferences[user_id]
+    def _flush_batch(self, key: Tuple[str, NotificationPriority], current_time: int) -> None:
+        """
+        Send a due batch, or reschedule it if it isn't due any more.
 
-            for priority, notifications in priority_batches.items():
-                if not notifications:
-                    continue
+        Args:
+            key: The (user_id, priority) of the batch
+            current_time: The current time (in seconds since epoch)
+        """
+        user_id, priority = key
+        notifications = self.notification_batches.get(user_id, {}).get(priority)
+        if not notifications:
+            return
 
-                batch_interval = preferences.batching.get(priority, 0)
-                last_batch = self.last_batch_time.get(user_id, {}).get(priority, 0)
+        # Preferences may have changed since the batch was scheduled
+        due_time = self._batch_due_time(user_id, priority, current_time)
+        if due_time > current_time:
+            self._batch_wheel.schedule(key, due_time)
+            return
 
-                if current_time - last_batch >= batch_interval * 60:  # Convert minutes to seconds
-                    # Send the batch
-                    for notification in notifications:
-                        self._send_notification(notification)
+        # Send the batch
+        for notification in notifications:
+            self._send_notification(notification)
 
-                    # Update last batch time
-                    if user_id not in self.last_batch_time:
-                        self.last_batch_time[user_id] = {}
-                    self.last_batch_time[user_id][priority] = current_time
+        # Update last batch time
+        if user_id not in self.last_batch_time:
+            self.last_batch_time[user_id] = {}
+        self.last_batch_time[user_id][priority] = current_time
 
-                    # Clear the batch
-                    self.notification_batches[user_id][priority] = []
+        # Clear the batch
+        self.notification_batches[user_id][priority] = []
+
+    def start_batch_flusher(self) -> None:
+        """Start a background thread that sends batches as soon as they are due."""
+        with self._batch_condition:
+            if self._flush_running:
+                return
+            self._flush_running = True
+            self._flush_thread = threading.Thread(
+                target=self._run_batch_flusher,
+                name="notification-batch-flusher",
+                daemon=True
+            )
+            self._flush_thread.start()
+        logger.info("Notification batch flusher started")
+
+    def stop_batch_flusher(self) -> None:
+        """Stop the batch flusher thread."""
+        with self._batch_condition:
+            self._flush_running = False
+            self._batch_condition.notify()
+        if self._flush_thread:
+            self._flush_thread.join()
+            self._flush_thread = None
+        logger.info("Notification batch flusher stopped")
+
+    def _run_batch_flusher(self) -> None:
+        """Tick the batch timer wheel once a second while any batch is pending."""
+        with self._batch_condition:
+            while self._flush_running:
+                if len(self._batch_wheel):
+                    self._batch_condition.wait(1)
+                else:
+                    # Nothing pending, so sleep until a batch is scheduled
+                    self._batch_condition.wait()
+                if not self._flush_running:
+                    return
+
+                try:
+                    self.process_batches()
+                except Exception as e:
+                    logger.error(f"Error flushing notification batches: {e}")
 
     def set_user_preferences(self, preferences: NotificationPreference) -> None:
         """
@@ -393,14 +796,15 @@ class NotificationSystem:
             List[Notification]: The list of notifications
         """
         if user_id is None:
-            notifications = self.notifications
+            index = self._notifications if include_read else self._unread
         else:
-            notifications = [n for n in self.notifications if n.user_id == user_id]
+            index = (self._user_index if include_read else self._unread_index).get(user_id, {})
 
-        if not include_read:
-            notifications = [n for n in notifications if not n.read]
+        if include_read:
+            return list(index.values())
 
-        return notifications
+        # Skip notifications whose read flag was set without going through mark_as_read
+        return [n for n in index.values() if not n.read]
 
     def mark_as_read(self, notification_id: str) -> bool:
         """
@@ -412,14 +816,38 @@ class NotificationSystem:
         Returns:
             bool: True if the notification was found and marked as read, False otherwise
         """
-        for notification in self.notifications:
-            if notification.id == notification_id:
-                notification.read = True
-                logger.info(f"Marked notification {notification_id} as read")
-                return True
+        notification = self._notifications.get(notification_id)
+        if notification is None:
+            logger.warning(f"Notification not found: {notification_id}")
+            return False
 
-        logger.warning(f"Notification not found: {notification_id}")
-        return False
+        notification.read = True
+        self._unread.pop(notification_id, None)
+        user_unread = self._unread_index.get(notification.user_id)
+        if user_unread is not None:
+            user_unread.pop(notification_id, None)
+            if not user_unread:
+                del self._unread_index[notification.user_id]
+
+        logger.info(f"Marked notification {notification_id} as read")
+        return True
+
+    def delete_notification(self, notification_id: str) -> bool:
+        """
+        Delete a notification.
+
+        Args:
+            notification_id: The ID of the notification to delete
+
+        Returns:
+            bool: True if the notification was found and deleted, False otherwise
+        """
+        if self._remove(notification_id) is None:
+            logger.warning(f"Notification not found: {notification_id}")
+            return False
+
+        logger.info(f"Deleted notification {notification_id}")
+        return True
 
 class ApprovalDelegate:
     """A delegate who can approve or reject requests on behalf of a user."""
@@ -474,14 +902,32 @@ class ApprovalDelegate:
 class ApprovalWorkflow:
     """Workflow for requesting and processing human approvals."""
 
-    def __init__(self, notification_system: NotificationSystem):
-        """Initialize the approval workflow."""
+    def __init__(self, notification_system: NotificationSystem, auto_expire: bool = False):
+        """
+        Initialize the approval workflow.
+
+        Args:
+            notification_system: The notification system used for approval notifications
+            auto_expire: Whether to start the expiry scheduler thread immediately
+        """
         self.notification_system = notification_system
         self.approval_requests = []
+        self.requests_by_id = {}  # Dictionary of request_id to ApprovalRequest
         self.delegates = {}  # Dictionary of user_id to list of ApprovalDelegate
         self.approval_templates = {}  # Dictionary of template_id to template
+
+        # Min-heap of (expiration_time, sequence, request_id); processed requests are skipped lazily
+        self._expiry_heap = []
+        self._expiry_sequence = itertools.count()
+        self._expiry_condition = threading.Condition()
+        self._expiry_thread = None
+        self._expiry_running = False
+
         logger.info("Approval Workflow initialized")
 
+        if auto_expire:
+            self.start_expiry_scheduler()
+
     def create_approval_request(self,
                                title: str,
                                description: str,
@@ -534,6 +980,8 @@ class ApprovalWorkflow:
             expiration_time, auto_approve_after, auto_reject_after
         )
         self.approval_requests.append(request)
+        self.requests_by_id[request.id] = request
+        self._schedule_expiry(request)
 
         # Check for delegates who can approve this request
         risk_level = context.get("risk_level", RiskLevel.MEDIUM)
@@ -592,101 +1040,192 @@ class ApprovalWorkflow:
         Returns:
             bool: True if the request was found and processed, False otherwise
         """
-        for request in self.approval_requests:
-            if request.id == request_id:
-                if request.status != ApprovalStatus.PENDING:
-                    logger.warning(f"Attempted to process non-pending approval request: {request_id}")
-                    return False
-
-                # Check if the approver is authorized
-                if approver_id and approver_id != request.user_id:
-                    # Check if the approver is a delegate
-                    risk_level = request.context.get("risk_level", RiskLevel.MEDIUM)
-                    if not self._is_delegate(approver_id, request.user_id, request.category, risk_level):
-                        logger.warning(f"Unauthorized approval attempt by {approver_id} for request {request_id}")
-                        return False
-
-                request.status = ApprovalStatus.APPROVED if approved else ApprovalStatus.REJECTED
-                request.updated_time = int(time.time())
-                request.response_details = details
-
-                # Create a notification about the approval decision
+        request = self.requests_by_id.get(request_id)
+        if request is None:
+            logger.warning(f"Approval request not found: {request_id}")
+            return False
+
+        if request.status != ApprovalStatus.PENDING:
+            logger.warning(f"Attempted to process non-pending approval request: {request_id}")
+            return False
+
+        # Check if the approver is authorized
+        if approver_id and approver_id != request.user_id:
+            # Check if the approver is a delegate
+            risk_level = request.context.get("risk_level", RiskLevel.MEDIUM)
+            if not self._is_delegate(approver_id, request.user_id, request.category, risk_level):
+                logger.warning(f"Unauthorized approval attempt by {approver_id} for request {request_id}")
+                return False
+
+        # The expiry scheduler may have decided the request since the check above
+        if not self._apply_decision(request, approved, details, approver_id):
+            logger.warning(f"Attempted to process non-pending approval request: {request_id}")
+            return False
+        return True
+
+    def _apply_decision(self,
+                        request: ApprovalRequest,
+                        approved: bool,
+                        details: Optional[str],
+                        approver_id: Optional[str]) -> bool:
+        """
+        Record an approval decision, notify the user and run the request callback.
+
+        Args:
+            request: The pending approval request
+            approved: Whether the request was approved
+            details: Additional details about the decision
+            approver_id: The ID of the user (or "system") making the decision
+
+        Returns:
+            bool: True if the decision was recorded, False if the request was already decided
+        """
+        request_id = request.id
+        if not request._set_status(ApprovalStatus.APPROVED if approved else ApprovalStatus.REJECTED, details):
+            return False
+
+        # Create a notification about the approval decision
+        self.notification_system.create_notification(
+            title=f"Approval {'Granted' if approved else 'Rejected'}: {request.title}",
+            message=f"The approval request has been {'approved' if approved else 'rejected'}.\n\n{details or ''}",
+            notification_type=NotificationType.SUCCESS if approved else NotificationType.WARNING,
+            priority=NotificationPriority.MEDIUM,
+            user_id=request.user_id,
+            related_entity_id=request.id,
+            related_entity_type="approval_request",
+            metadata={
+                "approver_id": approver_id or request.user_id,
+                "delegated": approver_id is not None and approver_id != request.user_id
+            }
+        )
+
+        # Call the callback if provided
+        if request.callback:
+            try:
+                request.callback(request.id, request.status, details)
+            except Exception as e:
+                logger.error(f"Error in approval callback for request {request_id}: {e}")
+
+        logger.info(f"Processed approval request {request_id}: {'approved' if approved else 'rejected'} by {approver_id or request.user_id}")
+        return True
+
+    def _schedule_expiry(self, request: ApprovalRequest) -> None:
+        """
+        Add a request to the expiry heap and wake the scheduler if it is now due first.
+
+        Args:
+            request: The approval request to schedule
+        """
+        with self._expiry_condition:
+            entry = (request.expiration_time, next(self._expiry_sequence), request.id)
+            heapq.heappush(self._expiry_heap, entry)
+            if self._expiry_heap[0] is entry:
+                self._expiry_condition.notify()
+
+    def _pop_due_requests(self, current_time: int) -> List[ApprovalRequest]:
+        """
+        Pop every pending request whose expiration time has passed.
+
+        Args:
+            current_time: The current time (in seconds since epoch)
+
+        Returns:
+            List[ApprovalRequest]: The due requests, earliest first
+        """
+        due = []
+        with self._expiry_condition:
+            while self._expiry_heap and self._expiry_heap[0][0] <= current_time:
+                _, _, request_id = heapq.heappop(self._expiry_heap)
+                request = self.requests_by_id.get(request_id)
+                if request is not None and request.status == ApprovalStatus.PENDING:
+                    due.append(request)
+        return due
+
+    def check_expired_requests(self) -> None:
+        """Check for expired approval requests and process them."""
+        current_time = int(time.time())
+
+        # Only requests at the top of the heap can be due, so this costs O(expired * log n)
+        for request in self._pop_due_requests(current_time):
+            if request.status != ApprovalStatus.PENDING:
+                continue
+
+            # Check if we should auto-approve or auto-reject
+            # Timeouts are decided by the system itself, so skip the approver authorization check
+            if request.auto_approve_after and current_time >= request.created_time + request.auto_approve_after:
+                self._apply_decision(request, True, "Automatically approved due to timeout", "system")
+            elif request.auto_reject_after and current_time >= request.created_time + request.auto_reject_after:
+                self._apply_decision(request, False, "Automatically rejected due to timeout", "system")
+            else:
+                # Mark as expired, unless a caller decided the request in the meantime
+                if not request._set_status(ApprovalStatus.EXPIRED, "Request expired without a decision"):
+                    continue
+
+                # Create a notification about the expired request
                 self.notification_system.create_notification(
-                    title=f"Approval {'Granted' if approved else 'Rejected'}: {request.title}",
-                    message=f"The approval request has been {'approved' if approved else 'rejected'}.\n\n{details or ''}",
-                    notification_type=NotificationType.SUCCESS if approved else NotificationType.WARNING,
+                    title=f"Approval Request Expired: {request.title}",
+                    message=f"The approval request has expired without a decision.\n\n{request.description}",
+                    notification_type=NotificationType.WARNING,
                     priority=NotificationPriority.MEDIUM,
                     user_id=request.user_id,
                     related_entity_id=request.id,
-                    related_entity_type="approval_request",
-                    metadata={
-                        "approver_id": approver_id or request.user_id,
-                        "delegated": approver_id is not None and approver_id != request.user_id
-                    }
+                    related_entity_type="approval_request"
                 )
 
                 # Call the callback if provided
                 if request.callback:
                     try:
-                        request.callback(request.id, request.status, details)
+                        request.callback(request.id, request.status, "Request expired without a decision")
                     except Exception as e:
-                        logger.error(f"Error in approval callback for request {request_id}: {e}")
-
-                logger.info(f"Processed approval request {request_id}: {'approved' if approved else 'rejected'} by {approver_id or request.user_id}")
-                return True
-
-        logger.warning(f"Approval request not found: {request_id}")
-        return False
-
-    def check_expired_requests(self) -> None:
-        """Check for expired approval requests and process them."""
-        current_time = int(time.time())
+                        logger.error(f"Error in approval callback for expired request {request.id}: {e}")
 
-        for request in self.approval_requests:
-            if request.status != ApprovalStatus.PENDING:
-                continue
+                logger.info(f"Marked approval request {request.id} as expired")
 
-            if current_time >= request.expiration_time:
-                # Check if we should auto-approve or auto-reject
-                if request.auto_approve_after and current_time >= request.created_time + request.auto_approve_after:
-                    self.process_approval(
-                        request.id,
-                        True,
-                        "Automatically approved due to timeout",
-                        "system"
-                    )
-                elif request.auto_reject_after and current_time >= request.created_time + request.auto_reject_after:
-                    self.process_approval(
-                        request.id,
-                        False,
-                        "Automatically rejected due to timeout",
-                        "system"
-                    )
-                else:
-                    # Mark as expired
-                    request.status = ApprovalStatus.EXPIRED
-                    request.updated_time = current_time
-                    request.response_details = "Request expired without a decision"
-
-                    # Create a notification about the expired request
-                    self.notification_system.create_notification(
-                        title=f"Approval Request Expired: {request.title}",
-                        message=f"The approval request has expired without a decision.\n\n{request.description}",
-                        notification_type=NotificationType.WARNING,
-                        priority=NotificationPriority.MEDIUM,
-                        user_id=request.user_id,
-                        related_entity_id=request.id,
-                        related_entity_type="approval_request"
-                    )
-
-                    # Call the callback if provided
-                    if request.callback:
-                        try:
-                            request.callback(request.id, request.status, "Request expired without a decision")
-                        except Exception as e:
-                            logger.error(f"Error in approval callback for expired request {request.id}: {e}")
-
-                    logger.info(f"Marked approval request {request.id} as expired")
+    def start_expiry_scheduler(self) -> None:
+        """Start a background thread that processes requests as soon as they expire."""
+        with self._expiry_condition:
+            if self._expiry_running:
+                return
+            self._expiry_running = True
+            self._expiry_thread = threading.Thread(
+                target=self._run_expiry_scheduler,
+                name="approval-expiry",
+                daemon=True
+            )
+            self._expiry_thread.start()
+        logger.info("Approval expiry scheduler started")
+
+    def stop_expiry_scheduler(self) -> None:
+        """Stop the expiry scheduler thread."""
+        with self._expiry_condition:
+            self._expiry_running = False
+            self._expiry_condition.notify()
+        if self._expiry_thread:
+            self._expiry_thread.join()
+            self._expiry_thread = None
+        logger.info("Approval expiry scheduler stopped")
+
+    def _run_expiry_scheduler(self) -> None:
+        """Sleep until the earliest expiration time, then process the due requests."""
+        while True:
+            with self._expiry_condition:
+                while self._expiry_running:
+                    if self._expiry_heap:
+                        timeout = self._expiry_heap[0][0] - time.time()
+                        if timeout <= 0:
+                            break
+                    else:
+                        timeout = None
+                    # Woken early when a sooner request is scheduled or the scheduler stops
+                    self._expiry_condition.wait(timeout)
+
+                if not self._expiry_running:
+                    return
+
+            try:
+                self.check_expired_requests()
+            except Exception as e:
+                logger.error(f"Error processing expired approval requests: {e}")
 
     def add_delegate(self, delegate: ApprovalDelegate) -> None:
         """
@@ -821,6 +1360,9 @@ class DecisionMatrix:
     Decision matrix for determining approval levels based on decision categories and risk levels.
     """
 
+    # Maximum number of memoized approval level lookups
+    APPROVAL_CACHE_SIZE = 256
+
     def __init__(self):
         """Initialize the decision matrix with default values."""
         # Default decision matrix based on the risk tolerance framework
@@ -895,10 +1437,35 @@ class DecisionMatrix:
             # Add more thresholds for other categories as needed
         }
 
+        # Sorted threshold bounds per category and metric, rebuilt whenever thresholds change
+        self._compiled_thresholds = {}
+        for category in self.risk_thresholds:
+            self._compile_thresholds(category)
+
+        # Bounded memo of (category, risk_level) -> approval level, cleared on every update
+        self._cached_approval_level = functools.lru_cache(maxsize=self.APPROVAL_CACHE_SIZE)(self._lookup_approval_level)
+
     def get_approval_level(self, category: DecisionCategory, risk_level: RiskLevel) -> ApprovalLevel:
         """
         Get the approval level for a given decision category and risk level.
 
+        Args:
+            category: The decision category
+            risk_level: The risk level
+
+        Returns:
+            ApprovalLevel: The approval level
+        """
+        try:
+            return self._cached_approval_level(category, risk_level)
+        except TypeError:
+            # Unhashable risk levels can't be memoized
+            return self._lookup_approval_level(category, risk_level)
+
+    def _lookup_approval_level(self, category: DecisionCategory, risk_level: RiskLevel) -> ApprovalLevel:
+        """
+        Look up the approval level in the matrix without memoization.
+
         Args:
             category: The decision category
             risk_level: The risk level
@@ -927,29 +1494,46 @@ class DecisionMatrix:
         Returns:
             RiskLevel: The assessed risk level
         """
-        if category not in self.risk_thresholds:
+        category_thresholds = self._compiled_thresholds.get(category)
+        if category_thresholds is None:
             # Default to medium risk for unknown categories
             return RiskLevel.MEDIUM
 
-        category_thresholds = self.risk_thresholds[category]
-
         # Check each metric against its thresholds
         highest_risk = RiskLevel.LOW  # Start with lowest risk
+        highest_value = RISK_LEVEL_VALUES[highest_risk]
 
         for metric, value in metrics.items():
-            if metric in category_thresholds:
-                metric_thresholds = category_thresholds[metric]
+            compiled = category_thresholds.get(metric)
+            if compiled is None:
+                continue
 
-                # Find the appropriate risk level based on thresholds
-                for threshold, risk in sorted(metric_thresholds.items()):
-                    if value < threshold:
-                        # If the value is less than the threshold, assign this risk level
-                        if self._risk_level_value(risk) > self._risk_level_value(highest_risk):
-                            highest_risk = risk
-                        break
+            # The risk level is the one for the first threshold strictly above the value
+            bounds, risks, risk_values = compiled
+            index = bisect.bisect_right(bounds, value)
+            if index < len(bounds) and risk_values[index] > highest_value:
+                highest_risk = risks[index]
+                highest_value = risk_values[index]
 
         return highest_risk
 
+    def _compile_thresholds(self, category: DecisionCategory) -> None:
+        """
+        Compile a category's thresholds into sorted arrays for bisection.
+
+        Args:
+            category: The decision category to compile
+        """
+        compiled = {}
+        for metric, metric_thresholds in self.risk_thresholds[category].items():
+            ordered = sorted(metric_thresholds.items())
+            compiled[metric] = (
+                [threshold for threshold, _ in ordered],
+                [risk for _, risk in ordered],
+                [self._risk_level_value(risk) for _, risk in ordered]
+            )
+        self._compiled_thresholds[category] = compiled
+
     def _risk_level_value(self, risk_level: RiskLevel) -> int:
         """
         Convert a risk level to a numeric value for comparison.
@@ -960,13 +1544,7 @@ class DecisionMatrix:
         Returns:
             int: The numeric value
         """
-        risk_values = {
-            RiskLevel.LOW: 1,
-            RiskLevel.MEDIUM: 2,
-            RiskLevel.HIGH: 3,
-            RiskLevel.CRITICAL: 4
-        }
-        return risk_values.get(risk_level, 0)
+        return RISK_LEVEL_VALUES.get(risk_level, 0)
 
     def update_matrix(self, category: DecisionCategory, risk_level: RiskLevel, approval_level: ApprovalLevel) -> None:
         """
@@ -981,6 +1559,7 @@ class DecisionMatrix:
             self.matrix[category] = {}
 
         self.matrix[category][risk_level] = approval_level
+        self._cached_approval_level.cache_clear()
         logger.info(f"Updated decision matrix: {category.value} + {risk_level.value} -> {approval_level.value}")
 
     def update_risk_threshold(self, category: DecisionCategory, metric: str, threshold: float, risk_level: RiskLevel) -> None:
@@ -1000,9 +1579,167 @@ class DecisionMatrix:
             self.risk_thresholds[category][metric] = {}
 
         self.risk_thresholds[category][metric][threshold] = risk_level
+        self._compile_thresholds(category)
+        self._cached_approval_level.cache_clear()
         logger.info(f"Updated risk threshold: {category.value}.{metric}[{threshold}] -> {risk_level.value}")
 
 
+class DecisionLog:
+    """
+    Audit trail of autonomy decisions.
+
+    Keeps a fixed-size ring buffer of recent decisions in memory, optionally appends
+    every decision to size-rotated segment files on disk, and maintains per-bucket
+    counts so aggregate queries don't need to replay the history.
+    """
+
+    # Dimensions that aggregate counts are kept for
+    DIMENSIONS = ("category", "risk_level", "approval_level")
+
+    def __init__(self,
+                max_recent: int = 1000,
+                log_dir: Optional[str] = None,
+                segment_size: int = 10 * 1024 * 1024,
+                bucket_seconds: int = 60,
+                retention_seconds: int = 24 * 60 * 60):
+        """
+        Initialize the decision log.
+
+        Args:
+            max_recent: Number of recent decisions kept in memory
+            log_dir: Directory for the on-disk decision log (None to keep decisions in memory only)
+            segment_size: Size in bytes after which a new log segment is started
+            bucket_seconds: Width of the time buckets used for aggregate counts
+            retention_seconds: How long aggregate counts are kept
+        """
+        self.recent = deque(maxlen=max_recent)
+        self.log_dir = log_dir
+        self.segment_size = segment_size
+        self.bucket_seconds = bucket_seconds
+        self.retention_seconds = retention_seconds
+
+        # Deque of (bucket_start, Counter of (dimension, value)), oldest first
+        self.buckets = deque()
+        self._lock = threading.Lock()
+
+        self._segment = None
+        self._segment_index = 0
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+            existing = [name for name in os.listdir(log_dir) if name.startswith("decisions-") and name.endswith(".log")]
+            if existing:
+                self._segment_index = max(int(name[len("decisions-"):-len(".log")]) for name in existing)
+            self._open_segment()
+
+    def record(self, decision: Dict[str, Any]) -> None:
+        """
+        Record a decision.
+
+        Args:
+            decision: The decision, with timestamp, category, action, context,
+                risk_level and approval_level keys
+        """
+        with self._lock:
+            self.recent.append(decision)
+            self._count(decision)
+            if self._segment:
+                self._append(decision)
+
+    def get_recent(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get the most recent decisions, oldest first.
+
+        Args:
+            limit: The maximum number of decisions to return
+
+        Returns:
+            List[Dict[str, Any]]: The recent decisions
+        """
+        with self._lock:
+            recent = list(itertools.islice(reversed(self.recent), limit))
+        recent.reverse()
+        return recent
+
+    def get_counts(self, dimension: str, window_seconds: int = 60 * 60) -> Dict[str, int]:
+        """
+        Count decisions per value of a dimension over a recent time window.
+
+        Args:
+            dimension: One of "category", "risk_level" or "approval_level"
+            window_seconds: How far back to count (rounded to whole buckets)
+
+        Returns:
+            Dict[str, int]: Number of decisions per value
+        """
+        if dimension not in self.DIMENSIONS:
+            raise ValueError(f"Unknown decision dimension: {dimension}")
+
+        since = int(time.time()) - window_seconds
+        counts = {}
+        with self._lock:
+            # Walk back from the newest bucket and stop at the first one outside the window
+            for bucket_start, counter in reversed(self.buckets):
+                if bucket_start + self.bucket_seconds <= since:
+                    break
+                for (key, value), count in counter.items():
+                    if key == dimension:
+                        counts[value] = counts.get(value, 0) + count
+        return counts
+
+    def close(self) -> None:
+        """Close the current log segment."""
+        with self._lock:
+            if self._segment:
+                self._segment.close()
+                self._segment = None
+
+    def _count(self, decision: Dict[str, Any]) -> None:
+        """Add a decision to its time bucket and drop buckets past retention."""
+        timestamp = decision["timestamp"]
+        bucket_start = timestamp - timestamp % self.bucket_seconds
+        if not self.buckets or self.buckets[-1][0] < bucket_start:
+            self.buckets.append((bucket_start, Counter()))
+
+        counter = self.buckets[-1][1]
+        for dimension in self.DIMENSIONS:
+            counter[(dimension, self._encode(decision[dimension]))] += 1
+
+        while self.buckets and self.buckets[0][0] < timestamp - self.retention_seconds:
+            self.buckets.popleft()
+
+    def _append(self, decision: Dict[str, Any]) -> None:
+        """Append a decision to the current segment, rotating it when full."""
+        # Short keys and no whitespace keep segments compact
+        record = {
+            "t": decision["timestamp"],
+            "c": self._encode(decision["category"]),
+            "a": decision["action"],
+            "r": self._encode(decision["risk_level"]),
+            "l": self._encode(decision["approval_level"]),
+            "x": decision["context"]
+        }
+        self._segment.write(json.dumps(record, separators=(",", ":"), default=self._encode) + "\n")
+        self._segment.flush()
+
+        if self._segment.tell() >= self.segment_size:
+            self._segment.close()
+            self._segment_index += 1
+            self._open_segment()
+
+    def _open_segment(self) -> None:
+        """Open the current segment file for appending."""
+        path = os.path.join(self.log_dir, f"decisions-{self._segment_index:06d}.log")
+        self._segment = open(path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _encode(value: Any) -> Any:
+        """Encode enums by value and anything else unserializable as a string."""
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            return value
+        return str(value)
+
 class AutonomyFramework:
     """
     Framework for managing agent autonomy.
@@ -1011,13 +1748,20 @@ class AutonomyFramework:
     to provide a unified interface for determining when the agent can act autonomously.
     """
 
-    def __init__(self):
-        """Initialize the autonomy framework."""
-        self.notification_system = NotificationSystem()
-        self.approval_workflow = ApprovalWorkflow(self.notification_system)
+    def __init__(self, decision_log_dir: Optional[str] = None):
+        """
+        Initialize the autonomy framework.
+
+        Args:
+            decision_log_dir: Directory for the on-disk decision log (defaults to
+                the DECISION_LOG_DIR environment variable; in memory only if unset)
+        """
+        self.notification_system = NotificationSystem(auto_flush=True, dispatcher=NotificationDispatcher.from_env())
+        self.approval_workflow = ApprovalWorkflow(self.notification_system, auto_expire=True)
         self.decision_matrix = DecisionMatrix()
         self.pending_actions = {}  # Dictionary of action ID to pending action info
-        self.decision_history = []  # List of past decisions for learning
+        self.decision_log = DecisionLog(log_dir=decision_log_dir or os.getenv("DECISION_LOG_DIR"))
+        self.decision_history = self.decision_log.recent  # Ring buffer of recent decisions for learning
         self.experimentation_framework = None  # Will be set after initialization to avoid circular imports
         logger.info("Autonomy Framework initialized")
 
@@ -1050,7 +1794,7 @@ class AutonomyFramework:
         approval_level = self.decision_matrix.get_approval_level(category, risk_level)
 
         # Record the decision in history
-        self.decision_history.append({
+        self.decision_log.record({
             "timestamp": int(time.time()),
             "category": category,
             "action": action,
@@ -1119,7 +1863,20 @@ class AutonomyFramework:
         Returns:
             List[Dict[str, Any]]: The recent decisions
         """
-        return self.decision_history[-limit:] if self.decision_history else []
+        return self.decision_log.get_recent(limit)
+
+    def get_decision_counts(self, dimension: str, window_seconds: int = 60 * 60) -> Dict[str, int]:
+        """
+        Count recent decisions by category, risk level or approval level.
+
+        Args:
+            dimension: One of "category", "risk_level" or "approval_level"
+            window_seconds: How far back to count
+
+        Returns:
+            Dict[str, int]: Number of decisions per value
+        """
+        return self.decision_log.get_counts(dimension, window_seconds)
 
     def set_experimentation_framework(self, experimentation_framework) -> None:
         """
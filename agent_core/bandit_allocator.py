@@ -0,0 +1,299 @@
+"""
+Bandit traffic allocation for the Nick the Great Unified Agent.
+
+This module implements Thompson sampling over the variants ("arms") of running experiments.
+Instead of a fixed traffic split, each arm gets the share of traffic equal to the
+probability that it is the best arm, estimated by sampling from every arm's posterior.
+Conversion-style rewards (0 or 1) use a Beta posterior and revenue-style rewards use a
+Normal posterior for the mean. When NumPy is installed the posteriors of all arms of all
+experiments are sampled in one vectorized call; otherwise the standard library is used.
+"""
+
+import functools
+import logging
+import math
+import random
+import threading
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Reward models
+BERNOULLI = "bernoulli"
+GAUSSIAN = "gaussian"
+
+# Posterior draws used to estimate each arm's probability of being best, with and without
+# NumPy (the standard library path is ~100x slower per draw, so it trades some precision)
+DEFAULT_DRAWS = 2000
+DEFAULT_PYTHON_DRAWS = 500
+
+# Beta parameters above which the standard library path samples a normal approximation instead
+BETA_NORMAL_APPROXIMATION = 30
+
+class BanditAllocator:
+    """
+    Thompson-sampling traffic allocator for the arms of many experiments.
+
+    For each arm it keeps the number of observations, the sum of rewards and the sum of
+    squared rewards, which is enough for both posteriors.
+    """
+
+    def __init__(self, draws: Optional[int] = None, seed: Optional[int] = None, use_numpy: Optional[bool] = None):
+        """
+        Initialize the allocator.
+
+        Args:
+            draws: Number of posterior draws used to estimate allocations (default depends on whether NumPy is used)
+            seed: Seed for the random number generator
+            use_numpy: Whether to use NumPy (default: if it is installed)
+        """
+        self.use_numpy = np is not None if use_numpy is None else use_numpy and np is not None
+        self.draws = draws or (DEFAULT_DRAWS if self.use_numpy else DEFAULT_PYTHON_DRAWS)
+        self.experiments = {}  # Dictionary of experiment_id to {"reward": model, "arms": {arm: [n, sum, sum_sq]}}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._rng = np.random.default_rng(seed) if self.use_numpy else None
+
+    def add_experiment(self, experiment_id: str, arms: List[str], reward: str = BERNOULLI) -> None:
+        """
+        Start allocating traffic for an experiment.
+
+        Args:
+            experiment_id: The ID of the experiment
+            arms: The names of the experiment's variants
+            reward: The reward model, BERNOULLI (0 or 1 per impression) or GAUSSIAN (e.g. revenue)
+
+        Raises:
+            ValueError: If the reward model is unknown or there are fewer than two arms
+        """
+        if reward not in (BERNOULLI, GAUSSIAN):
+            raise ValueError(f"Unknown reward model: {reward}")
+        if len(arms) < 2:
+            raise ValueError("A bandit experiment needs at least two arms")
+
+        with self._lock:
+            self.experiments[experiment_id] = {"reward": reward, "arms": {arm: [0, 0.0, 0.0] for arm in arms}}
+        logger.info(f"Bandit allocation started for experiment {experiment_id} over {len(arms)} arms")
+
+    def remove_experiment(self, experiment_id: str) -> bool:
+        """
+        Stop allocating traffic for an experiment.
+
+        Args:
+            experiment_id: The ID of the experiment
+
+        Returns:
+            bool: True if the experiment was being allocated
+        """
+        with self._lock:
+            return self.experiments.pop(experiment_id, None) is not None
+
+    def record(self,
+               experiment_id: str,
+               arm: str,
+               reward: float,
+               count: int = 1,
+               sum_squares: Optional[float] = None) -> bool:
+        """
+        Record the reward of impressions served by an arm.
+
+        Args:
+            experiment_id: The ID of the experiment
+            arm: The arm that served the impressions
+            reward: The total reward of the impressions (for BERNOULLI, the number of conversions)
+            count: The number of impressions
+            sum_squares: The sum of the squared reward of each impression. Required for a
+                batch (count > 1) of GAUSSIAN rewards, whose spread can't be recovered from the total.
+
+        Returns:
+            bool: True if the reward was recorded, False if the experiment or arm is unknown
+
+        Raises:
+            ValueError: If count is less than 1, a BERNOULLI reward isn't between 0 and count, or
+                sum_squares is missing for a GAUSSIAN batch or smaller than the total allows
+        """
+        if count < 1:
+            raise ValueError(f"Impression count must be at least 1, got {count}")
+
+        with self._lock:
+            experiment = self.experiments.get(experiment_id)
+            stats = experiment["arms"].get(arm) if experiment else None
+            if stats is None:
+                logger.warning(f"Reward recorded for unknown bandit arm {experiment_id}/{arm}")
+                return False
+
+            if experiment["reward"] == BERNOULLI:
+                if not 0 <= reward <= count:
+                    raise ValueError(f"Conversions must be between 0 and {count}, got {reward}")
+                # Each impression's reward is 0 or 1, so its square is itself
+                sum_squares = reward
+            elif sum_squares is None:
+                if count > 1:
+                    raise ValueError("sum_squares is required to record a batch of gaussian rewards")
+                sum_squares = reward * reward
+            elif sum_squares < reward * reward / count * (1 - 1e-9):
+                # By Cauchy-Schwarz the sum of squares is at least total^2 / count
+                raise ValueError(f"sum_squares {sum_squares} is too small for a total reward of {reward} over {count} impressions")
+
+            stats[0] += count
+            stats[1] += reward
+            stats[2] += sum_squares
+        return True
+
+    def choose(self, experiment_id: str) -> Optional[str]:
+        """
+        Choose the arm for one impression by drawing once from every arm's posterior.
+
+        Args:
+            experiment_id: The ID of the experiment
+
+        Returns:
+            Optional[str]: The chosen arm, or None if the experiment is unknown
+        """
+        with self._lock:
+            experiment = self.experiments.get(experiment_id)
+            if experiment is None:
+                return None
+            samples = {arm: self._sampler(experiment["reward"], stats)() for arm, stats in experiment["arms"].items()}
+        return max(samples, key=samples.get)
+
+    def allocate(self, experiment_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Compute the traffic share of every arm: its estimated probability of being the best arm.
+
+        Args:
+            experiment_ids: The experiments to allocate (None for all)
+
+        Returns:
+            Dict[str, Dict[str, float]]: Dictionary of experiment_id to {arm: share}
+        """
+        with self._lock:
+            ids = list(self.experiments) if experiment_ids is None else [i for i in experiment_ids if i in self.experiments]
+            snapshot = {
+                experiment_id: (self.experiments[experiment_id]["reward"],
+                                {arm: tuple(stats) for arm, stats in self.experiments[experiment_id]["arms"].items()})
+                for experiment_id in ids
+            }
+
+        if not snapshot:
+            return {}
+        if self.use_numpy:
+            return self._allocate_numpy(snapshot)
+        return self._allocate_python(snapshot)
+
+    def winner(self, experiment_id: str, confidence: float = 0.95) -> Optional[str]:
+        """
+        Get the arm that is best with at least the given probability.
+
+        Args:
+            experiment_id: The ID of the experiment
+            confidence: The required probability of being best
+
+        Returns:
+            Optional[str]: The winning arm, or None if no arm is confidently best yet
+        """
+        shares = self.allocate([experiment_id]).get(experiment_id, {})
+        for arm, share in shares.items():
+            if share >= confidence:
+                return arm
+        return None
+
+    def get_stats(self, experiment_id: str) -> Dict[str, Dict[str, float]]:
+        """
+        Get the impressions and mean reward of every arm.
+
+        Args:
+            experiment_id: The ID of the experiment
+
+        Returns:
+            Dict[str, Dict[str, float]]: Dictionary of arm to {"impressions", "mean_reward"}
+        """
+        with self._lock:
+            arms = self.experiments.get(experiment_id, {}).get("arms", {})
+            return {
+                arm: {"impressions": n, "mean_reward": total / n if n else 0.0}
+                for arm, (n, total, _) in arms.items()
+            }
+
+    def _sampler(self, reward: str, stats: List[float]) -> Callable[[], float]:
+        """Get a function that draws one sample from an arm's posterior with the standard library."""
+        n, total, _ = stats
+        if reward == BERNOULLI:
+            alpha, beta = 1 + total, 1 + n - total
+            if min(alpha, beta) < BETA_NORMAL_APPROXIMATION:
+                return functools.partial(self._random.betavariate, alpha, beta)
+            # betavariate is slow; with this much data the Beta posterior is close to normal
+            mean = alpha / (alpha + beta)
+            std = math.sqrt(alpha * beta / ((alpha + beta) ** 2 * (alpha + beta + 1)))
+        else:
+            mean, std = self._normal_posterior(stats)
+        return functools.partial(self._random.gauss, mean, std)
+
+    @staticmethod
+    def _normal_posterior(stats: List[float]) -> Tuple[float, float]:
+        """Get the (mean, standard deviation) of the posterior of an arm's mean reward."""
+        n, total, total_sq = stats
+        if n < 2:
+            # Too little data: a wide posterior so the arm keeps getting explored
+            return (total / n if n else 0.0), 1e6
+        mean = total / n
+        variance = max(total_sq / n - mean * mean, 0.0) * n / (n - 1)
+        return mean, math.sqrt(variance / n) or 1e-12
+
+    def _allocate_python(self, snapshot: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+        """Estimate allocations one draw at a time with the standard library."""
+        allocations = {}
+        for experiment_id, (reward, arms) in snapshot.items():
+            samplers = [self._sampler(reward, stats) for stats in arms.values()]
+            wins = [0] * len(samplers)
+            for _ in range(self.draws):
+                samples = [sample() for sample in samplers]
+                wins[samples.index(max(samples))] += 1
+            allocations[experiment_id] = {arm: count / self.draws for arm, count in zip(arms, wins)}
+        return allocations
+
+    def _allocate_numpy(self, snapshot: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+        """Estimate allocations for every arm of every experiment with one vectorized sample per reward model."""
+        ids = list(snapshot)
+        width = max(len(arms) for _, arms in snapshot.values())
+
+        # Arms are laid out as an (experiments, width) grid; unused cells never win
+        stats = np.zeros((len(ids), width, 3))
+        used = np.zeros((len(ids), width), dtype=bool)
+        bernoulli = np.array([snapshot[i][0] == BERNOULLI for i in ids])
+        for row, experiment_id in enumerate(ids):
+            arms = snapshot[experiment_id][1]
+            stats[row, :len(arms)] = list(arms.values())
+            used[row, :len(arms)] = True
+
+        n, total, total_sq = stats[..., 0], stats[..., 1], stats[..., 2]
+        samples = np.empty((self.draws, len(ids), width))
+
+        if bernoulli.any():
+            alpha = 1 + total[bernoulli]
+            beta = np.maximum(1 + n[bernoulli] - total[bernoulli], 1e-12)
+            samples[:, bernoulli] = self._rng.beta(alpha, beta, size=(self.draws,) + alpha.shape)
+
+        if (~bernoulli).any():
+            gn, gtotal, gtotal_sq = n[~bernoulli], total[~bernoulli], total_sq[~bernoulli]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = np.where(gn > 0, gtotal / np.maximum(gn, 1), 0.0)
+                variance = np.maximum(gtotal_sq / np.maximum(gn, 1) - mean * mean, 0.0) * gn / np.maximum(gn - 1, 1)
+                std = np.where(gn < 2, 1e6, np.maximum(np.sqrt(variance / np.maximum(gn, 1)), 1e-12))
+            samples[:, ~bernoulli] = self._rng.normal(mean, std, size=(self.draws,) + mean.shape)
+
+        samples[:, ~used] = -np.inf
+        best = samples.argmax(axis=2)  # (draws, experiments)
+        shares = (best[..., None] == np.arange(width)).mean(axis=0)  # (experiments, width)
+
+        return {
+            experiment_id: {arm: float(shares[row, column]) for column, arm in enumerate(snapshot[experiment_id][1])}
+            for row, experiment_id in enumerate(ids)
+        }
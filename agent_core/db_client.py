@@ -40,6 +40,9 @@ class BackendDBClient:
         self.db_sync_stub = None
         self.connected = False
 
+        # Cursor of the last restored page, used to resume an interrupted restore
+        self.restore_cursor = ''
+
         # Try to connect
         self.connect()
 
@@ -87,6 +90,42 @@ class BackendDBClient:
             logger.error(f"Error restoring experiments from Backend API: {e}")
             return None
 
+    def stream_restore_experiments(self, states=None, page_size=100, cursor=''):
+        """Stream experiment data from the Backend API page by page
+
+        Yields (experiments, next_cursor) for each page received. The cursor of the
+        last page received is kept in self.restore_cursor, so an interrupted restore
+        can be resumed by passing it back in.
+        """
+        # Reset before connecting, so a failed connect doesn't leave a previous restore's cursor
+        self.restore_cursor = cursor
+
+        if not self.connected and not self.connect():
+            logger.error("Cannot restore experiments: Not connected to Backend API")
+            return
+
+        try:
+            # Create request
+            request = database_sync_pb2.StreamRestoreExperimentsRequest(
+                experiment_states=states or [],
+                page_size=page_size,
+                cursor=cursor
+            )
+
+            # Pages arrive as the backend reads them, so callers can hydrate while receiving
+            for page in self.db_sync_stub.StreamRestoreExperiments(request):
+                if not page.success:
+                    logger.error(f"Failed to restore experiments: {page.message}")
+                    return
+
+                self.restore_cursor = page.next_cursor
+                yield page.experiments, page.next_cursor
+
+                if not page.next_cursor:
+                    return
+        except Exception as e:
+            logger.error(f"Error streaming experiments from Backend API: {e}")
+
     def sync_experiment_status(self, experiment_status):
         """Sync experiment status with the Backend API"""
         if not self.connected and not self.connect():
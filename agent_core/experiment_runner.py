@@ -0,0 +1,361 @@
+"""
+Experiment runner for the Nick the Great Unified Agent.
+
+This module runs started experiments for their configured duration. A single scheduler
+thread keeps a min-heap of metric collection ticks for every running experiment, and the
+collectors for the ticks that are due run on a small shared worker pool, so hundreds of
+experiments don't need a thread each. The number of running experiments and their total
+budget are capped; experiments that don't fit wait in a FIFO queue until a running one
+finishes.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Seconds in one day of experiment duration
+DAY_SECONDS = 24 * 3600
+
+class ExperimentRunner:
+    """
+    Shared scheduler that drives running experiments.
+
+    Collectors are registered per experiment type and called with the experiment on every
+    tick; the metrics they return are merged into experiment.metrics. When an experiment's
+    duration has passed, a final tick is collected and on_finish is called with its results.
+    """
+
+    def __init__(self,
+                 max_concurrent: int = 100,
+                 budget_limit: Optional[float] = None,
+                 tick_interval: float = 3600,
+                 day_length: float = DAY_SECONDS,
+                 max_workers: int = 4,
+                 on_start: Optional[Callable[[Any], None]] = None,
+                 on_finish: Optional[Callable[[Any, Dict[str, Any], Optional[Exception]], None]] = None,
+                 auto_start: bool = False):
+        """
+        Initialize the experiment runner.
+
+        Args:
+            max_concurrent: Maximum number of experiments running at once
+            budget_limit: Maximum total budget of running experiments (None for no limit)
+            tick_interval: Time (in seconds) between metric collection ticks
+            day_length: Length (in seconds) of one day of experiment duration
+            max_workers: Number of threads running collectors
+            on_start: Called with the experiment when it is admitted and starts running
+            on_finish: Called with (experiment, results, error) when a run ends
+            auto_start: Whether to start the scheduler thread immediately
+        """
+        self.max_concurrent = max_concurrent
+        self.budget_limit = budget_limit
+        self.tick_interval = tick_interval
+        self.day_length = day_length
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.collectors = {}  # Dictionary of experiment type to (collector, evaluator)
+        self.runs = {}  # Dictionary of experiment_id to run state
+        self.queue = deque()  # Experiments waiting for a slot, in submission order
+        self.committed_budget = 0.0
+        self._elapsed = {}  # Dictionary of experiment_id to seconds already run, for released experiments
+
+        # Min-heap of (due_time, sequence, experiment_id); entries for released runs are skipped lazily
+        self._tick_heap = []
+        self._tick_sequence = itertools.count()
+        self._condition = threading.Condition(threading.RLock())
+        self._scheduler_thread = None
+        self._scheduler_running = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="experiment-collector")
+
+        logger.info("Experiment runner initialized")
+
+        if auto_start:
+            self.start_scheduler()
+
+    def register_collector(self,
+                           experiment_type: Any,
+                           collector: Callable[[Any], Dict[str, Any]],
+                           evaluator: Optional[Callable[[Any], Dict[str, Any]]] = None) -> None:
+        """
+        Register the metric collector (and optionally the results evaluator) for an experiment type.
+
+        Args:
+            experiment_type: The experiment type
+            collector: Function called with the experiment on every tick, returning metrics to merge
+            evaluator: Function called with the experiment when it finishes, returning its results
+        """
+        self.collectors[experiment_type] = (collector, evaluator)
+
+    def submit(self, experiment: Any) -> bool:
+        """
+        Start running an experiment, or queue it if no slot or budget is free.
+
+        Args:
+            experiment: The experiment to run
+
+        Returns:
+            bool: True if the experiment started running, False if it was queued
+        """
+        with self._condition:
+            if experiment.id in self.runs or experiment in self.queue:
+                return experiment.id in self.runs
+            self.queue.append(experiment)
+            started = self._admit_queued()
+
+        self._notify_started(started)
+        return experiment in started
+
+    def release(self, experiment_id: str, keep_progress: bool = True) -> bool:
+        """
+        Stop running (or drop the queued) experiment, freeing its slot and budget.
+
+        Args:
+            experiment_id: The ID of the experiment
+            keep_progress: Whether to keep the time already run, so submitting the experiment
+                again resumes where it stopped
+
+        Returns:
+            bool: True if the experiment was running or queued
+        """
+        with self._condition:
+            run = self.runs.pop(experiment_id, None)
+            if run is None:
+                queued = [experiment for experiment in self.queue if experiment.id == experiment_id]
+                for experiment in queued:
+                    self.queue.remove(experiment)
+                if not keep_progress:
+                    self._elapsed.pop(experiment_id, None)
+                return bool(queued)
+
+            self.committed_budget -= run["experiment"].budget
+            if keep_progress:
+                self._elapsed[experiment_id] = run["elapsed"] + time.time() - run["started"]
+            started = self._admit_queued()
+
+        self._notify_started(started)
+        logger.info(f"Released experiment {experiment_id} from the runner")
+        return True
+
+    def run_due(self, current_time: Optional[float] = None) -> int:
+        """
+        Collect metrics for every tick that is due and finish experiments whose duration has passed.
+
+        Args:
+            current_time: The current time (default: time.time())
+
+        Returns:
+            int: The number of ticks processed
+        """
+        current_time = time.time() if current_time is None else current_time
+
+        # A run's next tick can already be due too (e.g. after a long pause), so repeat until none are
+        processed = 0
+        while True:
+            count = self._run_due_once(current_time)
+            if not count:
+                return processed
+            processed += count
+
+    def _run_due_once(self, current_time: float) -> int:
+        """Process the ticks due at current_time once, returning how many there were."""
+        due = []
+        with self._condition:
+            while self._tick_heap and self._tick_heap[0][0] <= current_time:
+                due_time, _, experiment_id = heapq.heappop(self._tick_heap)
+                run = self.runs.get(experiment_id)
+                if run is not None and run["next_tick"] == due_time:
+                    due.append(run)
+
+        if not due:
+            return 0
+
+        # Collectors may do I/O, so due ticks are collected in parallel
+        list(self._executor.map(self._collect, due))
+
+        finished = []
+        with self._condition:
+            for run in due:
+                experiment_id = run["experiment"].id
+                if self.runs.get(experiment_id) is not run:
+                    # Released while its metrics were being collected
+                    continue
+                if run["next_tick"] >= run["end_time"]:
+                    del self.runs[experiment_id]
+                    self._elapsed.pop(experiment_id, None)
+                    self.committed_budget -= run["experiment"].budget
+                    finished.append(run)
+                else:
+                    # Tick times are computed from the start, so rounding errors don't accumulate
+                    run["scheduled"] += 1
+                    self._schedule(run, min(run["started"] + run["scheduled"] * self.tick_interval, run["end_time"]))
+            started = self._admit_queued()
+
+        for run in finished:
+            self._finish(run)
+        self._notify_started(started)
+        return len(due)
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get the runner's load.
+
+        Returns:
+            Dict[str, Any]: Running and queued experiment counts and the committed budget
+        """
+        with self._condition:
+            return {
+                "running": len(self.runs),
+                "queued": len(self.queue),
+                "committed_budget": self.committed_budget,
+                "budget_limit": self.budget_limit,
+                "max_concurrent": self.max_concurrent
+            }
+
+    def start_scheduler(self) -> None:
+        """Start the background thread that processes ticks as they become due."""
+        with self._condition:
+            if self._scheduler_running:
+                return
+            self._scheduler_running = True
+            self._scheduler_thread = threading.Thread(
+                target=self._run_scheduler,
+                name="experiment-runner",
+                daemon=True
+            )
+            self._scheduler_thread.start()
+        logger.info("Experiment runner scheduler started")
+
+    def stop_scheduler(self) -> None:
+        """Stop the scheduler thread."""
+        with self._condition:
+            self._scheduler_running = False
+            self._condition.notify()
+        if self._scheduler_thread:
+            self._scheduler_thread.join()
+            self._scheduler_thread = None
+        logger.info("Experiment runner scheduler stopped")
+
+    def shutdown(self) -> None:
+        """Stop the scheduler thread and the collector pool."""
+        self.stop_scheduler()
+        self._executor.shutdown(wait=True)
+
+    def _admit_queued(self) -> List[Any]:
+        """Start queued experiments, in order, while a slot and budget are free. Called with the lock held."""
+        started = []
+        while self.queue and len(self.runs) < self.max_concurrent:
+            experiment = self.queue[0]
+            if self.budget_limit is not None and self.committed_budget + experiment.budget > self.budget_limit:
+                # Strict FIFO: later, cheaper experiments don't overtake the head of the queue
+                break
+            self.queue.popleft()
+
+            now = time.time()
+            elapsed = self._elapsed.pop(experiment.id, 0.0)
+            run = {
+                "experiment": experiment,
+                "started": now,
+                "elapsed": elapsed,
+                "end_time": now + max(experiment.duration * self.day_length - elapsed, 0),
+                "next_tick": None,
+                "scheduled": 1,  # Ticks scheduled since admission
+                "ticks": 0,
+                "collection_errors": 0
+            }
+            self.runs[experiment.id] = run
+            self.committed_budget += experiment.budget
+            self._schedule(run, min(now + self.tick_interval, run["end_time"]))
+            started.append(experiment)
+        return started
+
+    def _schedule(self, run: Dict[str, Any], due_time: float) -> None:
+        """Add a run's next tick to the heap and wake the scheduler if it is now due first. Called with the lock held."""
+        run["next_tick"] = due_time
+        entry = (due_time, next(self._tick_sequence), run["experiment"].id)
+        heapq.heappush(self._tick_heap, entry)
+        if self._tick_heap[0] is entry:
+            self._condition.notify()
+
+    def _collect(self, run: Dict[str, Any]) -> None:
+        """Run the collector for one tick and merge its metrics into the experiment."""
+        experiment = run["experiment"]
+        collector = self.collectors.get(experiment.experiment_type, (None, None))[0]
+        run["ticks"] += 1
+        if collector is None:
+            return
+
+        try:
+            metrics = collector(experiment)
+        except Exception as e:
+            run["collection_errors"] += 1
+            logger.error(f"Error collecting metrics for experiment {experiment.id}: {e}")
+            return
+
+        if metrics:
+            experiment.metrics.update(metrics)
+
+    def _finish(self, run: Dict[str, Any]) -> None:
+        """Evaluate a finished run and report its results."""
+        experiment = run["experiment"]
+        evaluator = self.collectors.get(experiment.experiment_type, (None, None))[1]
+        results = {
+            "metrics": dict(experiment.metrics),
+            "ticks": run["ticks"],
+            "collection_errors": run["collection_errors"]
+        }
+
+        error = None
+        if evaluator is not None:
+            try:
+                results.update(evaluator(experiment) or {})
+            except Exception as e:
+                error = e
+                logger.error(f"Error evaluating results of experiment {experiment.id}: {e}")
+
+        logger.info(f"Experiment {experiment.id} finished after {run['ticks']} ticks")
+        if self.on_finish:
+            try:
+                self.on_finish(experiment, results, error)
+            except Exception as e:
+                logger.error(f"Error in finish callback for experiment {experiment.id}: {e}")
+
+    def _notify_started(self, started: List[Any]) -> None:
+        """Call on_start for newly admitted experiments, outside the lock."""
+        for experiment in started:
+            logger.info(f"Experiment {experiment.id} admitted to the runner")
+            if self.on_start:
+                try:
+                    self.on_start(experiment)
+                except Exception as e:
+                    logger.error(f"Error in start callback for experiment {experiment.id}: {e}")
+
+    def _run_scheduler(self) -> None:
+        """Sleep until the earliest tick, then process the due ticks."""
+        while True:
+            with self._condition:
+                while self._scheduler_running:
+                    if self._tick_heap:
+                        timeout = self._tick_heap[0][0] - time.time()
+                        if timeout <= 0:
+                            break
+                    else:
+                        timeout = None
+                    # Woken early when a sooner tick is scheduled or the scheduler stops
+                    self._condition.wait(timeout)
+
+                if not self._scheduler_running:
+                    return
+
+            try:
+                self.run_due()
+            except Exception as e:
+                logger.error(f"Error running experiment ticks: {e}")
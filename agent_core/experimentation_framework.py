@@ -6,6 +6,7 @@ controlled experiments within predefined boundaries.
 """
 
 import logging
+import threading
 import time
 import uuid
 from enum import Enum
@@ -19,11 +20,17 @@ from autonomy_framework import (
     NotificationPriority,
     AutonomyFramework
 )
+from experiment_runner import ExperimentRunner
+from bandit_allocator import BanditAllocator, BERNOULLI, GAUSSIAN
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Allocation modes for experiments with variants
+FIXED_ALLOCATION = "fixed"
+BANDIT_ALLOCATION = "bandit"
+
 class ExperimentType(Enum):
     """Types of experiments that the agent can run."""
     A_B_TEST = "a_b_test"
@@ -39,15 +46,80 @@ class ExperimentStatus(Enum):
     """Status of an experiment."""
     DRAFT = "draft"
     PENDING_APPROVAL = "pending_approval"
+    QUEUED = "queued"
     RUNNING = "running"
     PAUSED = "paused"
     COMPLETED = "completed"
     FAILED = "failed"
     CANCELLED = "cancelled"
 
+# Experiment types that can use bandit allocation: the prefix of their variant parameters
+# (e.g. content_a, content_b) and their reward model
+BANDIT_VARIANTS = {
+    ExperimentType.A_B_TEST: ("content", BERNOULLI),
+    ExperimentType.PRICING_TEST: ("price", GAUSSIAN)
+}
+
+# Python types accepted for each parameter value type
+PARAMETER_TYPES = {
+    "int": int,
+    "float": (int, float),
+    "str": str,
+    "bool": bool
+}
+
+# How each parameter value type is described in warnings
+PARAMETER_TYPE_NAMES = {
+    "int": "an integer",
+    "float": "a number",
+    "str": "a string",
+    "bool": "a boolean"
+}
+
+def _format_parameter_failure(name: str, code: str, limit: Any) -> str:
+    """Format a failed parameter check as the warning text used by create_experiment."""
+    if code == "invalid_type":
+        return f"Parameter {name} must be {PARAMETER_TYPE_NAMES[limit]}"
+    if code == "below_minimum":
+        return f"Parameter {name} must be at least {limit}"
+    if code == "above_maximum":
+        return f"Parameter {name} must be at most {limit}"
+    return f"Parameter {name} must be one of {limit}"
+
+def format_warnings(warnings: List[Dict[str, Any]]) -> List[str]:
+    """
+    Format structured validation warnings as text.
+    
+    Args:
+        warnings: Warnings returned by a template validator
+    
+    Returns:
+        List[str]: The warning messages
+    """
+    messages = []
+    for warning in warnings:
+        field, code = warning["field"], warning["code"]
+        if field == "sample_size":
+            bound = "minimum" if code == "below_minimum" else "maximum"
+            messages.append(f"Sample size {warning['value']} is {code.split('_')[0]} the recommended {bound} of {warning['limit']}")
+        elif field == "duration":
+            bound = "minimum" if code == "below_minimum" else "maximum"
+            messages.append(f"Duration {warning['value']} days is {code.split('_')[0]} the recommended {bound} of {warning['limit']} days")
+        elif field == "budget":
+            messages.append(f"Budget ${warning['value']} is above the recommended limit of ${warning['limit']}")
+        elif code == "missing":
+            messages.append(f"Parameter {field} not specified, using default value: {warning['default']}")
+        else:
+            messages.append(_format_parameter_failure(field, code, warning["limit"]))
+            messages.append(f"Invalid value for parameter {field}, using default value: {warning['default']}")
+    return messages
+
 class ExperimentParameter:
     """A parameter for an experiment."""
     
+    # Fields the compiled checker is built from; assigning one of them recompiles it
+    _CHECKED_FIELDS = frozenset(("value_type", "min_value", "max_value", "allowed_values"))
+    
     def __init__(self, 
                 name: str, 
                 value_type: str,
@@ -76,6 +148,23 @@ class ExperimentParameter:
         self.allowed_values = allowed_values
         self.description = description
     
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in self._CHECKED_FIELDS:
+            self.__dict__.pop("_checker", None)
+    
+    @property
+    def checker(self) -> Callable[[Any], Optional[Tuple[str, Any]]]:
+        """
+        The compiled checks, compiled on first use and again after a checked field is assigned.
+        
+        Replace allowed_values rather than changing the list in place, so the checks are recompiled.
+        """
+        checker = self.__dict__.get("_checker")
+        if checker is None:
+            checker = self.__dict__["_checker"] = self.compile()
+        return checker
+    
     def validate(self, value: Any) -> Tuple[bool, Optional[str]]:
         """
         Validate a parameter value.
@@ -86,32 +175,64 @@ class ExperimentParameter:
         Returns:
             Tuple[bool, Optional[str]]: (is_valid, error_message)
         """
-        # Check type
-        if self.value_type == "int":
-            if not isinstance(value, int):
-                return False, f"Parameter {self.name} must be an integer"
-        elif self.value_type == "float":
-            if not isinstance(value, (int, float)):
-                return False, f"Parameter {self.name} must be a number"
-        elif self.value_type == "str":
-            if not isinstance(value, str):
-                return False, f"Parameter {self.name} must be a string"
-        elif self.value_type == "bool":
-            if not isinstance(value, bool):
-                return False, f"Parameter {self.name} must be a boolean"
-        
-        # Check range
-        if self.min_value is not None and value < self.min_value:
-            return False, f"Parameter {self.name} must be at least {self.min_value}"
-        
-        if self.max_value is not None and value > self.max_value:
-            return False, f"Parameter {self.name} must be at most {self.max_value}"
-        
-        # Check allowed values
-        if self.allowed_values is not None and value not in self.allowed_values:
-            return False, f"Parameter {self.name} must be one of {self.allowed_values}"
-        
-        return True, None
+        failure = self.checker(value)
+        if failure is None:
+            return True, None
+        return False, _format_parameter_failure(self.name, *failure)
+    
+    def compile(self) -> Callable[[Any], Optional[Tuple[str, Any]]]:
+        """
+        Compile the parameter's checks into a function that only runs the checks that apply.
+        
+        Returns:
+            Callable[[Any], Optional[Tuple[str, Any]]]: Function returning None for a valid value,
+                or (code, limit) for the first failed check
+        """
+        checks = []
+        
+        types = PARAMETER_TYPES.get(self.value_type)
+        if types is not None:
+            value_type = self.value_type
+            checks.append(lambda value: None if isinstance(value, types) else ("invalid_type", value_type))
+        
+        if self.min_value is not None:
+            min_value = self.min_value
+            checks.append(lambda value: ("below_minimum", min_value) if value < min_value else None)
+        
+        if self.max_value is not None:
+            max_value = self.max_value
+            checks.append(lambda value: ("above_maximum", max_value) if value > max_value else None)
+        
+        if self.allowed_values is not None:
+            allowed_values = self.allowed_values
+            try:
+                allowed_set = frozenset(allowed_values)
+            except TypeError:
+                allowed_set = None
+            
+            def check_allowed(value):
+                try:
+                    allowed = value in allowed_set if allowed_set is not None else value in allowed_values
+                except TypeError:
+                    # Unhashable values can't be in the set, but may still equal a listed value
+                    allowed = value in allowed_values
+                return None if allowed else ("not_allowed", allowed_values)
+            
+            checks.append(check_allowed)
+        
+        if not checks:
+            return lambda value: None
+        if len(checks) == 1:
+            return checks[0]
+        
+        def check(value):
+            for single_check in checks:
+                failure = single_check(value)
+                if failure is not None:
+                    return failure
+            return None
+        
+        return check
 
 class ExperimentTemplate:
     """A template for an experiment."""
@@ -154,6 +275,55 @@ class ExperimentTemplate:
         self.success_criteria = success_criteria
         self.risk_level = risk_level
         self.created_time = int(time.time())
+        self.validator = self.compile_validator()
+    
+    def compile_validator(self) -> Callable[[Dict[str, Any], int, int, float], Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Compile the template's ranges and parameter checks into one validator function.
+        
+        The validator is compiled when the template is created; call this again (and assign the
+        result to validator) after changing the template.
+        
+        Returns:
+            Callable: Function taking (parameters, sample_size, duration, budget) and returning
+                (parameter values to set, structured warnings). Each warning is a dictionary with
+                "field", "code" and, depending on the code, "value", "limit" and "default".
+        """
+        min_size, max_size = self.sample_size_range
+        min_duration, max_duration = self.duration_range
+        budget_limit = self.budget_limit
+        checks = [(name, param.checker, param.default_value) for name, param in self.parameters.items()]
+        
+        def validate(parameters, sample_size, duration, budget):
+            warnings = []
+            updates = {}
+            
+            if sample_size < min_size:
+                warnings.append({"field": "sample_size", "code": "below_minimum", "value": sample_size, "limit": min_size})
+            elif sample_size > max_size:
+                warnings.append({"field": "sample_size", "code": "above_maximum", "value": sample_size, "limit": max_size})
+            
+            if duration < min_duration:
+                warnings.append({"field": "duration", "code": "below_minimum", "value": duration, "limit": min_duration})
+            elif duration > max_duration:
+                warnings.append({"field": "duration", "code": "above_maximum", "value": duration, "limit": max_duration})
+            
+            if budget > budget_limit:
+                warnings.append({"field": "budget", "code": "above_limit", "value": budget, "limit": budget_limit})
+            
+            for name, check, default in checks:
+                if name not in parameters:
+                    updates[name] = default
+                    warnings.append({"field": name, "code": "missing", "default": default})
+                    continue
+                failure = check(parameters[name])
+                if failure is not None:
+                    updates[name] = default
+                    warnings.append({"field": name, "code": failure[0], "value": parameters[name], "limit": failure[1], "default": default})
+            
+            return updates, warnings
+        
+        return validate
 
 class Experiment:
     """An experiment run by the agent."""
@@ -195,28 +365,64 @@ class Experiment:
         self.success_criteria = success_criteria
         self.template_id = template_id
         self.user_id = user_id
-        self.status = ExperimentStatus.DRAFT
+        self.status_listener = None  # Called with (experiment, old_status, new_status) on status changes
+        self._status = ExperimentStatus.DRAFT
+        self.approval_request_id = None  # ID of the approval request the experiment is waiting on
         self.created_time = int(time.time())
         self.start_time = None
         self.end_time = None
         self.results = {}
         self.metrics = {}
         self.notes = []
+    
+    @property
+    def status(self) -> ExperimentStatus:
+        """The status of the experiment."""
+        return self._status
+    
+    @status.setter
+    def status(self, status: ExperimentStatus) -> None:
+        old_status = self._status
+        self._status = status
+        if self.status_listener and old_status != status:
+            self.status_listener(self, old_status, status)
 
 class ExperimentationFramework:
-    """Framework for running controlled experiments."""
+    """
+    Framework for running controlled experiments.
+    
+    Running experiments only gather metrics through the collectors registered on the runner.
+    A/B and pricing tests using bandit allocation get a default collector that records their
+    traffic split and variant outcomes; every other experiment needs a collector registered
+    for its type with runner.register_collector, or it finishes with empty metrics.
+    """
     
-    def __init__(self, autonomy_framework: AutonomyFramework):
+    def __init__(self,
+                 autonomy_framework: AutonomyFramework,
+                 runner: Optional[ExperimentRunner] = None,
+                 bandit: Optional[BanditAllocator] = None):
         """
         Initialize the experimentation framework.
         
         Args:
             autonomy_framework: The autonomy framework to use for approvals
+            runner: The runner that drives started experiments (a default runner with its scheduler started if None), shut down by close()
+            bandit: The allocator for experiments using bandit allocation
         """
         self.autonomy_framework = autonomy_framework
+        self.bandit = bandit or BanditAllocator()
+        self.runner = runner or ExperimentRunner(auto_start=True)
+        self.runner.on_start = self._experiment_admitted
+        self.runner.on_finish = self._experiment_finished
+        for experiment_type in BANDIT_VARIANTS:
+            if experiment_type not in self.runner.collectors:
+                self.runner.register_collector(experiment_type, self._collect_bandit_metrics)
         self.templates = {}  # Dictionary of template_id to ExperimentTemplate
         self.experiments = {}  # Dictionary of experiment_id to Experiment
-        self.running_experiments = {}  # Dictionary of experiment_id to experiment runner
+        self.experiments_by_status = {status: {} for status in ExperimentStatus}  # Dictionary of status to {experiment_id: Experiment}
+        self.experiments_by_approval = {}  # Dictionary of approval request ID to experiment_id
+        self.running_experiments = self.runner.runs  # Dictionary of experiment_id to run state (owned by the runner)
+        self._lock = threading.RLock()  # Guards the indexes; approval callbacks can arrive from other threads
         logger.info("Experimentation Framework initialized")
         
         # Initialize with default templates
@@ -233,7 +439,8 @@ class ExperimentationFramework:
                 ExperimentParameter("content_a", "str", "", description="First content variant"),
                 ExperimentParameter("content_b", "str", "", description="Second content variant"),
                 ExperimentParameter("target_audience", "str", "all", description="Target audience for the test"),
-                ExperimentParameter("metric", "str", "engagement", allowed_values=["engagement", "conversion", "retention"], description="Primary metric to optimize for")
+                ExperimentParameter("metric", "str", "engagement", allowed_values=["engagement", "conversion", "retention"], description="Primary metric to optimize for"),
+                ExperimentParameter("allocation", "str", FIXED_ALLOCATION, allowed_values=[FIXED_ALLOCATION, BANDIT_ALLOCATION], description="Fixed traffic split, or a bandit that shifts traffic to the better variant")
             ],
             sample_size_range=(1000, 5000),
             duration_range=(3, 7),
@@ -256,7 +463,8 @@ class ExperimentationFramework:
                 ExperimentParameter("price_a", "float", 0.0, min_value=0.0, description="First price point"),
                 ExperimentParameter("price_b", "float", 0.0, min_value=0.0, description="Second price point"),
                 ExperimentParameter("product_id", "str", "", description="ID of the product being tested"),
-                ExperimentParameter("target_audience", "str", "all", description="Target audience for the test")
+                ExperimentParameter("target_audience", "str", "all", description="Target audience for the test"),
+                ExperimentParameter("allocation", "str", FIXED_ALLOCATION, allowed_values=[FIXED_ALLOCATION, BANDIT_ALLOCATION], description="Fixed traffic split, or a bandit that shifts traffic to the better price")
             ],
             sample_size_range=(500, 2000),
             duration_range=(5, 14),
@@ -305,37 +513,9 @@ class ExperimentationFramework:
         
         # If a template is specified, validate against it
         if template_id and template_id in self.templates:
-            template = self.templates[template_id]
-            
-            # Check sample size
-            min_size, max_size = template.sample_size_range
-            if sample_size < min_size:
-                warnings.append(f"Sample size {sample_size} is below the recommended minimum of {min_size}")
-            elif sample_size > max_size:
-                warnings.append(f"Sample size {sample_size} is above the recommended maximum of {max_size}")
-            
-            # Check duration
-            min_duration, max_duration = template.duration_range
-            if duration < min_duration:
-                warnings.append(f"Duration {duration} days is below the recommended minimum of {min_duration} days")
-            elif duration > max_duration:
-                warnings.append(f"Duration {duration} days is above the recommended maximum of {max_duration} days")
-            
-            # Check budget
-            if budget > template.budget_limit:
-                warnings.append(f"Budget ${budget} is above the recommended limit of ${template.budget_limit}")
-            
-            # Validate parameters
-            for param_name, param in template.parameters.items():
-                if param_name not in parameters:
-                    parameters[param_name] = param.default_value
-                    warnings.append(f"Parameter {param_name} not specified, using default value: {param.default_value}")
-                else:
-                    is_valid, error = param.validate(parameters[param_name])
-                    if not is_valid:
-                        warnings.append(error)
-                        parameters[param_name] = param.default_value
-                        warnings.append(f"Invalid value for parameter {param_name}, using default value: {param.default_value}")
+            updates, structured_warnings = self.templates[template_id].validator(parameters, sample_size, duration, budget)
+            parameters.update(updates)
+            warnings = format_warnings(structured_warnings)
         
         # Create the experiment
         experiment = Experiment(
@@ -351,11 +531,74 @@ class ExperimentationFramework:
             user_id=user_id
         )
         
-        self.experiments[experiment.id] = experiment
+        self._track(experiment)
         logger.info(f"Created experiment: {experiment.id} - {name}")
         
         return experiment, warnings
     
+    def create_experiments(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Validate and create many experiments in one call.
+        
+        Each item holds the arguments of create_experiment. Items with a template_id may leave
+        out experiment_type, description and success_criteria, which then come from the template.
+        Parameters are copied, so items can share a parameters dictionary.
+        
+        Args:
+            batch: The experiments to create
+        
+        Returns:
+            List[Dict[str, Any]]: One result per item, in order: "experiment" (None if the item was
+                rejected), "warnings" (structured, see ExperimentTemplate.compile_validator; use
+                format_warnings for text) and "error" (why the item was rejected, or None)
+        """
+        results = []
+        created = []
+        
+        for spec in batch:
+            template = self.templates.get(spec.get("template_id"))
+            try:
+                experiment_type = spec.get("experiment_type") or (template.experiment_type if template else None)
+                if not isinstance(experiment_type, ExperimentType):
+                    experiment_type = ExperimentType(experiment_type)
+                parameters = dict(spec.get("parameters") or {})
+                sample_size, duration, budget = spec["sample_size"], spec["duration"], spec["budget"]
+                
+                warnings = []
+                if template is not None:
+                    updates, warnings = template.validator(parameters, sample_size, duration, budget)
+                    parameters.update(updates)
+                
+                experiment = Experiment(
+                    name=spec["name"],
+                    experiment_type=experiment_type,
+                    description=spec.get("description", template.description if template else ""),
+                    parameters=parameters,
+                    sample_size=sample_size,
+                    duration=duration,
+                    budget=budget,
+                    success_criteria=spec.get("success_criteria", dict(template.success_criteria) if template else {}),
+                    template_id=spec.get("template_id"),
+                    user_id=spec.get("user_id")
+                )
+            except KeyError as e:
+                results.append({"experiment": None, "warnings": [], "error": f"Missing field: {e.args[0]}"})
+                continue
+            except (ValueError, TypeError) as e:
+                results.append({"experiment": None, "warnings": [], "error": str(e)})
+                continue
+            
+            created.append(experiment)
+            results.append({"experiment": experiment, "warnings": warnings, "error": None})
+        
+        # Register the whole batch under one lock, with one log line instead of one per experiment
+        with self._lock:
+            for experiment in created:
+                self._track(experiment)
+        logger.info(f"Created {len(created)} experiments in a batch of {len(batch)}")
+        
+        return results
+    
     def start_experiment(self, experiment_id: str) -> Tuple[bool, Optional[str]]:
         """
         Start an experiment.
@@ -398,63 +641,261 @@ class ExperimentationFramework:
                     # Set status to pending approval
                     experiment.status = ExperimentStatus.PENDING_APPROVAL
                     
-                    # Create an approval request
-                    self.autonomy_framework.get_approval_workflow().create_approval_request(
-                        title=f"Experiment Approval: {experiment.name}",
-                        description=f"Approval is required to run the following experiment:\n\n"
-                                   f"Name: {experiment.name}\n"
-                                   f"Type: {experiment.experiment_type.value}\n"
-                                   f"Budget: ${experiment.budget}\n"
-                                   f"Sample Size: {experiment.sample_size}\n"
-                                   f"Duration: {experiment.duration} days\n\n"
-                                   f"Description: {experiment.description}",
-                        category=DecisionCategory.NEW_OPPORTUNITY,
-                        action="run_experiment",
-                        context={
-                            "experiment_id": experiment_id,
-                            "experiment_type": experiment.experiment_type.value,
-                            "budget": experiment.budget,
-                            "risk_level": template.risk_level
-                        },
-                        user_id=experiment.user_id,
-                        callback=self._experiment_approval_callback
-                    )
+                    # Create the approval request and remember which experiment it is for under the
+                    # lock, so a decision from another thread waits until the callback can find it
+                    with self._lock:
+                        request = self.autonomy_framework.get_approval_workflow().create_approval_request(
+                            title=f"Experiment Approval: {experiment.name}",
+                            description=f"Approval is required to run the following experiment:\n\n"
+                                       f"Name: {experiment.name}\n"
+                                       f"Type: {experiment.experiment_type.value}\n"
+                                       f"Budget: ${experiment.budget}\n"
+                                       f"Sample Size: {experiment.sample_size}\n"
+                                       f"Duration: {experiment.duration} days\n\n"
+                                       f"Description: {experiment.description}",
+                            category=DecisionCategory.NEW_OPPORTUNITY,
+                            action="run_experiment",
+                            context={
+                                "experiment_id": experiment_id,
+                                "experiment_type": experiment.experiment_type.value,
+                                "budget": experiment.budget,
+                                "risk_level": template.risk_level
+                            },
+                            user_id=experiment.user_id,
+                            callback=self._experiment_approval_callback
+                        )
+                        experiment.approval_request_id = request.id
+                        self.experiments_by_approval[request.id] = experiment_id
                     
                     return False, f"Experiment {experiment_id} requires approval to start"
         
-        # Start the experiment
+        return self._run_experiment(experiment)
+    
+    def _run_experiment(self, experiment: Experiment) -> Tuple[bool, Optional[str]]:
+        """
+        Hand an experiment to the runner, which starts it now or queues it until a slot and budget are free.
+        
+        Args:
+            experiment: The experiment to run
+        
+        Returns:
+            Tuple[bool, Optional[str]]: (success, error_message or a note that the experiment was queued)
+        """
+        if self.runner.budget_limit is not None and experiment.budget > self.runner.budget_limit:
+            return False, f"Experiment budget ${experiment.budget} exceeds the runner budget limit of ${self.runner.budget_limit}"
+        
+        # Queued first, so an experiment admitted straight away ends up RUNNING
+        experiment.status = ExperimentStatus.QUEUED
+        if self.runner.submit(experiment):
+            return True, None
+        
+        logger.info(f"Queued experiment {experiment.id} until a runner slot and budget are free")
+        return True, f"Experiment {experiment.id} queued until a runner slot and budget are free"
+    
+    def _experiment_admitted(self, experiment: Experiment) -> None:
+        """Mark an experiment as running once the runner admits it."""
+        if experiment.status != ExperimentStatus.QUEUED:
+            return
         experiment.status = ExperimentStatus.RUNNING
-        experiment.start_time = int(time.time())
+        experiment.start_time = experiment.start_time or int(time.time())
+        if experiment.parameters.get("allocation") == BANDIT_ALLOCATION and experiment.id not in self.bandit.experiments:
+            self._start_bandit(experiment)
+        if not self._has_collector(experiment):
+            logger.warning(f"No metric collector registered for {experiment.experiment_type.value} experiment {experiment.id}, it will finish without metrics")
+        logger.info(f"Started experiment: {experiment.id}")
+    
+    def _has_collector(self, experiment: Experiment) -> bool:
+        """Check whether anything collects metrics for a running experiment."""
+        collector = self.runner.collectors.get(experiment.experiment_type, (None, None))[0]
+        if collector == self._collect_bandit_metrics:
+            return experiment.id in self.bandit.experiments
+        return collector is not None
+    
+    def _collect_bandit_metrics(self, experiment: Experiment) -> Dict[str, Any]:
+        """Default collector for bandit experiment types: the traffic split and each variant's outcomes."""
+        if experiment.id not in self.bandit.experiments:
+            return {}
+        return {
+            "traffic_allocation": self.bandit.allocate([experiment.id]).get(experiment.id, {}),
+            "variants": self.bandit.get_stats(experiment.id)
+        }
+    
+    def _experiment_finished(self, experiment: Experiment, results: Dict[str, Any], error: Optional[Exception]) -> None:
+        """Write a finished run's results back to its experiment."""
+        if experiment.status != ExperimentStatus.RUNNING:
+            return
+        if experiment.id in self.bandit.experiments:
+            results["bandit"] = {
+                "allocation": self.bandit.allocate([experiment.id]).get(experiment.id, {}),
+                "variants": self.bandit.get_stats(experiment.id),
+                "winner": self.bandit.winner(experiment.id, experiment.success_criteria.get("confidence_level", 0.95))
+            }
+        experiment.results = results
+        experiment.end_time = int(time.time())
+        if error:
+            experiment.notes.append(f"Failed to evaluate results: {error}")
+            experiment.status = ExperimentStatus.FAILED
+        else:
+            experiment.status = ExperimentStatus.COMPLETED
+        logger.info(f"Experiment {experiment.id} finished with status {experiment.status.value}")
+    
+    def _start_bandit(self, experiment: Experiment) -> None:
+        """Start bandit allocation over an experiment's variants (e.g. content_a and content_b)."""
+        if experiment.experiment_type not in BANDIT_VARIANTS:
+            logger.warning(f"Experiment type {experiment.experiment_type.value} doesn't support bandit allocation")
+            return
         
-        # In a real implementation, we would start the experiment runner here
-        # For now, we'll just log that the experiment has started
-        logger.info(f"Started experiment: {experiment_id}")
+        prefix, reward = BANDIT_VARIANTS[experiment.experiment_type]
+        variants = [name[len(prefix) + 1:] for name in experiment.parameters if name.startswith(prefix + "_")]
+        try:
+            self.bandit.add_experiment(experiment.id, variants, reward)
+        except ValueError as e:
+            logger.error(f"Cannot use bandit allocation for experiment {experiment.id}: {e}")
+    
+    def choose_variant(self, experiment_id: str) -> Optional[str]:
+        """
+        Choose the variant to serve for one impression of a bandit experiment.
         
-        return True, None
+        Args:
+            experiment_id: The ID of the experiment
+        
+        Returns:
+            Optional[str]: The variant (e.g. "a"), or None if the experiment isn't using bandit allocation
+        """
+        return self.bandit.choose(experiment_id)
     
-    def _experiment_approval_callback(self, request_id: str, status: str, details: Optional[str]) -> None:
+    def record_outcome(self,
+                       experiment_id: str,
+                       variant: str,
+                       reward: float,
+                       impressions: int = 1,
+                       sum_squares: Optional[float] = None) -> bool:
+        """
+        Record the outcome of impressions served by a variant of a bandit experiment.
+        
+        Args:
+            experiment_id: The ID of the experiment
+            variant: The variant that was served
+            reward: The total reward (conversions for A/B tests, revenue for pricing tests)
+            impressions: The number of impressions
+            sum_squares: The sum of each impression's squared revenue, required when recording
+                more than one impression of a pricing test
+        
+        Returns:
+            bool: True if the outcome was recorded
+        
+        Raises:
+            ValueError: If the outcome is invalid for the experiment's reward model
+        """
+        return self.bandit.record(experiment_id, variant, reward, impressions, sum_squares)
+    
+    def reallocate_traffic(self) -> Dict[str, Dict[str, float]]:
+        """
+        Recompute the traffic split of every running bandit experiment in one pass.
+        
+        The split is also stored in each experiment's metrics under "traffic_allocation".
+        
+        Returns:
+            Dict[str, Dict[str, float]]: Dictionary of experiment_id to {variant: share of traffic}
+        """
+        allocations = self.bandit.allocate()
+        for experiment_id, allocation in allocations.items():
+            experiment = self.experiments.get(experiment_id)
+            if experiment is not None:
+                experiment.metrics["traffic_allocation"] = allocation
+        return allocations
+    
+    def close(self) -> None:
+        """Stop the runner's scheduler thread and collector pool."""
+        self.runner.shutdown()
+    
+    def get_experiment(self, experiment_id: str) -> Optional[Experiment]:
+        """
+        Get an experiment by ID.
+        
+        Args:
+            experiment_id: The ID of the experiment
+        
+        Returns:
+            Optional[Experiment]: The experiment, or None if not found
+        """
+        return self.experiments.get(experiment_id)
+    
+    def get_experiments(self, status: Optional[ExperimentStatus] = None) -> List[Experiment]:
+        """
+        Get experiments, optionally only those with a given status.
+        
+        Args:
+            status: The status to filter by (None for all experiments)
+        
+        Returns:
+            List[Experiment]: The experiments, in creation order
+        """
+        with self._lock:
+            if status is None:
+                return list(self.experiments.values())
+            return list(self.experiments_by_status[status].values())
+    
+    def get_experiment_for_approval(self, request_id: str) -> Optional[Experiment]:
+        """
+        Get the experiment waiting on an approval request.
+        
+        Args:
+            request_id: The ID of the approval request
+        
+        Returns:
+            Optional[Experiment]: The experiment, or None if no experiment is waiting on the request
+        """
+        with self._lock:
+            experiment_id = self.experiments_by_approval.get(request_id)
+            return self.experiments.get(experiment_id) if experiment_id else None
+    
+    def _track(self, experiment: Experiment) -> None:
+        """Add an experiment to the store and the status index."""
+        with self._lock:
+            experiment.status_listener = self._status_changed
+            self.experiments[experiment.id] = experiment
+            self.experiments_by_status[experiment.status][experiment.id] = experiment
+    
+    def _status_changed(self, experiment: Experiment, old_status: ExperimentStatus, new_status: ExperimentStatus) -> None:
+        """Move an experiment between status index entries when its status changes."""
+        with self._lock:
+            self.experiments_by_status[old_status].pop(experiment.id, None)
+            self.experiments_by_status[new_status][experiment.id] = experiment
+        
+        # Experiments that are paused, cancelled or failed elsewhere give their runner slot back
+        active = (ExperimentStatus.QUEUED, ExperimentStatus.RUNNING)
+        if old_status in active and new_status not in active:
+            self.runner.release(experiment.id, keep_progress=new_status == ExperimentStatus.PAUSED)
+        if new_status in (ExperimentStatus.COMPLETED, ExperimentStatus.FAILED, ExperimentStatus.CANCELLED):
+            self.bandit.remove_experiment(experiment.id)
+    
+    def _experiment_approval_callback(self, request_id: str, status: Any, details: Optional[str]) -> None:
         """
         Callback for experiment approval requests.
         
         Args:
             request_id: The ID of the approval request
-            status: The status of the approval request
+            status: The status of the approval request (an ApprovalStatus or its value)
             details: Additional details about the decision
         """
-        # Find the experiment associated with this approval request
-        for experiment_id, experiment in self.experiments.items():
-            if experiment.status == ExperimentStatus.PENDING_APPROVAL:
-                # This is a simplification - in a real implementation, we would store the request ID with the experiment
-                
-                if status == "approved":
-                    # Start the experiment
-                    experiment.status = ExperimentStatus.RUNNING
-                    experiment.start_time = int(time.time())
-                    logger.info(f"Started experiment {experiment_id} after approval")
-                else:
-                    # Mark as cancelled
-                    experiment.status = ExperimentStatus.CANCELLED
-                    experiment.notes.append(f"Cancelled due to approval rejection: {details}")
-                    logger.info(f"Cancelled experiment {experiment_id} due to approval rejection")
-                
-                break
+        approved = getattr(status, "value", status) == "approved"
+        
+        with self._lock:
+            experiment_id = self.experiments_by_approval.pop(request_id, None)
+            experiment = self.experiments.get(experiment_id) if experiment_id else None
+            
+            if experiment is None or experiment.status != ExperimentStatus.PENDING_APPROVAL:
+                logger.warning(f"No experiment is waiting on approval request {request_id}")
+                return
+            
+            experiment.approval_request_id = None
+            if approved:
+                # Start the experiment
+                logger.info(f"Starting experiment {experiment_id} after approval")
+                self._run_experiment(experiment)
+            else:
+                # Mark as cancelled
+                experiment.status = ExperimentStatus.CANCELLED
+                experiment.notes.append(f"Cancelled due to approval rejection: {details}")
+                logger.info(f"Cancelled experiment {experiment_id} due to approval rejection")
@@ -0,0 +1,337 @@
+"""
+Local reference implementation of the DatabaseSyncService.
+
+The real service lives in the Node backend and needs MongoDB. This one keeps
+experiments, log entries and metrics in SQLite so BackendDBClient can be
+load-tested on a single machine. Artificial latency, random failures and full
+outages can be injected to benchmark throughput, batching and recovery.
+
+Run it with:
+
+    python local_db_sync_service.py --port 50052 --latency-ms 5 --failure-rate 0.01
+"""
+
+import os
+import time
+import random
+import sqlite3
+import logging
+import argparse
+import threading
+from concurrent import futures
+
+import grpc
+from google.protobuf import json_format
+
+# Import the generated gRPC code
+try:
+    # Try to import from the generated directory first
+    from agent_core.generated import agent_pb2
+    from agent_core.generated import database_sync_pb2, database_sync_pb2_grpc
+except ImportError:
+    # Fall back to direct import (for backward compatibility)
+    import agent_pb2
+    import database_sync_pb2
+    import database_sync_pb2_grpc
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+    id TEXT PRIMARY KEY,
+    state INTEGER NOT NULL,
+    type INTEGER NOT NULL,
+    user_id TEXT NOT NULL DEFAULT '',
+    last_update_time INTEGER NOT NULL,
+    status BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_experiments_state ON experiments (state, id);
+
+CREATE TABLE IF NOT EXISTS log_entries (
+    experiment_id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    entry BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_log_entries_experiment ON log_entries (experiment_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    experiment_id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    metrics TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metrics_experiment ON metrics (experiment_id, timestamp);
+"""
+
+
+class LocalDatabaseSyncService(database_sync_pb2_grpc.DatabaseSyncServiceServicer):
+    """SQLite-backed DatabaseSyncService with latency and failure injection"""
+
+    def __init__(self, db_path=':memory:', latency_ms=0.0, jitter_ms=0.0,
+                 failure_rate=0.0, failure_mode='response', seed=None, system_user_id=None):
+        """
+        Initialize the service.
+
+        Args:
+            db_path: SQLite database path (in-memory by default)
+            latency_ms: Artificial latency added to every call
+            jitter_ms: Maximum random jitter added on top of the latency
+            failure_rate: Probability (0-1) that a call fails
+            failure_mode: "response" to return success=False, "unavailable" to
+                abort the call with UNAVAILABLE like a dropped connection
+            seed: Optional random seed for reproducible failure patterns
+            system_user_id: Owner of experiments first seen through SyncExperimentStatus,
+                like the backend (defaults to SYSTEM_USER_ID, or "system")
+        """
+        self.db_path = db_path
+        self.system_user_id = system_user_id or os.getenv('SYSTEM_USER_ID', 'system')
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.outage = False
+        self.random = random.Random(seed)
+
+        # Call counters, useful when checking client retry and batching behaviour
+        self.stats = {"calls": 0, "failures": 0}
+        self._stats_lock = threading.Lock()
+
+        # One connection shared by all gRPC worker threads, serialized by a lock
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        if db_path != ':memory:':
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+        logger.info(f"Local DatabaseSyncService using {db_path}")
+
+    def set_outage(self, outage):
+        """Start or end a simulated outage; every call fails with UNAVAILABLE while it lasts"""
+        self.outage = outage
+        logger.warning(f"Simulated outage {'started' if outage else 'ended'}")
+
+    def _inject(self, context):
+        """
+        Apply artificial latency and failures to a call.
+
+        Returns an error message if the call should report failure, None otherwise.
+        Aborts the call when simulating an outage or a transport failure.
+        """
+        with self._stats_lock:
+            self.stats["calls"] += 1
+
+        delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        if self.outage:
+            self._count_failure()
+            context.abort(grpc.StatusCode.UNAVAILABLE, "Simulated outage")
+
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            self._count_failure()
+            if self.failure_mode == 'unavailable':
+                context.abort(grpc.StatusCode.UNAVAILABLE, "Simulated failure")
+            return "Simulated failure"
+
+        return None
+
+    def _count_failure(self):
+        with self._stats_lock:
+            self.stats["failures"] += 1
+
+    def RestoreExperiments(self, request, context):
+        error = self._inject(context)
+        if error:
+            return database_sync_pb2.RestoreExperimentsResponse(success=False, message=error)
+
+        query, params = self._experiment_filters(
+            request.user_id,
+            request.experiment_type,
+            [request.experiment_state] if request.experiment_state else []
+        )
+        query += " ORDER BY last_update_time DESC LIMIT ?"
+        params.append(request.limit or 100)
+
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        experiments = [agent_pb2.ExperimentStatus.FromString(row[1]) for row in rows]
+        return database_sync_pb2.RestoreExperimentsResponse(
+            success=True,
+            message=f"Restored {len(experiments)} experiments",
+            experiments=experiments
+        )
+
+    def StreamRestoreExperiments(self, request, context):
+        page_size = request.page_size or 100
+        cursor = request.cursor
+
+        while context.is_active():
+            error = self._inject(context)
+            if error:
+                yield database_sync_pb2.RestoreExperimentsPage(success=False, message=error, next_cursor=cursor)
+                return
+
+            query, params = self._experiment_filters(
+                request.user_id, request.experiment_type, list(request.experiment_states)
+            )
+            query += " AND id > ? ORDER BY id LIMIT ?"
+            params.extend([cursor, page_size])
+
+            with self._lock:
+                rows = self.conn.execute(query, params).fetchall()
+
+            # A short page means there is nothing left after it
+            cursor = rows[-1][0] if len(rows) == page_size else ''
+            yield database_sync_pb2.RestoreExperimentsPage(
+                success=True,
+                message=f"Restored {len(rows)} experiments",
+                experiments=[agent_pb2.ExperimentStatus.FromString(row[1]) for row in rows],
+                next_cursor=cursor
+            )
+
+            if not cursor:
+                return
+
+    def SyncExperimentStatus(self, request, context):
+        error = self._inject(context)
+        if error:
+            return database_sync_pb2.SyncStatusResponse(success=False, message=error)
+
+        status = request.experiment_status
+        if not status.id.id:
+            return database_sync_pb2.SyncStatusResponse(success=False, message="Invalid experiment status: missing ID")
+
+        # Like the backend, a new experiment belongs to the system user and an update keeps its owner
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO experiments (id, state, type, user_id, last_update_time, status) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET state = excluded.state, type = excluded.type, "
+                "last_update_time = excluded.last_update_time, status = excluded.status",
+                (status.id.id, status.state, status.type, self.system_user_id,
+                 status.last_update_time.seconds or int(time.time()), status.SerializeToString())
+            )
+
+        return database_sync_pb2.SyncStatusResponse(
+            success=True, message=f"Successfully synced experiment {status.id.id}"
+        )
+
+    def SyncLogEntry(self, request, context):
+        error = self._inject(context)
+        if error:
+            return database_sync_pb2.SyncStatusResponse(success=False, message=error)
+
+        entry = request.log_entry
+        if not entry.experiment_id.id:
+            return database_sync_pb2.SyncStatusResponse(success=False, message="Invalid log entry: missing experiment ID")
+
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO log_entries (experiment_id, timestamp, level, entry) VALUES (?, ?, ?, ?)",
+                (entry.experiment_id.id, entry.timestamp.seconds, entry.level, entry.SerializeToString())
+            )
+
+        return database_sync_pb2.SyncStatusResponse(
+            success=True, message=f"Successfully synced log entry for experiment {entry.experiment_id.id}"
+        )
+
+    def SyncMetrics(self, request, context):
+        error = self._inject(context)
+        if error:
+            return database_sync_pb2.SyncStatusResponse(success=False, message=error)
+
+        experiment_id = request.experiment_id.id
+        if not experiment_id:
+            return database_sync_pb2.SyncStatusResponse(success=False, message="Invalid metrics request: missing experiment ID")
+
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO metrics (experiment_id, timestamp, metrics) VALUES (?, ?, ?)",
+                (experiment_id, request.timestamp.seconds or int(time.time()),
+                 json_format.MessageToJson(request.metrics))
+            )
+
+        return database_sync_pb2.SyncStatusResponse(
+            success=True, message=f"Successfully synced metrics for experiment {experiment_id}"
+        )
+
+    def set_experiment_owner(self, experiment_id, user_id):
+        """
+        Set the user an experiment belongs to, as creating it through the backend API would.
+
+        Returns True if the experiment exists, False otherwise
+        """
+        with self._lock, self.conn:
+            cursor = self.conn.execute("UPDATE experiments SET user_id = ? WHERE id = ?", (user_id, experiment_id))
+        return cursor.rowcount > 0
+
+    def count(self, table):
+        """Return the number of rows stored in a table (experiments, log_entries or metrics)"""
+        if table not in ('experiments', 'log_entries', 'metrics'):
+            raise ValueError(f"Unknown table: {table}")
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def close(self):
+        """Close the SQLite connection"""
+        with self._lock:
+            self.conn.close()
+
+    def _experiment_filters(self, user_id, experiment_type, states):
+        """Build the WHERE clause shared by both restore calls"""
+        query = "SELECT id, status FROM experiments WHERE 1 = 1"
+        params = []
+        if user_id:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        if experiment_type:
+            query += " AND type = ?"
+            params.append(experiment_type)
+        states = [state for state in states if state]
+        if states:
+            query += f" AND state IN ({', '.join('?' for _ in states)})"
+            params.extend(states)
+        return query, params
+
+
+def serve(service, port=50052, max_workers=10):
+    """Start a gRPC server for the service and return it"""
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+    database_sync_pb2_grpc.add_DatabaseSyncServiceServicer_to_server(service, server)
+    server.add_insecure_port(f'[::]:{port}')
+    server.start()
+    logger.info(f"Local DatabaseSyncService listening on port {port}")
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a local SQLite-backed DatabaseSyncService")
+    parser.add_argument('--port', type=int, default=int(os.getenv('BACKEND_GRPC_PORT', '50052')))
+    parser.add_argument('--db-path', default=':memory:')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--failure-mode', choices=['response', 'unavailable'], default='response')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    service = LocalDatabaseSyncService(
+        db_path=args.db_path,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        failure_mode=args.failure_mode,
+        seed=args.seed
+    )
+    server = serve(service, args.port)
+
+    try:
+        server.wait_for_termination()
+    except KeyboardInterrupt:
+        server.stop(5)
+        service.close()
@@ -9,6 +9,7 @@ from dotenv import load_dotenv
 from google.protobuf import timestamp_pb2
 from google.protobuf.struct_pb2 import Struct # Import Struct
 import threading # Import threading for running tasks in background
+import queue
 import json
 
 # Import autonomy framework
@@ -81,6 +82,7 @@ except ImportError:
             class MockDBClient:
                 def __init__(self):
                     self.connected = False
+                    self.restore_cursor = ''
 
                 def connect(self):
                     return False
@@ -88,6 +90,9 @@ except ImportError:
                 def restore_experiments(self):
                     return []
 
+                def stream_restore_experiments(self, states=None, page_size=100, cursor=''):
+                    return iter(())
+
                 def sync_experiment_status(self, status):
                     pass
 
@@ -147,32 +152,100 @@ def get_system_metrics():
         logger.error(f"Error getting system metrics: {e}")
         return 0.0, 0.0
 
+# Experiment states restored first on startup: running and queued work
+ACTIVE_RESTORE_STATES = [
+    agent_pb2.ExperimentState.STATE_RUNNING,
+    agent_pb2.ExperimentState.STATE_PAUSED,
+    agent_pb2.ExperimentState.STATE_DEFINED
+]
+
+# Terminal states, restored in the background after the active ones unless DB_RESTORE_TERMINAL is "none"
+TERMINAL_RESTORE_STATES = [
+    agent_pb2.ExperimentState.STATE_COMPLETED,
+    agent_pb2.ExperimentState.STATE_FAILED,
+    agent_pb2.ExperimentState.STATE_STOPPED
+]
+
+restore_page_size = int(os.getenv('DB_RESTORE_PAGE_SIZE', '100'))
+restore_terminal_mode = os.getenv('DB_RESTORE_TERMINAL', 'background').lower()
+
+# Number of times a restore stream is attempted, resuming from its cursor after an interruption
+RESTORE_MAX_ATTEMPTS = 3
+# Seconds to wait before the first resume, doubled before each one after it
+RESTORE_RETRY_DELAY = 1.0
+
+# Set once the startup restore has finished (or was skipped); until then experiments may be missing
+restore_complete = threading.Event()
+
+def _restore_experiment_states(states):
+    """Stream experiments in the given states from the database into memory"""
+    pages = queue.Queue(maxsize=4)
+
+    def receive_pages():
+        # Receive on a separate thread so hydration overlaps with the network reads
+        try:
+            cursor = ''
+            for attempt in range(1, RESTORE_MAX_ATTEMPTS + 1):
+                # Tracked from the pages themselves, so a failed connect resumes from the right place
+                finished = False
+                for experiments, next_cursor in db_client.stream_restore_experiments(states, restore_page_size, cursor):
+                    pages.put(experiments)
+                    cursor = next_cursor
+                    # An empty cursor means the stream reached its last page
+                    finished = not next_cursor
+
+                if finished:
+                    break
+                if attempt == RESTORE_MAX_ATTEMPTS:
+                    logger.error(f"Experiment restore interrupted {attempt} times, giving up at cursor {cursor!r}")
+                    break
+
+                delay = RESTORE_RETRY_DELAY * 2 ** (attempt - 1)
+                logger.warning(f"Experiment restore interrupted, resuming from cursor {cursor!r} in {delay:g}s")
+                time.sleep(delay)
+        finally:
+            pages.put(None)
+
+    threading.Thread(target=receive_pages, daemon=True).start()
+
+    restored = 0
+    for experiments in iter(pages.get, None):
+        for experiment in experiments:
+            # Don't clobber experiments created or updated locally while restoring
+            experiment_statuses.setdefault(experiment.id.id, experiment)
+        restored += len(experiments)
+        logger.debug(f"Hydrated {len(experiments)} experiments from database")
+
+    return restored
+
 # Function to restore experiments from database
 def restore_experiments_from_db():
-    """Restore experiment data from the database on startup"""
+    """Restore experiment data from the database on startup, setting restore_complete when done"""
     if not db_sync_enabled:
         logger.info("Database sync is disabled, skipping experiment restoration")
+        restore_complete.set()
         return
 
     try:
         logger.info("Attempting to restore experiments from database...")
 
-        # Try to restore experiments from the database
-        restored_experiments = db_client.restore_experiments()
+        restored = _restore_experiment_states(ACTIVE_RESTORE_STATES)
+        logger.info(f"Restored {restored} running and queued experiments from database")
+
+        if restore_terminal_mode != 'none':
+            terminal = _restore_experiment_states(TERMINAL_RESTORE_STATES)
+            logger.info(f"Restored {terminal} completed, failed and stopped experiments from database")
+            restored += terminal
 
-        if not restored_experiments:
+        if not restored:
             logger.warning("No experiments restored from database")
             return
 
-        # Add restored experiments to in-memory storage
-        for experiment in restored_experiments:
-            experiment_id = experiment.id.id
-            experiment_statuses[experiment_id] = experiment
-            logger.info(f"Restored experiment {experiment_id} from database")
-
-        logger.info(f"Successfully restored {len(restored_experiments)} experiments from database")
+        logger.info(f"Successfully restored {restored} experiments from database")
     except Exception as e:
         logger.error(f"Error restoring experiments from database: {e}")
+    finally:
+        restore_complete.set()
 
 # Function to sync experiment status to database
 def sync_experiment_to_db(experiment_id):
@@ -204,8 +277,8 @@ def sync_log_to_db(log_entry):
     except Exception as e:
         logger.error(f"Error syncing log entry to database: {e}")
 
-# Restore experiments on startup
-restore_experiments_from_db()
+# Restore experiments on startup without blocking import
+threading.Thread(target=restore_experiments_from_db, name="experiment-restore", daemon=True).start()
 
 # Define the AgentServiceServicer
 class AgentServiceServicer(agent_pb2_grpc.AgentServiceServicer):
@@ -351,16 +424,17 @@ class AgentServiceServicer(agent_pb2_grpc.AgentServiceServicer):
             # Start a background thread to update metrics periodically
             threading.Thread(
                 target=self._update_experiment_metrics,
-                args=(experiment_id,),
+                args=(experiment_id, task_instance),
                 daemon=True
             ).start()
 
         return agent_pb2.StatusResponse(success=True, message=f"Experiment {experiment_id} started")
 
-    def _update_experiment_metrics(self, experiment_id):
+    def _update_experiment_metrics(self, experiment_id, task_instance=None):
         """
         Periodically update metrics for a running experiment.
-        This runs in a background thread.
+        This runs in a background thread. Tasks that expose a progress attribute
+        report their own progress; for the others it is simulated.
         """
         logger.info(f"Starting metrics update thread for experiment {experiment_id}")
 
@@ -393,11 +467,17 @@ class AgentServiceServicer(agent_pb2_grpc.AgentServiceServicer):
                             "memory_usage_mb": memory_usage
                         })
 
-                        # Simulate progress for now (in a real implementation, the task would report progress)
-                        # This is just a placeholder - real tasks should report actual progress
-                        if elapsed_seconds > 0:
+                        # Use the progress the task reports, or simulate it for tasks that don't
+                        reported_progress = getattr(task_instance, 'progress', None)
+                        if reported_progress is not None:
+                            progress = float(reported_progress)
+                        elif elapsed_seconds > 0:
                             # Simple progress simulation - increases over time but slows down
                             progress = min(95.0, (elapsed_seconds / (elapsed_seconds + 30.0)) * 100.0)
+                        else:
+                            progress = None
+
+                        if progress is not None:
                             status.metrics.update({"progress_percent": progress})
 
                             # Estimate remaining time based on progress
@@ -561,13 +641,16 @@ class AgentServiceServicer(agent_pb2_grpc.AgentServiceServicer):
 
         if experiment_id not in experiment_statuses:
             logger.warning(f"Attempted to get status for non-existent experiment: {experiment_id}")
+            message = f"Experiment with ID {experiment_id} not found"
+            if not restore_complete.is_set():
+                message += " (experiments are still being restored from the database)"
             # Return a default or error status
             return agent_pb2.ExperimentStatus(
                 id=request.id,
                 name="Not Found",
                 type=agent_pb2.ExperimentType.TYPE_UNSPECIFIED,
                 state=agent_pb2.ExperimentState.STATE_UNSPECIFIED,
-                status_message=f"Experiment with ID {experiment_id} not found"
+                status_message=message
             )
 
         # Return the current status
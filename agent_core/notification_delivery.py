@@ -0,0 +1,558 @@
+"""
+Notification delivery for the Nick the Great Unified Agent.
+
+This module delivers notifications over external channels (webhooks, Slack, SMS
+gateways and email). Each channel gets its own bounded worker pool, so a burst of
+notifications fans out in parallel without one slow channel holding up the others.
+Failed deliveries are retried with jittered exponential backoff and dead-lettered
+once the attempts run out; failures that can't succeed on retry (such as HTTP 4xx
+responses other than 429) are dead-lettered straight away.
+"""
+
+import abc
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import smtplib
+import threading
+import time
+from collections import deque
+from concurrent import futures
+from email.message import EmailMessage
+from http.client import HTTPConnection, HTTPSConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class DeliveryError(Exception):
+    """Raised when a channel fails to deliver a notification."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        """
+        Initialize the error.
+
+        Args:
+            message: The error message
+            retryable: Whether delivering the same notification again could succeed
+        """
+        super().__init__(message)
+        self.retryable = retryable
+
+class DeliveryChannel(abc.ABC):
+    """Base class for notification delivery channels."""
+
+    @abc.abstractmethod
+    def deliver(self, payload: Dict[str, Any]) -> None:
+        """
+        Deliver a notification.
+
+        Args:
+            payload: The notification payload (see NotificationSystem._delivery_payload)
+
+        Raises:
+            DeliveryError: If the notification could not be delivered
+        """
+
+    def close(self) -> None:
+        """Release any pooled connections."""
+
+class WebhookChannel(DeliveryChannel):
+    """Delivers notifications as JSON POST requests to a webhook URL."""
+
+    def __init__(self, url: str, timeout: float = 10.0, headers: Optional[Dict[str, str]] = None):
+        """
+        Initialize the webhook channel.
+
+        Args:
+            url: The webhook URL
+            timeout: Socket timeout for each request (in seconds)
+            headers: Extra HTTP headers to send with each request
+        """
+        parts = urlsplit(url)
+        self.url = url
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path or "/"
+        if parts.query:
+            self.path += f"?{parts.query}"
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+
+        # One keep-alive connection per worker thread, reused across deliveries
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def deliver(self, payload: Dict[str, Any]) -> None:
+        body = json.dumps(self.format(payload)).encode("utf-8")
+        connection = self._connection()
+        try:
+            connection.request("POST", self.path, body=body, headers=self.headers)
+            response = connection.getresponse()
+            response.read()
+        except Exception as e:
+            # Drop the connection so the next attempt reconnects
+            connection.close()
+            raise DeliveryError(f"Webhook request to {self.host} failed: {e}") from e
+
+        if response.status >= 300:
+            # Only rate limiting and server errors can go away on their own
+            retryable = response.status == 429 or response.status >= 500
+            raise DeliveryError(f"Webhook {self.host} returned HTTP {response.status}", retryable)
+
+    def format(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the request body for a notification.
+
+        Args:
+            payload: The notification payload
+
+        Returns:
+            Dict[str, Any]: The JSON body to send
+        """
+        return payload
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+
+    def _connection(self) -> HTTPConnection:
+        """Get this thread's pooled connection, opening it if needed."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection_class = HTTPSConnection if self.scheme == "https" else HTTPConnection
+            connection = connection_class(self.host, self.port, timeout=self.timeout)
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+class SlackChannel(WebhookChannel):
+    """Delivers notifications to a Slack incoming webhook."""
+
+    def format(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {"text": f"*{payload['title']}*\n{payload['message']}"}
+
+class SMSChannel(WebhookChannel):
+    """Delivers notifications through an HTTP SMS gateway."""
+
+    def format(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if not payload.get("recipient"):
+            raise DeliveryError("No phone number configured for SMS notification", retryable=False)
+        return {"to": payload["recipient"], "body": f"{payload['title']}: {payload['message']}"[:1600]}
+
+class EmailChannel(DeliveryChannel):
+    """Delivers notifications by email over SMTP."""
+
+    def __init__(self,
+                host: str,
+                port: int = 587,
+                sender: str = "agent@localhost",
+                username: Optional[str] = None,
+                password: Optional[str] = None,
+                use_tls: bool = True,
+                timeout: float = 10.0):
+        """
+        Initialize the email channel.
+
+        Args:
+            host: The SMTP server host
+            port: The SMTP server port
+            sender: The From address
+            username: SMTP username (if authentication is required)
+            password: SMTP password (if authentication is required)
+            use_tls: Whether to upgrade the connection with STARTTLS
+            timeout: Socket timeout (in seconds)
+        """
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+
+        # One SMTP session per worker thread, reused across deliveries
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def deliver(self, payload: Dict[str, Any]) -> None:
+        if not payload.get("recipient"):
+            raise DeliveryError("No email address configured for email notification", retryable=False)
+
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = payload["recipient"]
+        message["Subject"] = payload["title"]
+        message.set_content(payload["message"])
+
+        connection = None
+        try:
+            connection = self._connection()
+            connection.send_message(message)
+        except Exception as e:
+            if connection is not None:
+                self._discard(connection)
+            raise DeliveryError(f"SMTP delivery via {self.host} failed: {e}") from e
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for connection in self._connections:
+                try:
+                    connection.quit()
+                except Exception:
+                    pass
+            self._connections = []
+
+    def _connection(self) -> smtplib.SMTP:
+        """Get this thread's pooled SMTP session, opening it if needed."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            try:
+                connection.noop()
+                return connection
+            except Exception:
+                self._discard(connection)
+
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                connection.starttls()
+            if self.username:
+                connection.login(self.username, self.password or "")
+        except Exception:
+            connection.close()
+            raise
+        self._local.connection = connection
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection
+
+    def _discard(self, connection: smtplib.SMTP) -> None:
+        """Close a broken SMTP session and stop pooling it."""
+        if getattr(self._local, "connection", None) is connection:
+            self._local.connection = None
+        with self._connections_lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+class NotificationDispatcher:
+    """
+    Dispatches notifications to delivery channels.
+
+    Every channel has its own worker pool, which bounds its concurrency and keeps
+    channels independent. Deliveries are retried with full-jitter exponential backoff
+    and dead-lettered after the last failed attempt. Retries wait on a scheduler thread
+    rather than in a worker, so a backing-off delivery doesn't hold up the channel.
+    """
+
+    def __init__(self,
+                channels: Optional[Dict[str, DeliveryChannel]] = None,
+                max_concurrency: int = 4,
+                max_attempts: int = 3,
+                base_delay: float = 0.5,
+                max_delay: float = 30.0,
+                dead_letter_size: int = 1000):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            channels: Dictionary of channel name (e.g. "webhook") to DeliveryChannel
+            max_concurrency: Maximum number of concurrent deliveries per channel
+            max_attempts: Number of delivery attempts before dead-lettering
+            base_delay: Backoff before the first retry (in seconds)
+            max_delay: Maximum backoff between retries (in seconds)
+            dead_letter_size: Maximum number of dead letters kept
+        """
+        self.channels = dict(channels or {})
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dead_letters = deque(maxlen=dead_letter_size)
+        self._executors = {}
+        self._pending = set()  # Futures of deliveries that haven't finished yet
+        self._lock = threading.Lock()
+
+        # Min-heap of (due_time, sequence, name, payload, attempt, future, error) waiting to be retried
+        self._retry_heap = []
+        self._retry_sequence = itertools.count()
+        self._retry_condition = threading.Condition()
+        self._retry_thread = None
+        self._closed = False
+
+    @classmethod
+    def from_env(cls) -> 'NotificationDispatcher':
+        """
+        Create a dispatcher with the channels configured in the environment.
+
+        Reads NOTIFICATION_WEBHOOK_URL, SLACK_WEBHOOK_URL, SMS_GATEWAY_URL and
+        SMTP_HOST (with SMTP_PORT, SMTP_SENDER, SMTP_USERNAME and SMTP_PASSWORD).
+        Channels without configuration are left out.
+
+        Returns:
+            NotificationDispatcher: The dispatcher
+        """
+        channels = {}
+        if os.getenv("NOTIFICATION_WEBHOOK_URL"):
+            channels["webhook"] = WebhookChannel(os.getenv("NOTIFICATION_WEBHOOK_URL"))
+        if os.getenv("SLACK_WEBHOOK_URL"):
+            channels["slack"] = SlackChannel(os.getenv("SLACK_WEBHOOK_URL"))
+        if os.getenv("SMS_GATEWAY_URL"):
+            channels["sms"] = SMSChannel(os.getenv("SMS_GATEWAY_URL"))
+        if os.getenv("SMTP_HOST"):
+            channels["email"] = EmailChannel(
+                os.getenv("SMTP_HOST"),
+                int(os.getenv("SMTP_PORT", "587")),
+                os.getenv("SMTP_SENDER", "agent@localhost"),
+                os.getenv("SMTP_USERNAME"),
+                os.getenv("SMTP_PASSWORD")
+            )
+
+        return cls(channels, max_concurrency=int(os.getenv("NOTIFICATION_DELIVERY_CONCURRENCY", "4")))
+
+    def register_channel(self, name: str, channel: DeliveryChannel) -> None:
+        """
+        Register (or replace) a delivery channel.
+
+        Args:
+            name: The channel name
+            channel: The delivery channel
+        """
+        self.channels[name] = channel
+        logger.info(f"Registered notification delivery channel: {name}")
+
+    def has_channel(self, name: str) -> bool:
+        """Check whether a channel is registered."""
+        return name in self.channels
+
+    def dispatch(self, name: str, payload: Dict[str, Any]) -> futures.Future:
+        """
+        Queue a notification for delivery on a channel.
+
+        Args:
+            name: The channel name
+            payload: The notification payload
+
+        Returns:
+            Future: Resolves to True if delivered, False if dead-lettered
+        """
+        future = futures.Future()
+        future.set_running_or_notify_cancel()
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._finished)
+        self._executor(name).submit(self._attempt, name, payload, 1, future)
+        return future
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Shut down the worker pools and close pooled connections.
+
+        Args:
+            wait: Whether to wait for queued deliveries (and their retries) to finish; if not,
+                deliveries waiting for a retry are dead-lettered
+        """
+        if wait:
+            with self._lock:
+                pending = list(self._pending)
+            futures.wait(pending)
+
+        with self._retry_condition:
+            self._closed = True
+            waiting = self._retry_heap
+            self._retry_heap = []
+            self._retry_condition.notify()
+        if self._retry_thread:
+            self._retry_thread.join()
+            self._retry_thread = None
+        for _, _, name, payload, attempt, future, error in waiting:
+            self._dead_letter(name, payload, error, attempt - 1, future)
+
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors = {}
+        for executor in executors:
+            executor.shutdown(wait=wait)
+        for channel in self.channels.values():
+            channel.close()
+
+    def _executor(self, name: str) -> futures.ThreadPoolExecutor:
+        """Get the worker pool for a channel, creating it on first use."""
+        with self._lock:
+            executor = self._executors.get(name)
+            if executor is None:
+                executor = futures.ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix=f"notify-{name}"
+                )
+                self._executors[name] = executor
+            return executor
+
+    def _finished(self, future: futures.Future) -> None:
+        """Stop tracking a delivery once its future resolves."""
+        with self._lock:
+            self._pending.discard(future)
+
+    def _attempt(self, name: str, payload: Dict[str, Any], attempt: int, future: futures.Future) -> None:
+        """Make one delivery attempt, scheduling a retry or dead-lettering if it fails."""
+        try:
+            self.channels[name].deliver(payload)
+        except Exception as e:
+            logger.warning(f"Delivery of notification {payload.get('id')} via {name} failed (attempt {attempt}): {e}")
+            if getattr(e, "retryable", True) and attempt < self.max_attempts:
+                # Full jitter keeps retries from a burst from hitting the channel in lockstep
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                if self._schedule_retry(delay, name, payload, attempt + 1, future, e):
+                    return
+            self._dead_letter(name, payload, e, attempt, future)
+            return
+
+        logger.debug(f"Delivered notification {payload.get('id')} via {name} (attempt {attempt})")
+        future.set_result(True)
+
+    def _dead_letter(self,
+                    name: str,
+                    payload: Dict[str, Any],
+                    error: Exception,
+                    attempts: int,
+                    future: futures.Future) -> None:
+        """Record a delivery that won't be attempted again and resolve its future."""
+        self.dead_letters.append({
+            "channel": name,
+            "payload": payload,
+            "error": str(error),
+            "attempts": attempts,
+            "time": int(time.time())
+        })
+        logger.error(f"Dead-lettered notification {payload.get('id')} for {name}: {error}")
+        future.set_result(False)
+
+    def _schedule_retry(self,
+                       delay: float,
+                       name: str,
+                       payload: Dict[str, Any],
+                       attempt: int,
+                       future: futures.Future,
+                       error: Exception) -> bool:
+        """
+        Queue a delivery to be attempted again after a delay, waking the scheduler if it is now due first.
+
+        Returns:
+            bool: True if the retry was queued, False if the dispatcher is closed
+        """
+        with self._retry_condition:
+            if self._closed:
+                return False
+            entry = (time.monotonic() + delay, next(self._retry_sequence), name, payload, attempt, future, error)
+            heapq.heappush(self._retry_heap, entry)
+            if self._retry_thread is None:
+                self._retry_thread = threading.Thread(target=self._run_retries, name="notify-retry", daemon=True)
+                self._retry_thread.start()
+            elif self._retry_heap[0] is entry:
+                self._retry_condition.notify()
+        return True
+
+    def _run_retries(self) -> None:
+        """Sleep until the earliest retry is due, then hand it back to its channel's workers."""
+        while True:
+            with self._retry_condition:
+                while not self._closed:
+                    if self._retry_heap:
+                        timeout = self._retry_heap[0][0] - time.monotonic()
+                        if timeout <= 0:
+                            break
+                    else:
+                        timeout = None
+                    # Woken early when a sooner retry is scheduled or the dispatcher closes
+                    self._retry_condition.wait(timeout)
+
+                if self._closed:
+                    return
+                _, _, name, payload, attempt, future, error = heapq.heappop(self._retry_heap)
+
+            try:
+                self._executor(name).submit(self._attempt, name, payload, attempt, future)
+            except RuntimeError:
+                # The worker pool was shut down while the retry was waiting
+                self._dead_letter(name, payload, error, attempt - 1, future)
+
+class LocalWebhookSink:
+    """
+    Local HTTP server that records webhook deliveries.
+
+    Stands in for a real webhook receiver in tests and local runs. Requests can be
+    made to fail on purpose to exercise retries.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize the sink.
+
+        Args:
+            host: The interface to listen on
+            port: The port to listen on (0 picks a free port)
+        """
+        self.received = []
+        self.fail_count = 0
+        self.fail_status = 503
+        self._lock = threading.Lock()
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with sink._lock:
+                    fail = sink.fail_count > 0
+                    if fail:
+                        sink.fail_count -= 1
+                    else:
+                        sink.received.append(json.loads(body or b"null"))
+                    status = sink.fail_status if fail else 204
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}/webhook"
+        self._thread = None
+
+    def fail_next(self, count: int, status: int = 503) -> None:
+        """Answer the next count requests with an HTTP error status (503 by default)."""
+        with self._lock:
+            self.fail_count = count
+            self.fail_status = status
+
+    def start(self) -> 'LocalWebhookSink':
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="webhook-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server."""
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread:
+            self._thread.join()
@@ -19,6 +19,7 @@ os.environ['AGENT_CORE_PORT'] = '50051'
 os.environ['BACKEND_HOST'] = 'localhost'
 os.environ['BACKEND_GRPC_PORT'] = '50052'
 os.environ['DB_SYNC_ENABLED'] = 'false'
+os.environ['LLM_CACHE_ENABLED'] = 'false'
 
 # Mock the gRPC modules
 sys.modules['agent_pb2'] = MagicMock()
@@ -106,6 +107,8 @@ def mock_db_client():
     client = MagicMock(spec=BackendDBClient)
     client.connected = True
     client.restore_experiments.return_value = []
+    client.stream_restore_experiments.return_value = iter(())
+    client.restore_cursor = ''
     client.sync_experiment_status.return_value = True
     client.sync_log_entry.return_value = True
     client.sync_metrics.return_value = True
@@ -9,6 +9,7 @@ from google.protobuf.struct_pb2 import Struct
 from google.protobuf.timestamp_pb2 import Timestamp
 
 # Import the modules to test
+import main
 from main import AgentServiceServicer, experiment_statuses, running_tasks
 
 class TestAgentService:
@@ -154,3 +155,47 @@ class TestAgentService:
         assert response.version is not None
         assert response.uptime_seconds >= 0
         assert response.experiment_count >= 0
+
+class TestExperimentRestore:
+    """Test restoring experiments from the database on startup."""
+    
+    def test_interrupted_restore_backs_off_and_resumes(self):
+        """Test that an interrupted restore waits before resuming from the last cursor."""
+        # Arrange
+        pages = [iter([([], 'exp-1')]), iter([([], '')])]
+        
+        # Act
+        with patch('main.db_client.stream_restore_experiments', side_effect=pages) as mock_stream, \
+                patch('main.time.sleep') as mock_sleep:
+            main._restore_experiment_states(main.ACTIVE_RESTORE_STATES)
+        
+        # Assert
+        assert [call.args[2] for call in mock_stream.call_args_list] == ['', 'exp-1']
+        mock_sleep.assert_called_once_with(main.RESTORE_RETRY_DELAY)
+    
+    def test_failed_restore_gives_up_with_increasing_delays(self):
+        """Test that a restore that never completes stops after RESTORE_MAX_ATTEMPTS."""
+        # Act
+        with patch('main.db_client.stream_restore_experiments', side_effect=lambda *args: iter(())) as mock_stream, \
+                patch('main.time.sleep') as mock_sleep:
+            main._restore_experiment_states(main.ACTIVE_RESTORE_STATES)
+        
+        # Assert
+        assert mock_stream.call_count == main.RESTORE_MAX_ATTEMPTS
+        assert [call.args[0] for call in mock_sleep.call_args_list] == [
+            main.RESTORE_RETRY_DELAY * 2 ** attempt for attempt in range(main.RESTORE_MAX_ATTEMPTS - 1)
+        ]
+    
+    def test_missing_experiment_during_restore(self, agent_service, mock_context, reset_experiment_statuses):
+        """Test that a lookup miss says when experiments are still being restored."""
+        # Arrange
+        request = MagicMock()
+        request.id = main.agent_pb2.ExperimentId(id='not-restored-yet')
+        
+        # Act
+        with patch.object(main.restore_complete, 'is_set', return_value=False):
+            response = agent_service.GetExperimentStatus(request, mock_context)
+        
+        # Assert
+        assert response.name == 'Not Found'
+        assert 'still being restored' in response.status_message
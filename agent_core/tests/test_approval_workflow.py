@@ -334,6 +334,35 @@ class TestApprovalWorkflow:
         assert result is False
         assert request.status == ApprovalStatus.APPROVED  # Status should not change
     
+    def test_process_approval_racing_expiry(self):
+        """Test that a request decided by the expiry scheduler mid-approval runs its callback once."""
+        # Arrange
+        callback = MagicMock()
+        request = self.approval_workflow.create_approval_request(
+            title="Test Approval",
+            description="This is a test approval request",
+            category=DecisionCategory.FINANCIAL,
+            action="make_payment",
+            context={"amount": 100.0, "recipient": "Test Recipient"},
+            user_id="user1",
+            callback=callback,
+            expiration_time=int(time.time()) - 1
+        )
+        
+        # The scheduler expires the request while the delegate check is running
+        def expire_then_authorize(*args):
+            self.approval_workflow.check_expired_requests()
+            return True
+        
+        # Act
+        with patch.object(self.approval_workflow, '_is_delegate', side_effect=expire_then_authorize):
+            result = self.approval_workflow.process_approval(request.id, True, "Approved for testing", "delegate1")
+        
+        # Assert
+        assert result is False
+        assert request.status == ApprovalStatus.EXPIRED
+        callback.assert_called_once_with(request.id, ApprovalStatus.EXPIRED, "Request expired without a decision")
+    
     def test_get_pending_count(self):
         """Test getting the count of pending approval requests."""
         # Arrange
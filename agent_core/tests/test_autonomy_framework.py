@@ -5,6 +5,7 @@ Unit tests for the Autonomy Framework.
 import os
 import sys
 import pytest
+import time
 from unittest.mock import MagicMock, patch
 
 # Add the parent directory to the path so we can import the agent_core modules
@@ -21,7 +22,12 @@ from autonomy_framework import (
     Notification,
     ApprovalRequest,
     NotificationSystem,
-    ApprovalWorkflow
+    ApprovalWorkflow,
+    DecisionMatrix,
+    DecisionLog,
+    RiskLevel,
+    NotificationPreference,
+    TimerWheel
 )
 
 class TestAutonomyFramework:
@@ -201,6 +207,33 @@ class TestNotificationSystem:
         assert len(notifications) == 2
         assert all(n.user_id == "user1" for n in notifications)
 
+    def test_batch_sent_when_do_not_disturb_ends(self):
+        """Test that the batch flusher sends batched notifications right after do-not-disturb."""
+        notification_system = NotificationSystem()
+        now = int(time.time())
+        notification_system.set_user_preferences(NotificationPreference(
+            "test_user",
+            do_not_disturb=[{"start_time": now - 60, "end_time": now + 1}]
+        ))
+        notification_system.start_batch_flusher()
+
+        notification = notification_system.create_notification(
+            "Test Notification",
+            "This is a test notification",
+            NotificationType.INFO,
+            NotificationPriority.HIGH,
+            user_id="test_user"
+        )
+        assert notification.sent is False
+
+        deadline = time.time() + 5
+        while not notification.sent and time.time() < deadline:
+            time.sleep(0.05)
+        notification_system.stop_batch_flusher()
+
+        assert notification.sent is True
+        assert notification.sent_time > now + 1
+
 
 class TestApprovalWorkflow:
     """Test the Approval Workflow."""
@@ -376,3 +409,156 @@ class TestApprovalWorkflow:
 
         # Assert
         assert pending_count == 2
+
+    def test_check_expired_requests(self):
+        """Test that only requests past their expiration time are expired."""
+        # Arrange
+        expired = self.approval_workflow.create_approval_request(
+            "Expired Approval",
+            "This request has already expired",
+            DecisionCategory.FINANCIAL,
+            "make_payment",
+            {"amount": 100.0},
+            "test_user",
+            MagicMock(),
+            expiration_time=int(time.time()) - 1
+        )
+        active = self.approval_workflow.create_approval_request(
+            "Active Approval",
+            "This request has not expired yet",
+            DecisionCategory.FINANCIAL,
+            "make_payment",
+            {"amount": 100.0},
+            "test_user"
+        )
+
+        # Act
+        self.approval_workflow.check_expired_requests()
+
+        # Assert
+        assert expired.status == ApprovalStatus.EXPIRED
+        assert active.status == ApprovalStatus.PENDING
+        expired.callback.assert_called_once_with(expired.id, ApprovalStatus.EXPIRED, "Request expired without a decision")
+
+    def test_expiry_scheduler_auto_approves(self):
+        """Test that the scheduler thread auto-approves requests when they time out."""
+        # Arrange
+        callback = MagicMock()
+        self.approval_workflow.start_expiry_scheduler()
+
+        # Act
+        request = self.approval_workflow.create_approval_request(
+            "Auto Approval",
+            "This request is approved automatically",
+            DecisionCategory.CONTENT_CREATION,
+            "publish",
+            {},
+            "test_user",
+            callback,
+            auto_approve_after=1
+        )
+        deadline = time.time() + 5
+        while request.status == ApprovalStatus.PENDING and time.time() < deadline:
+            time.sleep(0.05)
+        self.approval_workflow.stop_expiry_scheduler()
+
+        # Assert
+        assert request.status == ApprovalStatus.APPROVED
+        callback.assert_called_once_with(request.id, ApprovalStatus.APPROVED, "Automatically approved due to timeout")
+
+class TestDecisionMatrix:
+    """Test the Decision Matrix."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        self.decision_matrix = DecisionMatrix()
+
+    def test_assess_risk_level_thresholds(self):
+        """Test that values map to the risk level of the first threshold above them."""
+        category = DecisionCategory.RESOURCE_ALLOCATION
+
+        assert self.decision_matrix.assess_risk_level(category, {"change_percentage": 5}) == RiskLevel.LOW
+        assert self.decision_matrix.assess_risk_level(category, {"change_percentage": 10}) == RiskLevel.MEDIUM
+        assert self.decision_matrix.assess_risk_level(category, {"change_percentage": 50}) == RiskLevel.HIGH
+        assert self.decision_matrix.assess_risk_level(DecisionCategory.SYSTEM, {}) == RiskLevel.MEDIUM
+
+    def test_update_risk_threshold_recompiles(self):
+        """Test that new thresholds take effect immediately."""
+        category = DecisionCategory.RESOURCE_ALLOCATION
+
+        self.decision_matrix.update_risk_threshold(category, "change_percentage", 5, RiskLevel.CRITICAL)
+
+        assert self.decision_matrix.assess_risk_level(category, {"change_percentage": 3}) == RiskLevel.CRITICAL
+
+    def test_update_matrix_invalidates_cache(self):
+        """Test that cached approval levels are dropped when the matrix changes."""
+        category = DecisionCategory.FINANCIAL
+        assert self.decision_matrix.get_approval_level(category, RiskLevel.LOW) == ApprovalLevel.NOTIFY
+
+        self.decision_matrix.update_matrix(category, RiskLevel.LOW, ApprovalLevel.AUTONOMOUS)
+
+        assert self.decision_matrix.get_approval_level(category, RiskLevel.LOW) == ApprovalLevel.AUTONOMOUS
+
+class TestDecisionLog:
+    """Test the Decision Log."""
+
+    def _decision(self, category=DecisionCategory.SYSTEM, approval_level=ApprovalLevel.AUTONOMOUS):
+        return {
+            "timestamp": int(time.time()),
+            "category": category,
+            "action": "test_action",
+            "context": {"risk_level": RiskLevel.LOW},
+            "risk_level": RiskLevel.LOW,
+            "approval_level": approval_level
+        }
+
+    def test_recent_is_bounded(self):
+        """Test that only the most recent decisions are kept in memory."""
+        decision_log = DecisionLog(max_recent=3)
+
+        for _ in range(5):
+            decision_log.record(self._decision())
+
+        assert len(decision_log.recent) == 3
+        assert len(decision_log.get_recent(10)) == 3
+
+    def test_get_counts(self):
+        """Test aggregate counts over a time window."""
+        decision_log = DecisionLog()
+        decision_log.record(self._decision(DecisionCategory.SYSTEM))
+        decision_log.record(self._decision(DecisionCategory.FINANCIAL, ApprovalLevel.APPROVAL_REQUIRED))
+        decision_log.record(self._decision(DecisionCategory.FINANCIAL, ApprovalLevel.APPROVAL_REQUIRED))
+
+        assert decision_log.get_counts("category") == {"system": 1, "financial": 2}
+        assert decision_log.get_counts("approval_level") == {"autonomous": 1, "approval_required": 2}
+        with pytest.raises(ValueError):
+            decision_log.get_counts("action")
+
+    def test_segments_rotate(self, tmp_path):
+        """Test that the on-disk log rotates to a new segment when full."""
+        decision_log = DecisionLog(log_dir=str(tmp_path), segment_size=200)
+
+        for _ in range(5):
+            decision_log.record(self._decision())
+        decision_log.close()
+
+        segments = sorted(os.listdir(tmp_path))
+        assert len(segments) > 1
+        assert segments[0] == "decisions-000000.log"
+
+class TestTimerWheel:
+    """Test the Timer Wheel."""
+
+    def test_fires_at_due_time(self):
+        """Test that timers fire exactly when due, across wheel levels."""
+        wheel = TimerWheel(1000)
+        wheel.schedule("soon", 1010)
+        wheel.schedule("later", 1000 + 5000)
+        wheel.schedule("cancelled", 1020)
+        wheel.cancel("cancelled")
+
+        assert wheel.advance(1009) == []
+        assert wheel.advance(1010) == ["soon"]
+        assert wheel.advance(1000 + 4999) == []
+        assert wheel.advance(1000 + 5000) == ["later"]
+        assert len(wheel) == 0
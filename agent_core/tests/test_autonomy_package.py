@@ -0,0 +1,743 @@
+"""
+Unit tests for the autonomy package.
+"""
+
+import os
+import sys
+import time
+import random
+import statistics
+import threading
+import pytest
+from unittest.mock import patch
+
+# Add the parent directory to the path so we can import the agent_core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the modules to test
+from autonomy.conditions import compile_condition, ConditionError, MissingContextKey
+from autonomy.decision_matrix import DecisionMatrix, DecisionCategory, ApprovalLevel
+from autonomy.autonomy_framework import AutonomyFramework, DecisionResult
+from autonomy.approval_workflow import ApprovalWorkflow, ApprovalStatus, ApprovalRequest
+from autonomy.notification_system import NotificationSystem, NotificationType, NotificationStatus
+from autonomy.storage import AutonomyStore
+from autonomy.action_queue import DeferredActionQueue
+from autonomy.experiment_log import ExperimentLog
+from autonomy.experimentation_framework import Experiment, ExperimentType, ExperimentStatus
+from autonomy.experiment_statistics import RunningStats
+from autonomy.risk_tolerance import RiskAssessment, RiskCategory, RiskLevel, RiskToleranceProfile, create_default_profiles
+
+class TestConditions:
+    """Test the condition expression compiler."""
+
+    def test_evaluates_comparisons_and_boolean_ops(self):
+        """Test that supported expressions evaluate like Python."""
+        assert compile_condition("amount <= 10.0 and experiment_has_positive_roi")({"amount": 5, "experiment_has_positive_roi": True})
+        assert compile_condition("platform in ['twitter', 'facebook']")({"platform": "twitter"})
+        assert compile_condition("not (5 < amount <= 10) or flagged")({"amount": 12, "flagged": False})
+        assert not compile_condition("interaction_type == 'like'")({"interaction_type": "comment"})
+
+    def test_rejects_unsafe_syntax(self):
+        """Test that calls, attribute access and arithmetic are rejected at compile time."""
+        for expression in ["__import__('os').system('true')", "amount.real > 1", "amount + 1 > 2", "x[0]", "amount >"]:
+            with pytest.raises(ConditionError):
+                compile_condition(expression)
+
+    def test_missing_context_key(self):
+        """Test that a missing context key raises a KeyError."""
+        with pytest.raises(MissingContextKey):
+            compile_condition("word_count > 10000")({})
+
+class TestPackageDecisionMatrix:
+    """Test the autonomy package Decision Matrix."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        self.decision_matrix = DecisionMatrix()
+
+    def test_update_matrix_rejects_invalid_condition(self):
+        """Test that update_matrix rejects conditions outside the expression language."""
+        # Act
+        result = self.decision_matrix.update_matrix(
+            DecisionCategory.FINANCIAL,
+            "spend_money",
+            {"conditions": {"__import__('os').getpid()": ApprovalLevel.AUTONOMOUS}}
+        )
+
+        # Assert
+        assert result is False
+        assert "__import__('os').getpid()" not in self.decision_matrix.matrix[DecisionCategory.FINANCIAL]["spend_money"]["conditions"]
+
+    def test_rejected_update_changes_nothing(self):
+        """Test that an update with any invalid part leaves the action and category untouched."""
+        # Arrange
+        before = dict(self.decision_matrix.matrix[DecisionCategory.FINANCIAL]["spend_money"])
+        context = {"amount": 3.0}
+
+        # Act
+        bad_condition = self.decision_matrix.update_matrix(
+            DecisionCategory.FINANCIAL,
+            "spend_money",
+            {"default": ApprovalLevel.AUTONOMOUS, "conditions": {"amount <": ApprovalLevel.AUTONOMOUS}}
+        )
+        bad_level = self.decision_matrix.update_matrix(
+            DecisionCategory.FINANCIAL,
+            "spend_money",
+            {"default": ApprovalLevel.AUTONOMOUS, "conditions": {"amount < 1.0": "autonomous"}}
+        )
+        bad_default = self.decision_matrix.update_matrix(DecisionCategory.FINANCIAL, "new_action", {"default": "autonomous"})
+
+        # Assert
+        assert (bad_condition, bad_level, bad_default) == (False, False, False)
+        assert self.decision_matrix.matrix[DecisionCategory.FINANCIAL]["spend_money"] == before
+        assert "new_action" not in self.decision_matrix.matrix[DecisionCategory.FINANCIAL]
+        assert self.decision_matrix.get_approval_level(DecisionCategory.FINANCIAL, "spend_money", context) == ApprovalLevel.NOTIFY
+
+    def test_direct_matrix_edits_are_recompiled(self):
+        """Test that conditions edited directly on the matrix are picked up."""
+        # Arrange
+        context = {"amount": 3.0}
+        assert self.decision_matrix.get_approval_level(DecisionCategory.FINANCIAL, "spend_money", context) == ApprovalLevel.NOTIFY
+
+        # Act
+        self.decision_matrix.matrix[DecisionCategory.FINANCIAL]["spend_money"]["conditions"] = {"amount < 1.0": ApprovalLevel.AUTONOMOUS}
+
+        # Assert
+        assert self.decision_matrix.get_approval_level(DecisionCategory.FINANCIAL, "spend_money", context) == ApprovalLevel.APPROVAL_REQUIRED
+
+    def test_concurrent_updates_and_reads(self):
+        """Test that update_matrix can run while other threads make decisions."""
+        # Arrange
+        errors = []
+        stop = threading.Event()
+
+        def decide():
+            while not stop.is_set():
+                try:
+                    level = self.decision_matrix.get_approval_level(DecisionCategory.FINANCIAL, "spend_money", {"amount": 3.0, "flag": True})
+                    assert level in (ApprovalLevel.NOTIFY, ApprovalLevel.AUTONOMOUS)
+                except Exception as e:
+                    errors.append(e)
+        readers = [threading.Thread(target=decide) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+
+        # Act
+        for i in range(200):
+            self.decision_matrix.update_matrix(DecisionCategory.FINANCIAL, "spend_money", {"conditions": {f"flag and amount > {1000 + i}": ApprovalLevel.AUTONOMOUS}})
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+        # Assert
+        assert errors == []
+        assert len(self.decision_matrix.matrix[DecisionCategory.FINANCIAL]["spend_money"]["conditions"]) >= 200
+
+class TestRiskRules:
+    """Test the rule-table risk assessment."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        self.profile = create_default_profiles()["balanced"]
+
+    def test_profile_rules_are_applied(self):
+        """Test that rules added to a profile are used by its assessments."""
+        # Arrange
+        self.profile.add_rule({
+            "category": RiskCategory.REPUTATION,
+            "field": "platform",
+            "values": {"twitter": RiskLevel.HIGH}
+        })
+        risk_assessment = RiskAssessment(self.profile)
+
+        # Act
+        within_tolerance, reason = risk_assessment.check_tolerance("post_content", {"platform": "twitter"})
+
+        # Assert
+        assert within_tolerance is False
+        assert reason == "Risk level high for reputation exceeds tolerance level medium"
+        assert risk_assessment.check_tolerance("post_content", {"platform": "pinterest"}) == (True, None)
+
+    def test_tolerance_changes_invalidate_compiled_profile(self):
+        """Test that updating a tolerance level takes effect on an existing assessment."""
+        # Arrange
+        risk_assessment = RiskAssessment(self.profile)
+        context = {"amount": 600}
+        assert risk_assessment.check_tolerance("spend_money", context)[0] is False
+
+        # Act
+        self.profile.update_tolerance_level(RiskCategory.FINANCIAL, RiskLevel.HIGH)
+
+        # Assert
+        assert risk_assessment.check_tolerance("spend_money", context) == (True, None)
+
+    def test_tolerance_levels_are_read_only(self):
+        """Test that tolerance levels can only change through update_tolerance_level."""
+        # Arrange
+        version = self.profile.version
+
+        # Act
+        with pytest.raises(TypeError):
+            self.profile.tolerance_levels[RiskCategory.FINANCIAL] = RiskLevel.HIGH
+        self.profile.update_tolerance_level(RiskCategory.FINANCIAL, RiskLevel.HIGH)
+
+        # Assert
+        assert self.profile.tolerance_levels[RiskCategory.FINANCIAL] == RiskLevel.HIGH
+        assert self.profile.version == version + 1
+
+    def test_rules_round_trip_through_dict(self):
+        """Test that profile rules survive to_dict and from_dict."""
+        # Arrange
+        self.profile.add_rule({
+            "category": RiskCategory.FINANCIAL,
+            "field": "monthly_cost",
+            "thresholds": [(50, RiskLevel.MEDIUM), (200, RiskLevel.HIGH)]
+        })
+
+        # Act
+        profile = RiskToleranceProfile.from_dict(self.profile.to_dict())
+
+        # Assert
+        assert profile.rules == self.profile.rules
+        assert RiskAssessment(profile).assess_risk("subscribe", {"monthly_cost": 201})[RiskCategory.FINANCIAL] == RiskLevel.HIGH
+
+    def test_invalid_rule_rejected(self):
+        """Test that malformed rules are rejected when added."""
+        with pytest.raises(ValueError):
+            self.profile.add_rule({"category": RiskCategory.FINANCIAL, "field": "amount"})
+
+class TestPackageApprovalWorkflow:
+    """Test the autonomy package Approval Workflow."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        self.approval_workflow = ApprovalWorkflow(NotificationSystem())
+
+    def _create_requests(self, count, user_id="test_user"):
+        requests = []
+        for i in range(count):
+            request = ApprovalRequest(
+                f"Request {i}", "Needs approval", DecisionCategory.FINANCIAL, "spend_money", {"amount": i}, user_id
+            )
+            # Distinct creation times make the expected order explicit
+            request.created_time = 1000 + i
+            self.approval_workflow.add_approval_request(request)
+            requests.append(request)
+        return requests
+
+    def test_indexes_follow_status_transitions(self):
+        """Test that filtered queries reflect approve, reject, cancel and expire transitions."""
+        # Arrange
+        requests = self._create_requests(4)
+        requests[3].expiry_time = 1
+
+        # Act
+        self.approval_workflow.approve_request(requests[0].id, "approver")
+        self.approval_workflow.reject_request(requests[1].id, "approver")
+        self.approval_workflow.cancel_request(requests[2].id)
+        expired = self.approval_workflow.check_expired_requests()
+
+        # Assert
+        assert expired == [requests[3].id]
+        assert self.approval_workflow.get_approval_requests(status=ApprovalStatus.PENDING) == []
+        assert self.approval_workflow.get_approval_requests(user_id="test_user", status=ApprovalStatus.APPROVED) == [requests[0]]
+        assert self.approval_workflow.get_approval_requests(status=ApprovalStatus.REJECTED) == [requests[1]]
+        assert self.approval_workflow.get_approval_requests(status=ApprovalStatus.CANCELLED) == [requests[2]]
+        assert self.approval_workflow.get_approval_requests(category=DecisionCategory.FINANCIAL) == requests
+
+    def test_cursor_pagination(self):
+        """Test paging through requests in creation order, both directions."""
+        # Arrange
+        requests = self._create_requests(5)
+        self._create_requests(2, user_id="other_user")
+
+        # Act
+        first, cursor = self.approval_workflow.get_approval_requests_page(user_id="test_user", limit=2)
+        second, cursor = self.approval_workflow.get_approval_requests_page(user_id="test_user", limit=2, cursor=cursor)
+        third, last_cursor = self.approval_workflow.get_approval_requests_page(user_id="test_user", limit=2, cursor=cursor)
+        newest, _ = self.approval_workflow.get_approval_requests_page(user_id="test_user", limit=3, newest_first=True)
+
+        # Assert
+        assert first + second + third == requests
+        assert last_cursor is None
+        assert newest == requests[:-4:-1]
+
+    def test_concurrent_decisions_only_one_wins(self):
+        """Test that when threads race to decide a request, exactly one decision is applied."""
+        # Arrange
+        callbacks = []
+        request = self.approval_workflow.create_approval_request(
+            "Race", "Needs approval", DecisionCategory.FINANCIAL, "spend_money", {"amount": 1}, "test_user",
+            callback=lambda request_id, status, details: callbacks.append(status)
+        )
+        barrier = threading.Barrier(16)
+        outcomes = []
+
+        def decide(index):
+            barrier.wait()
+            if index % 2:
+                outcomes.append(self.approval_workflow.approve_request(request.id, f"approver_{index}"))
+            else:
+                outcomes.append(self.approval_workflow.reject_request(request.id, f"approver_{index}"))
+        threads = [threading.Thread(target=decide, args=(index,)) for index in range(16)]
+
+        # Act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert
+        assert outcomes.count(True) == 1
+        assert callbacks == [request.status]
+        assert self.approval_workflow.get_approval_requests(status=ApprovalStatus.PENDING) == []
+        assert self.approval_workflow.get_approval_requests(status=request.status) == [request]
+
+class TestAutonomyStore:
+    """Test SQLite persistence of approvals and notifications."""
+
+    def test_query_pages_and_sees_buffered_writes(self):
+        """Test that queries include unflushed writes and page by creation time."""
+        # Arrange
+        store = AutonomyStore(flush_interval=0)
+        for i in range(5):
+            store.save("approval_requests", {"id": f"r{i}", "created_time": 1000 + i, "status": "pending", "user_id": "u", "category": "financial"})
+        store.delete("approval_requests", "r2")
+
+        # Act
+        first, cursor = store.query("approval_requests", {"user_id": "u"}, limit=2)
+        second, last_cursor = store.query("approval_requests", {"user_id": "u"}, limit=2, cursor=cursor)
+
+        # Assert
+        assert [record["id"] for record in first + second] == ["r0", "r1", "r3", "r4"]
+        assert last_cursor is None
+        assert store.load("approval_requests", "r2") is None
+        store.close()
+
+    def test_restart_reloads_pending_requests(self, tmp_path):
+        """Test that pending requests are reloaded and decided ones are loaded on demand."""
+        # Arrange
+        db_path = str(tmp_path / "autonomy.db")
+        store = AutonomyStore(db_path)
+        approval_workflow = ApprovalWorkflow(NotificationSystem(store), store)
+        pending = approval_workflow.create_approval_request("Pending", "Needs approval", DecisionCategory.FINANCIAL, "spend_money", {"amount": 1}, "test_user")
+        approved = approval_workflow.create_approval_request("Approved", "Needs approval", DecisionCategory.FINANCIAL, "spend_money", {"amount": 2}, "test_user")
+        approval_workflow.approve_request(approved.id, "approver", "ok")
+        store.close()
+
+        # Act
+        store = AutonomyStore(db_path)
+        notification_system = NotificationSystem(store)
+        approval_workflow = ApprovalWorkflow(notification_system, store)
+
+        # Assert
+        assert list(approval_workflow.approval_requests) == [pending.id]
+        assert approval_workflow.approval_requests[pending.id].notification_id == pending.notification_id
+        assert approval_workflow.get_approval_requests(status=ApprovalStatus.APPROVED)[0].decision_reason == "ok"
+        assert approval_workflow.get_approval_request(approved.id).status == ApprovalStatus.APPROVED
+        assert notification_system.notifications == {}
+        notification = notification_system.get_notification(pending.notification_id)
+        assert notification.notification_type == NotificationType.APPROVAL_REQUEST
+        assert [n.id for n in notification_system.get_notifications(status=NotificationStatus.PENDING)] == [pending.notification_id]
+        store.close()
+
+    def test_concurrent_flushes_keep_latest_version(self):
+        """Test that racing flushes never let an older version of a record win or hide it from load."""
+        # Arrange
+        store = AutonomyStore(batch_size=2, flush_interval=0.001)
+        store.save("approval_requests", {"id": "r", "created_time": 1000, "status": "v0", "user_id": "u", "category": "financial"})
+
+        # Widen the window between taking a batch from the buffer and writing it
+        class SlowLock:
+            def __init__(self):
+                self._lock = threading.Lock()
+
+            def __enter__(self):
+                time.sleep(0.0002)
+                return self._lock.__enter__()
+
+            def __exit__(self, *args):
+                return self._lock.__exit__(*args)
+
+        store._lock = SlowLock()
+        stop = threading.Event()
+        saved = [0]  # Latest version whose save has returned
+        errors = []
+
+        def read():
+            while not stop.is_set():
+                expected = saved[0]
+                record = store.load("approval_requests", "r")
+                version = int(record["status"][1:]) if record else -1
+                if version < expected:
+                    errors.append((expected, version))
+                store.query("approval_requests", {"user_id": "u"})
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+
+        # Act
+        try:
+            for version in range(1, 200):
+                store.save("approval_requests", {"id": "r", "created_time": 1000, "status": f"v{version}", "user_id": "u", "category": "financial"})
+                saved[0] = version
+                store.save("notifications", {"id": f"n{version}", "created_time": 1000 + version})
+        finally:
+            stop.set()
+            for reader in readers:
+                reader.join()
+        store.flush()
+
+        # Assert
+        assert errors == []
+        assert store.query("approval_requests")[0][0]["status"] == "v199"
+        store.close()
+
+class TestDeferredActionQueue:
+    """Test the deferred action queue."""
+
+    def test_ttl_eviction_skips_approved_actions(self):
+        """Test that only actions still waiting for approval are evicted."""
+        # Arrange
+        queue = DeferredActionQueue(ttl=60)
+        release = threading.Event()
+        queue.register("wait", lambda context: release.wait(5))
+        queue.defer("a1", None, "wait", "financial", "spend_money", {})
+        queue.defer("a2", None, "wait", "financial", "spend_money", {}, ttl=120)
+        queue.defer("a3", None, "wait", "financial", "spend_money", {})
+        future = queue.approve("a3")
+
+        # Act
+        evicted = queue.evict_expired(now=queue.get("a1")["expiry_time"])
+
+        # Assert
+        assert [action["id"] for action in evicted] == ["a1"]
+        assert set(queue.actions) == {"a2", "a3"}
+        release.set()
+        assert future.result(timeout=5) is True
+        queue.shutdown()
+        assert set(queue.actions) == {"a2"}
+
+class TestExperimentLog:
+    """Test the segmented experiment log."""
+
+    def _fill(self, log, count):
+        entries = [{"timestamp": 1000 + i, "level": "ERROR" if i == 4 else "INFO", "message": f"Entry {i}"} for i in range(count)]
+        log.extend(entries)
+        return entries
+
+    def test_behaves_like_a_list_across_segments(self, tmp_path):
+        """Test that entries are readable by index and iteration after being written to segments."""
+        # Arrange
+        log = ExperimentLog("exp", str(tmp_path), segment_size=3, tail_size=2)
+
+        # Act
+        entries = self._fill(log, 7)
+
+        # Assert
+        assert sorted(os.listdir(tmp_path / "exp")) == ["000000.jsonl", "000001.jsonl"]
+        assert len(log) == 7
+        assert log == entries
+        assert [log[0], log[4], log[-1]] == [entries[0], entries[4], entries[6]]
+        assert log[2:5] == entries[2:5]
+
+    def test_query_reads_only_matching_segments(self, tmp_path):
+        """Test that time range and level queries skip segments that can't match."""
+        # Arrange
+        log = ExperimentLog("exp", str(tmp_path), segment_size=3)
+        entries = self._fill(log, 10)
+        read = []
+        read_segment = log._read_segment
+        log._read_segment = lambda segment: read.append(segment["file"]) or read_segment(segment)
+
+        # Act
+        errors = log.query(level="ERROR")
+        in_range = log.query(start_time=1007, end_time=1009)
+
+        # Assert
+        assert errors == [entries[4]]
+        assert in_range == entries[7:10]
+        assert read == ["000001.jsonl", "000002.jsonl"]
+
+    def test_experiment_serializes_tail_and_index(self, tmp_path):
+        """Test that to_dict carries the segment index and a bounded tail instead of every entry."""
+        # Arrange
+        experiment = Experiment("Test", ExperimentType.CUSTOM, "Test experiment", {}, {}, log_dir=str(tmp_path))
+        for i in range(250):
+            experiment.add_log(f"Entry {i}", timestamp=1000 + i)
+
+        # Act
+        data = experiment.to_dict()
+        restored = Experiment.from_dict(data)
+
+        # Assert
+        assert len(data["logs"]) == 100
+        assert data["log_index"]["count"] == 250
+        assert len(restored.logs) == 250
+        assert restored.logs[0]["message"] == "Entry 0"
+        assert restored.get_logs(start_time=1249) == [experiment.logs[-1]]
+
+class TestExperimentStatistics:
+    """Test streaming statistics and sequential testing of experiments."""
+
+    def _run(self, effect, observations=2000, seed=1):
+        rng = random.Random(seed)
+        experiment = Experiment("Test", ExperimentType.CUSTOM, "Test experiment", {},
+                                {"confidence_level": 0.95, "metric": "revenue", "min_samples": 20})
+        experiment.start()
+        for i in range(observations):
+            variant = "a" if i % 2 == 0 else "b"
+            if experiment.record_observation(variant, "revenue", rng.gauss(1.0 + (effect if variant == "b" else 0.0), 1.0)):
+                return experiment, i + 1
+        return experiment, None
+
+    def test_running_stats_match_batch_statistics(self):
+        """Test that Welford accumulators (and merged ones) match batch mean and variance."""
+        # Arrange
+        values = [4.0, -1.25, 0.5, 1.5, 2.5, 100.0, -3.25]
+        left, right, merged = RunningStats(), RunningStats(), RunningStats()
+
+        # Act
+        for value in values[:4]:
+            left.add(value)
+        for value in values[4:]:
+            right.add(value)
+        merged.merge(left)
+        merged.merge(right)
+
+        # Assert
+        assert merged.count == len(values)
+        assert merged.mean == pytest.approx(statistics.mean(values))
+        assert merged.variance == pytest.approx(statistics.variance(values))
+
+    def test_stops_early_when_significant(self):
+        """Test that a real difference completes the experiment before all observations are used."""
+        # Act
+        experiment, stopped_after = self._run(effect=0.5)
+
+        # Assert
+        assert stopped_after is not None and stopped_after < 2000
+        assert experiment.status == ExperimentStatus.COMPLETED
+        assert experiment.results["winner"] == "b"
+        assert experiment.results["success"] is True
+        assert experiment.results["p_values"]["b"] <= 0.05
+
+    def test_worse_treatment_is_not_a_success(self):
+        """Test that a significantly worse treatment completes the experiment as unsuccessful."""
+        # Act
+        experiment, stopped_after = self._run(effect=-0.5)
+
+        # Assert
+        assert stopped_after is not None
+        assert experiment.status == ExperimentStatus.COMPLETED
+        assert experiment.results["winner"] == "a"
+        assert experiment.results["success"] is False
+
+    def test_control_without_data_has_no_winner(self):
+        """Test that observations for other variants are accepted before the control has any."""
+        # Arrange
+        experiment = Experiment("Test", ExperimentType.CUSTOM, "Test experiment", {},
+                                {"confidence_level": 0.95, "metric": "revenue", "control_variant": "a"})
+        experiment.start()
+
+        # Act
+        completed = [experiment.record_observation("b", "revenue", float(i)) for i in range(50)]
+        experiment.record_observation("a", "clicks", 1.0)
+        results = experiment.statistical_results()
+
+        # Assert
+        assert not any(completed)
+        assert experiment.status == ExperimentStatus.RUNNING
+        assert results["control_variant"] == "a"
+        assert results["winner"] is None
+        assert results["variants"]["b"]["revenue"]["count"] == 50
+
+    def test_no_difference_runs_to_completion(self):
+        """Test that equal variants don't stop early and are judged unsuccessful at the end."""
+        # Arrange
+        experiment, stopped_after = self._run(effect=0.0, observations=500)
+
+        # Act
+        experiment.complete({})
+        restored = Experiment.from_dict(experiment.to_dict())
+
+        # Assert
+        assert stopped_after is None
+        assert experiment.results["winner"] is None
+        assert experiment.results["success"] is False
+        assert restored.variants["a"]["revenue"].mean == experiment.variants["a"]["revenue"].mean
+        assert restored.sequential_tests["b"].p_value == experiment.sequential_tests["b"].p_value
+
+class TestPackageAutonomyFramework:
+    """Test the autonomy package Autonomy Framework."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        self.autonomy_framework = AutonomyFramework()
+
+    def test_can_execute_many_matches_can_execute(self):
+        """Test that the bulk check agrees with per-item checks."""
+        # Arrange
+        items = [
+            (DecisionCategory.FINANCIAL, "spend_money", {"amount": 3.0}),
+            (DecisionCategory.FINANCIAL, "spend_money", {"amount": 75.0}),
+            (DecisionCategory.FINANCIAL, "spend_money", {"amount": 3.0}),
+            (DecisionCategory.FINANCIAL, "allocate_budget", {"amount": 8.0, "experiment_has_positive_roi": True}),
+            (DecisionCategory.RESOURCE_ALLOCATION, "reallocate_resources", {"resource_type": "compute", "amount_change": 5.0, "regulated": True}),
+            (DecisionCategory.CONTENT_CREATION, "generate_ebook", {"word_count": 500, "contains_sensitive_topics": False, "tags": ["unhashable"]}),
+            (DecisionCategory.CONTENT_CREATION, "unknown_action", {})
+        ]
+
+        # Act
+        bulk = self.autonomy_framework.can_execute_many(items)
+
+        # Assert
+        assert bulk["results"] == [self.autonomy_framework.can_execute(*item) for item in items]
+        assert bulk["summary"] == {
+            "total": 7, "allowed": 4, "notify": 3, "approval_required": 1, "prohibited": 1, "risk_exceeded": 1
+        }
+
+    def test_approved_action_runs_off_the_approver_thread(self):
+        """Test that approving runs the action on a worker and cleans up the pending action."""
+        # Arrange
+        threads = []
+        result = self.autonomy_framework.execute_action(
+            DecisionCategory.FINANCIAL, "spend_money", {"amount": 20.0}, "Buy ads", "Spend on ads",
+            lambda context: threads.append(threading.current_thread())
+        )
+
+        # Act
+        self.autonomy_framework.approval_workflow.approve_request(result["approval_request_id"], "approver")
+        self.autonomy_framework.close()
+
+        # Assert
+        assert result["status"] == "approval_requested"
+        assert threads and threads[0] is not threading.current_thread()
+        assert self.autonomy_framework.pending_actions == {}
+        assert self.autonomy_framework.notification_system.get_notifications(related_entity_id=result["action_id"])[0].title == "Approved Action Executed"
+
+    def test_action_decided_as_soon_as_requested_runs(self):
+        """Test that an approval arriving before execute_action returns still runs the action."""
+        # Arrange
+        workflow = self.autonomy_framework.approval_workflow
+        create_approval_request = workflow.create_approval_request
+        executed = []
+
+        def create_and_approve(*args, **kwargs):
+            request = create_approval_request(*args, **kwargs)
+            workflow.approve_request(request.id, "approver")
+            return request
+
+        # Act
+        with patch.object(workflow, "create_approval_request", side_effect=create_and_approve):
+            result = self.autonomy_framework.execute_action(
+                DecisionCategory.FINANCIAL, "spend_money", {"amount": 20.0}, "Buy ads", "Spend on ads", executed.append
+            )
+        self.autonomy_framework.close()
+
+        # Assert
+        assert result["status"] == "approval_requested"
+        assert executed == [{"amount": 20.0}]
+        assert self.autonomy_framework.pending_actions == {}
+
+    def test_rejected_action_is_evicted(self):
+        """Test that rejecting an approval request drops its pending action."""
+        # Arrange
+        result = self.autonomy_framework.execute_action(
+            DecisionCategory.FINANCIAL, "spend_money", {"amount": 20.0}, "Buy ads", "Spend on ads", lambda context: None
+        )
+
+        # Act
+        self.autonomy_framework.approval_workflow.reject_request(result["approval_request_id"], "approver", "Too expensive")
+
+        # Assert
+        assert self.autonomy_framework.pending_actions == {}
+
+    def test_named_action_survives_restart(self, tmp_path):
+        """Test that a named action approved after a restart runs with its saved context."""
+        # Arrange
+        db_path = str(tmp_path / "autonomy.db")
+        framework = AutonomyFramework(db_path=db_path)
+        framework.register_action("buy_ads", lambda context: None)
+        result = framework.execute_action(
+            DecisionCategory.FINANCIAL, "spend_money", {"amount": 20.0}, "Buy ads", "Spend on ads", None, action_name="buy_ads"
+        )
+        framework.close()
+        executed = []
+
+        # Act
+        framework = AutonomyFramework(db_path=db_path)
+        framework.register_action("buy_ads", executed.append)
+        framework.approval_workflow.approve_request(result["approval_request_id"], "approver")
+        framework.close()
+
+        # Assert
+        assert executed == [{"amount": 20.0}]
+        assert AutonomyFramework(db_path=db_path).pending_actions == {}
+
+    def test_evaluate_returns_single_pass_result(self):
+        """Test that evaluate reports the matched rule, risk and stage timings."""
+        # Arrange
+        framework = AutonomyFramework(timing_sample_interval=1)
+
+        # Act
+        decision = framework.evaluate(DecisionCategory.FINANCIAL, "spend_money", {"amount": 3.0})
+
+        # Assert
+        assert isinstance(decision, DecisionResult)
+        assert decision.approval_level == ApprovalLevel.NOTIFY
+        assert decision.matched_rule is not None
+        assert (decision.can_execute, decision.reason) == framework.can_execute(DecisionCategory.FINANCIAL, "spend_money", {"amount": 3.0})
+        assert decision.risk[RiskCategory.FINANCIAL] == RiskLevel.MINIMAL
+        assert set(decision.timings) == {"matrix", "risk", "total"}
+        with pytest.raises(TypeError):
+            decision.risk[RiskCategory.FINANCIAL] = RiskLevel.HIGH
+        assert framework.get_decision_timings().snapshot()["total"]["count"] == 2
+        assert 'stage="matrix"' in framework.get_decision_timings().to_prometheus()
+
+    def test_evaluate_captures_risk_assessment(self):
+        """Test that reading a decision's risk returns what the tolerance check saw, without re-running the rules."""
+        # Arrange
+        context = {"resource_type": "compute", "amount_change": 5.0, "regulated": True}
+        expected = self.autonomy_framework.risk_assessment.assess_risk("reallocate_resources", context)
+
+        # Act
+        decision = self.autonomy_framework.evaluate(DecisionCategory.RESOURCE_ALLOCATION, "reallocate_resources", context)
+        with patch.object(self.autonomy_framework.risk_assessment, "_levels", side_effect=AssertionError("rules re-run")):
+            risk = dict(decision.risk)
+
+        # Assert
+        assert risk == expected
+        assert decision.within_tolerance is False
+
+    def test_stage_timings_are_sampled(self):
+        """Test that only one in timing_sample_interval decisions records stage timings."""
+        # Arrange
+        sampled = AutonomyFramework(timing_sample_interval=10)
+        untimed = AutonomyFramework(timing_sample_interval=0)
+
+        # Act
+        for framework in (sampled, untimed):
+            for _ in range(50):
+                framework.can_execute(DecisionCategory.FINANCIAL, "spend_money", {"amount": 3.0})
+
+        # Assert
+        assert sampled.get_decision_timings().snapshot()["total"]["count"] == 5
+        assert untimed.get_decision_timings().snapshot() == {}
+
+    def test_execute_action_matches_rules_once(self):
+        """Test that execute_action doesn't re-evaluate the decision matrix."""
+        # Arrange
+        match_rule = self.autonomy_framework.decision_matrix._match_rule
+        calls = []
+        self.autonomy_framework.decision_matrix._match_rule = lambda *args: calls.append(args) or match_rule(*args)
+
+        # Act
+        result = self.autonomy_framework.execute_action(
+            DecisionCategory.FINANCIAL, "spend_money", {"amount": 3.0}, "Buy ads", "Spend on ads", lambda context: "done"
+        )
+
+        # Assert
+        assert result["status"] == "executed"
+        assert len(calls) == 1
@@ -0,0 +1,256 @@
+"""
+Unit tests for the Bandit Allocator.
+"""
+
+import os
+import sys
+import random
+import pytest
+
+# Add the parent directory to the path so we can import the agent_core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the modules to test
+import bandit_allocator
+from bandit_allocator import BanditAllocator, BERNOULLI, GAUSSIAN
+from autonomy_framework import AutonomyFramework
+from experiment_runner import ExperimentRunner
+from experimentation_framework import (
+    ExperimentationFramework,
+    ExperimentStatus,
+    ExperimentType,
+    BANDIT_ALLOCATION
+)
+
+class TestBanditAllocator:
+    """Test the Bandit Allocator with the standard library sampler."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        self.bandit = BanditAllocator(seed=42, use_numpy=False)
+
+    def test_add_experiment_validates_arms(self):
+        """Test that experiments need two arms and a known reward model."""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            self.bandit.add_experiment("exp", ["a"])
+        with pytest.raises(ValueError):
+            self.bandit.add_experiment("exp", ["a", "b"], reward="poisson")
+
+    def test_no_data_splits_evenly(self):
+        """Test that arms without data get roughly equal traffic."""
+        # Arrange
+        self.bandit.add_experiment("exp", ["a", "b"])
+
+        # Act
+        allocation = self.bandit.allocate()["exp"]
+
+        # Assert
+        assert allocation["a"] + allocation["b"] == pytest.approx(1.0)
+        assert allocation["a"] == pytest.approx(0.5, abs=0.1)
+
+    def test_bernoulli_shifts_traffic_to_better_arm(self):
+        """Test that the arm with the higher conversion rate gets most of the traffic."""
+        # Arrange
+        self.bandit.add_experiment("exp", ["a", "b"], BERNOULLI)
+        self.bandit.record("exp", "a", 50, 1000)
+        self.bandit.record("exp", "b", 80, 1000)
+
+        # Act
+        allocation = self.bandit.allocate()["exp"]
+
+        # Assert
+        assert allocation["b"] > 0.95
+        assert self.bandit.winner("exp", 0.95) == "b"
+
+    def test_gaussian_shifts_traffic_to_better_arm(self):
+        """Test that the arm with the higher mean revenue gets most of the traffic."""
+        # Arrange
+        rng = random.Random(1)
+        self.bandit.add_experiment("exp", ["low", "high"], GAUSSIAN)
+        for _ in range(200):
+            self.bandit.record("exp", "low", rng.gauss(10.0, 2.0))
+            self.bandit.record("exp", "high", rng.gauss(12.0, 2.0))
+
+        # Act
+        allocation = self.bandit.allocate()["exp"]
+
+        # Assert
+        assert allocation["high"] > 0.99
+        assert self.bandit.get_stats("exp")["high"]["impressions"] == 200
+
+    def test_allocate_covers_all_experiments(self):
+        """Test that one allocate call covers every experiment."""
+        # Arrange
+        self.bandit.add_experiment("conversion", ["a", "b", "c"], BERNOULLI)
+        self.bandit.add_experiment("revenue", ["a", "b"], GAUSSIAN)
+
+        # Act
+        allocations = self.bandit.allocate()
+
+        # Assert
+        assert set(allocations) == {"conversion", "revenue"}
+        assert set(allocations["conversion"]) == {"a", "b", "c"}
+
+    def test_unknown_arm_is_not_recorded(self):
+        """Test that rewards for unknown experiments or arms are rejected."""
+        # Arrange
+        self.bandit.add_experiment("exp", ["a", "b"])
+
+        # Act & Assert
+        assert not self.bandit.record("exp", "c", 1)
+        assert not self.bandit.record("other", "a", 1)
+        assert self.bandit.choose("other") is None
+
+    def test_record_rejects_invalid_rewards(self):
+        """Test that impossible counts and rewards are rejected."""
+        # Arrange
+        self.bandit.add_experiment("conversion", ["a", "b"], BERNOULLI)
+        self.bandit.add_experiment("revenue", ["a", "b"], GAUSSIAN)
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            self.bandit.record("conversion", "a", 0, 0)
+        with pytest.raises(ValueError):
+            self.bandit.record("conversion", "a", 11, 10)
+        with pytest.raises(ValueError):
+            self.bandit.record("revenue", "a", 1000.0, 100)
+        with pytest.raises(ValueError):
+            self.bandit.record("revenue", "a", 1000.0, 100, sum_squares=9000.0)
+        assert self.bandit.get_stats("conversion")["a"]["impressions"] == 0
+        assert self.bandit.get_stats("revenue")["a"]["impressions"] == 0
+
+    def test_gaussian_batches_keep_their_variance(self):
+        """Test that an A/A pricing test recorded in batches rarely declares a false winner."""
+        # Arrange
+        rng = random.Random(5)
+        false_winners = 0
+
+        # Act
+        for trial in range(20):
+            bandit = BanditAllocator(seed=trial, use_numpy=False)
+            bandit.add_experiment("exp", ["a", "b"], GAUSSIAN)
+            for _ in range(5):
+                for arm in ("a", "b"):
+                    values = [rng.gauss(10.0, 5.0) for _ in range(100)]
+                    bandit.record("exp", arm, sum(values), len(values), sum(v * v for v in values))
+            if bandit.winner("exp", 0.95) is not None:
+                false_winners += 1
+
+        # Assert - both arms are identical, so a winner should only be declared about 5% of the time
+        assert false_winners <= 4
+
+    def test_thompson_sampling_limits_wasted_impressions(self):
+        """Test that serving impressions with choose() sends most traffic to the better arm."""
+        # Arrange
+        rates = {"a": 0.02, "b": 0.06}
+        rng = random.Random(7)
+        self.bandit.add_experiment("exp", ["a", "b"])
+
+        # Act
+        for _ in range(4000):
+            arm = self.bandit.choose("exp")
+            self.bandit.record("exp", arm, 1 if rng.random() < rates[arm] else 0)
+
+        # Assert - a fixed split would have served 2000 impressions on the worse arm
+        assert self.bandit.get_stats("exp")["a"]["impressions"] < 1000
+
+    @pytest.mark.skipif(bandit_allocator.np is None, reason="NumPy is not installed")
+    def test_numpy_matches_standard_library(self):
+        """Test that the vectorized sampler agrees with the standard library sampler."""
+        # Arrange
+        vectorized = BanditAllocator(seed=1, use_numpy=True)
+        for bandit in (self.bandit, vectorized):
+            bandit.add_experiment("conversion", ["a", "b", "c"], BERNOULLI)
+            bandit.record("conversion", "a", 30, 1000)
+            bandit.record("conversion", "b", 40, 1000)
+            bandit.add_experiment("revenue", ["a", "b"], GAUSSIAN)
+            for value in (9.0, 11.0, 10.0):
+                bandit.record("revenue", "a", value)
+                bandit.record("revenue", "b", value + 0.5)
+
+        # Act
+        expected = self.bandit.allocate()
+        actual = vectorized.allocate()
+
+        # Assert
+        for experiment_id, allocation in expected.items():
+            for arm, share in allocation.items():
+                assert actual[experiment_id][arm] == pytest.approx(share, abs=0.06)
+
+class TestBanditExperiments:
+    """Test bandit allocation through the Experimentation Framework."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        self.runner = ExperimentRunner(day_length=10, tick_interval=2)
+        self.framework = ExperimentationFramework(
+            AutonomyFramework(), runner=self.runner, bandit=BanditAllocator(seed=3, use_numpy=False)
+        )
+        self.ab_template_id = next(
+            template_id for template_id, template in self.framework.templates.items()
+            if template.experiment_type == ExperimentType.A_B_TEST
+        )
+
+    def teardown_method(self):
+        """Stop the runner's worker pool."""
+        self.framework.close()
+
+    def _start_ab_test(self, allocation):
+        """Create and start an A/B content test."""
+        experiment, _ = self.framework.create_experiment(
+            name="Headline test",
+            experiment_type=ExperimentType.A_B_TEST,
+            description="Test two headlines",
+            parameters={"content_a": "Headline A", "content_b": "Headline B", "allocation": allocation},
+            sample_size=2000,
+            duration=3,
+            budget=100.0,
+            success_criteria={"confidence_level": 0.95},
+            template_id=self.ab_template_id
+        )
+        self.framework.start_experiment(experiment.id)
+        return experiment
+
+    def test_templates_default_to_fixed_allocation(self):
+        """Test that experiments use a fixed split unless they ask for a bandit."""
+        # Act
+        experiment = self._start_ab_test("fixed")
+
+        # Assert
+        assert experiment.status == ExperimentStatus.RUNNING
+        assert self.framework.choose_variant(experiment.id) is None
+
+    def test_bandit_experiment_routes_and_completes(self):
+        """Test that a bandit experiment chooses variants, reallocates and reports a winner."""
+        # Arrange
+        experiment = self._start_ab_test(BANDIT_ALLOCATION)
+        assert self.framework.choose_variant(experiment.id) in ("a", "b")
+
+        # Act
+        self.framework.record_outcome(experiment.id, "a", 20, 1000)
+        self.framework.record_outcome(experiment.id, "b", 60, 1000)
+        allocations = self.framework.reallocate_traffic()
+        self.runner.run_due(experiment.start_time + 100)
+
+        # Assert
+        assert allocations[experiment.id]["b"] > 0.95
+        assert experiment.status == ExperimentStatus.COMPLETED
+        assert experiment.results["bandit"]["winner"] == "b"
+        assert experiment.id not in self.framework.bandit.experiments
+
+    def test_bandit_experiments_collect_metrics_by_default(self):
+        """Test that bandit experiments report their outcomes without a registered collector."""
+        # Arrange
+        experiment = self._start_ab_test(BANDIT_ALLOCATION)
+        self.framework.record_outcome(experiment.id, "b", 30, 100)
+
+        # Act
+        self.runner.run_due(experiment.start_time + 100)
+
+        # Assert
+        metrics = experiment.results["metrics"]
+        assert metrics["variants"]["a"] == {"impressions": 0, "mean_reward": 0.0}
+        assert metrics["variants"]["b"] == {"impressions": 100, "mean_reward": 0.3}
+        assert set(metrics["traffic_allocation"]) == {"a", "b"}
+        assert experiment.status == ExperimentStatus.COMPLETED
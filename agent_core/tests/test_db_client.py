@@ -132,6 +132,52 @@ class TestBackendDBClient:
         assert experiments is None
         self.mock_stub.RestoreExperiments.assert_called_once()
     
+    def test_stream_restore_experiments_pages(self):
+        """Test streaming restoration across multiple pages."""
+        # Arrange
+        first, second = MagicMock(), MagicMock()
+        self.mock_stub.StreamRestoreExperiments.return_value = iter([
+            MagicMock(success=True, experiments=[first], next_cursor="exp-1"),
+            MagicMock(success=True, experiments=[second], next_cursor="")
+        ])
+        
+        # Act
+        pages = list(self.client.stream_restore_experiments(page_size=1))
+        
+        # Assert
+        assert pages == [([first], "exp-1"), ([second], "")]
+        assert self.client.restore_cursor == ""
+        self.mock_stub.StreamRestoreExperiments.assert_called_once()
+    
+    def test_stream_restore_experiments_interrupted(self):
+        """Test that an interrupted stream keeps the cursor for resuming."""
+        # Arrange
+        def broken_stream(request):
+            yield MagicMock(success=True, experiments=[MagicMock()], next_cursor="exp-1")
+            raise Exception("Stream broken")
+        self.mock_stub.StreamRestoreExperiments.side_effect = broken_stream
+        
+        # Act
+        pages = list(self.client.stream_restore_experiments(page_size=1))
+        
+        # Assert
+        assert len(pages) == 1
+        assert self.client.restore_cursor == "exp-1"
+    
+    def test_stream_restore_experiments_connect_failure_resets_cursor(self):
+        """Test that a restore that can't connect doesn't keep a previous restore's cursor."""
+        # Arrange
+        self.client.restore_cursor = "exp-1"
+        self.client.connected = False
+        self.mock_grpc_channel.side_effect = Exception("Connection failed")
+        
+        # Act
+        pages = list(self.client.stream_restore_experiments(page_size=1))
+        
+        # Assert
+        assert pages == []
+        assert self.client.restore_cursor == ""
+    
     def test_sync_experiment_status_success(self):
         """Test successful synchronization of experiment status."""
         # Arrange
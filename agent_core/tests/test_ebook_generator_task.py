@@ -81,8 +81,7 @@ class TestEbookGeneratorTask:
         assert 'ABACUSAI_API_KEY not found in environment variables' in result['message']
     
     @patch('task_modules.ebook_generator_task.EbookGenerator')
-    @patch('tempfile.TemporaryDirectory')
-    def test_execute_success(self, mock_temp_dir, mock_ebook_generator_class):
+    def test_execute_success(self, mock_ebook_generator_class):
         """Test successful execution of the task."""
         # Arrange
         parameters = {'topic': 'Test Topic', 'audience': 'Test Audience', 'num_chapters': 3}
@@ -91,10 +90,7 @@ class TestEbookGeneratorTask:
         mock_generator_instance = MagicMock()
         mock_ebook_generator_class.return_value = mock_generator_instance
         
-        # Mock the temporary directory
-        mock_temp_dir.return_value.__enter__.return_value = '/tmp/test'
-        
-        # Mock the outline.json file
+        # Mock the streamed outline and chapters
         outline = {
             'title': 'Test Book',
             'description': 'A test book',
@@ -104,43 +100,69 @@ class TestEbookGeneratorTask:
                 {'number': 3, 'title': 'Chapter 3'}
             ]
         }
+        mock_generator_instance.stream_book.return_value = iter([
+            {'type': 'outline', 'outline': outline},
+            {'type': 'chapter', 'number': 1, 'title': 'Chapter 1', 'content': 'x' * 250, 'attempts': 1, 'error': None},
+            {'type': 'chapter', 'number': 2, 'title': 'Chapter 2', 'content': 'Short', 'attempts': 1, 'error': None},
+            {'type': 'chapter', 'number': 3, 'title': 'Chapter 3', 'content': None, 'attempts': 3, 'error': 'Timed out'}
+        ])
         
-        # Mock the os.path.exists function
-        with patch('os.path.exists', return_value=True):
-            # Mock the open function for reading the outline
-            with patch('builtins.open', mock_open(read_data=json.dumps(outline))):
-                # Mock the os.path.join function
-                with patch('os.path.join', side_effect=lambda *args: '/'.join(args)):
-                    # Act
-                    result = self.task.execute(parameters)
+        # Act
+        with patch('builtins.open', mock_open()) as mock_file:
+            result = self.task.execute(parameters)
         
         # Assert
         assert result['status'] == 'completed'
         assert result['result']['title'] == 'Test Book'
         assert result['result']['description'] == 'A test book'
         assert result['result']['num_chapters'] == 3
+        assert result['result']['chapters_generated'] == 2
+        assert result['result']['chapters'][0]['content_length'] == 250
+        assert result['result']['chapters'][0]['content_preview'] == 'x' * 200 + '...'
+        assert result['result']['chapters'][1]['content_preview'] == 'Short'
+        assert result['result']['chapters_failed'] == [{'number': 3, 'title': 'Chapter 3', 'error': 'Timed out'}]
+        assert self.task.progress == 100.0
         
-        # Verify the generator was called with the correct parameters
-        mock_ebook_generator_class.assert_called_once_with('test-api-key')
-        mock_generator_instance.generate_full_book.assert_called_once_with(
-            'Test Topic', 'Test Audience', '/tmp/test', 3
-        )
+        # Verify the generator was called with the correct parameters and nothing was read back from disk
+        mock_ebook_generator_class.assert_called_once_with('test-api-key', use_cache=True)
+        mock_generator_instance.stream_book.assert_called_once_with('Test Topic', 'Test Audience', 3)
+        mock_generator_instance.save_chapter.assert_not_called()
+        mock_file.assert_not_called()
+    
+    @patch('task_modules.ebook_generator_task.EbookGenerator')
+    def test_execute_saves_to_output_dir(self, mock_ebook_generator_class):
+        """Test that the book is saved when an output directory is given."""
+        # Arrange
+        parameters = {'topic': 'Test Topic', 'audience': 'Test Audience', 'num_chapters': 1, 'output_dir': '/tmp/book'}
+        outline = {'title': 'Test Book', 'description': 'A test book', 'chapters': [{'number': 1, 'title': 'Chapter 1'}]}
+        
+        # Mock the EbookGenerator instance
+        mock_generator_instance = MagicMock()
+        mock_generator_instance.stream_book.return_value = iter([
+            {'type': 'outline', 'outline': outline},
+            {'type': 'chapter', 'number': 1, 'title': 'Chapter 1', 'content': 'Content', 'attempts': 1, 'error': None}
+        ])
+        mock_ebook_generator_class.return_value = mock_generator_instance
+        
+        # Act
+        result = self.task.execute(parameters)
+        
+        # Assert
+        assert result['status'] == 'completed'
+        mock_generator_instance.save_outline.assert_called_once_with(outline, '/tmp/book')
+        mock_generator_instance.save_chapter.assert_called_once_with('Content', '/tmp/book', 1)
     
     @patch('task_modules.ebook_generator_task.EbookGenerator')
-    @patch('tempfile.TemporaryDirectory')
-    def test_execute_generator_error(self, mock_temp_dir, mock_ebook_generator_class):
+    def test_execute_generator_error(self, mock_ebook_generator_class):
         """Test handling of errors from the generator."""
         # Arrange
         parameters = {'topic': 'Test Topic', 'audience': 'Test Audience'}
         
         # Mock the EbookGenerator instance
         mock_generator_instance = MagicMock()
-        mock_generator_instance.generate_full_book.side_effect = Exception('Generator error')
+        mock_generator_instance.stream_book.side_effect = Exception('Generator error')
         mock_ebook_generator_class.return_value = mock_generator_instance
         
-        # Mock the temporary directory
-        mock_temp_dir.return_value.__enter__.return_value = '/tmp/test'
-        
         # Act
         result = self.task.execute(parameters)
         
@@ -149,28 +171,140 @@ class TestEbookGeneratorTask:
         assert 'Generator error' in result['message']
         
         # Verify the generator was called with the correct parameters
-        mock_ebook_generator_class.assert_called_once_with('test-api-key')
-        mock_generator_instance.generate_full_book.assert_called_once()
+        mock_ebook_generator_class.assert_called_once_with('test-api-key', use_cache=True)
+        mock_generator_instance.stream_book.assert_called_once()
     
     @patch('task_modules.ebook_generator_task.EbookGenerator')
-    @patch('tempfile.TemporaryDirectory')
-    def test_execute_outline_missing(self, mock_temp_dir, mock_ebook_generator_class):
-        """Test handling of missing outline file."""
+    def test_execute_outline_missing(self, mock_ebook_generator_class):
+        """Test handling of a missing outline."""
         # Arrange
         parameters = {'topic': 'Test Topic', 'audience': 'Test Audience'}
         
-        # Mock the EbookGenerator instance
+        # Mock the EbookGenerator instance to stream no outline
         mock_generator_instance = MagicMock()
+        mock_generator_instance.stream_book.return_value = iter([{'type': 'outline', 'outline': None}])
         mock_ebook_generator_class.return_value = mock_generator_instance
         
-        # Mock the temporary directory
-        mock_temp_dir.return_value.__enter__.return_value = '/tmp/test'
-        
-        # Mock the os.path.exists function to return False for the outline file
-        with patch('os.path.exists', return_value=False):
-            # Act
-            result = self.task.execute(parameters)
+        # Act
+        result = self.task.execute(parameters)
         
         # Assert
         assert result['status'] == 'failed'
         assert 'Failed to generate book outline' in result['message']
+
+class TestEbookGeneratorChapters:
+    """Test chapter generation in the EbookGenerator class."""
+    
+    def setup_method(self):
+        """Set up the test environment."""
+        from task_modules.ebook_generator import EbookGenerator
+        
+        with patch('task_modules.ebook_generator.ApiClient'):
+            self.generator = EbookGenerator('test-api-key')
+        
+        self.outline = {
+            'title': 'Test Book',
+            'description': 'A test book',
+            'chapters': [
+                {'number': i, 'title': f'Chapter {i}', 'description': f'About {i}'}
+                for i in range(1, 6)
+            ]
+        }
+        self.generator.generate_book_outline = MagicMock(return_value=self.outline)
+    
+    def test_parallel_chapters_saved_in_order(self):
+        """Test that chapters generated in parallel are all saved."""
+        # Arrange
+        self.generator.generate_chapter_content = MagicMock(
+            side_effect=lambda title, chapter, audience: f"Content {chapter['number']}"
+        )
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Act
+            report = self.generator.generate_full_book('Topic', 'Audience', temp_dir, 5, max_concurrency=3)
+            
+            # Assert
+            assert report['chapters_completed'] == [1, 2, 3, 4, 5]
+            assert report['chapters_failed'] == []
+            assert sorted(os.listdir(os.path.join(temp_dir, 'chapters'))) == [f"chapter_{i:02d}.md" for i in range(1, 6)]
+            with open(os.path.join(temp_dir, 'chapters', 'chapter_04.md')) as f:
+                assert f.read() == 'Content 4'
+    
+    def test_failed_chapter_is_retried(self):
+        """Test that a chapter that fails once is retried."""
+        # Arrange
+        attempts = {}
+        
+        def flaky(title, chapter, audience):
+            attempts[chapter['number']] = attempts.get(chapter['number'], 0) + 1
+            return None if chapter['number'] == 2 and attempts[2] == 1 else 'Content'
+        
+        self.generator.generate_chapter_content = MagicMock(side_effect=flaky)
+        
+        with tempfile.TemporaryDirectory() as temp_dir, patch('task_modules.ebook_generator.time.sleep'):
+            # Act
+            report = self.generator.generate_full_book('Topic', 'Audience', temp_dir, 5, max_concurrency=2)
+        
+        # Assert
+        assert report['chapters_completed'] == [1, 2, 3, 4, 5]
+        assert attempts[2] == 2
+    
+    def test_partial_failure_is_reported(self):
+        """Test that chapters failing every attempt are reported without stopping the book."""
+        # Arrange
+        self.generator.generate_chapter_content = MagicMock(
+            side_effect=lambda title, chapter, audience: None if chapter['number'] == 3 else 'Content'
+        )
+        
+        with tempfile.TemporaryDirectory() as temp_dir, patch('task_modules.ebook_generator.time.sleep'):
+            # Act
+            report = self.generator.generate_full_book('Topic', 'Audience', temp_dir, 5, max_concurrency=4, max_retries=1)
+        
+        # Assert
+        assert report['chapters_completed'] == [1, 2, 4, 5]
+        assert report['chapters_failed'] == [
+            {'number': 3, 'title': 'Chapter 3', 'attempts': 2, 'error': 'No content returned'}
+        ]
+    
+    def test_failed_chapter_reports_provider_error(self):
+        """Test that the report carries the error the provider raised, not a generic message."""
+        # Arrange
+        def text_generation(prompt, **kwargs):
+            if 'chapter 3 ' in prompt:
+                raise RuntimeError('Rate limit exceeded')
+            return MagicMock(generations=[MagicMock(text='Content')])
+        
+        self.generator.use_cache = False
+        self.generator.client.text_generation = MagicMock(side_effect=text_generation)
+        
+        with tempfile.TemporaryDirectory() as temp_dir, patch('task_modules.ebook_generator.time.sleep'):
+            # Act
+            report = self.generator.generate_full_book('Topic', 'Audience', temp_dir, 5, max_concurrency=2, max_retries=1)
+        
+        # Assert
+        assert report['chapters_completed'] == [1, 2, 4, 5]
+        assert report['chapters_failed'] == [
+            {'number': 3, 'title': 'Chapter 3', 'attempts': 2, 'error': 'Rate limit exceeded'}
+        ]
+    
+    def test_retry_is_not_served_a_cached_empty_chapter(self):
+        """Test that an empty chapter isn't cached, so the retry asks the provider again."""
+        # Arrange
+        from task_modules.llm_cache import LLMCache
+        
+        responses = [MagicMock(generations=[MagicMock(text='')]), MagicMock(generations=[MagicMock(text='Chapter text')])]
+        self.generator.client.text_generation = MagicMock(side_effect=responses)
+        chapter = self.outline['chapters'][0]
+        
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                patch('task_modules.llm_cache.get_default_cache', return_value=LLMCache(cache_dir)), \
+                patch('task_modules.ebook_generator.time.sleep'):
+            # Act
+            result = self.generator.generate_chapter_with_retry('Test Book', chapter, 'Audience', max_retries=2)
+            rerun = self.generator.generate_chapter_with_retry('Test Book', chapter, 'Audience', max_retries=2)
+        
+        # Assert
+        assert result['content'] == 'Chapter text'
+        assert result['attempts'] == 2
+        assert rerun['content'] == 'Chapter text'
+        assert self.generator.client.text_generation.call_count == 2
@@ -0,0 +1,156 @@
+"""
+Unit tests for experiment approvals in the Experimentation Framework.
+"""
+
+import os
+import sys
+import threading
+import pytest
+from unittest.mock import patch
+
+# Add the parent directory to the path so we can import the agent_core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the modules to test
+from autonomy_framework import AutonomyFramework, ApprovalStatus, RiskLevel
+from experimentation_framework import ExperimentationFramework, ExperimentStatus, ExperimentType
+
+class TestExperimentApprovals:
+    """Test how approval requests are matched to experiments."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        self.autonomy_framework = AutonomyFramework()
+        self.framework = ExperimentationFramework(self.autonomy_framework)
+        self.pricing_template_id = next(
+            template_id for template_id, template in self.framework.templates.items()
+            if template.approval_required
+        )
+        # High-risk experiments need approval before they can start
+        self.framework.templates[self.pricing_template_id].risk_level = RiskLevel.HIGH
+
+    def teardown_method(self):
+        """Stop the framework's runner."""
+        self.framework.close()
+
+    def _create_pending_experiment(self, name):
+        """Create a pricing experiment and start it, so it waits for approval."""
+        experiment, _ = self.framework.create_experiment(
+            name=name,
+            experiment_type=ExperimentType.PRICING_TEST,
+            description="Test price points",
+            parameters={"price_a": 9.99, "price_b": 12.99, "product_id": "book-1"},
+            sample_size=1000,
+            duration=7,
+            budget=5000.0,
+            success_criteria={"min_revenue_increase": 0.1},
+            template_id=self.pricing_template_id,
+            user_id="user123"
+        )
+        success, _ = self.framework.start_experiment(experiment.id)
+        assert not success
+        return experiment
+
+    def test_start_links_approval_request(self):
+        """Test that starting an experiment that needs approval records its request."""
+        # Act
+        experiment = self._create_pending_experiment("Pricing 1")
+
+        # Assert
+        assert experiment.status == ExperimentStatus.PENDING_APPROVAL
+        assert experiment.approval_request_id is not None
+        assert self.framework.get_experiment_for_approval(experiment.approval_request_id) is experiment
+        assert self.framework.get_experiments(ExperimentStatus.PENDING_APPROVAL) == [experiment]
+
+    def test_callback_starts_the_matching_experiment(self):
+        """Test that an approval starts the experiment it was for, not the first pending one."""
+        # Arrange
+        experiments = [self._create_pending_experiment(f"Pricing {i}") for i in range(5)]
+        target = experiments[3]
+
+        # Act
+        self.framework._experiment_approval_callback(target.approval_request_id, ApprovalStatus.APPROVED, None)
+
+        # Assert
+        assert target.status == ExperimentStatus.RUNNING
+        assert target.start_time is not None
+        assert self.framework.get_experiments(ExperimentStatus.RUNNING) == [target]
+        assert len(self.framework.get_experiments(ExperimentStatus.PENDING_APPROVAL)) == 4
+        assert all(e.status == ExperimentStatus.PENDING_APPROVAL for e in experiments if e is not target)
+
+    def test_rejection_cancels_the_matching_experiment(self):
+        """Test that a rejection cancels only the experiment it was for."""
+        # Arrange
+        first = self._create_pending_experiment("Pricing 1")
+        second = self._create_pending_experiment("Pricing 2")
+
+        # Act
+        self.framework._experiment_approval_callback(second.approval_request_id, "rejected", "Too risky")
+
+        # Assert
+        assert first.status == ExperimentStatus.PENDING_APPROVAL
+        assert second.status == ExperimentStatus.CANCELLED
+        assert "Too risky" in second.notes[-1]
+        assert self.framework.get_experiments(ExperimentStatus.CANCELLED) == [second]
+
+    def test_process_approval_runs_callback(self):
+        """Test the full path from the approval workflow to the experiment."""
+        # Arrange
+        experiment = self._create_pending_experiment("Pricing 1")
+
+        # Act
+        self.autonomy_framework.get_approval_workflow().process_approval(experiment.approval_request_id, True)
+
+        # Assert
+        assert experiment.status == ExperimentStatus.RUNNING
+        assert self.framework.get_experiment_for_approval(experiment.approval_request_id) is None
+
+    def test_decision_during_request_creation_is_not_lost(self):
+        """Test that a request decided on another thread before start_experiment registers it still starts the experiment."""
+        # Arrange
+        workflow = self.autonomy_framework.get_approval_workflow()
+        create_approval_request = workflow.create_approval_request
+        approvers = []
+
+        def create_and_approve_elsewhere(*args, **kwargs):
+            request = create_approval_request(*args, **kwargs)
+            approver = threading.Thread(target=workflow.process_approval, args=(request.id, True))
+            approver.start()
+            approver.join(0.2)
+            approvers.append(approver)
+            return request
+
+        # Act
+        with patch.object(workflow, 'create_approval_request', side_effect=create_and_approve_elsewhere):
+            experiment = self._create_pending_experiment("Pricing 1")
+        approvers[0].join()
+
+        # Assert
+        assert experiment.status == ExperimentStatus.RUNNING
+        assert self.framework.get_experiment_for_approval(experiment.approval_request_id) is None
+
+    def test_unknown_or_repeated_request_is_ignored(self):
+        """Test that callbacks for unknown or already handled requests change nothing."""
+        # Arrange
+        experiment = self._create_pending_experiment("Pricing 1")
+        request_id = experiment.approval_request_id
+        self.framework._experiment_approval_callback(request_id, ApprovalStatus.APPROVED, None)
+
+        # Act
+        self.framework._experiment_approval_callback("unknown", ApprovalStatus.REJECTED, None)
+        self.framework._experiment_approval_callback(request_id, ApprovalStatus.REJECTED, None)
+
+        # Assert
+        assert experiment.status == ExperimentStatus.RUNNING
+
+    def test_direct_status_changes_update_index(self):
+        """Test that setting an experiment's status directly keeps the status index current."""
+        # Arrange
+        experiment = self._create_pending_experiment("Pricing 1")
+
+        # Act
+        experiment.status = ExperimentStatus.PAUSED
+
+        # Assert
+        assert self.framework.get_experiments(ExperimentStatus.PENDING_APPROVAL) == []
+        assert self.framework.get_experiments(ExperimentStatus.PAUSED) == [experiment]
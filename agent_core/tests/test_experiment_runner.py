@@ -0,0 +1,231 @@
+"""
+Unit tests for the Experiment Runner.
+"""
+
+import os
+import sys
+import time
+import pytest
+
+# Add the parent directory to the path so we can import the agent_core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the modules to test
+from autonomy_framework import AutonomyFramework
+from experiment_runner import ExperimentRunner
+from experimentation_framework import ExperimentationFramework, ExperimentStatus, ExperimentType
+
+class TestExperimentRunner:
+    """Test the Experiment Runner through the Experimentation Framework."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        # One "day" of duration is 10 seconds, with a tick every 2 seconds
+        self.runner = ExperimentRunner(max_concurrent=3, budget_limit=1000.0, tick_interval=2, day_length=10)
+        self.framework = ExperimentationFramework(AutonomyFramework(), runner=self.runner)
+        self.collected = []
+
+        def collector(experiment):
+            self.collected.append(experiment.id)
+            return {"engagement": len(self.collected)}
+
+        self.runner.register_collector(ExperimentType.A_B_TEST, collector)
+
+    def teardown_method(self):
+        """Stop the runner's worker pool."""
+        self.framework.close()
+
+    def _start(self, name, budget=100.0, duration=1):
+        """Create and start an A/B test."""
+        experiment, _ = self.framework.create_experiment(
+            name=name,
+            experiment_type=ExperimentType.A_B_TEST,
+            description="Test two headlines",
+            parameters={},
+            sample_size=1000,
+            duration=duration,
+            budget=budget,
+            success_criteria={}
+        )
+        success, message = self.framework.start_experiment(experiment.id)
+        return experiment, success, message
+
+    def test_start_runs_experiment(self):
+        """Test that starting an experiment hands it to the runner."""
+        # Act
+        experiment, success, message = self._start("Headline test")
+
+        # Assert
+        assert success
+        assert message is None
+        assert experiment.status == ExperimentStatus.RUNNING
+        assert experiment.start_time is not None
+        assert experiment.id in self.framework.running_experiments
+
+    def test_ticks_collect_metrics_and_complete(self):
+        """Test that ticks collect metrics until the duration passes, then results are written back."""
+        # Arrange
+        experiment, _, _ = self._start("Headline test")
+
+        # Act
+        ticks = self.runner.run_due(time.time() + 60)
+
+        # Assert
+        assert ticks == 5  # Every 2 seconds over a 10 second "day", the last one at the end
+        assert experiment.status == ExperimentStatus.COMPLETED
+        assert experiment.end_time is not None
+        assert experiment.metrics == {"engagement": 5}
+        assert experiment.results["metrics"] == {"engagement": 5}
+        assert experiment.results["ticks"] == 5
+        assert self.runner.get_status()["running"] == 0
+
+    def test_nothing_runs_before_first_tick(self):
+        """Test that no ticks are processed before they are due."""
+        # Arrange
+        experiment, _, _ = self._start("Headline test")
+
+        # Act
+        ticks = self.runner.run_due(time.time())
+
+        # Assert
+        assert ticks == 0
+        assert experiment.status == ExperimentStatus.RUNNING
+
+    def test_concurrency_limit_queues_experiments(self):
+        """Test that experiments beyond max_concurrent are queued and started when a slot frees."""
+        # Arrange
+        experiments = [self._start(f"Test {i}")[0] for i in range(3)]
+
+        # Act
+        queued, success, message = self._start("Test 3", duration=5)
+
+        # Assert
+        assert success
+        assert "queued" in message
+        assert queued.status == ExperimentStatus.QUEUED
+        assert self.runner.get_status()["queued"] == 1
+
+        # Act - finishing the running experiments admits the queued one
+        self.runner.run_due(time.time() + 11)
+
+        # Assert
+        assert all(e.status == ExperimentStatus.COMPLETED for e in experiments)
+        assert queued.status == ExperimentStatus.RUNNING
+
+    def test_budget_limit_queues_experiments(self):
+        """Test that experiments are queued while the running budget is used up."""
+        # Arrange
+        first, _, _ = self._start("Expensive", budget=800.0)
+
+        # Act
+        second, _, _ = self._start("Also expensive", budget=300.0)
+
+        # Assert
+        assert second.status == ExperimentStatus.QUEUED
+        assert self.runner.get_status()["committed_budget"] == 800.0
+
+        # Act - cancelling the first frees its budget
+        first.status = ExperimentStatus.CANCELLED
+
+        # Assert
+        assert second.status == ExperimentStatus.RUNNING
+        assert self.runner.get_status()["committed_budget"] == 300.0
+
+    def test_budget_over_limit_is_rejected(self):
+        """Test that an experiment that could never fit the budget isn't started."""
+        # Act
+        experiment, success, message = self._start("Too expensive", budget=5000.0)
+
+        # Assert
+        assert not success
+        assert "budget" in message
+        assert experiment.status == ExperimentStatus.DRAFT
+
+    def test_pause_and_resume_keeps_progress(self):
+        """Test that a paused experiment resumes with the time it has already run."""
+        # Arrange
+        experiment, _, _ = self._start("Headline test")
+        experiment.status = ExperimentStatus.PAUSED
+        assert self.runner.get_status()["running"] == 0
+
+        # Act
+        success, _ = self.framework.start_experiment(experiment.id)
+
+        # Assert
+        assert success
+        assert experiment.status == ExperimentStatus.RUNNING
+        assert self.framework.running_experiments[experiment.id]["elapsed"] >= 0
+
+    def test_collector_errors_are_counted(self):
+        """Test that failing collectors don't stop the experiment."""
+        # Arrange
+        def failing_collector(experiment):
+            raise RuntimeError("metrics service unavailable")
+
+        self.runner.register_collector(ExperimentType.A_B_TEST, failing_collector)
+        experiment, _, _ = self._start("Headline test")
+
+        # Act
+        self.runner.run_due(time.time() + 60)
+
+        # Assert
+        assert experiment.status == ExperimentStatus.COMPLETED
+        assert experiment.results["collection_errors"] == 5
+
+    def test_evaluator_results_are_merged(self):
+        """Test that an evaluator's results are written back, and its errors fail the experiment."""
+        # Arrange
+        self.runner.register_collector(ExperimentType.A_B_TEST, lambda e: {"conversion": 0.12}, lambda e: {"winner": "b"})
+        good, _, _ = self._start("Good")
+        self.runner.register_collector(ExperimentType.PRICING_TEST, lambda e: {}, lambda e: 1 / 0)
+        bad, _ = self.framework.create_experiment(
+            name="Bad", experiment_type=ExperimentType.PRICING_TEST, description="", parameters={},
+            sample_size=100, duration=1, budget=10.0, success_criteria={}
+        )
+        self.framework.start_experiment(bad.id)
+
+        # Act
+        self.runner.run_due(time.time() + 60)
+
+        # Assert
+        assert good.results["winner"] == "b"
+        assert good.status == ExperimentStatus.COMPLETED
+        assert bad.status == ExperimentStatus.FAILED
+
+    def test_shared_scheduler_runs_many_experiments(self):
+        """Test that the scheduler thread drives many experiments to completion."""
+        # Arrange
+        runner = ExperimentRunner(max_concurrent=500, tick_interval=0.05, day_length=0.2, auto_start=True)
+        framework = ExperimentationFramework(AutonomyFramework(), runner=runner)
+        runner.register_collector(ExperimentType.A_B_TEST, lambda e: {"visits": 1})
+        experiments = []
+        for i in range(300):
+            experiment, _ = framework.create_experiment(
+                name=f"Test {i}", experiment_type=ExperimentType.A_B_TEST, description="", parameters={},
+                sample_size=100, duration=1, budget=1.0, success_criteria={}
+            )
+            framework.start_experiment(experiment.id)
+            experiments.append(experiment)
+
+        # Act
+        deadline = time.time() + 10
+        while time.time() < deadline and len(framework.get_experiments(ExperimentStatus.COMPLETED)) < 300:
+            time.sleep(0.05)
+        framework.close()
+
+        # Assert
+        assert len(framework.get_experiments(ExperimentStatus.COMPLETED)) == 300
+        assert all(e.results["ticks"] == 4 for e in experiments)
+
+    def test_close_stops_default_runner(self):
+        """Test that closing a framework stops the scheduler thread of the runner it started."""
+        # Arrange
+        framework = ExperimentationFramework(AutonomyFramework())
+        scheduler = framework.runner._scheduler_thread
+
+        # Act
+        framework.close()
+
+        # Assert
+        assert scheduler.is_alive() is False
+        assert framework.runner._scheduler_thread is None
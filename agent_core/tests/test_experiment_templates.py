@@ -0,0 +1,178 @@
+"""
+Unit tests for experiment template validation in the Experimentation Framework.
+"""
+
+import os
+import sys
+import pytest
+from unittest.mock import patch
+
+# Add the parent directory to the path so we can import the agent_core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the modules to test
+from autonomy_framework import AutonomyFramework
+from experiment_runner import ExperimentRunner
+from experimentation_framework import (
+    ExperimentationFramework,
+    ExperimentParameter,
+    ExperimentStatus,
+    ExperimentType,
+    format_warnings
+)
+
+class TestExperimentParameter:
+    """Test compiled parameter checks."""
+
+    def test_validate_messages(self):
+        """Test that validate reports the first failed check."""
+        # Arrange
+        price = ExperimentParameter("price", "float", 1.0, min_value=0.0, max_value=100.0)
+        metric = ExperimentParameter("metric", "str", "engagement", allowed_values=["engagement", "conversion"])
+
+        # Act & Assert
+        assert price.validate(9.99) == (True, None)
+        assert price.validate("cheap") == (False, "Parameter price must be a number")
+        assert price.validate(-1) == (False, "Parameter price must be at least 0.0")
+        assert price.validate(101) == (False, "Parameter price must be at most 100.0")
+        assert metric.validate("retention") == (False, "Parameter metric must be one of ['engagement', 'conversion']")
+        assert metric.validate(["engagement"]) == (False, "Parameter metric must be a string")
+
+    def test_compile_returns_codes(self):
+        """Test that compiled checks return (code, limit) for failures."""
+        # Arrange
+        check = ExperimentParameter("count", "int", 1, min_value=1).compile()
+
+        # Act & Assert
+        assert check(5) is None
+        assert check(0) == ("below_minimum", 1)
+        assert check(1.5) == ("invalid_type", "int")
+
+    def test_checks_are_compiled_once(self):
+        """Test that validate reuses the compiled checks until a checked field changes."""
+        # Arrange
+        price = ExperimentParameter("price", "float", 1.0, min_value=0.0, max_value=100.0)
+
+        # Act
+        with patch.object(ExperimentParameter, 'compile', autospec=True, side_effect=ExperimentParameter.compile) as compile_checks:
+            results = [price.validate(50) for _ in range(10)]
+            price.max_value = 10.0
+            capped = price.validate(50)
+            price.description = "Unit price"
+            price.validate(5)
+
+        # Assert
+        assert results == [(True, None)] * 10
+        assert capped == (False, "Parameter price must be at most 10.0")
+        assert compile_checks.call_count == 2
+
+    def test_unhashable_allowed_values(self):
+        """Test that allowed values that can't go in a set still work."""
+        # Arrange
+        param = ExperimentParameter("layout", "", [1], allowed_values=[[1], [2]])
+
+        # Act & Assert
+        assert param.validate([2]) == (True, None)
+        assert param.validate([3])[0] is False
+
+class TestCreateExperiments:
+    """Test template validators and batch creation."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        self.runner = ExperimentRunner()
+        self.framework = ExperimentationFramework(AutonomyFramework(), runner=self.runner)
+        self.template = next(
+            template for template in self.framework.templates.values()
+            if template.experiment_type == ExperimentType.A_B_TEST
+        )
+
+    def teardown_method(self):
+        """Stop the runner's worker pool."""
+        self.framework.close()
+
+    def test_validator_structured_warnings(self):
+        """Test that the compiled template validator returns updates and structured warnings."""
+        # Act
+        updates, warnings = self.template.validator({"content_a": "A", "metric": "clicks"}, 100, 3, 900.0)
+
+        # Assert
+        assert updates == {"content_b": "", "target_audience": "all", "metric": "engagement", "allocation": "fixed"}
+        assert {"field": "sample_size", "code": "below_minimum", "value": 100, "limit": 1000} in warnings
+        assert {"field": "budget", "code": "above_limit", "value": 900.0, "limit": 500.0} in warnings
+        assert {"field": "content_b", "code": "missing", "default": ""} in warnings
+        assert any(w["field"] == "metric" and w["code"] == "not_allowed" for w in warnings)
+
+    def test_create_experiment_text_warnings(self):
+        """Test that create_experiment still returns text warnings and fills in defaults."""
+        # Arrange
+        parameters = {"content_a": "A", "content_b": "B", "target_audience": "all", "metric": "clicks", "allocation": "fixed"}
+
+        # Act
+        experiment, warnings = self.framework.create_experiment(
+            "Headline test", ExperimentType.A_B_TEST, "", parameters, 6000, 5, 100.0, {}, self.template.id
+        )
+
+        # Assert
+        assert warnings == [
+            "Sample size 6000 is above the recommended maximum of 5000",
+            "Parameter metric must be one of ['engagement', 'conversion', 'retention']",
+            "Invalid value for parameter metric, using default value: engagement"
+        ]
+        assert experiment.parameters["metric"] == "engagement"
+
+    def test_create_experiments_batch(self):
+        """Test creating many variants from a template in one call."""
+        # Arrange
+        base = {"content_a": "Original headline", "metric": "conversion"}
+        batch = [
+            {
+                "name": f"Headline variant {i}",
+                "template_id": self.template.id,
+                "parameters": dict(base, content_b=f"Variant {i}"),
+                "sample_size": 2000,
+                "duration": 5,
+                "budget": 100.0
+            }
+            for i in range(500)
+        ]
+
+        # Act
+        results = self.framework.create_experiments(batch)
+
+        # Assert
+        assert len(results) == 500
+        assert all(result["error"] is None for result in results)
+        experiment = results[7]["experiment"]
+        assert experiment.name == "Headline variant 7"
+        assert experiment.experiment_type == ExperimentType.A_B_TEST
+        assert experiment.parameters["content_b"] == "Variant 7"
+        assert experiment.success_criteria == self.template.success_criteria
+        assert format_warnings(results[7]["warnings"]) == [
+            "Parameter target_audience not specified, using default value: all",
+            "Parameter allocation not specified, using default value: fixed"
+        ]
+        assert len(self.framework.get_experiments(ExperimentStatus.DRAFT)) == 500
+
+    def test_create_experiments_rejects_bad_items(self):
+        """Test that invalid items are rejected without stopping the batch."""
+        # Arrange
+        shared_parameters = {"content_a": "A"}
+        batch = [
+            {"name": "No sizes", "template_id": self.template.id, "parameters": shared_parameters},
+            {"name": "Bad type", "experiment_type": "coin_flip", "sample_size": 1, "duration": 1, "budget": 1.0},
+            {"name": "Good", "template_id": self.template.id, "parameters": shared_parameters,
+             "sample_size": 2000, "duration": 5, "budget": 100.0}
+        ]
+
+        # Act
+        results = self.framework.create_experiments(batch)
+
+        # Assert
+        assert results[0]["experiment"] is None
+        assert results[0]["error"] == "Missing field: sample_size"
+        assert results[1]["experiment"] is None
+        assert "coin_flip" in results[1]["error"]
+        assert results[2]["experiment"] is not None
+        assert shared_parameters == {"content_a": "A"}  # Parameters are copied, not filled in place
+        assert len(self.framework.experiments) == 1
@@ -0,0 +1,220 @@
+"""
+Unit tests for the shared LLM response cache.
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import pytest
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the path so we can import the task_modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Import the module to test
+from task_modules import llm_cache
+from task_modules.llm_cache import LLMCache, cached_generate, cached_text_generation
+
+class TestLLMCache:
+    """Test the LLMCache class."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = LLMCache(self.temp_dir.name, max_bytes=1024 * 1024, ttl=60)
+
+    def teardown_method(self):
+        """Clean up after the test."""
+        self.temp_dir.cleanup()
+
+    def test_key_covers_request(self):
+        """Test that every part of the request changes the key."""
+        # Arrange
+        key = LLMCache.make_key("model", "prompt", 0.7, 100)
+
+        # Act & Assert
+        assert key == LLMCache.make_key("model", "prompt", 0.7, 100)
+        assert key != LLMCache.make_key("other", "prompt", 0.7, 100)
+        assert key != LLMCache.make_key("model", "other", 0.7, 100)
+        assert key != LLMCache.make_key("model", "prompt", 0.2, 100)
+        assert key != LLMCache.make_key("model", "prompt", 0.7, 200)
+
+    def test_set_and_get(self):
+        """Test that stored responses are returned and survive a restart."""
+        # Act
+        self.cache.set("abc", "Generated text")
+        reopened = LLMCache(self.temp_dir.name)
+
+        # Assert
+        assert self.cache.get("abc") == "Generated text"
+        assert self.cache.get("missing") is None
+        assert reopened.get("abc") == "Generated text"
+        assert self.cache.get_stats()["hits"] == 1
+        assert self.cache.get_stats()["misses"] == 1
+
+    def test_expired_entries_are_missing(self):
+        """Test that responses older than the TTL are not returned."""
+        # Arrange
+        self.cache.set("abc", "Generated text")
+
+        # Act
+        with patch('task_modules.llm_cache.time.time', return_value=time.time() + 120):
+            result = self.cache.get("abc")
+
+        # Assert
+        assert result is None
+        assert self.cache.get_stats()["entries"] == 0
+
+    def test_least_recently_used_are_evicted(self):
+        """Test that the size limit evicts the least recently used responses first."""
+        # Arrange
+        entry_size = len(json.dumps({"created": time.time(), "text": "x" * 100}))
+        cache = LLMCache(os.path.join(self.temp_dir.name, "small"), max_bytes=entry_size * 2 + 10)
+        cache.set("a", "x" * 100)
+        cache.set("b", "x" * 100)
+        cache.get("a")
+
+        # Act
+        cache.set("c", "x" * 100)
+
+        # Assert
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+        assert cache.get_stats()["total_bytes"] <= cache.max_bytes
+
+class TestCachedGeneration:
+    """Test generation through the cache."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = LLMCache(self.temp_dir.name)
+        self.generate = MagicMock(return_value='{"title": "Test Book"}')
+
+    def teardown_method(self):
+        """Clean up after the test."""
+        self.temp_dir.cleanup()
+
+    def test_reruns_are_served_from_cache(self):
+        """Test that identical requests only generate once."""
+        # Act
+        first = cached_generate("model", "prompt", 0.7, 100, self.generate, json.loads, cache=self.cache)
+        second = cached_generate("model", "prompt", 0.7, 100, self.generate, json.loads, cache=self.cache)
+
+        # Assert
+        assert first == second == {"title": "Test Book"}
+        self.generate.assert_called_once()
+
+    def test_opt_out_bypasses_cache(self):
+        """Test that use_cache=False always generates and stores nothing."""
+        # Act
+        cached_generate("model", "prompt", 0.7, 100, self.generate, use_cache=False, cache=self.cache)
+        cached_generate("model", "prompt", 0.7, 100, self.generate, use_cache=False, cache=self.cache)
+
+        # Assert
+        assert self.generate.call_count == 2
+        assert self.cache.get_stats()["entries"] == 0
+
+    def test_unparseable_responses_are_not_cached(self):
+        """Test that a response the caller rejects is generated again next time."""
+        # Arrange
+        self.generate.side_effect = ["not json", '{"title": "Test Book"}']
+
+        # Act
+        with pytest.raises(ValueError):
+            cached_generate("model", "prompt", 0.7, 100, self.generate, json.loads, cache=self.cache)
+        result = cached_generate("model", "prompt", 0.7, 100, self.generate, json.loads, cache=self.cache)
+
+        # Assert
+        assert result == {"title": "Test Book"}
+        assert self.generate.call_count == 2
+
+    def test_empty_responses_are_not_cached(self):
+        """Test that empty or whitespace-only responses are generated again next time."""
+        # Arrange
+        self.generate.side_effect = ["", "  \n", "Chapter content"]
+
+        # Act
+        results = [cached_generate("model", "prompt", 0.7, 100, self.generate, cache=self.cache) for _ in range(4)]
+
+        # Assert
+        assert results == ["", "  \n", "Chapter content", "Chapter content"]
+        assert self.generate.call_count == 3
+
+    def test_rejected_responses_are_not_cached(self):
+        """Test that a response rejected by parse is not stored."""
+        # Arrange
+        def reject_short(text):
+            if len(text) < 10:
+                raise ValueError("Response too short")
+            return text
+
+        self.generate.side_effect = ["Short", "Long enough content"]
+
+        # Act
+        with pytest.raises(ValueError):
+            cached_generate("model", "prompt", 0.7, 100, self.generate, reject_short, cache=self.cache)
+        result = cached_generate("model", "prompt", 0.7, 100, self.generate, reject_short, cache=self.cache)
+
+        # Assert
+        assert result == "Long enough content"
+        assert self.cache.get(LLMCache.make_key("model", "prompt", 0.7, 100)) == "Long enough content"
+
+    def test_cached_text_generation_uses_shared_cache(self):
+        """Test that AbacusAI text generation goes through the shared cache."""
+        # Arrange
+        client = MagicMock()
+        client.text_generation.return_value.generations = [MagicMock(text="Chapter content")]
+
+        # Act
+        with patch.object(llm_cache, 'get_default_cache', return_value=self.cache):
+            for _ in range(3):
+                text = cached_text_generation(client, prompt="prompt", max_tokens=100, temperature=0.7, model="model")
+
+        # Assert
+        assert text == "Chapter content"
+        client.text_generation.assert_called_once_with(prompt="prompt", max_tokens=100, temperature=0.7, model="model")
+
+    def test_default_cache_can_be_disabled(self):
+        """Test that LLM_CACHE_ENABLED=false turns the shared cache off."""
+        # Act
+        with patch.dict(os.environ, {'LLM_CACHE_ENABLED': 'false'}):
+            cache = llm_cache.get_default_cache()
+
+        # Assert
+        assert cache is None
+
+    def test_cache_write_failures_return_the_response(self):
+        """Test that a response that can't be stored is still returned instead of regenerated."""
+        # Arrange
+        full = OSError(28, "No space left on device")
+
+        # Act
+        with patch.object(llm_cache.tempfile, 'mkstemp', side_effect=full):
+            result = cached_generate("model", "prompt", 0.7, 100, self.generate, json.loads, cache=self.cache)
+
+        # Assert
+        assert result == {"title": "Test Book"}
+        self.generate.assert_called_once()
+        assert self.cache.get_stats()["entries"] == 0
+
+    def test_unusable_cache_dir_disables_default_cache(self):
+        """Test that generation still works when the shared cache directory can't be created."""
+        # Arrange
+        blocker = os.path.join(self.temp_dir.name, "not-a-dir")
+        with open(blocker, 'w') as f:
+            f.write("")
+
+        # Act
+        with patch.dict(os.environ, {'LLM_CACHE_ENABLED': 'true', 'LLM_CACHE_DIR': os.path.join(blocker, 'cache')}), \
+                patch.object(llm_cache, '_default_cache', None):
+            cache = llm_cache.get_default_cache()
+            result = cached_generate("model", "prompt", 0.7, 100, self.generate)
+
+        # Assert
+        assert cache is None
+        assert result == '{"title": "Test Book"}'
+        self.generate.assert_called_once()
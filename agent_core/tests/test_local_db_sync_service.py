@@ -0,0 +1,99 @@
+"""
+Tests for the local DatabaseSyncService, served over gRPC with the generated stubs.
+"""
+
+import os
+import sys
+from concurrent import futures
+
+import pytest
+import grpc
+
+# Add the parent directory to the path so we can import the agent_core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The service needs the stubs generated by generate_protos.sh
+local_db_sync_service = pytest.importorskip("local_db_sync_service")
+agent_pb2 = local_db_sync_service.agent_pb2
+database_sync_pb2 = local_db_sync_service.database_sync_pb2
+database_sync_pb2_grpc = local_db_sync_service.database_sync_pb2_grpc
+
+class TestLocalDatabaseSyncService:
+    """Test the LocalDatabaseSyncService through a real gRPC server."""
+
+    def setup_method(self):
+        """Start the service on a free port and connect a stub to it."""
+        self.service = local_db_sync_service.LocalDatabaseSyncService(system_user_id="system")
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        database_sync_pb2_grpc.add_DatabaseSyncServiceServicer_to_server(self.service, self.server)
+        port = self.server.add_insecure_port("localhost:0")
+        self.server.start()
+        self.channel = grpc.insecure_channel(f"localhost:{port}")
+        self.stub = database_sync_pb2_grpc.DatabaseSyncServiceStub(self.channel)
+
+    def teardown_method(self):
+        """Stop the server and close the service."""
+        self.channel.close()
+        self.server.stop(None)
+        self.service.close()
+
+    def _sync(self, experiment_id, state=agent_pb2.STATE_RUNNING, name=""):
+        status = agent_pb2.ExperimentStatus(name=name, state=state, type=agent_pb2.AI_DRIVEN_EBOOKS)
+        status.id.id = experiment_id
+        return self.stub.SyncExperimentStatus(database_sync_pb2.SyncExperimentStatusRequest(experiment_status=status))
+
+    def _stream_ids(self, **kwargs):
+        pages = list(self.stub.StreamRestoreExperiments(database_sync_pb2.StreamRestoreExperimentsRequest(**kwargs)))
+        return pages, [experiment.id.id for page in pages for experiment in page.experiments]
+
+    def test_sync_keeps_experiment_owner(self):
+        """Test that new experiments belong to the system user and updates keep their owner."""
+        # Arrange
+        self._sync("exp-1")
+        self._sync("exp-2")
+        self.service.set_experiment_owner("exp-1", "alice")
+
+        # Act
+        response = self._sync("exp-1", state=agent_pb2.STATE_COMPLETED, name="Updated")
+        alice = self.stub.RestoreExperiments(database_sync_pb2.RestoreExperimentsRequest(user_id="alice"))
+        system = self.stub.RestoreExperiments(database_sync_pb2.RestoreExperimentsRequest(user_id="system"))
+
+        # Assert
+        assert response.success is True
+        assert [experiment.id.id for experiment in alice.experiments] == ["exp-1"]
+        assert alice.experiments[0].name == "Updated"
+        assert alice.experiments[0].state == agent_pb2.STATE_COMPLETED
+        assert [experiment.id.id for experiment in system.experiments] == ["exp-2"]
+        assert self.service.count("experiments") == 2
+
+    def test_stream_filters_by_user_and_state(self):
+        """Test that the streamed restore only returns the user's experiments in the requested states."""
+        # Arrange
+        for i in range(5):
+            self._sync(f"alice-{i}", state=agent_pb2.STATE_COMPLETED if i == 4 else agent_pb2.STATE_RUNNING)
+            self.service.set_experiment_owner(f"alice-{i}", "alice")
+        self._sync("other-0")
+
+        # Act
+        pages, ids = self._stream_ids(user_id="alice", experiment_states=[agent_pb2.STATE_RUNNING], page_size=2)
+
+        # Assert
+        assert ids == ["alice-0", "alice-1", "alice-2", "alice-3"]
+        assert [len(page.experiments) for page in pages] == [2, 2, 0]
+        assert all(page.success for page in pages)
+        assert pages[-1].next_cursor == ""
+
+    def test_stream_resumes_from_cursor(self):
+        """Test that a restore resumed from a page's cursor returns exactly the remaining experiments."""
+        # Arrange
+        for i in range(5):
+            self._sync(f"exp-{i}")
+        first_pages, _ = self._stream_ids(page_size=2)
+
+        # Act
+        pages, ids = self._stream_ids(page_size=2, cursor=first_pages[0].next_cursor)
+
+        # Assert
+        assert first_pages[0].next_cursor == "exp-1"
+        assert ids == ["exp-2", "exp-3", "exp-4"]
+        assert pages[-1].next_cursor == ""
@@ -0,0 +1,246 @@
+"""
+Unit tests for notification delivery.
+"""
+
+import os
+import sys
+import time
+import smtplib
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the path so we can import the agent_core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the modules to test
+from notification_delivery import (
+    DeliveryChannel,
+    DeliveryError,
+    NotificationDispatcher,
+    WebhookChannel,
+    EmailChannel,
+    LocalWebhookSink
+)
+from autonomy_framework import (
+    NotificationSystem,
+    NotificationPreference,
+    NotificationChannel,
+    NotificationType,
+    NotificationPriority
+)
+
+
+class SlowChannel(DeliveryChannel):
+    """Channel that blocks for a while and tracks how many deliveries overlap."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def deliver(self, payload):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+
+
+class FlakyChannel(DeliveryChannel):
+    """Channel that fails the first delivery of each payload in fail_ids."""
+
+    def __init__(self, fail_ids):
+        self.fail_ids = set(fail_ids)
+        self.delivered = []
+
+    def deliver(self, payload):
+        if payload["id"] in self.fail_ids:
+            self.fail_ids.discard(payload["id"])
+            raise DeliveryError("Temporarily unavailable")
+        self.delivered.append(payload["id"])
+
+
+class TestNotificationDispatcher:
+    """Test the Notification Dispatcher."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        self.sink = LocalWebhookSink().start()
+
+    def teardown_method(self):
+        """Clean up the test environment."""
+        self.sink.stop()
+
+    def test_webhook_delivery_retries(self):
+        """Test that failed webhook deliveries are retried until they succeed."""
+        # Arrange
+        dispatcher = NotificationDispatcher({"webhook": WebhookChannel(self.sink.url)}, base_delay=0.01)
+        self.sink.fail_next(2)
+
+        # Act
+        delivered = dispatcher.dispatch("webhook", {"id": "n1", "title": "Hello", "message": "World"}).result(5)
+        dispatcher.close()
+
+        # Assert
+        assert delivered is True
+        assert self.sink.received == [{"id": "n1", "title": "Hello", "message": "World"}]
+        assert len(dispatcher.dead_letters) == 0
+
+    def test_dead_letter_after_max_attempts(self):
+        """Test that a delivery is dead-lettered once every attempt has failed."""
+        # Arrange
+        dispatcher = NotificationDispatcher(
+            {"webhook": WebhookChannel(self.sink.url)}, max_attempts=2, base_delay=0.01
+        )
+        self.sink.fail_next(2)
+
+        # Act
+        delivered = dispatcher.dispatch("webhook", {"id": "n1", "title": "Hello", "message": "World"}).result(5)
+        dispatcher.close()
+
+        # Assert
+        assert delivered is False
+        assert self.sink.received == []
+        assert dispatcher.dead_letters[0]["channel"] == "webhook"
+        assert dispatcher.dead_letters[0]["attempts"] == 2
+
+    def test_client_errors_are_not_retried(self):
+        """Test that HTTP 4xx responses are dead-lettered at once, except 429 which is retried."""
+        # Arrange
+        dispatcher = NotificationDispatcher({"webhook": WebhookChannel(self.sink.url)}, base_delay=0.01)
+
+        # Act
+        self.sink.fail_next(1, 400)
+        rejected = dispatcher.dispatch("webhook", {"id": "n1", "title": "Hello", "message": "World"}).result(5)
+        self.sink.fail_next(1, 429)
+        throttled = dispatcher.dispatch("webhook", {"id": "n2", "title": "Hello", "message": "World"}).result(5)
+        dispatcher.close()
+
+        # Assert
+        assert rejected is False
+        assert dispatcher.dead_letters[0]["attempts"] == 1
+        assert throttled is True
+        assert [payload["id"] for payload in self.sink.received] == ["n2"]
+
+    def test_retries_do_not_hold_a_worker(self):
+        """Test that a delivery waiting to be retried doesn't block the channel's other deliveries."""
+        # Arrange
+        channel = FlakyChannel(["n1"])
+        dispatcher = NotificationDispatcher({"flaky": channel}, max_concurrency=1, base_delay=0.5)
+
+        # Act
+        with patch('notification_delivery.random.uniform', side_effect=lambda low, high: high):
+            retried = dispatcher.dispatch("flaky", {"id": "n1"})
+            other = dispatcher.dispatch("flaky", {"id": "n2"})
+            other_delivered = other.result(0.25)
+            waiting = not retried.done()
+            retried_delivered = retried.result(5)
+        dispatcher.close()
+
+        # Assert
+        assert other_delivered is True
+        assert waiting is True
+        assert retried_delivered is True
+        assert channel.delivered == ["n2", "n1"]
+
+    def test_close_without_waiting_dead_letters_pending_retries(self):
+        """Test that closing without waiting resolves deliveries that were waiting for a retry."""
+        # Arrange
+        dispatcher = NotificationDispatcher({"flaky": FlakyChannel(["n1"])}, base_delay=60, max_delay=60)
+        with patch('notification_delivery.random.uniform', side_effect=lambda low, high: high):
+            future = dispatcher.dispatch("flaky", {"id": "n1"})
+            while not dispatcher._retry_heap:
+                time.sleep(0.01)
+
+        # Act
+        dispatcher.close(wait=False)
+
+        # Assert
+        assert future.result(1) is False
+        assert dispatcher.dead_letters[0]["attempts"] == 1
+
+    def test_channels_must_implement_deliver(self):
+        """Test that the base channel can't be used without a deliver method."""
+        # Act & Assert
+        with pytest.raises(TypeError):
+            DeliveryChannel()
+
+    def test_bounded_concurrency(self):
+        """Test that deliveries on a channel run in parallel, up to the concurrency limit."""
+        # Arrange
+        channel = SlowChannel(0.05)
+        dispatcher = NotificationDispatcher({"slow": channel}, max_concurrency=3)
+
+        # Act
+        results = [dispatcher.dispatch("slow", {"id": str(i)}) for i in range(9)]
+        for future in results:
+            future.result(5)
+        dispatcher.close()
+
+        # Assert
+        assert channel.peak == 3
+
+    def test_notification_system_fans_out(self):
+        """Test that the notification system delivers through configured channels."""
+        # Arrange
+        dispatcher = NotificationDispatcher(
+            {"webhook": WebhookChannel(self.sink.url), "email": SlowChannel(0)}
+        )
+        notification_system = NotificationSystem(dispatcher=dispatcher)
+        notification_system.set_user_preferences(NotificationPreference(
+            "test_user",
+            channels={NotificationPriority.CRITICAL: [NotificationChannel.DASHBOARD, NotificationChannel.WEBHOOK]}
+        ))
+
+        # Act
+        notifications = [
+            notification_system.create_notification(
+                f"Approval {i}", "Approval needed", NotificationType.WARNING,
+                NotificationPriority.CRITICAL, "test_user"
+            )
+            for i in range(5)
+        ]
+        dispatcher.close()
+
+        # Assert
+        assert sorted(payload["title"] for payload in self.sink.received) == [f"Approval {i}" for i in range(5)]
+        for notification in notifications:
+            assert notification.delivery_status == {NotificationChannel.WEBHOOK: "delivered"}
+
+
+class TestEmailChannel:
+    """Test the email delivery channel."""
+
+    def setup_method(self):
+        """Set up the test environment."""
+        self.channel = EmailChannel("smtp.example.com", use_tls=False)
+        self.payload = {"id": "n1", "title": "Hello", "message": "World", "recipient": "user@example.com"}
+
+    def test_broken_connections_are_evicted(self):
+        """Test that a session that failed to send is closed and replaced on the next delivery."""
+        # Arrange
+        broken, healthy = MagicMock(), MagicMock()
+        broken.send_message.side_effect = smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+
+        # Act
+        with patch('notification_delivery.smtplib.SMTP', side_effect=[broken, healthy]):
+            with pytest.raises(DeliveryError):
+                self.channel.deliver(self.payload)
+            self.channel.deliver(self.payload)
+
+        # Assert
+        broken.close.assert_called_once()
+        healthy.send_message.assert_called_once()
+        assert self.channel._connections == [healthy]
+
+    def test_missing_recipient_is_not_retryable(self):
+        """Test that a notification without an email address fails permanently."""
+        # Act
+        with pytest.raises(DeliveryError) as error:
+            self.channel.deliver({**self.payload, "recipient": None})
+
+        # Assert
+        assert error.value.retryable is False
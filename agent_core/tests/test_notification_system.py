@@ -332,6 +332,76 @@ class TestNotificationSystem:
         # Assert
         assert result is False
     
+    def test_get_notifications_unread_after_mark_as_read(self):
+        """Test that marking as read removes a notification from unread results."""
+        # Arrange
+        notification1 = self.notification_system.create_notification(
+            title="Notification 1",
+            message="Message 1",
+            notification_type=NotificationType.INFO,
+            priority=NotificationPriority.LOW,
+            user_id="user1"
+        )
+        self.notification_system.create_notification(
+            title="Notification 2",
+            message="Message 2",
+            notification_type=NotificationType.INFO,
+            priority=NotificationPriority.LOW,
+            user_id="user1"
+        )
+        
+        # Act
+        self.notification_system.mark_as_read(notification1.id)
+        unread = self.notification_system.get_notifications(user_id="user1")
+        everything = self.notification_system.get_notifications(user_id="user1", include_read=True)
+        
+        # Assert
+        assert [n.title for n in unread] == ["Notification 2"]
+        assert [n.title for n in everything] == ["Notification 1", "Notification 2"]
+    
+    def test_size_cap_evicts_oldest(self):
+        """Test that the oldest notifications are evicted beyond the size cap."""
+        # Arrange
+        notification_system = NotificationSystem(max_notifications=2)
+        
+        # Act
+        for i in range(3):
+            notification_system.create_notification(
+                title=f"Notification {i}",
+                message="Message",
+                notification_type=NotificationType.INFO,
+                priority=NotificationPriority.LOW,
+                user_id="user1"
+            )
+        
+        # Assert
+        titles = [n.title for n in notification_system.get_notifications(user_id="user1")]
+        assert titles == ["Notification 1", "Notification 2"]
+    
+    def test_retention_evicts_expired(self):
+        """Test that notifications older than the retention period are evicted."""
+        # Arrange
+        notification_system = NotificationSystem(retention_seconds=60)
+        old = notification_system.create_notification(
+            title="Old",
+            message="Message",
+            notification_type=NotificationType.INFO,
+            priority=NotificationPriority.LOW
+        )
+        old.created_time -= 120
+        
+        # Act
+        notification_system.create_notification(
+            title="New",
+            message="Message",
+            notification_type=NotificationType.INFO,
+            priority=NotificationPriority.LOW
+        )
+        
+        # Assert
+        assert old not in notification_system.notifications
+        assert notification_system.mark_as_read(old.id) is False
+    
     def test_delete_notification(self):
         """Test deleting a notification."""
         # Arrange
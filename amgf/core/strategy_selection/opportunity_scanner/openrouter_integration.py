@@ -1,6 +1,12 @@
 import os
 import requests
 
+try:
+    from task_modules.llm_cache import cached_generate
+except ImportError:
+    # The shared LLM response cache isn't part of standalone service images
+    cached_generate = None
+
 class OpenRouterAPI:
     def __init__(self):
         self.api_key = os.getenv('OPENROUTER_API_KEY')
@@ -8,7 +14,8 @@ class OpenRouterAPI:
         if not self.api_key:
             raise ValueError("OpenRouter API key not found in environment variables")
 
-    def generate_text(self, prompt, model='gpt-4o-mini', max_tokens=500):
+    def generate_text(self, prompt, model='gpt-4o-mini', max_tokens=500, use_cache=True):
+        temperature = 0.7
         headers = {
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
@@ -17,12 +24,18 @@ class OpenRouterAPI:
             'model': model,
             'messages': [{'role': 'user', 'content': prompt}],
             'max_tokens': max_tokens,
-            'temperature': 0.7
+            'temperature': temperature
         }
-        response = requests.post(self.api_url, json=payload, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        return data['choices'][0]['message']['content']
+
+        def generate():
+            response = requests.post(self.api_url, json=payload, headers=headers)
+            response.raise_for_status()
+            data = response.json()
+            return data['choices'][0]['message']['content']
+
+        if cached_generate is None:
+            return generate()
+        return cached_generate(model, prompt, temperature, max_tokens, generate, use_cache=use_cache)
 
 # Example usage:
 # openrouter = OpenRouterAPI()
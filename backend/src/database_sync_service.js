@@ -55,6 +55,70 @@ async function restoreExperiments(call, callback) {
   }
 }
 
+/**
+ * Stream experiments from the database to the Agent Core page by page
+ * @param {Object} call - gRPC server-streaming call object
+ */
+async function streamRestoreExperiments(call) {
+  try {
+    logger.info('Received StreamRestoreExperiments request');
+
+    // Extract filters from request
+    const userId = call.request.user_id || null;
+    const experimentType = call.request.experiment_type || null;
+    const experimentStates = (call.request.experiment_states || [])
+      .filter(state => state && state !== 'STATE_UNSPECIFIED');
+    const pageSize = call.request.page_size || 100;
+    let cursor = call.request.cursor || '';
+
+    // Build filters
+    const filters = {};
+    if (userId) {
+      filters.userId = userId;
+    }
+    if (experimentType && experimentType !== 'TYPE_UNSPECIFIED') {
+      filters.type = experimentType;
+    }
+    if (experimentStates.length > 0) {
+      filters.state = { $in: experimentStates };
+    }
+
+    let restored = 0;
+    while (!call.cancelled) {
+      const page = await experimentService.listExperimentsAfter(filters, cursor, pageSize);
+      const experiments = page.map(experiment => experiment.toGrpcFormat());
+      restored += experiments.length;
+
+      // A short page means there is nothing left after it
+      const lastPage = page.length < pageSize;
+      cursor = lastPage ? '' : page[page.length - 1]._id;
+
+      call.write({
+        success: true,
+        message: `Restored ${experiments.length} experiments`,
+        experiments: experiments,
+        next_cursor: cursor
+      });
+
+      if (lastPage) {
+        break;
+      }
+    }
+
+    logger.info(`Streamed ${restored} experiments`);
+    call.end();
+  } catch (error) {
+    logger.error(`Error in StreamRestoreExperiments: ${error.message}`);
+    call.write({
+      success: false,
+      message: `Error restoring experiments: ${error.message}`,
+      experiments: [],
+      next_cursor: call.request.cursor || ''
+    });
+    call.end();
+  }
+}
+
 /**
  * Sync experiment status from Agent Core to the database
  * @param {Object} call - gRPC call object
@@ -176,6 +240,7 @@ async function syncMetrics(call, callback) {
 
 module.exports = {
   restoreExperiments,
+  streamRestoreExperiments,
   syncExperimentStatus,
   syncLogEntry,
   syncMetrics
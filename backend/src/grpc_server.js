@@ -40,6 +40,7 @@ const server = new grpc.Server();
 // Add the DatabaseSyncService to the server
 server.addService(dbSyncProto.DatabaseSyncService.service, {
   restoreExperiments: databaseSyncService.restoreExperiments,
+  streamRestoreExperiments: databaseSyncService.streamRestoreExperiments,
   syncExperimentStatus: databaseSyncService.syncExperimentStatus,
   syncLogEntry: databaseSyncService.syncLogEntry,
   syncMetrics: databaseSyncService.syncMetrics
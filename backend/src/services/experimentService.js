@@ -147,6 +147,30 @@ class ExperimentService {
     }
   }
 
+  /**
+   * List experiments in ID order, starting after a cursor
+   * @param {Object} filters - Filter criteria
+   * @param {String} cursor - ID of the last experiment already returned (empty to start)
+   * @param {Number} limit - Maximum number of experiments to return
+   * @returns {Promise<Array>} Experiment documents
+   */
+  async listExperimentsAfter(filters = {}, cursor = '', limit = 100) {
+    try {
+      const query = { ...filters };
+      if (cursor) {
+        query._id = { $gt: cursor };
+      }
+
+      // _id is always indexed, so keyset pagination stays cheap on deep pages
+      return await Experiment.find(query)
+        .sort({ _id: 1 })
+        .limit(limit);
+    } catch (error) {
+      logger.error(`Error listing experiments after cursor from database: ${error.message}`);
+      throw error;
+    }
+  }
+
   /**
    * Add a log entry for an experiment
    * @param {Object} logEntry - Log entry data
@@ -4,6 +4,10 @@ import json
 from dotenv import load_dotenv
 from abacusai import ApiClient
 
+# Add the parent directory to the path so we can import the shared LLM cache
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from task_modules.llm_cache import cached_text_generation
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -16,12 +20,13 @@ if not api_key:
 # Initialize AbacusAI client
 client = ApiClient(api_key)
 
-def research_profitable_niches(num_niches=10):
+def research_profitable_niches(num_niches=10, use_cache=True):
     """
     Research potentially profitable ebook niches with high demand but low competition
     
     Args:
         num_niches (int): Number of niche ideas to generate
+        use_cache (bool): Whether to reuse a cached response for the same request
         
     Returns:
         list: List of niche ideas with analysis
@@ -56,26 +61,28 @@ def research_profitable_niches(num_niches=10):
     """
     
     try:
-        response = client.text_generation(
+        # Parse the JSON response (only valid responses are cached)
+        niches = cached_text_generation(
+            client,
             prompt=prompt,
             max_tokens=3000,
             temperature=0.7,
-            model="claude-3-opus-20240229"
+            model="claude-3-opus-20240229",
+            parse=json.loads,
+            use_cache=use_cache
         )
-        
-        # Parse the JSON response
-        niches = json.loads(response.generations[0].text)
         return niches
     except Exception as e:
         print(f"Error researching profitable niches: {e}")
         return None
 
-def analyze_competition(niche):
+def analyze_competition(niche, use_cache=True):
     """
     Analyze competition for a specific niche
     
     Args:
         niche (str): The niche to analyze
+        use_cache (bool): Whether to reuse a cached response for the same request
         
     Returns:
         dict: Competition analysis
@@ -104,15 +111,16 @@ def analyze_competition(niche):
     """
     
     try:
-        response = client.text_generation(
+        # Parse the JSON response (only valid responses are cached)
+        analysis = cached_text_generation(
+            client,
             prompt=prompt,
             max_tokens=2000,
             temperature=0.7,
-            model="claude-3-opus-20240229"
+            model="claude-3-opus-20240229",
+            parse=json.loads,
+            use_cache=use_cache
         )
-        
-        # Parse the JSON response
-        analysis = json.loads(response.generations[0].text)
         return analysis
     except Exception as e:
         print(f"Error analyzing competition: {e}")
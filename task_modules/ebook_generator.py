@@ -1,8 +1,11 @@
 import os
 import json
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from abacusai import ApiClient
 from dotenv import load_dotenv
+from .llm_cache import cached_text_generation
 
 # Load environment variables (if running as a standalone script)
 if __name__ == "__main__":
@@ -11,15 +14,20 @@ if __name__ == "__main__":
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Number of chapters generated at once unless EBOOK_CHAPTER_CONCURRENCY says otherwise
+DEFAULT_CHAPTER_CONCURRENCY = 1
+
 class EbookGenerator:
-    def __init__(self, api_key):
+    def __init__(self, api_key, use_cache=True):
         """
         Initializes the EbookGenerator with the AbacusAI API key.
 
         Args:
             api_key (str): The AbacusAI API key.
+            use_cache (bool): Whether to reuse cached responses for identical requests.
         """
         self.api_key = api_key
+        self.use_cache = use_cache
         self.client = ApiClient(self.api_key)
         logging.info("EbookGenerator initialized")
 
@@ -62,15 +70,16 @@ class EbookGenerator:
         """
 
         try:
-            response = self.client.text_generation(
+            # Parse the JSON response (only valid responses are cached)
+            outline = cached_text_generation(
+                self.client,
                 prompt=prompt,
                 max_tokens=2000,
                 temperature=0.7,
-                model="claude-3-opus-20240229"
+                model="claude-3-opus-20240229",
+                parse=json.loads,
+                use_cache=self.use_cache
             )
-
-            # Parse the JSON response
-            outline = json.loads(response.generations[0].text)
             logging.info(f"Generated book outline for topic: {topic}")
             return outline
         except Exception as e:
@@ -87,7 +96,10 @@ class EbookGenerator:
             audience (str): The target audience for the book.
 
         Returns:
-            str: Generated chapter content, or None on error.
+            str: Generated chapter content.
+
+        Raises:
+            Exception: Whatever the API client raised, so callers can report the real error.
         """
         prompt = f"""
         Write chapter {chapter_info['number']} titled "{chapter_info['title']}" for a book called "{book_title}" targeted at {audience}.
@@ -102,51 +114,174 @@ class EbookGenerator:
         Write approximately 2000-3000 words of high-quality content that would be valuable enough for someone to pay for.
         """
 
-        try:
-            response = self.client.text_generation(
-                prompt=prompt,
-                max_tokens=4000,
-                temperature=0.7,
-                model="claude-3-opus-20240229"
-            )
+        content = cached_text_generation(
+            self.client,
+            prompt=prompt,
+            max_tokens=4000,
+            temperature=0.7,
+            model="claude-3-opus-20240229",
+            use_cache=self.use_cache
+        )
 
-            logging.info(f"Generated chapter content: {chapter_info['title']}")
-            return response.generations[0].text
-        except Exception as e:
-            logging.error(f"Error generating chapter content: {e}")
-            return None
+        logging.info(f"Generated chapter content: {chapter_info['title']}")
+        return content
 
-    def generate_full_book(self, topic, audience, output_dir, num_chapters=10):
+    def generate_chapter_with_retry(self, book_title, chapter_info, audience, max_retries=2, retry_delay=2.0):
         """
-        Generates a complete book including outline and all chapters.
+        Generates content for a chapter, retrying failed attempts with exponential backoff.
+
+        Args:
+            book_title (str): The title of the book.
+            chapter_info (dict): Chapter information including number, title, and description.
+            audience (str): The target audience for the book.
+            max_retries (int): Number of times a failed attempt is retried.
+            retry_delay (float): Seconds to wait before the first retry (doubled for each further retry).
+
+        Returns:
+            dict: Chapter result with number, title, content (None if every attempt failed),
+                attempts, and error (None on success).
+        """
+        logging.info(f"Generating Chapter {chapter_info['number']}: {chapter_info['title']}...")
+        content = None
+        error = None
+        attempts = 0
+
+        while attempts <= max_retries:
+            attempts += 1
+            try:
+                content = self.generate_chapter_content(book_title, chapter_info, audience)
+                error = None if content else "No content returned"
+            except Exception as e:
+                content, error = None, str(e)
+
+            if content:
+                break
+            if attempts <= max_retries:
+                delay = retry_delay * 2 ** (attempts - 1)
+                logging.warning(f"Chapter {chapter_info['number']} attempt {attempts} failed ({error}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+        return {
+            "number": chapter_info['number'],
+            "title": chapter_info['title'],
+            "content": content,
+            "attempts": attempts,
+            "error": error
+        }
+
+    def generate_chapters(self, book_title, chapters, audience, max_concurrency=1, max_retries=2, retry_delay=2.0):
+        """
+        Generates chapters with up to max_concurrency requests in flight.
+
+        Chapters are independent once the outline exists, so they are generated in parallel,
+        but results are yielded in outline order: each one as soon as it and every chapter
+        before it are done.
+
+        Args:
+            book_title (str): The title of the book.
+            chapters (list): Chapter information from the outline.
+            audience (str): The target audience for the book.
+            max_concurrency (int): Maximum number of chapters generated at once.
+            max_retries (int): Number of times a failed chapter is retried.
+            retry_delay (float): Seconds to wait before a chapter's first retry.
+
+        Yields:
+            dict: Chapter results, as returned by generate_chapter_with_retry.
+        """
+        if max_concurrency <= 1:
+            for chapter in chapters:
+                yield self.generate_chapter_with_retry(book_title, chapter, audience, max_retries, retry_delay)
+            return
+
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="ebook-chapter") as executor:
+            futures = [
+                executor.submit(self.generate_chapter_with_retry, book_title, chapter, audience, max_retries, retry_delay)
+                for chapter in chapters
+            ]
+            try:
+                for future in futures:
+                    yield future.result()
+            finally:
+                # If the caller stops early, don't start the chapters still waiting for a worker
+                for future in futures:
+                    future.cancel()
+
+    def stream_book(self, topic, audience, num_chapters=10, max_concurrency=None, max_retries=2):
+        """
+        Generates a book as a stream of results, without writing anything to disk.
 
         Args:
             topic (str): The main topic of the book.
             audience (str): The target audience for the book.
-            output_dir (str): The directory to save the generated files.
             num_chapters (int): Number of chapters to generate.
+            max_concurrency (int): Maximum number of chapters generated at once
+                (defaults to EBOOK_CHAPTER_CONCURRENCY, or 1).
+            max_retries (int): Number of times a failed chapter is retried.
+
+        Yields:
+            dict: First {"type": "outline", "outline": outline}, where outline is None if it
+                couldn't be generated (and nothing else follows). Then one
+                {"type": "chapter", ...} per chapter in outline order, with the fields
+                returned by generate_chapter_with_retry.
         """
         logging.info(f"Generating book outline for '{topic}' targeted at {audience}...")
         outline = self.generate_book_outline(topic, audience, num_chapters)
 
         if not outline:
-            logging.error("Failed to generate book outline. Exiting.")
+            logging.error("Failed to generate book outline.")
+            yield {"type": "outline", "outline": None}
             return
 
         logging.info(f"Book outline generated: {outline['title']}")
-        self.save_outline(outline, output_dir)
+        yield {"type": "outline", "outline": outline}
 
-        for chapter in outline['chapters']:
-            logging.info(f"Generating Chapter {chapter['number']}: {chapter['title']}...")
-            content = self.generate_chapter_content(outline['title'], chapter, audience)
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv('EBOOK_CHAPTER_CONCURRENCY', DEFAULT_CHAPTER_CONCURRENCY))
+        logging.info(f"Generating {len(outline['chapters'])} chapters, up to {max_concurrency} at a time...")
 
-            if content:
-                self.save_chapter(content, output_dir, chapter['number'])
-                logging.info(f"Chapter {chapter['number']} completed and saved.")
+        for result in self.generate_chapters(outline['title'], outline['chapters'], audience, max_concurrency, max_retries):
+            if result['content']:
+                logging.info(f"Chapter {result['number']} completed.")
+            else:
+                logging.error(f"Failed to generate content for Chapter {result['number']} after {result['attempts']} attempts: {result['error']}")
+            yield dict(result, type="chapter")
+
+    def generate_full_book(self, topic, audience, output_dir, num_chapters=10, max_concurrency=None, max_retries=2):
+        """
+        Generates a complete book including outline and all chapters, and saves it to output_dir.
+
+        Args:
+            topic (str): The main topic of the book.
+            audience (str): The target audience for the book.
+            output_dir (str): The directory to save the generated files.
+            num_chapters (int): Number of chapters to generate.
+            max_concurrency (int): Maximum number of chapters generated at once
+                (defaults to EBOOK_CHAPTER_CONCURRENCY, or 1).
+            max_retries (int): Number of times a failed chapter is retried.
+
+        Returns:
+            dict: Generation report with title, chapters_completed (chapter numbers) and
+                chapters_failed (number, title, attempts and error of each), or None if the
+                outline couldn't be generated.
+        """
+        report = None
+        for event in self.stream_book(topic, audience, num_chapters, max_concurrency, max_retries):
+            if event['type'] == 'outline':
+                if not event['outline']:
+                    return None
+                self.save_outline(event['outline'], output_dir)
+                report = {"title": event['outline']['title'], "chapters_completed": [], "chapters_failed": []}
+            elif event['content']:
+                self.save_chapter(event['content'], output_dir, event['number'])
+                report['chapters_completed'].append(event['number'])
             else:
-                logging.error(f"Failed to generate content for Chapter {chapter['number']}.")
+                report['chapters_failed'].append({key: event[key] for key in ('number', 'title', 'attempts', 'error')})
 
+        if report['chapters_failed']:
+            failed_numbers = ", ".join(str(chapter['number']) for chapter in report['chapters_failed'])
+            logging.warning(f"Book generated with {len(report['chapters_failed'])} failed chapters: {failed_numbers}")
         logging.info(f"Book generation complete. Files saved to {output_dir}")
+        return report
 
     def save_outline(self, outline, output_dir):
         """Saves the book outline to a JSON and markdown file."""
@@ -1,7 +1,5 @@
 import os
-import json
 import logging
-import tempfile
 from dotenv import load_dotenv
 from .ebook_generator import EbookGenerator
 
@@ -25,6 +23,7 @@ class EbookGeneratorTask:
         """
         self.api_key = None
         self.generator = None
+        self.progress = None  # Percentage of chapters generated, once the outline is known
         logger.info("EbookGeneratorTask initialized")
     
     def execute(self, parameters):
@@ -37,6 +36,8 @@ class EbookGeneratorTask:
                 - topic: The main topic of the book
                 - audience: The target audience for the book
                 - num_chapters: (Optional) Number of chapters to generate
+                - output_dir: (Optional) Directory to save the outline and chapters to
+                - use_cache: (Optional) Set to false to bypass the shared LLM response cache
         
         Returns:
             dict: A dictionary containing the task result with the following fields:
@@ -72,6 +73,7 @@ class EbookGeneratorTask:
             topic = params['topic']
             audience = params['audience']
             num_chapters = int(params.get('num_chapters', 5))  # Default to 5 chapters
+            use_cache = str(params.get('use_cache', True)).lower() != 'false'
             
             # Get API key from environment
             self.api_key = os.getenv('ABACUSAI_API_KEY')
@@ -79,50 +81,52 @@ class EbookGeneratorTask:
                 return {"status": "failed", "message": "ABACUSAI_API_KEY not found in environment variables"}
             
             # Initialize generator
-            self.generator = EbookGenerator(self.api_key)
+            self.generator = EbookGenerator(self.api_key, use_cache=use_cache)
             
-            # Create temporary directory for output
-            with tempfile.TemporaryDirectory() as temp_dir:
-                logger.info(f"Generating ebook in temporary directory: {temp_dir}")
-                
-                # Generate the book
-                self.generator.generate_full_book(topic, audience, temp_dir, num_chapters)
-                
-                # Read the outline
-                outline_path = os.path.join(temp_dir, 'outline.json')
-                if not os.path.exists(outline_path):
-                    return {"status": "failed", "message": "Failed to generate book outline"}
-                
-                with open(outline_path, 'r') as f:
-                    outline = json.load(f)
+            output_dir = params.get('output_dir')
+            
+            # Chapters are summarized as they stream in, so nothing is read back from disk
+            outline = None
+            chapters = []
+            chapters_failed = []
+            for event in self.generator.stream_book(topic, audience, num_chapters):
+                if event['type'] == 'outline':
+                    outline = event['outline']
+                    if not outline:
+                        return {"status": "failed", "message": "Failed to generate book outline"}
+                    if output_dir:
+                        self.generator.save_outline(outline, output_dir)
+                    self.progress = 0.0
+                    continue
                 
-                # Get chapter information
-                chapters = []
-                chapters_dir = os.path.join(temp_dir, 'chapters')
-                if os.path.exists(chapters_dir):
-                    for chapter in outline['chapters']:
-                        chapter_file = os.path.join(chapters_dir, f"chapter_{chapter['number']:02d}.md")
-                        if os.path.exists(chapter_file):
-                            with open(chapter_file, 'r') as f:
-                                chapter_content = f.read()
-                            chapters.append({
-                                "number": chapter['number'],
-                                "title": chapter['title'],
-                                "content_length": len(chapter_content),
-                                "content_preview": chapter_content[:200] + "..." if len(chapter_content) > 200 else chapter_content
-                            })
+                chapter_content = event['content']
+                if chapter_content:
+                    if output_dir:
+                        self.generator.save_chapter(chapter_content, output_dir, event['number'])
+                    chapters.append({
+                        "number": event['number'],
+                        "title": event['title'],
+                        "content_length": len(chapter_content),
+                        "content_preview": chapter_content[:200] + "..." if len(chapter_content) > 200 else chapter_content
+                    })
+                else:
+                    chapters_failed.append({"number": event['number'], "title": event['title'], "error": event['error']})
                 
-                # Return success result
-                return {
-                    "status": "completed",
-                    "result": {
-                        "title": outline['title'],
-                        "description": outline['description'],
-                        "num_chapters": len(outline['chapters']),
-                        "chapters_generated": len(chapters),
-                        "chapters": chapters
-                    }
+                self.progress = 100.0 * (len(chapters) + len(chapters_failed)) / len(outline['chapters'])
+                logger.info(f"Ebook generation progress: {self.progress:.0f}%")
+            
+            # Return success result
+            return {
+                "status": "completed",
+                "result": {
+                    "title": outline['title'],
+                    "description": outline['description'],
+                    "num_chapters": len(outline['chapters']),
+                    "chapters_generated": len(chapters),
+                    "chapters": chapters,
+                    "chapters_failed": chapters_failed
                 }
+            }
                 
         except Exception as e:
             logger.error(f"Error executing ebook generation task: {e}", exc_info=True)
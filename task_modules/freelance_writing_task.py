@@ -4,6 +4,7 @@ import logging
 import tempfile
 from dotenv import load_dotenv
 from abacusai import ApiClient
+from .llm_cache import cached_text_generation
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +26,7 @@ class FreelanceWritingTask:
         """
         self.api_key = None
         self.client = None
+        self.use_cache = True
         logger.info("FreelanceWritingTask initialized")
     
     def execute(self, parameters):
@@ -40,6 +42,7 @@ class FreelanceWritingTask:
                 - word_count: (Optional) Target word count
                 - tone: (Optional) Desired tone of the content
                 - keywords: (Optional) List of keywords to include
+                - use_cache: (Optional) Set to false to bypass the shared LLM response cache
         
         Returns:
             dict: A dictionary containing the task result with the following fields:
@@ -82,6 +85,7 @@ class FreelanceWritingTask:
             word_count = int(params.get('word_count', 1000))  # Default to 1000 words
             tone = params.get('tone', 'professional')
             keywords = params.get('keywords', [])
+            self.use_cache = str(params.get('use_cache', True)).lower() != 'false'
             
             # Get API key from environment
             self.api_key = os.getenv('ABACUSAI_API_KEY')
@@ -180,15 +184,16 @@ class FreelanceWritingTask:
             }}
             """
             
-            response = self.client.text_generation(
+            # Parse the JSON response (only valid responses are cached)
+            outline = cached_text_generation(
+                self.client,
                 prompt=prompt,
                 max_tokens=2000,
                 temperature=0.7,
-                model="claude-3-opus-20240229"
+                model="claude-3-opus-20240229",
+                parse=json.loads,
+                use_cache=self.use_cache
             )
-            
-            # Parse the JSON response
-            outline = json.loads(response.generations[0].text)
             logger.info(f"Generated content outline for {project_type} on topic: {topic}")
             return outline
             
@@ -226,14 +231,15 @@ class FreelanceWritingTask:
             Please provide the complete, ready-to-publish content.
             """
             
-            response = self.client.text_generation(
+            content = cached_text_generation(
+                self.client,
                 prompt=prompt,
                 max_tokens=4000,
                 temperature=0.7,
-                model="claude-3-opus-20240229"
+                model="claude-3-opus-20240229",
+                use_cache=self.use_cache
             )
             
-            content = response.generations[0].text
             logger.info(f"Generated full content for {project_type} on topic: {topic}")
             return content
             
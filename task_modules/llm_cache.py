@@ -0,0 +1,326 @@
+"""
+Shared LLM response cache for the task modules.
+
+Responses are stored on disk, one JSON file per response, under a key that hashes the
+model, prompt, temperature and max_tokens of the request, so re-running a task with the
+same inputs (or retrying a failed step) doesn't pay for the same generation twice. The
+cache is bounded by total size, evicting least recently used responses first, and entries
+older than the TTL are treated as missing.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Default size limit (in megabytes) and time-to-live (in seconds) of the shared cache
+DEFAULT_MAX_MB = 512
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+class LLMCache:
+    """
+    Disk-backed, content-addressed cache of generated text.
+
+    Recency is tracked in memory and mirrored in the files' modification times, so the
+    LRU order survives restarts.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, ttl=DEFAULT_TTL_SECONDS):
+        """
+        Initialize the cache, indexing any responses already stored in cache_dir.
+
+        Args:
+            cache_dir (str): Directory the responses are stored in.
+            max_bytes (int): Maximum total size of the stored responses.
+            ttl (float): Seconds a response stays valid (None for no expiry).
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # Key to file size, least recently used first
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(model, prompt, temperature, max_tokens):
+        """
+        Get the cache key of a request.
+
+        Args:
+            model (str): The model name.
+            prompt (str): The prompt.
+            temperature (float): The sampling temperature.
+            max_tokens (int): The maximum number of tokens to generate.
+
+        Returns:
+            str: Hex SHA-256 digest of the request.
+        """
+        request = json.dumps([model, prompt, temperature, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(request.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Get a cached response.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            str: The cached text, or None if it isn't cached or has expired.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Discarding unreadable LLM cache entry {key}: {e}")
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            if self.ttl is not None and time.time() - entry['created'] > self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self.hits += 1
+            return entry['text']
+
+    def set(self, key, text):
+        """
+        Store a response, evicting least recently used responses if the cache is full.
+
+        Args:
+            key (str): The cache key.
+            text (str): The generated text.
+
+        Raises:
+            OSError: If the response can't be written.
+        """
+        data = json.dumps({"created": time.time(), "text": text}, ensure_ascii=False).encode('utf-8')
+        path = self._path(key)
+
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written to a temporary file first so readers never see a partial entry
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except OSError:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                raise
+
+            self.total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self.total_bytes += len(data)
+
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+
+    def discard(self, key):
+        """
+        Remove a response from the cache.
+
+        Args:
+            key (str): The cache key.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """Remove every response from the cache."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def get_stats(self):
+        """
+        Get the cache's size and hit rate.
+
+        Returns:
+            dict: Number of entries, total bytes, hits and misses.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def _path(self, key):
+        """Get the file a response is stored in (sharded by the first two characters of its key)."""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _remove(self, key):
+        """Remove an entry and its file. Called with the lock held."""
+        self.total_bytes -= self._entries.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _load_index(self):
+        """Index the stored responses, least recently used first."""
+        found = []
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(shard_dir, name))
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, name[:-len('.json')], stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.total_bytes += size
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache():
+    """
+    Get the cache shared by all task modules, configured from environment variables.
+
+    Returns:
+        LLMCache: The shared cache, or None if LLM_CACHE_ENABLED is false or the cache
+            directory can't be used.
+    """
+    global _default_cache
+
+    if os.getenv('LLM_CACHE_ENABLED', 'true').lower() != 'true':
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            cache_dir = os.getenv('LLM_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'llm_cache')
+            max_bytes = int(float(os.getenv('LLM_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+            ttl = float(os.getenv('LLM_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS)) or None
+            try:
+                _default_cache = LLMCache(cache_dir, max_bytes, ttl)
+            except OSError as e:
+                logger.warning(f"LLM response cache disabled, can't use {cache_dir}: {e}")
+                return None
+            logger.info(f"LLM response cache at {cache_dir}")
+        return _default_cache
+
+def cached_generate(model, prompt, temperature, max_tokens, generate, parse=None, use_cache=True, cache=None):
+    """
+    Get a generated response from the cache, or generate and cache it.
+
+    A response is only cached once parse accepts it (parse can raise to reject it), and
+    empty or whitespace-only responses are never cached, so a failed response is
+    regenerated on the next call or retry instead of being served again. The cache is
+    best-effort: if it can't be read or written, the response is generated and returned
+    uncached rather than failing the call.
+
+    Args:
+        model (str): The model name.
+        prompt (str): The prompt.
+        temperature (float): The sampling temperature.
+        max_tokens (int): The maximum number of tokens to generate.
+        generate (callable): Function called without arguments that returns the generated text.
+        parse (callable): Optional function applied to the text, e.g. json.loads.
+        use_cache (bool): Whether to use the cache for this call.
+        cache (LLMCache): The cache to use (defaults to the shared cache).
+
+    Returns:
+        The generated text, or the result of parse if given.
+    """
+    cache = (cache or get_default_cache()) if use_cache else None
+    key = LLMCache.make_key(model, prompt, temperature, max_tokens) if cache else None
+
+    text = None
+    if cache:
+        try:
+            text = cache.get(key)
+            if text is not None and not text.strip():
+                # Stored before empty responses were rejected
+                cache.discard(key)
+                text = None
+        except OSError as e:
+            logger.warning(f"Couldn't read LLM cache entry {key}: {e}")
+            text = None
+
+    if text is None:
+        text = generate()
+        result = parse(text) if parse else text
+        if cache and isinstance(text, str) and text.strip():
+            try:
+                cache.set(key, text)
+            except OSError as e:
+                logger.warning(f"Couldn't store LLM cache entry {key}: {e}")
+        return result
+
+    if not parse:
+        return text
+    try:
+        return parse(text)
+    except Exception:
+        cache.discard(key)
+        raise
+
+def cached_text_generation(client, prompt, max_tokens, temperature, model, parse=None, use_cache=True):
+    """
+    Call client.text_generation through the shared cache.
+
+    Args:
+        client (abacusai.ApiClient): The AbacusAI client.
+        prompt (str): The prompt.
+        max_tokens (int): The maximum number of tokens to generate.
+        temperature (float): The sampling temperature.
+        model (str): The model name.
+        parse (callable): Optional function applied to the text, e.g. json.loads.
+        use_cache (bool): Whether to use the cache for this call.
+
+    Returns:
+        The generated text, or the result of parse if given.
+    """
+    def generate():
+        response = client.text_generation(
+            prompt=prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            model=model
+        )
+        return response.generations[0].text
+
+    return cached_generate(model, prompt, temperature, max_tokens, generate, parse, use_cache)
@@ -4,6 +4,7 @@ import logging
 import tempfile
 from dotenv import load_dotenv
 from abacusai import ApiClient
+from .llm_cache import cached_text_generation
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +26,7 @@ class NicheAffiliateWebsiteTask:
         """
         self.api_key = None
         self.client = None
+        self.use_cache = True
         logger.info("NicheAffiliateWebsiteTask initialized")
     
     def execute(self, parameters):
@@ -39,6 +41,7 @@ class NicheAffiliateWebsiteTask:
                 - affiliate_programs: (Optional) List of affiliate programs to use
                 - num_articles: (Optional) Number of initial articles to generate
                 - monetization_strategy: (Optional) Primary monetization strategy
+                - use_cache: (Optional) Set to false to bypass the shared LLM response cache
         
         Returns:
             dict: A dictionary containing the task result with the following fields:
@@ -78,6 +81,7 @@ class NicheAffiliateWebsiteTask:
             affiliate_programs = params.get('affiliate_programs', [])
             num_articles = int(params.get('num_articles', 5))  # Default to 5 articles
             monetization_strategy = params.get('monetization_strategy', 'affiliate links')
+            self.use_cache = str(params.get('use_cache', True)).lower() != 'false'
             
             # Get API key from environment
             self.api_key = os.getenv('ABACUSAI_API_KEY')
@@ -215,15 +219,16 @@ class NicheAffiliateWebsiteTask:
             }}
             """
             
-            response = self.client.text_generation(
+            # Parse the JSON response (only valid responses are cached)
+            website_plan = cached_text_generation(
+                self.client,
                 prompt=prompt,
                 max_tokens=3000,
                 temperature=0.7,
-                model="claude-3-opus-20240229"
+                model="claude-3-opus-20240229",
+                parse=json.loads,
+                use_cache=self.use_cache
             )
-            
-            # Parse the JSON response
-            website_plan = json.loads(response.generations[0].text)
             logger.info(f"Generated website plan for {niche} niche")
             return website_plan
             
@@ -256,15 +261,16 @@ class NicheAffiliateWebsiteTask:
             ]
             """
             
-            response = self.client.text_generation(
+            # Parse the JSON response (only valid responses are cached)
+            article_ideas = cached_text_generation(
+                self.client,
                 prompt=prompt,
                 max_tokens=2000,
                 temperature=0.7,
-                model="claude-3-opus-20240229"
+                model="claude-3-opus-20240229",
+                parse=json.loads,
+                use_cache=self.use_cache
             )
-            
-            # Parse the JSON response
-            article_ideas = json.loads(response.generations[0].text)
             logger.info(f"Generated {len(article_ideas)} article ideas for {niche} niche")
             return article_ideas
             
@@ -308,14 +314,15 @@ class NicheAffiliateWebsiteTask:
             Please provide the complete, ready-to-publish article.
             """
             
-            response = self.client.text_generation(
+            content = cached_text_generation(
+                self.client,
                 prompt=prompt,
                 max_tokens=4000,
                 temperature=0.7,
-                model="claude-3-opus-20240229"
+                model="claude-3-opus-20240229",
+                use_cache=self.use_cache
             )
             
-            content = response.generations[0].text
             logger.info(f"Generated sample article: {title}")
             return content
             
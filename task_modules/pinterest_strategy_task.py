@@ -4,6 +4,7 @@ import logging
 import tempfile
 from dotenv import load_dotenv
 from abacusai import ApiClient
+from .llm_cache import cached_text_generation
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +26,7 @@ class PinterestStrategyTask:
         """
         self.api_key = None
         self.client = None
+        self.use_cache = True
         logger.info("PinterestStrategyTask initialized")
     
     def execute(self, parameters):
@@ -39,6 +41,7 @@ class PinterestStrategyTask:
                 - business_goal: The primary business goal (traffic, sales, brand awareness)
                 - num_pins: (Optional) Number of pin ideas to generate
                 - board_structure: (Optional) Suggested board structure
+                - use_cache: (Optional) Set to false to bypass the shared LLM response cache
         
         Returns:
             dict: A dictionary containing the task result with the following fields:
@@ -80,6 +83,7 @@ class PinterestStrategyTask:
             business_goal = params['business_goal']
             num_pins = int(params.get('num_pins', 10))  # Default to 10 pin ideas
             board_structure = params.get('board_structure', 'recommended')
+            self.use_cache = str(params.get('use_cache', True)).lower() != 'false'
             
             # Get API key from environment
             self.api_key = os.getenv('ABACUSAI_API_KEY')
@@ -214,15 +218,16 @@ class PinterestStrategyTask:
             }}
             """
             
-            response = self.client.text_generation(
+            # Parse the JSON response (only valid responses are cached)
+            pinterest_strategy = cached_text_generation(
+                self.client,
                 prompt=prompt,
                 max_tokens=3000,
                 temperature=0.7,
-                model="claude-3-opus-20240229"
+                model="claude-3-opus-20240229",
+                parse=json.loads,
+                use_cache=self.use_cache
             )
-            
-            # Parse the JSON response
-            pinterest_strategy = json.loads(response.generations[0].text)
             logger.info(f"Generated Pinterest strategy for {niche} niche")
             return pinterest_strategy
             
@@ -256,15 +261,16 @@ class PinterestStrategyTask:
             ]
             """
             
-            response = self.client.text_generation(
+            # Parse the JSON response (only valid responses are cached)
+            pin_ideas = cached_text_generation(
+                self.client,
                 prompt=prompt,
                 max_tokens=3000,
                 temperature=0.7,
-                model="claude-3-opus-20240229"
+                model="claude-3-opus-20240229",
+                parse=json.loads,
+                use_cache=self.use_cache
             )
-            
-            # Parse the JSON response
-            pin_ideas = json.loads(response.generations[0].text)
             logger.info(f"Generated {len(pin_ideas)} pin ideas for {niche} niche")
             return pin_ideas
             
@@ -307,15 +313,16 @@ class PinterestStrategyTask:
             ]
             """
             
-            response = self.client.text_generation(
+            # Parse the JSON response (only valid responses are cached)
+            pin_descriptions = cached_text_generation(
+                self.client,
                 prompt=prompt,
                 max_tokens=2000,
                 temperature=0.7,
-                model="claude-3-opus-20240229"
+                model="claude-3-opus-20240229",
+                parse=json.loads,
+                use_cache=self.use_cache
             )
-            
-            # Parse the JSON response
-            pin_descriptions = json.loads(response.generations[0].text)
             logger.info(f"Generated optimized descriptions for {len(pin_descriptions)} pins")
             return pin_descriptions
             